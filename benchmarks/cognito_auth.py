@@ -0,0 +1,56 @@
+"""
+Per-request authentication latency: cognito-idp GetUser vs local JWKS verification.
+
+Local verification is measured offline against the stand-in JWKS in
+tests/fixtures. GetUser is measured against the real user pool with the
+access token from tests/config.py, so it only runs inside the test container
+with valid AWS credentials and a fresh token (pass --local-only to skip it).
+
+    python benchmarks/cognito_auth.py [--local-only]
+"""
+
+import os
+import time
+import statistics
+import sys
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tests.test_cognito import TEST_JWKS, TEST_USER_POOL_ID, create_access_token
+from src.AWS import Cognito
+
+REQUESTS = 200
+
+
+def time_calls(func, arg, count: int) -> list[float]:
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func(arg)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def report(name: str, durations: list[float]):
+    durations = sorted(durations)
+    p99 = durations[int(len(durations) * 0.99) - 1]
+    print(f"{name:32} mean {statistics.mean(durations):8.3f} ms   p50 {statistics.median(durations):8.3f} ms   p99 {p99:8.3f} ms")
+
+
+def main():
+    with mock.patch.dict(os.environ, {"USER_POOL_ID": TEST_USER_POOL_ID}), \
+         mock.patch.object(Cognito, "_fetch_jwks", return_value=TEST_JWKS), \
+         mock.patch.object(Cognito, "COGNITO_LOCAL_VERIFICATION", True):
+        Cognito._jwks_cache = None
+        token = create_access_token(email="bench@example.com", given_name="Bench", family_name="User")
+        report("local verification (warm JWKS)", time_calls(Cognito.get_user_from_cognito, token, REQUESTS))
+
+    if "--local-only" in sys.argv:
+        return
+
+    from tests.config import access_token
+    report("cognito-idp GetUser", time_calls(Cognito.get_user_from_cognito_api, access_token, 20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cold-start import report for lambda_function.
+
+For every route in handler_registry this starts a fresh interpreter with
+`python -X importtime`, imports lambda_function and resolves that route's
+handler, then sums the self-time of every module imported. The "eager"
+baseline resolves every handler up front, which is what importing
+lambda_function used to cost before handlers were loaded lazily.
+
+Run from the repo root inside the test container (the usual .env must be
+loaded so the Models modules can read their table names):
+
+    python benchmarks/cold_start_imports.py
+"""
+
+import os
+import subprocess
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from lambda_function import handler_registry
+
+
+def import_cost(statements: str) -> tuple[float, int]:
+    """Return (total import self-time in ms, number of modules) for a fresh interpreter."""
+    env = {**os.environ, "PYTHONPATH": SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statements],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=SRC_DIR,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+
+    total_us = 0
+    modules = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us = line.split(":", 1)[1].split("|")[0].strip()
+        total_us += int(self_us)
+        modules += 1
+    return total_us / 1000, modules
+
+
+def resolve_statements(handler_paths: list[str]) -> str:
+    lines = ["import lambda_function", "from Lib.LazyImport import import_string"]
+    lines += [f"import_string({path!r})" for path in handler_paths]
+    return "; ".join(lines)
+
+
+def main():
+    routes = [
+        (f"{method} {route}", info["handler"])
+        for route, methods in handler_registry.items()
+        for method, info in methods.items()
+    ]
+    all_paths = [path for _, path in routes]
+
+    base_ms, base_modules = import_cost(resolve_statements([]))
+    eager_ms, eager_modules = import_cost(resolve_statements(all_paths))
+
+    print(f"lambda_function only:          {base_ms:9.1f} ms  ({base_modules} modules)")
+    print(f"all handlers (eager, before):  {eager_ms:9.1f} ms  ({eager_modules} modules)")
+    print()
+    print(f"{'route':60} {'lazy import ms':>15} {'modules':>8} {'saved vs eager':>15}")
+
+    for name, path in routes:
+        lazy_ms, lazy_modules = import_cost(resolve_statements([path]))
+        print(f"{name:60} {lazy_ms:15.1f} {lazy_modules:8d} {eager_ms - lazy_ms:15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+GET /context/{context_id} on a long conversation: reading the whole context
+and building the response versus reading only the last page of messages
+(limit=50), for each storage mode and encoding.
+
+"ms" is Context.get_context plus transform_to_filtered_context, run against
+the in-memory DynamoDB in tests/fakes (which, like boto3, copies whatever it
+returns). "messages read" is how many messages were deserialized. A GetItem
+is billed on the whole item either way, so inline contexts save time and
+transfer rather than read units.
+
+    python benchmarks/context_page_read.py
+"""
+
+import os
+import sys
+import time
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from langchain_core.messages import HumanMessage, AIMessage
+from Models import Context
+from AWS import DynamoDB
+from LLM.BaseMessagesConverter import base_messages_to_dict_messages
+from tests.fakes.dynamodb import FakeDynamoDB
+
+HISTORY_SIZE = 2000
+PAGE_SIZE = 50
+REPEATS = 20
+LAYOUTS = (
+    (Context.MESSAGE_STORAGE_INLINE, Context.MESSAGE_ENCODING_JSON),
+    (Context.MESSAGE_STORAGE_INLINE, Context.MESSAGE_ENCODING_COMPACT),
+    (Context.MESSAGE_STORAGE_LOG, Context.MESSAGE_ENCODING_JSON),
+)
+
+
+def measure(storage: str, encoding: str, limit) -> tuple[int, float]:
+    fake_dynamodb = FakeDynamoDB()
+    fake_dynamodb.create_table("contexts", "context_id")
+    fake_dynamodb.create_table("context_messages", "context_id", sort_key_name="seq")
+    fake_dynamodb.create_table("models", "model")
+    patches = [
+        mock.patch.object(DynamoDB, "_dynamodb", fake_dynamodb),
+        mock.patch.object(Context, "CONTEXT_MESSAGE_STORAGE", storage),
+        mock.patch.object(Context, "CONTEXT_MESSAGE_ENCODING", encoding),
+        mock.patch.object(Context.ContextMessageLog, "CONTEXT_MESSAGES_TABLE_NAME", "context_messages"),
+    ]
+    for patch in patches:
+        patch.start()
+    try:
+        history = [
+            HumanMessage(content=f"Question {i} about the order status and delivery window") if i % 2 == 0
+            else AIMessage(content=f"Answer {i}: the order is packed and ships tomorrow morning.", usage_metadata={"input_tokens": 1200, "output_tokens": 24, "total_tokens": 1224})
+            for i in range(HISTORY_SIZE)
+        ]
+        Context.save_context(Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1",
+            messages=base_messages_to_dict_messages(history), created_at=1, updated_at=1,
+        ))
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            context = Context.get_context("context-1", limit=limit)
+            Context.transform_to_filtered_context(context)
+        elapsed = (time.perf_counter() - start) / REPEATS
+    finally:
+        for patch in patches:
+            patch.stop()
+    return len(context.messages), elapsed * 1000
+
+
+def main():
+    print(f"{HISTORY_SIZE} messages, average of {REPEATS} reads\n")
+    print(f"{'storage':>8} {'encoding':>8} {'read':>10} {'messages read':>14} {'ms':>8}")
+    for storage, encoding in LAYOUTS:
+        for name, limit in (("full", None), (f"limit={PAGE_SIZE}", PAGE_SIZE)):
+            count, ms = measure(storage, encoding, limit)
+            print(f"{storage:>8} {encoding:>8} {name:>10} {count:>14} {ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
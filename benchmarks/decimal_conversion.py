@@ -0,0 +1,103 @@
+"""
+Compare the old always-rebuild float_to_decimal / decimal_to_serializable with
+the copy-on-write versions in Lib.DecimalConversion on a 500-message context,
+both as written to DynamoDB (floats) and as read back (Decimals).
+
+Reports wall time per conversion and the allocations (count and peak bytes)
+seen by tracemalloc.
+
+    python benchmarks/decimal_conversion.py
+"""
+
+import time
+import os
+import sys
+import tracemalloc
+from decimal import Decimal
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.Lib.DecimalConversion import float_to_decimal, decimal_to_serializable
+
+MESSAGE_COUNT = 500
+ITERATIONS = 50
+
+
+def legacy_float_to_decimal(obj):
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    elif isinstance(obj, dict):
+        return {key: legacy_float_to_decimal(value) for key, value in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_float_to_decimal(item) for item in obj]
+    else:
+        return obj
+
+
+def legacy_decimal_to_serializable(obj):
+    if isinstance(obj, Decimal):
+        if obj % 1 == 0:
+            return int(obj)
+        else:
+            return float(obj)
+    elif isinstance(obj, dict):
+        return {key: legacy_decimal_to_serializable(value) for key, value in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_decimal_to_serializable(item) for item in obj]
+    else:
+        return obj
+
+
+def build_context(number) -> dict:
+    """A context shaped like Context.model_dump(): mostly strings, a few numbers in AI usage metadata."""
+    messages = []
+    for i in range(MESSAGE_COUNT // 2):
+        messages.append({
+            "type": "human", "content": f"Question {i}: " + "lorem ipsum " * 30,
+            "additional_kwargs": {}, "response_metadata": {}, "name": None, "id": None,
+        })
+        messages.append({
+            "type": "ai", "content": "Answer " + "dolor sit amet " * 40,
+            "additional_kwargs": {}, "name": None, "id": f"run-{i}",
+            "tool_calls": [{"name": "search", "args": {"query": "q", "limit": 5}, "id": f"call_{i}", "type": "tool_call"}],
+            "invalid_tool_calls": [],
+            "response_metadata": {"model_name": "gpt-4o", "finish_reason": "stop"},
+            "usage_metadata": {"input_tokens": 1200 + i, "output_tokens": 300, "total_tokens": 1500 + i},
+        })
+    messages[-1]["response_metadata"]["temperature"] = number(0.7)
+    return {"context_id": "c", "agent_id": "a", "user_id": "u", "messages": messages, "created_at": 1, "updated_at": 2}
+
+
+def measure(func, payload) -> tuple[float, int, int]:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func(payload)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / ITERATIONS
+
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    result = func(payload)
+    snapshot_after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, "filename") if stat.count_diff > 0)
+    del result
+    return elapsed_ms, allocations, peak
+
+
+def main():
+    cases = (
+        ("write, no floats", build_context(int), legacy_float_to_decimal, float_to_decimal),
+        ("write, one float", build_context(float), legacy_float_to_decimal, float_to_decimal),
+        ("read, no Decimals", build_context(int), legacy_decimal_to_serializable, decimal_to_serializable),
+        ("read, one Decimal", build_context(lambda value: Decimal(str(value))), legacy_decimal_to_serializable, decimal_to_serializable),
+    )
+    print(f"{MESSAGE_COUNT}-message context, mean of {ITERATIONS} runs\n")
+    print(f"{'case':>18} {'impl':>14} {'ms':>8} {'live allocs':>12} {'peak KB':>9}")
+    for name, payload, legacy, current in cases:
+        for impl_name, func in (("always-copy", legacy), ("copy-on-write", current)):
+            ms, allocations, peak = measure(func, payload)
+            print(f"{name:>18} {impl_name:>14} {ms:>8.2f} {allocations:>12} {peak / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
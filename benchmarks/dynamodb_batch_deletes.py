@@ -0,0 +1,73 @@
+"""
+Compare deleting all of a user's contexts one DeleteItem at a time (the old
+delete_all_contexts_for_user loop) against a key-only index query followed by
+BatchWriteItem (batch_delete_items), serially and with parallel chunks.
+
+Uses the in-memory DynamoDB stand-in from tests/fakes with a simulated
+round-trip latency, and reports requests and wall time.
+
+    python benchmarks/dynamodb_batch_deletes.py
+"""
+
+import time
+import os
+import sys
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.AWS import DynamoDB
+from tests.fakes.dynamodb import FakeDynamoDB
+
+CONTEXT_COUNTS = [100, 1_000, 5_000]
+LATENCY_SECONDS = 0.005
+INDEX_NAME = "user_id-updated_at-index"
+
+
+def build_fake(context_count: int) -> FakeDynamoDB:
+    fake = FakeDynamoDB(latency_seconds=LATENCY_SECONDS)
+    table = fake.create_table("contexts", "context_id", indexes={INDEX_NAME: ("user_id", "updated_at")})
+    for i in range(context_count):
+        context_id = f"context-{i:06d}"
+        table.items[context_id] = {"context_id": context_id, "user_id": "user-1", "updated_at": i}
+    return fake
+
+
+def delete_one_by_one():
+    items = DynamoDB.get_all_items_by_index("contexts", "user_id", "user-1", index_name=INDEX_NAME)
+    for item in items:
+        DynamoDB.delete_item("contexts", "context_id", item["context_id"])
+
+
+def delete_batched(max_workers: int):
+    items = DynamoDB.get_all_items_by_index(
+        "contexts", "user_id", "user-1", index_name=INDEX_NAME, projection_expression="context_id"
+    )
+    DynamoDB.batch_delete_items("contexts", "context_id", [item["context_id"] for item in items], max_workers=max_workers)
+
+
+def measure(context_count: int, func) -> tuple[int, float]:
+    fake = build_fake(context_count)
+    with mock.patch.object(DynamoDB, "_dynamodb", fake):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+    assert not fake.tables["contexts"].items
+    return sum(fake.requests.values()), elapsed * 1000
+
+
+def main():
+    print(f"{LATENCY_SECONDS * 1000:.0f} ms simulated round trip\n")
+    print(f"{'contexts':>9} {'method':>16} {'requests':>9} {'ms':>10}")
+    methods = (
+        ("delete_item", delete_one_by_one),
+        ("batch x1", lambda: delete_batched(1)),
+        ("batch x4", lambda: delete_batched(DynamoDB.BULK_DELETE_MAX_WORKERS)),
+    )
+    for context_count in CONTEXT_COUNTS:
+        for name, func in methods:
+            requests, ms = measure(context_count, func)
+            print(f"{context_count:>9} {name:>16} {requests:>9} {ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
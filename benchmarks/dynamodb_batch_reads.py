@@ -0,0 +1,62 @@
+"""
+Compare fetching N items by key with a filtered Scan (the old
+get_items_by_scan) against BatchGetItem (batch_get_items), across table sizes.
+
+Uses the in-memory DynamoDB stand-in from tests/fakes with a simulated
+round-trip latency, and reports requests, consumed read units and wall time.
+
+    python benchmarks/dynamodb_batch_reads.py
+"""
+
+import time
+import random
+import os
+import sys
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.AWS import DynamoDB
+from tests.fakes.dynamodb import FakeDynamoDB
+
+TABLE_SIZES = [1_000, 10_000, 50_000]
+KEYS_REQUESTED = 50
+LATENCY_SECONDS = 0.005
+
+
+def build_fake(table_size: int) -> FakeDynamoDB:
+    fake = FakeDynamoDB(latency_seconds=LATENCY_SECONDS)
+    table = fake.create_table("agents", "agent_id")
+    for i in range(table_size):
+        agent_id = f"agent-{i:06d}"
+        table.items[agent_id] = {
+            "agent_id": agent_id,
+            "agent_name": f"Agent {i}",
+            "prompt": "You are a helpful assistant. " * 20,
+        }
+    return fake
+
+
+def measure(fake: FakeDynamoDB, func) -> tuple[int, float, float, int]:
+    fake.requests.clear()
+    fake.consumed_read_units = 0.0
+    with mock.patch.object(DynamoDB, "_dynamodb", fake):
+        start = time.perf_counter()
+        items = func()
+        elapsed = time.perf_counter() - start
+    return len(items), fake.consumed_read_units, elapsed * 1000, sum(fake.requests.values())
+
+
+def main():
+    print(f"Fetching {KEYS_REQUESTED} keys, {LATENCY_SECONDS * 1000:.0f} ms simulated round trip\n")
+    print(f"{'table size':>10} {'method':>12} {'found':>6} {'requests':>9} {'RCU':>10} {'ms':>9}")
+    for table_size in TABLE_SIZES:
+        fake = build_fake(table_size)
+        keys = random.sample(sorted(fake.tables["agents"].items), KEYS_REQUESTED)
+        scan = measure(fake, lambda: DynamoDB.get_items_by_scan("agents", "agent_id", keys))
+        batch = measure(fake, lambda: DynamoDB.batch_get_items("agents", "agent_id", keys))
+        for name, (found, rcu, ms, requests) in (("scan", scan), ("batch_get", batch)):
+            print(f"{table_size:>10} {name:>12} {found:>6} {requests:>9} {rcu:>10.1f} {ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
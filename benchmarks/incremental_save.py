@@ -0,0 +1,99 @@
+"""
+Bytes serialized per chat turn when a handler converts and re-saves the whole
+conversation (the old path) versus converting only the generated messages
+and appending them with Context.append_messages, for both storage modes.
+
+Each turn starts from the LangChain messages an AgentChat holds after
+invoking, adds a tool call, its output and an answer, and saves. "sent KB" is
+the attribute values sent to DynamoDB in write requests, "WCU" the write units
+consumed and "ms" the time spent converting and saving (including the
+in-memory DynamoDB in tests/fakes it runs against, which copies whole items).
+
+    python benchmarks/incremental_save.py
+"""
+
+import os
+import sys
+import time
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from Models import Context
+from AWS import DynamoDB
+from LLM.BaseMessagesConverter import dict_messages_to_base_messages, base_messages_to_dict_messages
+from tests.fakes.dynamodb import FakeDynamoDB
+
+HISTORY_SIZES = (20, 200, 1000)
+TURNS = 10
+
+
+def turn_messages(turn: int) -> list:
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{"id": f"call-{turn}", "name": "get_order", "args": {"order_id": f"order-{turn}"}}],
+            usage_metadata={"input_tokens": 1200, "output_tokens": 24, "total_tokens": 1224},
+        ),
+        ToolMessage(tool_call_id=f"call-{turn}", content=f'{{"order_id": "order-{turn}", "status": "packed"}}'),
+        AIMessage(content=f"Order {turn} is packed.", usage_metadata={"input_tokens": 1260, "output_tokens": 14, "total_tokens": 1274}),
+    ]
+
+
+def full_save(context: Context.Context, messages: list, base_message_count: int) -> None:
+    context.messages = base_messages_to_dict_messages(messages)
+    Context.save_context(context)
+
+
+def incremental_save(context: Context.Context, messages: list, base_message_count: int) -> None:
+    Context.append_messages(context, base_messages_to_dict_messages(messages[base_message_count:]))
+
+
+def measure(storage: str, history_size: int, save) -> tuple[float, float, float]:
+    fake_dynamodb = FakeDynamoDB()
+    fake_dynamodb.create_table("contexts", "context_id")
+    fake_dynamodb.create_table("context_messages", "context_id", sort_key_name="seq")
+    patches = [
+        mock.patch.object(DynamoDB, "_dynamodb", fake_dynamodb),
+        mock.patch.object(Context, "CONTEXT_MESSAGE_STORAGE", storage),
+        mock.patch.object(Context, "CONTEXT_MESSAGE_ENCODING", Context.MESSAGE_ENCODING_JSON),
+        mock.patch.object(Context.ContextMessageLog, "CONTEXT_MESSAGES_TABLE_NAME", "context_messages"),
+    ]
+    for patch in patches:
+        patch.start()
+    try:
+        history = [HumanMessage(content=f"Question {i}") if i % 2 == 0 else AIMessage(content=f"Answer {i}") for i in range(history_size)]
+        Context.save_context(Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1",
+            messages=base_messages_to_dict_messages(history), created_at=1, updated_at=1,
+        ))
+        fake_dynamodb.request_bytes = 0
+        fake_dynamodb.consumed_write_units = 0
+        elapsed = 0.0
+        for turn in range(TURNS):
+            context = Context.get_context("context-1")
+            messages = dict_messages_to_base_messages(context.messages)
+            base_message_count = len(messages)
+            messages += turn_messages(turn)
+            start = time.perf_counter()
+            save(context, messages, base_message_count)
+            elapsed += time.perf_counter() - start
+    finally:
+        for patch in patches:
+            patch.stop()
+    return fake_dynamodb.request_bytes / TURNS, fake_dynamodb.consumed_write_units / TURNS, elapsed / TURNS * 1000
+
+
+def main():
+    print(f"{TURNS} turns of 3 generated messages, averages per turn\n")
+    print(f"{'storage':>8} {'history':>8} {'path':>12} {'sent KB':>8} {'WCU':>7} {'ms':>7}")
+    for storage in (Context.MESSAGE_STORAGE_INLINE, Context.MESSAGE_STORAGE_LOG):
+        for history_size in HISTORY_SIZES:
+            for name, save in (("full", full_save), ("incremental", incremental_save)):
+                sent, wcu, ms = measure(storage, history_size, save)
+                print(f"{storage:>8} {history_size:>8} {name:>12} {sent / 1024:>8.1f} {wcu:>7.1f} {ms:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
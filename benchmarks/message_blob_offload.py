@@ -0,0 +1,81 @@
+"""
+Bytes written per chat turn with and without offloading large message
+content to S3, for both context storage modes.
+
+Each turn loads the context, builds the LLM messages (hydrating offloaded
+content), appends a human message, a tool call, a large tool output (like
+view_url on a big page) and an answer, and saves. Runs against the in-memory
+DynamoDB and S3 stand-ins in tests/fakes.
+
+    python benchmarks/message_blob_offload.py
+"""
+
+import os
+import sys
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from Models import Context, MessageBlobStore
+from AWS import DynamoDB, ClientPool
+from LLM.BaseMessagesConverter import base_messages_to_dict_messages
+from tests.fakes.dynamodb import FakeDynamoDB
+from tests.fakes.s3 import FakeS3
+
+TURNS = 20
+TOOL_OUTPUT_BYTES = 40_000
+
+
+def run_turn(turn: int) -> None:
+    context = Context.get_context("context-1")
+    page = (f"Turn {turn} page text. " * (TOOL_OUTPUT_BYTES // 20))[:TOOL_OUTPUT_BYTES]
+    messages = [
+        HumanMessage(content=f"Summarize page {turn}"),
+        AIMessage(content="", tool_calls=[{"id": f"call-{turn}", "name": "view_url", "args": {"url": f"https://example.com/{turn}"}}]),
+        ToolMessage(tool_call_id=f"call-{turn}", content=page),
+        AIMessage(content=f"Page {turn} is about turn {turn}."),
+    ]
+    Context.append_messages(context, base_messages_to_dict_messages(messages))
+
+
+def measure(storage: str, offload: bool) -> tuple[float, float, float]:
+    fake_dynamodb = FakeDynamoDB()
+    fake_dynamodb.create_table("contexts", "context_id")
+    fake_dynamodb.create_table("context_messages", "context_id", sort_key_name="seq")
+    fake_s3 = FakeS3()
+    MessageBlobStore._blob_cache.clear()
+    patches = [
+        mock.patch.object(DynamoDB, "_dynamodb", fake_dynamodb),
+        mock.patch.dict(ClientPool._clients, {"s3": fake_s3}),
+        mock.patch.object(Context, "CONTEXT_MESSAGE_STORAGE", storage),
+        mock.patch.object(Context.ContextMessageLog, "CONTEXT_MESSAGES_TABLE_NAME", "context_messages"),
+        mock.patch.object(MessageBlobStore, "MESSAGE_BLOB_BUCKET", "blobs" if offload else None),
+    ]
+    for patch in patches:
+        patch.start()
+    try:
+        Context.save_context(Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1", messages=[], created_at=1, updated_at=1,
+        ))
+        fake_dynamodb.bytes_written = 0
+        fake_dynamodb.consumed_write_units = 0
+        for turn in range(TURNS):
+            run_turn(turn)
+    finally:
+        for patch in patches:
+            patch.stop()
+    return fake_dynamodb.bytes_written / TURNS, fake_dynamodb.consumed_write_units / TURNS, fake_s3.bytes_written / TURNS
+
+
+def main():
+    print(f"{TURNS} turns, {TOOL_OUTPUT_BYTES // 1000} KB tool output per turn, averages per turn\n")
+    print(f"{'storage':>8} {'offload':>8} {'DynamoDB KB':>12} {'WCU':>8} {'S3 KB':>8}")
+    for storage in ("inline", "log"):
+        for offload in (False, True):
+            dynamodb_bytes, wcu, s3_bytes = measure(storage, offload)
+            print(f"{storage:>8} {str(offload):>8} {dynamodb_bytes / 1024:>12.1f} {wcu:>8.1f} {s3_bytes / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
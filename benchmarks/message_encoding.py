@@ -0,0 +1,105 @@
+"""
+Context item size, capacity units and load time for inline contexts stored as
+a JSON messages list versus the compact encoding (LLM.MessageCodec), with
+zstd and with the gzip fallback, for 10, 100 and 1000-message contexts.
+
+Messages are built the way a chat turn builds them (LangChain messages with
+tool calls, usage and response metadata, converted to dicts). The context is
+written and read through Models.Context against the in-memory DynamoDB in
+tests/fakes, so the load time includes decoding.
+
+    python benchmarks/message_encoding.py
+"""
+
+import gc
+import os
+import sys
+import time
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from Models import Context
+from AWS import DynamoDB
+from LLM import MessageCodec
+from LLM.BaseMessagesConverter import base_messages_to_dict_messages
+from tests.fakes.dynamodb import FakeDynamoDB, item_size, read_units
+
+MESSAGE_COUNTS = (10, 100, 1000)
+LOADS = 20
+DYNAMODB_MAX_ITEM_BYTES = 400 * 1024
+
+
+def build_messages(count: int) -> list[dict]:
+    messages = []
+    turn = 0
+    while len(messages) < count:
+        messages += [
+            HumanMessage(content=f"Can you look up order {turn} and tell me when it ships?"),
+            AIMessage(
+                content="",
+                tool_calls=[{"id": f"call_{turn:08d}", "name": "get_order", "args": {"order_id": f"order-{turn}"}}],
+                response_metadata={"model_name": "gpt-4o-2024-08-06", "finish_reason": "tool_calls"},
+                usage_metadata={"input_tokens": 1200 + turn, "output_tokens": 24, "total_tokens": 1224 + turn},
+            ),
+            ToolMessage(tool_call_id=f"call_{turn:08d}", content=f'{{"order_id": "order-{turn}", "status": "packed", "ships_in_days": 2}}'),
+            AIMessage(
+                content=f"Order {turn} is packed and ships in 2 days.",
+                response_metadata={"model_name": "gpt-4o-2024-08-06", "finish_reason": "stop"},
+                usage_metadata={"input_tokens": 1260 + turn, "output_tokens": 14, "total_tokens": 1274 + turn},
+            ),
+        ]
+        turn += 1
+    return base_messages_to_dict_messages(messages[:count])
+
+
+def measure(count: int, encoding: str, use_zstd: bool) -> tuple[int, int, float, float]:
+    fake_dynamodb = FakeDynamoDB()
+    table = fake_dynamodb.create_table("contexts", "context_id")
+    patches = [
+        mock.patch.object(DynamoDB, "_dynamodb", fake_dynamodb),
+        mock.patch.object(Context, "CONTEXT_MESSAGE_ENCODING", encoding),
+        mock.patch.object(Context, "CONTEXT_MESSAGE_STORAGE", Context.MESSAGE_STORAGE_INLINE),
+    ]
+    if not use_zstd:
+        patches.append(mock.patch.object(MessageCodec, "zstandard", None))
+    for patch in patches:
+        patch.start()
+    try:
+        Context.save_context(Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1",
+            messages=build_messages(count), created_at=1, updated_at=1,
+        ))
+        size = item_size(table.items["context-1"])
+        fake_dynamodb.consumed_write_units = 0
+        Context.save_context(Context.get_context("context-1"))
+        wcu = fake_dynamodb.consumed_write_units
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(LOADS):
+            Context.get_context("context-1")
+        load_ms = (time.perf_counter() - start) / LOADS * 1000
+    finally:
+        for patch in patches:
+            patch.stop()
+    return size, wcu, read_units(size), load_ms
+
+
+def main():
+    variants = [("json", Context.MESSAGE_ENCODING_JSON, False), ("gzip", Context.MESSAGE_ENCODING_COMPACT, False)]
+    if MessageCodec.zstandard is not None:
+        variants.append(("zstd", Context.MESSAGE_ENCODING_COMPACT, True))
+    else:
+        print("zstandard is not installed, skipping zstd\n")
+
+    print(f"{'messages':>8} {'encoding':>8} {'item KB':>9} {'WCU':>6} {'RCU':>6} {'load ms':>8}")
+    for count in MESSAGE_COUNTS:
+        for name, encoding, use_zstd in variants:
+            size, wcu, rcu, load_ms = measure(count, encoding, use_zstd)
+            note = "  over the 400 KB item limit" if size > DYNAMODB_MAX_ITEM_BYTES else ""
+            print(f"{count:>8} {name:>8} {size / 1024:>9.1f} {wcu:>6} {rcu:>6.1f} {load_ms:>8.2f}{note}")
+
+
+if __name__ == "__main__":
+    main()
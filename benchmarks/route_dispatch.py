@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for request routing in lambda_function.
+
+Builds a concrete request path for every route in handler_registry, then times
+dispatch for each one with the old per-request regex loop and with the
+precompiled Router. Run from the repo root inside the test container
+(PYTHONPATH must include src and the usual .env must be loaded):
+
+    python benchmarks/route_dispatch.py
+"""
+
+import re
+import os
+import sys
+import timeit
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.lambda_function import handler_registry, match_route
+
+
+ITERATIONS = 2000
+
+
+def legacy_match_route(request_path: str, method: str, handler_registry: dict) -> tuple:
+    for route, methods in handler_registry.items():
+        route_pattern = re.sub(
+            r'\{(\w+)\}',
+            lambda m: rf'(?P<{m.group(1)}>.+)' if m.group(1) == 'link' else rf'(?P<{m.group(1)}>[^/]+)',
+            route
+        )
+        match = re.match(f"^{route_pattern}$", request_path)
+        if match:
+            handler_info = methods.get(method)
+            if handler_info:
+                return handler_info.get('handler'), match.groupdict()
+    return None, None
+
+
+def example_path(route: str) -> str:
+    path = re.sub(r'\{link\}', "https://example.com/a/b", route)
+    return re.sub(r'\{(\w+)\}', "3f1c2a9e-0b7d-4c55-9a57-1e2f3a4b5c6d", path)
+
+
+def main():
+    cases = [(example_path(route), method) for route, methods in handler_registry.items() for method in methods]
+
+    # Sanity check: both implementations agree on every route
+    for path, method in cases:
+        legacy_handler, legacy_params = legacy_match_route(path, method, handler_registry)
+        handler, params, _, _, _ = match_route(path, method)
+        assert legacy_handler == handler and legacy_params == params, f"Mismatch for {method} {path}"
+
+    legacy_total = 0.0
+    router_total = 0.0
+    worst = []
+    for path, method in cases:
+        legacy = timeit.timeit(lambda: legacy_match_route(path, method, handler_registry), number=ITERATIONS) / ITERATIONS
+        routed = timeit.timeit(lambda: match_route(path, method), number=ITERATIONS) / ITERATIONS
+        legacy_total += legacy
+        router_total += routed
+        worst.append((legacy, routed, method, path))
+
+    print(f"Routes benchmarked: {len(cases)}")
+    print(f"Mean dispatch (legacy regex loop): {legacy_total / len(cases) * 1e6:8.2f} us")
+    print(f"Mean dispatch (Router):            {router_total / len(cases) * 1e6:8.2f} us")
+    print("\nSlowest legacy routes:")
+    for legacy, routed, method, path in sorted(worst, reverse=True)[:10]:
+        print(f"  {method:6} {path:70} legacy {legacy * 1e6:8.2f} us   router {routed * 1e6:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Cleanup script to delete message blobs that no stored message refers to.
+
+Blobs are content-addressed and shared by every message with the same content,
+so deleting a context or rewriting its messages leaves them in S3. This script:
+1. Lists the blobs under MESSAGE_BLOB_PREFIX last uploaded at least
+   MESSAGE_BLOB_MIN_AGE_SECONDS ago (a day by default)
+2. Scans every context, and the messages table in log storage, for the blobs
+   their messages refer to
+3. Reads the age of each listed blob that nothing refers to again, and deletes
+   the ones that are still old
+
+A save uploads its blobs again even when they exist, before it writes its
+messages. So a blob that a save is reusing, including one listed in step 1,
+is new again by step 3 and kept. Run it on a schedule (e.g. weekly). Pass
+--dry-run to only report what would be deleted.
+"""
+
+import sys
+sys.path.append("../")
+
+from src.Models import Context, MessageBlobStore
+
+
+def cleanup_message_blobs(dry_run: bool = False):
+    if not MessageBlobStore.is_enabled():
+        print("MESSAGE_BLOB_BUCKET is not set, there are no message blobs to clean up")
+        return
+
+    candidates = MessageBlobStore.list_blob_keys()
+    print(f"  {len(candidates)} blobs older than {MessageBlobStore.MESSAGE_BLOB_MIN_AGE_SECONDS} seconds")
+    referenced = Context.referenced_blob_keys()
+    print(f"  {len(referenced)} blobs referenced by stored messages")
+    unreferenced = [key for key in candidates if key not in referenced]
+    deleted = unreferenced if dry_run else MessageBlobStore.delete_blobs(unreferenced)
+
+    print(f"\n\nCleanup complete!{' (dry run)' if dry_run else ''}")
+    print(f"  Deleted: {len(deleted)} blobs")
+    print(f"  Kept: {len(candidates) - len(deleted)} blobs")
+
+
+if __name__ == "__main__":
+    print("Starting message blob cleanup...")
+    print("=" * 50)
+    cleanup_message_blobs(dry_run="--dry-run" in sys.argv)
@@ -0,0 +1,74 @@
+"""
+Migration script to re-encode existing contexts in the compact message encoding.
+
+This script:
+1. Scans the contexts table one page at a time, fetching only the storage attributes
+2. Skips contexts in "log" storage and contexts that are already compact
+3. Re-saves every other context with CONTEXT_MESSAGE_ENCODING=compact, keeping its updated_at
+4. Reports the size of the messages before and after
+
+Contexts saved by a live request while the script runs are skipped (the save
+conflicts on version) and are picked up by a second run. Pass --dry-run to
+only report the size savings.
+
+Deploy the code that reads the compact encoding before running this script.
+"""
+
+import json
+import sys
+sys.path.append("../")
+
+from src.Models import Context
+from src.AWS.DynamoDB import scan_pages
+from src.LLM.MessageCodec import encode_messages
+from src.Lib.DecimalConversion import decimal_to_serializable
+
+
+def migrate_contexts(dry_run: bool = False):
+    """
+    Re-encode all inline contexts stored as a JSON messages list.
+    """
+    Context.CONTEXT_MESSAGE_ENCODING = Context.MESSAGE_ENCODING_COMPACT
+
+    migrated_count = 0
+    skipped_count = 0
+    conflict_count = 0
+    bytes_before = 0
+    bytes_after = 0
+
+    projection = f"{Context.CONTEXTS_PRIMARY_KEY}, message_storage, message_encoding"
+    for page in scan_pages(Context.CONTEXTS_TABLE_NAME, projection_expression=projection):
+        for item in page:
+            context_id = item[Context.CONTEXTS_PRIMARY_KEY]
+            if item.get("message_storage") == Context.MESSAGE_STORAGE_LOG or item.get("message_encoding") == Context.MESSAGE_ENCODING_COMPACT:
+                skipped_count += 1
+                continue
+            try:
+                context = Context.get_context(context_id)
+                before = len(json.dumps(decimal_to_serializable(context.messages), default=str).encode("utf-8"))
+                after = len(encode_messages(context.messages))
+                if not dry_run:
+                    Context.save_context(context, touch=False)
+                bytes_before += before
+                bytes_after += after
+                migrated_count += 1
+                if migrated_count % 100 == 0:
+                    print(f"  Migrated {migrated_count} contexts...")
+            except Context.ContextConflictError:
+                print(f"\nSkipping context {context_id} - it was saved while migrating, run again to pick it up")
+                conflict_count += 1
+            except Exception as e:
+                print(f"\nError processing context {context_id}: {e}")
+                continue
+
+    print(f"\n\nMigration complete!{' (dry run)' if dry_run else ''}")
+    print(f"  Migrated: {migrated_count} contexts")
+    print(f"  Skipped: {skipped_count} contexts (log storage or already compact)")
+    print(f"  Conflicts: {conflict_count} contexts")
+    print(f"  Messages size: {bytes_before} bytes -> {bytes_after} bytes")
+
+
+if __name__ == "__main__":
+    print("Starting context message encoding migration...")
+    print("=" * 50)
+    migrate_contexts(dry_run="--dry-run" in sys.argv)
@@ -0,0 +1,67 @@
+import os
+import threading
+from collections import Counter
+import boto3
+from botocore.config import Config
+
+# Shared botocore config for every client created in this container
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "50")),
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=int(os.environ.get("AWS_READ_TIMEOUT_SECONDS", "60")),
+    retries={
+        "max_attempts": int(os.environ.get("AWS_MAX_ATTEMPTS", "5")),
+        "mode": "adaptive",
+    },
+)
+
+_clients: dict[str, object] = {}
+_resources: dict[str, object] = {}
+_lock = threading.Lock()
+
+# Number of clients/resources created per service name, so tests can assert reuse
+client_creation_counts: Counter = Counter()
+resource_creation_counts: Counter = Counter()
+
+
+def get_client(service_name: str):
+    """
+    Return the container-wide boto3 client for service_name, creating it on
+    first use. boto3 clients are thread-safe, so one instance is shared by
+    every caller and invocation.
+    """
+    client = _clients.get(service_name)
+    if client is None:
+        with _lock:
+            client = _clients.get(service_name)
+            if client is None:
+                client = boto3.client(service_name, config=CLIENT_CONFIG)
+                _clients[service_name] = client
+                client_creation_counts[service_name] += 1
+    return client
+
+
+def get_resource(service_name: str):
+    """
+    Return the container-wide boto3 resource for service_name, creating it on
+    first use.
+    """
+    resource = _resources.get(service_name)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(service_name)
+            if resource is None:
+                resource = boto3.resource(service_name, config=CLIENT_CONFIG)
+                _resources[service_name] = resource
+                resource_creation_counts[service_name] += 1
+    return resource
+
+
+def reset() -> None:
+    """Drop every pooled client and creation count (for tests)."""
+    with _lock:
+        _clients.clear()
+        _resources.clear()
+        client_creation_counts.clear()
+        resource_creation_counts.clear()
@@ -1,6 +1,21 @@
 import os
-import boto3
+import json
+import time
+import threading
+import urllib.request
+import jwt  # PyJWT
 from pydantic import BaseModel
+from Lib.TTLCache import TTLCache
+from AWS.ClientPool import get_client
+
+# When enabled, access tokens are verified locally against the user pool's
+# JWKS instead of calling cognito-idp GetUser on every request.
+COGNITO_LOCAL_VERIFICATION = os.environ.get("COGNITO_LOCAL_VERIFICATION", "false").lower() == "true"
+# Optional: reject access tokens issued to other app clients
+COGNITO_APP_CLIENT_ID = os.environ.get("COGNITO_APP_CLIENT_ID")
+# Minimum time between JWKS refetches triggered by an unknown key id
+JWKS_REFRESH_MIN_INTERVAL_SECONDS = 60
+USER_ATTRIBUTES = ("email", "sub", "family_name", "given_name")
 
 
 class CognitoUser(BaseModel):
@@ -10,8 +25,121 @@ class CognitoUser(BaseModel):
     given_name: str
 
 
+class JWKSCache:
+    """
+    Signing keys for a user pool, fetched once per container. An unknown key
+    id (key rotation) triggers a refetch, at most once per
+    JWKS_REFRESH_MIN_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, jwks_url: str):
+        self.jwks_url = jwks_url
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def get_signing_key(self, kid: str) -> jwt.PyJWK:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None and self._can_refresh():
+                self._refresh()
+                key = self._keys.get(kid)
+        if key is None:
+            raise Exception(f"Unknown signing key: {kid}", 401)
+        return key
+
+    def _can_refresh(self) -> bool:
+        return self._fetched_at is None or time.monotonic() - self._fetched_at >= JWKS_REFRESH_MIN_INTERVAL_SECONDS
+
+    def _refresh(self) -> None:
+        self._fetched_at = time.monotonic()
+        jwks = _fetch_jwks(self.jwks_url)
+        self._keys = {
+            jwk["kid"]: jwt.PyJWK(jwk)
+            for jwk in jwks.get("keys", [])
+            if jwk.get("kid")
+        }
+
+
+def _fetch_jwks(jwks_url: str) -> dict:
+    with urllib.request.urlopen(jwks_url, timeout=5) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def get_user_pool_issuer() -> str:
+    user_pool_id = os.environ["USER_POOL_ID"]
+    region = user_pool_id.split("_", 1)[0]
+    return f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+
+
+_jwks_cache = None
+_jwks_cache_lock = threading.Lock()
+
+def _get_jwks_cache() -> JWKSCache:
+    global _jwks_cache
+    if _jwks_cache is None:
+        with _jwks_cache_lock:
+            if _jwks_cache is None:
+                _jwks_cache = JWKSCache(f"{get_user_pool_issuer()}/.well-known/jwks.json")
+    return _jwks_cache
+
+
+# sub -> CognitoUser, for access tokens that don't carry the user's attributes
+_user_attributes_cache = TTLCache(
+    maxsize=int(os.environ.get("COGNITO_USER_CACHE_MAX_SIZE", "1024")),
+    ttl=float(os.environ.get("COGNITO_USER_CACHE_TTL_SECONDS", "300")),
+)
+
+
+def verify_access_token(access_token: str) -> dict:
+    """
+    Verify a Cognito access token locally (signature, expiry, issuer, token_use
+    and optionally client_id) and return its claims.
+    """
+    try:
+        kid = jwt.get_unverified_header(access_token).get("kid")
+        if not kid:
+            raise Exception("Access token has no key id", 401)
+        signing_key = _get_jwks_cache().get_signing_key(kid)
+        claims = jwt.decode(
+            access_token,
+            signing_key.key,
+            algorithms=["RS256"],
+            issuer=get_user_pool_issuer(),
+            options={"require": ["exp", "iat", "sub", "token_use"], "verify_aud": False},
+        )
+    except jwt.InvalidTokenError as e:
+        raise Exception(f"Invalid access token: {e}", 401)
+
+    if claims.get("token_use") != "access":
+        raise Exception("Token is not an access token", 401)
+    if COGNITO_APP_CLIENT_ID and claims.get("client_id") != COGNITO_APP_CLIENT_ID:
+        raise Exception("Access token was issued to a different app client", 401)
+    return claims
+
+
 def get_user_from_cognito(access_token: str) -> CognitoUser:
-    cognito = boto3.client("cognito-idp")
+    if not COGNITO_LOCAL_VERIFICATION:
+        return get_user_from_cognito_api(access_token)
+
+    claims = verify_access_token(access_token)
+    if all(attribute in claims for attribute in USER_ATTRIBUTES):
+        return CognitoUser(**{attribute: claims[attribute] for attribute in USER_ATTRIBUTES})
+
+    # Access tokens only carry the user's attributes when a pre token generation
+    # trigger adds them, so fall back to GetUser once per user per container.
+    user = _user_attributes_cache.get(claims["sub"])
+    if user is None:
+        user = get_user_from_cognito_api(access_token)
+        _user_attributes_cache.set(user.sub, user)
+    return user
+
+
+def get_user_from_cognito_api(access_token: str) -> CognitoUser:
+    cognito = get_client("cognito-idp")
     response = cognito.get_user(
         AccessToken=access_token
     )
@@ -21,8 +149,9 @@ def get_user_from_cognito(access_token: str) -> CognitoUser:
 
 
 def delete_user_from_cognito(user_id: str) -> None:
-    cognito = boto3.client("cognito-idp")
+    cognito = get_client("cognito-idp")
     cognito.admin_delete_user(
         UserPoolId=os.environ["USER_POOL_ID"],
         Username=user_id
     )
+    _user_attributes_cache.invalidate(user_id)
@@ -1,69 +1,515 @@
-import boto3
+import time
+import json
+import base64
+import random
+from concurrent.futures import ThreadPoolExecutor
+from AWS.ClientPool import get_resource
 from boto3.dynamodb.conditions import Key
 from boto3.dynamodb.conditions import Attr
-from decimal import Decimal
+from Lib.DecimalConversion import float_to_decimal, decimal_to_serializable
 
 # Initialize once at module level - reused across all function calls
-_dynamodb = boto3.resource("dynamodb")
+_dynamodb = get_resource("dynamodb")
+
+# DynamoDB limits and retry policy for batch operations
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+TRANSACT_WRITE_MAX_ITEMS = 100
+TRANSACT_WRITE_MAX_BYTES = 4 * 1024 * 1024
+# Concurrent chunks for bulk deletes (cascading deletes of a user or org)
+BULK_DELETE_MAX_WORKERS = 4
+BATCH_MAX_RETRIES = 8
+BATCH_BACKOFF_BASE_SECONDS = 0.05
+BATCH_BACKOFF_MAX_SECONDS = 2.0
 
 def _get_table(table_name: str):
     """Get a DynamoDB table reference."""
     return _dynamodb.Table(table_name)
 
-def float_to_decimal(obj):
-    """Recursively convert float objects to Decimal for DynamoDB serialization."""
-    if isinstance(obj, float):
-        return Decimal(str(obj))
-    elif isinstance(obj, dict):
-        return {key: float_to_decimal(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [float_to_decimal(item) for item in obj]
-    else:
-        return obj
-
-def get_item(table_name: str, primary_key_name: str, key: str) -> dict:
+def projection(attributes: list[str]) -> tuple[str, dict]:
+    """
+    ProjectionExpression and ExpressionAttributeNames for attribute names or
+    list elements such as "messages[3]". Every name gets a placeholder, so
+    reserved words need no special handling.
+    """
+    names = {}
+    paths = []
+    for attribute in attributes:
+        name, bracket, index = attribute.partition("[")
+        placeholder = next((key for key, value in names.items() if value == name), None)
+        if placeholder is None:
+            placeholder = f"#p{len(names)}"
+            names[placeholder] = name
+        paths.append(placeholder + bracket + index)
+    return ", ".join(paths), names
+
+def get_item(table_name: str, primary_key_name: str, key: str, attributes: list[str] = None) -> dict:
+    """
+    :param attributes: Optional attribute names (or list elements like
+        "messages[3]") to read instead of the whole item. A read is billed on
+        the whole item either way, but only these are sent and deserialized.
+    """
     table = _get_table(table_name)
-    response = table.get_item(Key={primary_key_name: key})
+    params = {"Key": {primary_key_name: key}}
+    if attributes:
+        params["ProjectionExpression"], params["ExpressionAttributeNames"] = projection(attributes)
+    response = table.get_item(**params)
     if "Item" not in response:
         return None
     return response["Item"]
 
 def get_items_by_scan(table_name: str, primary_key_name: str, keys: list[str]) -> list[dict]:
+    """
+    Scan the whole table for items whose primary key is in keys.
+    Prefer batch_get_items, which reads only the requested items.
+    """
     table = _get_table(table_name)
-    response = table.scan(
-        FilterExpression=Attr(primary_key_name).is_in(keys)
-    )
-    return response.get('Items', [])
+    items = []
+    scan_params = {"FilterExpression": Attr(primary_key_name).is_in(keys)}
+
+    while True:
+        response = table.scan(**scan_params)
+        items.extend(response.get('Items', []))
+
+        if 'LastEvaluatedKey' in response:
+            scan_params["ExclusiveStartKey"] = response['LastEvaluatedKey']
+        else:
+            break
+
+    return items
+
+def _backoff(attempt: int) -> None:
+    """Sleep with capped exponential backoff and full jitter."""
+    delay = min(BATCH_BACKOFF_MAX_SECONDS, BATCH_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    time.sleep(random.uniform(0, delay))
+
+def _run_chunks(func, chunks: list, max_workers: int) -> list:
+    """Run func over chunks, concurrently if max_workers > 1. Results keep chunk order."""
+    if max_workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            return list(executor.map(func, chunks))
+    return [func(chunk) for chunk in chunks]
+
+def batch_get_items(
+    table_name: str,
+    primary_key_name: str,
+    keys: list[str],
+    projection_expression: str = None,
+    max_workers: int = 1,
+    attributes: list[str] = None,
+) -> list[dict]:
+    """
+    Fetch items by primary key with BatchGetItem.
+
+    Keys are de-duplicated and sent in chunks of 100 (the BatchGetItem limit).
+    UnprocessedKeys are retried with exponential backoff. Missing keys are
+    skipped, and results come back in no particular order.
+
+    :param table_name: Name of the DynamoDB table
+    :param primary_key_name: Partition key attribute name
+    :param keys: Partition key values to fetch
+    :param projection_expression: Optional comma-separated attributes to fetch
+    :param max_workers: Number of chunks to request concurrently
+    :param attributes: Optional attribute names to fetch, as in get_item
+        (placeholders are used, so reserved words are fine)
+    :return: List of found items
+    """
+    unique_keys = list(dict.fromkeys(key for key in keys if key is not None))
+    chunks = [unique_keys[i:i + BATCH_GET_MAX_KEYS] for i in range(0, len(unique_keys), BATCH_GET_MAX_KEYS)]
+
+    def fetch_chunk(chunk: list[str]) -> list[dict]:
+        table_request = {"Keys": [{primary_key_name: key} for key in chunk]}
+        if attributes:
+            table_request["ProjectionExpression"], table_request["ExpressionAttributeNames"] = projection(attributes)
+        elif projection_expression:
+            table_request["ProjectionExpression"] = projection_expression
+        request_items = {table_name: table_request}
+
+        items = []
+        attempt = 0
+        while request_items:
+            response = _dynamodb.batch_get_item(RequestItems=request_items)
+            items.extend(response.get("Responses", {}).get(table_name, []))
+            request_items = response.get("UnprocessedKeys")
+            if request_items:
+                attempt += 1
+                if attempt > BATCH_MAX_RETRIES:
+                    raise Exception(f"BatchGetItem on {table_name} still has unprocessed keys after {BATCH_MAX_RETRIES} retries")
+                _backoff(attempt)
+        return items
+
+    items = []
+    for chunk_items in _run_chunks(fetch_chunk, chunks, max_workers):
+        items.extend(chunk_items)
+    return items
+
+def batch_get_items_across_tables(keys_by_table: dict[str, tuple[str, list[str]]]) -> dict[str, list[dict]]:
+    """
+    Fetch items from several tables with BatchGetItem, in one request for up
+    to 100 keys across all of them.
+
+    Keys are de-duplicated per table. UnprocessedKeys are retried with
+    exponential backoff, and missing keys are skipped.
+
+    :param keys_by_table: (partition key attribute name, keys) by table name
+    :return: Found items by table name, with a list for every requested table
+    """
+    requests = [
+        (table_name, primary_key_name, key)
+        for table_name, (primary_key_name, keys) in keys_by_table.items()
+        for key in dict.fromkeys(key for key in keys if key is not None)
+    ]
+    results = {table_name: [] for table_name in keys_by_table}
+    for start in range(0, len(requests), BATCH_GET_MAX_KEYS):
+        request_items = {}
+        for table_name, primary_key_name, key in requests[start:start + BATCH_GET_MAX_KEYS]:
+            request_items.setdefault(table_name, {"Keys": []})["Keys"].append({primary_key_name: key})
+
+        attempt = 0
+        while request_items:
+            response = _dynamodb.batch_get_item(RequestItems=request_items)
+            for table_name, items in response.get("Responses", {}).items():
+                results[table_name].extend(items)
+            request_items = response.get("UnprocessedKeys")
+            if request_items:
+                attempt += 1
+                if attempt > BATCH_MAX_RETRIES:
+                    raise Exception(f"BatchGetItem on {', '.join(request_items)} still has unprocessed keys after {BATCH_MAX_RETRIES} retries")
+                _backoff(attempt)
+    return results
+
+def batch_write_items(
+    table_name: str,
+    primary_key_name: str,
+    put_items: list[dict] = None,
+    delete_keys: list = None,
+    max_workers: int = 1,
+    sort_key_name: str = None,
+) -> None:
+    """
+    Put and/or delete items with BatchWriteItem.
+
+    Requests are sent in chunks of 25 (the BatchWriteItem limit) and
+    UnprocessedItems are retried with exponential backoff. A batch may not
+    touch the same key twice, so duplicate keys are collapsed (the last put
+    wins) and a key that is both put and deleted is only put.
+
+    :param table_name: Name of the DynamoDB table
+    :param primary_key_name: Partition key attribute name
+    :param put_items: Items to write
+    :param delete_keys: Partition key values to delete, or (partition, sort)
+        tuples if the table has a sort key
+    :param max_workers: Number of chunks to send concurrently
+    :param sort_key_name: Sort key attribute name, for tables with a composite key
+    """
+    def item_key(item: dict):
+        if sort_key_name:
+            return (item[primary_key_name], item[sort_key_name])
+        return item[primary_key_name]
+
+    requests_by_key = {}
+    for key in delete_keys or []:
+        if key is None:
+            continue
+        if sort_key_name:
+            key_dict = {primary_key_name: key[0], sort_key_name: key[1]}
+        else:
+            key_dict = {primary_key_name: key}
+        requests_by_key[key] = {"DeleteRequest": {"Key": key_dict}}
+    for item in put_items or []:
+        requests_by_key[item_key(item)] = {"PutRequest": {"Item": float_to_decimal(item)}}
+    write_requests = list(requests_by_key.values())
+    chunks = [write_requests[i:i + BATCH_WRITE_MAX_ITEMS] for i in range(0, len(write_requests), BATCH_WRITE_MAX_ITEMS)]
+
+    def write_chunk(chunk: list[dict]) -> None:
+        request_items = {table_name: chunk}
+        attempt = 0
+        while request_items:
+            response = _dynamodb.batch_write_item(RequestItems=request_items)
+            request_items = response.get("UnprocessedItems")
+            if request_items:
+                attempt += 1
+                if attempt > BATCH_MAX_RETRIES:
+                    raise Exception(f"BatchWriteItem on {table_name} still has unprocessed items after {BATCH_MAX_RETRIES} retries")
+                _backoff(attempt)
+
+    _run_chunks(write_chunk, chunks, max_workers)
+
+def batch_delete_items(table_name: str, primary_key_name: str, keys: list[str], max_workers: int = 1) -> None:
+    batch_write_items(table_name, primary_key_name, delete_keys=keys, max_workers=max_workers)
+
+def batch_put_items(table_name: str, primary_key_name: str, items: list[dict], max_workers: int = 1) -> None:
+    batch_write_items(table_name, primary_key_name, put_items=items, max_workers=max_workers)
 
 def get_all_items(table_name: str) -> list[dict]:
     table = _get_table(table_name)
     response = table.scan()
     return response['Items']
 
-def put_item(table_name: str, item: dict) -> None:
+def scan_pages(table_name: str, projection_expression: str = None, attributes: list[str] = None):
+    """
+    Yield a whole table one scan page (up to 1 MB) at a time, so large tables
+    can be walked without holding every item in memory. attributes reads only
+    those attributes, like get_item's, with no reserved word handling needed.
+    """
+    table = _get_table(table_name)
+    scan_params = {}
+    if projection_expression:
+        scan_params["ProjectionExpression"] = projection_expression
+    if attributes:
+        scan_params["ProjectionExpression"], scan_params["ExpressionAttributeNames"] = projection(attributes)
+    while True:
+        response = table.scan(**scan_params)
+        yield response["Items"]
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def put_item(table_name: str, item: dict, condition_expression=None) -> None:
+    """
+    Write a whole item. If condition_expression (a boto3 condition) is given,
+    the write only happens when it holds, otherwise botocore raises
+    ConditionalCheckFailedException (see is_conditional_check_failed).
+    """
     table = _get_table(table_name)
     # Convert floats to Decimals for DynamoDB compatibility
     converted_item = float_to_decimal(item)
-    table.put_item(Item=converted_item)
+    if condition_expression is not None:
+        table.put_item(Item=converted_item, ConditionExpression=condition_expression)
+    else:
+        table.put_item(Item=converted_item)
+
+class UpdateExpressionBuilder:
+    """
+    Builds an UpdateExpression with its attribute name/value placeholders.
+
+    Paths are dot-separated attribute names with optional list indexes,
+    e.g. "status", "data.logs" or "messages[3].content". Placeholders use the
+    #u/:u prefixes so they never collide with the #n/:v placeholders boto3
+    generates for condition objects passed alongside.
+    """
+
+    def __init__(self):
+        self.names: dict[str, str] = {}
+        self.values: dict[str, object] = {}
+        self._name_placeholders: dict[str, str] = {}
+        self.set_clauses: list[str] = []
+        self.remove_clauses: list[str] = []
+        self.add_clauses: list[str] = []
+
+    def _name(self, name: str) -> str:
+        placeholder = self._name_placeholders.get(name)
+        if placeholder is None:
+            placeholder = f"#u{len(self._name_placeholders)}"
+            self._name_placeholders[name] = placeholder
+            self.names[placeholder] = name
+        return placeholder
+
+    def _value(self, value) -> str:
+        placeholder = f":u{len(self.values)}"
+        self.values[placeholder] = float_to_decimal(value)
+        return placeholder
+
+    def path(self, path: str) -> str:
+        parts = []
+        for part in path.split("."):
+            name, bracket, indexes = part.partition("[")
+            if not name:
+                raise ValueError(f"Invalid attribute path: {path}")
+            parts.append(self._name(name) + (bracket + indexes if bracket else ""))
+        return ".".join(parts)
+
+    def set(self, path: str, value) -> "UpdateExpressionBuilder":
+        self.set_clauses.append(f"{self.path(path)} = {self._value(value)}")
+        return self
+
+    def set_if_not_exists(self, path: str, value) -> "UpdateExpressionBuilder":
+        attribute = self.path(path)
+        self.set_clauses.append(f"{attribute} = if_not_exists({attribute}, {self._value(value)})")
+        return self
+
+    def append(self, path: str, values: list) -> "UpdateExpressionBuilder":
+        """Append values to a list attribute, creating the list if it doesn't exist."""
+        attribute = self.path(path)
+        self.set_clauses.append(
+            f"{attribute} = list_append(if_not_exists({attribute}, {self._value([])}), {self._value(list(values))})"
+        )
+        return self
+
+    def remove(self, path: str) -> "UpdateExpressionBuilder":
+        self.remove_clauses.append(self.path(path))
+        return self
+
+    def add(self, path: str, value) -> "UpdateExpressionBuilder":
+        """Atomically add to a number (or add elements to a set)."""
+        self.add_clauses.append(f"{self.path(path)} {self._value(value)}")
+        return self
+
+    def build(self) -> dict:
+        sections = []
+        if self.set_clauses:
+            sections.append("SET " + ", ".join(self.set_clauses))
+        if self.remove_clauses:
+            sections.append("REMOVE " + ", ".join(self.remove_clauses))
+        if self.add_clauses:
+            sections.append("ADD " + ", ".join(self.add_clauses))
+        if not sections:
+            raise ValueError("Update expression has no actions")
+
+        params = {"UpdateExpression": " ".join(sections), "ExpressionAttributeNames": self.names}
+        if self.values:
+            params["ExpressionAttributeValues"] = self.values
+        return params
+
+def update_item(
+    table_name: str,
+    primary_key_name: str,
+    key: str,
+    update_attributes: dict = None,
+    remove_attributes: list[str] = None,
+    add_attributes: dict = None,
+    append_attributes: dict = None,
+    condition_expression=None,
+    return_values: str = "ALL_NEW",
+) -> dict:
+    """
+    Partially update an item with a single UpdateItem call.
+
+    :param table_name: Name of the DynamoDB table
+    :param primary_key_name: Partition key attribute name
+    :param key: Partition key value
+    :param update_attributes: {path: value} to SET
+    :param remove_attributes: Paths to REMOVE
+    :param add_attributes: {path: number} to atomically ADD
+    :param append_attributes: {path: list} to append to list attributes
+    :param condition_expression: Optional boto3 condition (e.g. Attr("version").eq(3))
+    :param return_values: DynamoDB ReturnValues option, ALL_NEW by default
+    :return: The returned attributes (the whole updated item for ALL_NEW)
+    """
+    builder = _update_builder(update_attributes, remove_attributes, add_attributes, append_attributes)
+    return update_item_with_expression(table_name, primary_key_name, key, builder, condition_expression, return_values)
+
+def _update_builder(
+    update_attributes: dict = None,
+    remove_attributes: list[str] = None,
+    add_attributes: dict = None,
+    append_attributes: dict = None,
+) -> UpdateExpressionBuilder:
+    builder = UpdateExpressionBuilder()
+    for path, value in (update_attributes or {}).items():
+        builder.set(path, value)
+    for path in remove_attributes or []:
+        builder.remove(path)
+    for path, value in (add_attributes or {}).items():
+        builder.add(path, value)
+    for path, values in (append_attributes or {}).items():
+        builder.append(path, values)
+    return builder
+
+def update_item_with_expression(
+    table_name: str,
+    primary_key_name: str,
+    key: str,
+    builder: UpdateExpressionBuilder,
+    condition_expression=None,
+    return_values: str = "ALL_NEW",
+) -> dict:
+    """
+    Run an UpdateItem call built with UpdateExpressionBuilder.
+    Raises the botocore ConditionalCheckFailedException if the condition fails.
+    """
+    table = _get_table(table_name)
+    params = {
+        "Key": {primary_key_name: key},
+        "ReturnValues": return_values,
+        **builder.build(),
+    }
+    if condition_expression is not None:
+        params["ConditionExpression"] = condition_expression
+    response = table.update_item(**params)
+    return response.get("Attributes", {})
+
+def transact_put(table_name: str, item: dict, condition_expression=None) -> dict:
+    """A TransactWriteItems action that writes a whole item (see put_item)."""
+    action = {"TableName": table_name, "Item": float_to_decimal(item)}
+    if condition_expression is not None:
+        action["ConditionExpression"] = condition_expression
+    return {"Put": action}
+
+def transact_update(
+    table_name: str,
+    primary_key_name: str,
+    key: str,
+    update_attributes: dict = None,
+    remove_attributes: list[str] = None,
+    add_attributes: dict = None,
+    append_attributes: dict = None,
+    condition_expression=None,
+) -> dict:
+    """A TransactWriteItems action that partially updates an item (see update_item)."""
+    builder = _update_builder(update_attributes, remove_attributes, add_attributes, append_attributes)
+    action = {"TableName": table_name, "Key": {primary_key_name: key}, **builder.build()}
+    if condition_expression is not None:
+        action["ConditionExpression"] = condition_expression
+    return {"Update": action}
+
+def transact_delete(table_name: str, key: dict) -> dict:
+    """A TransactWriteItems action that deletes the item with the given key attributes."""
+    return {"Delete": {"TableName": table_name, "Key": key}}
+
+def fits_in_transaction(actions: list[dict]) -> bool:
+    """
+    True if the actions are within TransactWriteItems' limits. The request
+    size is approximated by the JSON length of the actions.
+    """
+    if len(actions) > TRANSACT_WRITE_MAX_ITEMS:
+        return False
+    return len(json.dumps(decimal_to_serializable(actions), default=str)) <= TRANSACT_WRITE_MAX_BYTES
 
-def update_item(table_name: str, primary_key_name: str, key: str, update_attributes: dict) -> dict:
-    item = get_item(table_name, primary_key_name, key)
-    item.update(update_attributes)
-    put_item(table_name, item)
-    return item
-    
+def transact_write_items(actions: list[dict]) -> None:
+    """
+    Apply transact_put/transact_update/transact_delete actions all or nothing
+    with one TransactWriteItems call. If a condition fails nothing is written
+    and botocore raises TransactionCanceledException, which
+    is_conditional_check_failed recognizes. Transactional writes consume
+    twice the write units of plain ones.
+    """
+    # The resource's client takes Python values and condition objects, like its tables
+    _dynamodb.meta.client.transact_write_items(TransactItems=actions)
+
+def is_conditional_check_failed(error: Exception) -> bool:
+    """
+    True if error is a botocore ClientError for a failed ConditionExpression,
+    or a transaction canceled because one of its conditions failed.
+    """
+    response = getattr(error, "response", None)
+    if not response:
+        return False
+    code = response.get("Error", {}).get("Code")
+    if code == "TransactionCanceledException":
+        return any(reason.get("Code") == "ConditionalCheckFailed" for reason in response.get("CancellationReasons", []))
+    return code == "ConditionalCheckFailedException"
 
 def delete_item(table_name: str, primary_key_name: str, key: str) -> None:
     table = _get_table(table_name)
     table.delete_item(Key={primary_key_name: key})
 
-def get_all_items_by_index(table_name: str, index_key: str, key_value: str) -> list[dict]:
+def get_all_items_by_index(
+    table_name: str,
+    index_key: str,
+    key_value: str,
+    index_name: str = None,
+    projection_expression: str = None,
+) -> list[dict]:
     """
-    Query items by an index, assuming the index name matches the index key.
+    Query all pages of items by an index. By default the index name is assumed
+    to match the index key.
 
     :param table_name: Name of the DynamoDB table
-    :param index_key: The key for the GSI and also the index name
+    :param index_key: The partition key of the GSI
     :param key_value: Value of the key to query
+    :param index_name: Name of the GSI, if it differs from index_key
+    :param projection_expression: Optional comma-separated attributes to fetch
     :return: List of items matching the query
     """
     table = _get_table(table_name)
@@ -71,22 +517,20 @@ def get_all_items_by_index(table_name: str, index_key: str, key_value: str) -> l
     last_evaluated_key = None
 
     while True:
+        query_params = {
+            "IndexName": index_name or index_key,
+            "KeyConditionExpression": Key(index_key).eq(key_value),
+        }
+        if projection_expression:
+            query_params["ProjectionExpression"] = projection_expression
         if last_evaluated_key:
-            response = table.query(
-                IndexName=index_key,
-                KeyConditionExpression=Key(index_key).eq(key_value),
-                ExclusiveStartKey=last_evaluated_key
-            )
-        else:
-            response = table.query(
-                IndexName=index_key,
-                KeyConditionExpression=Key(index_key).eq(key_value)
-            )
+            query_params["ExclusiveStartKey"] = last_evaluated_key
 
-        items.extend(response.get('Items', []))
+        response = table.query(**query_params)
+        items.extend(response.get("Items", []))
 
-        if 'LastEvaluatedKey' in response:
-            last_evaluated_key = response['LastEvaluatedKey']
+        if "LastEvaluatedKey" in response:
+            last_evaluated_key = response["LastEvaluatedKey"]
         else:
             break
 
@@ -180,6 +624,111 @@ def query_by_pk_and_sk_range(
     return items
 
 
+def query_items(
+    table_name: str,
+    key_condition,
+    index_name: str = None,
+    ascending: bool = True,
+    limit: int = None,
+    projection_expression: str = None,
+    exclusive_start_key: dict = None,
+    attributes: list[str] = None,
+) -> tuple[list[dict], dict]:
+    """
+    Query a table or GSI, following pages until limit items are read (or all
+    of them if limit is None).
+
+    :param table_name: Name of the DynamoDB table
+    :param key_condition: boto3 key condition, e.g. Key("context_id").eq(x) & Key("seq").gte(10)
+    :param index_name: Optional GSI name
+    :param ascending: Sort key order
+    :param limit: Max number of items to return
+    :param projection_expression: Optional comma-separated attributes to fetch
+    :param exclusive_start_key: LastEvaluatedKey of a previous call, to continue from
+    :param attributes: Optional attributes to fetch instead, each through a placeholder so reserved words work
+    :return: (items, last_evaluated_key), last_evaluated_key is None when there are no more items
+    """
+    table = _get_table(table_name)
+    items = []
+    last_evaluated_key = exclusive_start_key
+
+    while True:
+        query_params = {
+            "KeyConditionExpression": key_condition,
+            "ScanIndexForward": ascending,
+        }
+        if index_name:
+            query_params["IndexName"] = index_name
+        if limit is not None:
+            query_params["Limit"] = limit - len(items)
+        if projection_expression:
+            query_params["ProjectionExpression"] = projection_expression
+        if attributes:
+            query_params["ProjectionExpression"], query_params["ExpressionAttributeNames"] = projection(attributes)
+        if last_evaluated_key:
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+
+        response = table.query(**query_params)
+        items.extend(response.get("Items", []))
+        last_evaluated_key = response.get("LastEvaluatedKey")
+
+        if not last_evaluated_key or (limit is not None and len(items) >= limit):
+            break
+
+    return items, last_evaluated_key
+
+def query_pages(
+    table_name: str,
+    key_condition,
+    index_name: str = None,
+    ascending: bool = True,
+    projection_expression: str = None,
+    attributes: list[str] = None,
+):
+    """
+    Yield every item of a query one page (up to 1 MB) at a time, like
+    scan_pages, so a large result can be walked without holding it in memory.
+    attributes reads only those attributes, as in scan_pages.
+    """
+    table = _get_table(table_name)
+    query_params = {"KeyConditionExpression": key_condition, "ScanIndexForward": ascending}
+    if index_name:
+        query_params["IndexName"] = index_name
+    if projection_expression:
+        query_params["ProjectionExpression"] = projection_expression
+    if attributes:
+        query_params["ProjectionExpression"], query_params["ExpressionAttributeNames"] = projection(attributes)
+    while True:
+        response = table.query(**query_params)
+        yield response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def encode_cursor(last_evaluated_key: dict) -> str:
+    """Opaque page cursor for API responses from a query's LastEvaluatedKey (None if there are no more pages)."""
+    if not last_evaluated_key:
+        return None
+    data = json.dumps(decimal_to_serializable(last_evaluated_key), separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str, key_names: list[str]) -> dict:
+    """
+    The ExclusiveStartKey for a cursor from encode_cursor. key_names are the
+    key attributes of the queried table, or of an index plus its table, which
+    is what an index query's LastEvaluatedKey holds. Raises a 400 for
+    anything else, including a key with other attributes or non-key values.
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise Exception("Invalid cursor", 400)
+    if not isinstance(key, dict) or set(key) != set(key_names):
+        raise Exception("Invalid cursor", 400)
+    if not all(isinstance(value, (str, int)) and not isinstance(value, bool) for value in key.values()):
+        raise Exception("Invalid cursor", 400)
+    return key
+
 def get_latest_items_by_index(
     table_name: str,
     index_name: str,
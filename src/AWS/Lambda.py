@@ -1,7 +1,7 @@
 import json
 from pydantic import BaseModel
 from typing import Optional
-import boto3
+from AWS.ClientPool import get_client
 import decimal
 from enum import Enum
 
@@ -27,7 +27,7 @@ class LambdaEvent(BaseModel):
     runJobId: Optional[str] = None
 
 def invoke_lambda(lambda_name: str, event: dict, invokation_type: str = "Event"):
-    client = boto3.client('lambda')
+    client = get_client('lambda')
     response = client.invoke(
         FunctionName=lambda_name,
         InvocationType=invokation_type,
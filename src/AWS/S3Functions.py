@@ -1,7 +1,87 @@
-import boto3
+from AWS.ClientPool import get_client
 
 def get_text_from_file(bucket_name: str, key: str):
-    s3 = boto3.client('s3')
+    s3 = get_client('s3')
     s3_response = s3.get_object(Bucket=bucket_name, Key=key)
     text_from_file = s3_response['Body'].read().decode('utf-8')
-    return text_from_file
\ No newline at end of file
+    return text_from_file
+
+def put_bytes(bucket_name: str, key: str, data: bytes, content_type: str = "application/octet-stream", content_encoding: str = None) -> None:
+    s3 = get_client('s3')
+    params = {"Bucket": bucket_name, "Key": key, "Body": data, "ContentType": content_type}
+    if content_encoding:
+        params["ContentEncoding"] = content_encoding
+    s3.put_object(**params)
+
+def get_bytes(bucket_name: str, key: str) -> bytes:
+    s3 = get_client('s3')
+    s3_response = s3.get_object(Bucket=bucket_name, Key=key)
+    return s3_response['Body'].read()
+
+def object_exists(bucket_name: str, key: str) -> bool:
+    s3 = get_client('s3')
+    try:
+        s3.head_object(Bucket=bucket_name, Key=key)
+        return True
+    except Exception as e:
+        error_code = getattr(e, "response", {}).get("Error", {}).get("Code")
+        if error_code in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+def get_last_modified(bucket_name: str, key: str):
+    """The object's LastModified datetime, or None if it doesn't exist."""
+    s3 = get_client('s3')
+    try:
+        return s3.head_object(Bucket=bucket_name, Key=key)['LastModified']
+    except Exception as e:
+        error_code = getattr(e, "response", {}).get("Error", {}).get("Code")
+        if error_code in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+
+def list_objects(bucket_name: str, prefix: str = ""):
+    """Yield the objects under prefix, one page of {"Key", "LastModified", ...} dicts at a time."""
+    s3 = get_client('s3')
+    params = {"Bucket": bucket_name, "Prefix": prefix}
+    while True:
+        response = s3.list_objects_v2(**params)
+        yield response.get('Contents', [])
+        if not response.get('IsTruncated'):
+            return
+        params["ContinuationToken"] = response['NextContinuationToken']
+
+def delete_objects(bucket_name: str, keys: list[str]) -> None:
+    """Delete keys with DeleteObjects, 1000 (its limit) per request."""
+    s3 = get_client('s3')
+    for start in range(0, len(keys), 1000):
+        chunk = keys[start:start + 1000]
+        response = s3.delete_objects(Bucket=bucket_name, Delete={"Objects": [{"Key": key} for key in chunk], "Quiet": True})
+        if response.get('Errors'):
+            raise Exception(f"Could not delete {len(response['Errors'])} objects from {bucket_name}: {response['Errors'][0]}")
+
+def get_stream(bucket_name: str, key: str):
+    """The object's body as a file-like stream, for reading large objects without loading them whole."""
+    s3 = get_client('s3')
+    return s3.get_object(Bucket=bucket_name, Key=key)['Body']
+
+def create_multipart_upload(bucket_name: str, key: str, content_type: str = "application/octet-stream", content_encoding: str = None) -> str:
+    s3 = get_client('s3')
+    params = {"Bucket": bucket_name, "Key": key, "ContentType": content_type}
+    if content_encoding:
+        params["ContentEncoding"] = content_encoding
+    return s3.create_multipart_upload(**params)['UploadId']
+
+def upload_part(bucket_name: str, key: str, upload_id: str, part_number: int, data: bytes) -> dict:
+    """Upload one part (at least 5 MB, except the last). Returns the part for complete_multipart_upload."""
+    s3 = get_client('s3')
+    response = s3.upload_part(Bucket=bucket_name, Key=key, UploadId=upload_id, PartNumber=part_number, Body=data)
+    return {"ETag": response['ETag'], "PartNumber": part_number}
+
+def complete_multipart_upload(bucket_name: str, key: str, upload_id: str, parts: list[dict]) -> None:
+    s3 = get_client('s3')
+    s3.complete_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts})
+
+def abort_multipart_upload(bucket_name: str, key: str, upload_id: str) -> None:
+    s3 = get_client('s3')
+    s3.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
@@ -1,4 +1,5 @@
 import json
+import time
 from typing import List, Optional, Callable
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -6,6 +7,11 @@ from langchain_core.messages import HumanMessage, BaseMessage, ToolMessage, AIMe
 from LLM.AgentTool import AgentTool
 from LLM.TerminatingConfig import TerminatingConfig
 from LLM.ContentNormalizer import normalize_content
+from LLM.ContextCompactor import ContextCompactor
+from LLM.PromptAssembler import PromptAssembler
+from LLM.TokenEstimator import estimate_text_tokens, estimate_tools_tokens
+from LLM.ToolExecutor import calls_to_execute, execute_tool_calls
+from LLM.AgentLoop import AgentLoopBudget, AgentLoopLimits, AgentStepTrace, AgentTrace, StopReason, elapsed_ms
 from Models import DataWindow, JSONDocument
 from Tools.MemoryTools.helper_retrive_and_cache_doc import retrieve_and_cache_doc
 from AWS.APIGateway import default_type_error_handler
@@ -21,11 +27,27 @@ class AgentChat:
       prompt_arg_names: List[str] = [],
       terminating_config: Optional[TerminatingConfig] = None,
       on_response: Optional[Callable] = None,
+      compactor: Optional[ContextCompactor] = None,
+      prompt_assembler: Optional[PromptAssembler] = None,
+      tool_concurrency: Optional[int] = None,
+      tool_timeout_seconds: Optional[float] = None,
+      limits: Optional[AgentLoopLimits] = None,
   ):
     self.messages = messages
     self.context = context
     self.terminating_config = terminating_config
     self.on_response = on_response
+    self.compactor = compactor
+    self.prompt_assembler = prompt_assembler
+    # Defaults come from ToolExecutor (TOOL_CALL_CONCURRENCY / TOOL_CALL_TIMEOUT_SECONDS)
+    self.tool_concurrency = tool_concurrency
+    self.tool_timeout_seconds = tool_timeout_seconds
+    # Steps, time and tokens an invoke may use (AGENT_* env defaults)
+    self.limits = limits
+    # Trace of the last invoke, for profiling
+    self.trace: Optional[AgentTrace] = None
+    self.name_to_tool = {}
+    self.name_to_tool_id = {}
     self._invocation_count = 0
     self._consecutive_nudge_count = 0
     self.pending_client_side_tool_calls = None
@@ -36,6 +58,10 @@ class AgentChat:
       if context and context.get("prompt_args") and arg_name in context["prompt_args"]:
         prompt = prompt.replace(arg_name, str(context["prompt_args"][arg_name]))
     
+    # The system prompt and tool definitions are sent with every call, count
+    # them towards compaction and the prompt budget
+    self._prompt_tokens = estimate_text_tokens(prompt)
+
     # Escape any remaining curly brackets for ChatPromptTemplate
     prompt = prompt.replace("{", "{{").replace("}", "}}")
     
@@ -55,20 +81,132 @@ class AgentChat:
         if tool.tool_id:
           self.name_to_tool_id[tool_name] = tool.tool_id
       llm = llm.bind_tools(tool_params_list)
+      self._prompt_tokens += estimate_tools_tokens(tool_params_list)
     self.prompt_chain = chat_prompt_template | llm
 
   def invoke(self, load_data_windows: bool = True):
-    # Check max invocations limit
-    if self.terminating_config:
-      self._invocation_count += 1
-      if self._invocation_count > self.terminating_config.max_invocations:
-        raise Exception(f"Max invocations exceeded: {self.terminating_config.max_invocations}")
-    
+    """
+    Run the agent until it answers: call the LLM, run the tools it calls and
+    call it again, one step at a time, within self.limits. Returns the final
+    text (or a terminating tool's response). self.trace describes the turn.
+    """
+    budget = AgentLoopBudget(self.limits)
+    self.trace = budget.trace
+    stop_reason = None
+    try:
+      while True:
+        stop_reason = budget.stop_reason()
+        if stop_reason:
+          # Out of steps, time or tokens: the turn ends after its last tool round
+          return ""
+
+        # Check max invocations limit
+        if self.terminating_config:
+          self._invocation_count += 1
+          if self._invocation_count > self.terminating_config.max_invocations:
+            raise Exception(f"Max invocations exceeded: {self.terminating_config.max_invocations}")
+
+        step = budget.start_step()
+        response = self._invoke_llm(step, load_data_windows)
+        budget.record_usage(step, response.usage_metadata)
+        # Every later step refreshes DataWindows, the tools may have changed them
+        load_data_windows = True
+
+        if len(response.tool_calls) > 0:
+          tool_call_message = self.messages[-1]
+          # Reset consecutive nudge count since agent is calling tools
+          if self.terminating_config:
+            self._consecutive_nudge_count = 0
+
+          # Separate server-side and client-side tool calls
+          client_side_tool_calls = []
+          server_side_tool_calls = []
+          for tool_call in response.tool_calls:
+            tool = self.name_to_tool.get(tool_call["name"])
+            if tool and tool.is_client_side_tool:
+              client_side_tool_calls.append(tool_call)
+            else:
+              server_side_tool_calls.append(tool_call)
+
+          # Run the server-side calls concurrently, up to the first terminating one
+          calls, terminating_call = calls_to_execute(server_side_tool_calls, self.name_to_tool_id, self.terminating_config)
+          durations = {}
+          tools_start = time.perf_counter()
+          tool_messages = execute_tool_calls(
+            calls, self.name_to_tool, self.context,
+            concurrency=self.tool_concurrency, timeout=budget.tool_timeout(self.tool_timeout_seconds),
+            durations=durations,
+          )
+          budget.record_tool_calls(step, calls, tool_messages, durations, tools_start)
+          # ToolMessages follow the order of the calls, however they finished
+          self.messages.extend(tool_messages)
+
+          if terminating_call:
+            # Update AIMessage to only include called tools, so the history has
+            # no calls without responses
+            response.tool_calls = calls
+            tool_call_message.tool_calls = calls
+            # Return the terminating tool's response
+            stop_reason = StopReason.terminated
+            return tool_messages[-1].content
+
+          # If there are client-side tool calls, store them and return
+          if client_side_tool_calls:
+            self.pending_client_side_tool_calls = [
+              {
+                "tool_call_id": tc["id"],
+                "tool_name": tc["name"],
+                "tool_input": tc["args"],
+              }
+              for tc in client_side_tool_calls
+            ]
+            stop_reason = StopReason.client_side_tools
+            return ""
+
+          # Call the LLM again with the tool responses
+          continue
+
+        # No tool calls - content only response
+        if self.terminating_config:
+          # Agent returned content instead of calling terminating tool
+          self._consecutive_nudge_count += 1
+
+          if self._consecutive_nudge_count > self.terminating_config.consecutive_nudges:
+            raise Exception(f"Max consecutive nudges exceeded: {self.terminating_config.consecutive_nudges}. Agent failed to call a terminating tool.")
+
+          # Add nudge message and re-invoke
+          nudge_message = SystemMessage(content=self.terminating_config.nudge_message)
+          self.messages.append(nudge_message)
+          continue
+
+        stop_reason = StopReason.completed
+        return normalize_content(response.content)
+    finally:
+      budget.finish(stop_reason)
+
+  def _invoke_llm(self, step: AgentStepTrace, load_data_windows: bool):
+    """One LLM call on the current messages. Appends the AI message(s) and returns the response."""
     # Refresh DataWindows if enabled
+    start = time.perf_counter()
     if load_data_windows:
       self._refresh_data_windows()
-    
-    response = self.prompt_chain.invoke({"messages": self.messages})
+    step.refresh_ms = elapsed_ms(start)
+
+    # Summarize older turns if the prompt is getting close to the context window
+    start = time.perf_counter()
+    prompt_messages = self.messages
+    if self.compactor:
+      self.compactor.maybe_compact(self.messages, fixed_tokens=self._prompt_tokens)
+      prompt_messages = self.compactor.prompt_messages(self.messages)
+
+    # Leave out older turns that don't fit the model's context window
+    if self.prompt_assembler:
+      prompt_messages = self.prompt_assembler.assemble(prompt_messages, fixed_tokens=self._prompt_tokens)
+    step.prompt_ms = elapsed_ms(start)
+
+    start = time.perf_counter()
+    response = self.prompt_chain.invoke({"messages": prompt_messages})
+    step.llm_ms = elapsed_ms(start)
 
     if self.on_response:
       self.on_response(response)
@@ -88,92 +226,8 @@ class AgentChat:
         response_metadata=response.response_metadata,
         id=response.id,
       ))
-    
-    if len(response.tool_calls) > 0:
-      # Reset consecutive nudge count since agent is calling tools
-      if self.terminating_config:
-        self._consecutive_nudge_count = 0
-      
-      # Separate server-side and client-side tool calls
-      client_side_tool_calls = []
-      server_side_tool_calls = []
-      for tool_call in response.tool_calls:
-        tool = self.name_to_tool.get(tool_call["name"])
-        if tool and tool.is_client_side_tool:
-          client_side_tool_calls.append(tool_call)
-        else:
-          server_side_tool_calls.append(tool_call)
-      
-      # Process server-side tools first
-      called_tool_calls = []
-      for tool_call in server_side_tool_calls:
-        try:
-          tool = self.name_to_tool[tool_call["name"]]
-          
-          # Build params starting with tool call args
-          params = {**tool_call['args']}
-          
-          # Add tool_call_id for async tools
-          if tool.is_async:
-            params['tool_call_id'] = tool_call['id']
-          
-          # Add context if tool needs it
-          if tool.pass_context:
-            params['context'] = self.context
-          
-          # Call the tool and get response
-          tool_response = tool.function(**params)
-          tool_message = ToolMessage(tool_call_id=tool_call['id'], content=tool_response)
-          self.messages.append(tool_message)
-            
-        except Exception as e:
-          # General error handling (e.g., tool not found)
-          tool_message = ToolMessage(tool_call_id=tool_call['id'], content=f"Issue calling tool: {tool_call['name']}, error: {e}")
-          self.messages.append(tool_message)
-          tool_response = tool_message.content
-        
-        # Check for terminating tool after execution
-        if self.terminating_config:
-          called_tool_calls.append(tool_call)
-          
-          # Look up the tool_id from the tool name
-          tool_id = self.name_to_tool_id.get(tool_call["name"])
-          if tool_id and tool_id in self.terminating_config.tool_ids:
-            # Update AIMessage to only include called tools
-            response.tool_calls = called_tool_calls
-            # Return the terminating tool's response
-            return tool_response
-      
-      # If there are client-side tool calls, store them and return
-      if client_side_tool_calls:
-        self.pending_client_side_tool_calls = [
-          {
-            "tool_call_id": tc["id"],
-            "tool_name": tc["name"],
-            "tool_input": tc["args"],
-          }
-          for tc in client_side_tool_calls
-        ]
-        return ""
-      
-      # Recursively invoke after processing tool calls
-      return self.invoke(load_data_windows=True)
-    
-    # No tool calls - content only response
-    if self.terminating_config:
-      # Agent returned content instead of calling terminating tool
-      self._consecutive_nudge_count += 1
-      
-      if self._consecutive_nudge_count > self.terminating_config.consecutive_nudges:
-        raise Exception(f"Max consecutive nudges exceeded: {self.terminating_config.consecutive_nudges}. Agent failed to call a terminating tool.")
-      
-      # Add nudge message and re-invoke
-      nudge_message = SystemMessage(content=self.terminating_config.nudge_message)
-      self.messages.append(nudge_message)
-      return self.invoke(load_data_windows=True)
-    
-    return normalize_content(response.content)
-  
+    return response
+
   def _refresh_data_windows(self):
     """
     Refresh all DataWindow and MemoryWindow tool messages with the latest data.
@@ -239,6 +293,11 @@ class AgentChat:
       except Exception as e:
         self.messages[msg_index].content = f"Error refreshing MemoryWindow: {e}"
 
+  @property
+  def new_compaction_state(self):
+    """The compaction state to save on the context if this chat compacted it, else None."""
+    return self.compactor.updated_state if self.compactor else None
+
   def get_context_size(self) -> int:
     """Returns the total token count from the last AIMessage that has usage_metadata."""
     for message in reversed(self.messages):
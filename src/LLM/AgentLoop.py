@@ -0,0 +1,154 @@
+import os
+import time
+from typing import Optional
+from pydantic import BaseModel
+from langchain_core.messages import ToolMessage
+from AWS.CloudWatchLogs import get_logger
+
+logger = get_logger(log_level=os.environ["LOG_LEVEL"])
+
+
+def _limit_from_env(name: str, cast, default=None):
+    """A limit from the environment: the default if unset or empty, no limit if "none"."""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    if value.lower() == "none":
+        return None
+    return cast(value)
+
+
+# Limits of one agent turn (an invoke: LLM calls and the tool rounds between
+# them). At most 50 LLM calls by default; no deadline or token budget.
+AGENT_MAX_STEPS = _limit_from_env("AGENT_MAX_STEPS", int, 50)
+AGENT_DEADLINE_SECONDS = _limit_from_env("AGENT_DEADLINE_SECONDS", float)
+AGENT_TOKEN_BUDGET = _limit_from_env("AGENT_TOKEN_BUDGET", int)
+
+
+class AgentLoopLimits(BaseModel):
+    # LLM calls per turn
+    max_steps: Optional[int] = AGENT_MAX_STEPS
+    # Wall-clock time per turn. No new LLM call starts after it, and tool
+    # calls are cut off when it is reached.
+    deadline_seconds: Optional[float] = AGENT_DEADLINE_SECONDS
+    # Total tokens (input + output) of the turn's LLM calls
+    token_budget: Optional[int] = AGENT_TOKEN_BUDGET
+
+
+class StopReason:
+    completed = "completed"
+    terminated = "terminated"
+    client_side_tools = "client_side_tools"
+    aborted = "aborted"
+    max_steps = "max_steps"
+    deadline = "deadline"
+    token_budget = "token_budget"
+
+
+# Stop reasons of a turn cut short by one of its limits
+LIMIT_STOP_REASONS = (StopReason.max_steps, StopReason.deadline, StopReason.token_budget)
+
+
+class ToolCallTrace(BaseModel):
+    tool_call_id: str
+    tool_name: str
+    latency_ms: float
+    error: bool = False
+
+
+class AgentStepTrace(BaseModel):
+    step: int
+    refresh_ms: float = 0
+    # Compaction and prompt assembly
+    prompt_ms: float = 0
+    llm_ms: float = 0
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    # Wall time of the tool round, and of each call in it
+    tools_ms: float = 0
+    tool_calls: list[ToolCallTrace] = []
+
+
+class AgentTrace(BaseModel):
+    steps: list[AgentStepTrace] = []
+    stop_reason: Optional[str] = None
+    total_ms: float = 0
+    total_tokens: int = 0
+
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+class AgentLoopBudget:
+    """Tracks one turn against its limits and records its trace."""
+
+    def __init__(self, limits: Optional[AgentLoopLimits] = None):
+        self.limits = limits or AgentLoopLimits()
+        self.trace = AgentTrace()
+        self._start = time.perf_counter()
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.limits.deadline_seconds is None:
+            return None
+        return self.limits.deadline_seconds - (time.perf_counter() - self._start)
+
+    def stop_reason(self) -> Optional[str]:
+        """Why no further LLM call should be made, or None to go on."""
+        if self.limits.max_steps is not None and len(self.trace.steps) >= self.limits.max_steps:
+            return StopReason.max_steps
+        remaining = self.remaining_seconds()
+        if remaining is not None and remaining <= 0:
+            return StopReason.deadline
+        if self.limits.token_budget is not None and self.trace.total_tokens >= self.limits.token_budget:
+            return StopReason.token_budget
+        return None
+
+    def tool_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """A tool call timeout that doesn't run past the deadline."""
+        remaining = self.remaining_seconds()
+        if remaining is None:
+            return timeout
+        remaining = max(remaining, 0.001)
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def start_step(self) -> AgentStepTrace:
+        step = AgentStepTrace(step=len(self.trace.steps) + 1)
+        self.trace.steps.append(step)
+        return step
+
+    def record_usage(self, step: AgentStepTrace, usage_metadata: Optional[dict]) -> None:
+        if not usage_metadata:
+            return
+        step.input_tokens = usage_metadata.get("input_tokens")
+        step.output_tokens = usage_metadata.get("output_tokens")
+        self.trace.total_tokens += usage_metadata.get("total_tokens") or ((step.input_tokens or 0) + (step.output_tokens or 0))
+
+    def record_tool_calls(self, step: AgentStepTrace, tool_calls: list[dict], tool_messages: list[ToolMessage], durations: dict, start: float) -> None:
+        step.tools_ms = elapsed_ms(start)
+        errors = {message.tool_call_id for message in tool_messages if message.status == "error"}
+        step.tool_calls = [
+            ToolCallTrace(
+                tool_call_id=tool_call["id"],
+                tool_name=tool_call["name"],
+                latency_ms=round(durations.get(tool_call["id"], 0) * 1000, 1),
+                error=tool_call["id"] in errors,
+            )
+            for tool_call in tool_calls
+        ]
+
+    def finish(self, stop_reason: Optional[str] = None) -> AgentTrace:
+        if stop_reason:
+            self.trace.stop_reason = stop_reason
+        self.trace.total_ms = elapsed_ms(self._start)
+        steps = self.trace.steps
+        logger.info(
+            f"Agent turn: {len(steps)} steps in {self.trace.total_ms} ms "
+            f"(llm {round(sum(step.llm_ms for step in steps), 1)} ms, "
+            f"tools {round(sum(step.tools_ms for step in steps), 1)} ms, "
+            f"refresh {round(sum(step.refresh_ms for step in steps), 1)} ms), "
+            f"{self.trace.total_tokens} tokens, stopped: {self.trace.stop_reason}"
+        )
+        if self.trace.stop_reason in LIMIT_STOP_REASONS:
+            logger.warning(f"Agent turn stopped early: {self.trace.stop_reason}")
+        return self.trace
@@ -1,23 +1,10 @@
 from typing import List
 import json
-from decimal import Decimal
+from Lib.DecimalConversion import decimal_to_serializable
+from Models.MessageBlobStore import hydrate_messages
+from LLM.TokenEstimator import TOKEN_ESTIMATE_KEY
 from langchain_core.messages import HumanMessage, BaseMessage, ToolMessage, AIMessage, SystemMessage
 
-def decimal_to_serializable(obj):
-    """Recursively convert Decimal objects to float/int for JSON serialization."""
-    if isinstance(obj, Decimal):
-        # Convert to int if it's a whole number, otherwise float
-        if obj % 1 == 0:
-            return int(obj)
-        else:
-            return float(obj)
-    elif isinstance(obj, dict):
-        return {key: decimal_to_serializable(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [decimal_to_serializable(item) for item in obj]
-    else:
-        return obj
-
 def base_messages_to_dict_messages(messages: List[BaseMessage]) -> List[dict]:
     # Convert to dict and handle any Decimals that might be present
     dict_messages = []
@@ -29,10 +16,15 @@ def base_messages_to_dict_messages(messages: List[BaseMessage]) -> List[dict]:
     return dict_messages
 
 def dict_messages_to_base_messages(messages: List[dict]) -> List[BaseMessage]:
+    # Fetch the full content of any messages offloaded to S3 (concurrently)
+    messages = hydrate_messages(messages)
     base_messages = []
     for message in messages:
         # Clean the message dict of any Decimal objects before creating BaseMessage
         cleaned_message = decimal_to_serializable(message)
+        # The stored token estimate is not a message field
+        if TOKEN_ESTIMATE_KEY in cleaned_message:
+            cleaned_message = {key: value for key, value in cleaned_message.items() if key != TOKEN_ESTIMATE_KEY}
         
         if cleaned_message["type"] == "human":
             base_messages.append(HumanMessage(**cleaned_message))
@@ -0,0 +1,27 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class CompactionConfig(BaseModel):
+    enabled: bool = True
+    # Compact once the prompt reaches this share of the model's context window
+    threshold_percentage: float = 80.0
+    # Most recent messages that are always sent as they are
+    keep_recent_messages: int = 20
+    # Model that writes the summary, the context's model if not set
+    summary_model_id: Optional[str] = None
+    summary_prompt: Optional[str] = None
+
+
+class CompactionState(BaseModel):
+    # Summary of messages[:compacted_message_count], sent in their place
+    summary: str
+    compacted_message_count: int
+    # Length of the history when it was compacted; only AI messages after it
+    # report a prompt size that already reflects the summary
+    message_count_at_compaction: int
+    compaction_count: int = 1
+    # Estimated prompt tokens before and after the last compaction
+    tokens_before: int
+    tokens_after: int
+    compacted_at: int
@@ -0,0 +1,221 @@
+import os
+import json
+from datetime import datetime
+from typing import Optional
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage, SystemMessage
+from AWS.CloudWatchLogs import get_logger
+from LLM.CompactionConfig import CompactionConfig, CompactionState
+from LLM.ContentNormalizer import normalize_content
+from LLM.CreateLLM import create_llm, DEFAULT_MODEL
+from LLM.TokenEstimator import estimate_messages_tokens
+from Models.LLMModel import get_model_or_none
+
+logger = get_logger(log_level=os.environ["LOG_LEVEL"])
+
+DEFAULT_SUMMARY_PROMPT = (
+    "Summarize the conversation below so the summary can replace it in an assistant's context. "
+    "Keep every fact, decision, user preference, open task, name, id and tool result that later "
+    "turns may depend on. Leave out small talk. Write concise plain text."
+)
+SUMMARY_MESSAGE_PREFIX = "Summary of the earlier conversation:\n"
+# Tool outputs are cut to this many characters in the transcript given to the summarizer
+TRANSCRIPT_TOOL_OUTPUT_CHARS = 2000
+
+
+def safe_boundaries(messages: list[BaseMessage]) -> list[bool]:
+    """
+    For each index i, whether the history can be cut before messages[i]: no
+    tool call before i has its ToolMessage at or after i (or has no response
+    yet), so both sides keep every tool call paired with its response.
+    """
+    response_index = {message.tool_call_id: index for index, message in enumerate(messages) if isinstance(message, ToolMessage)}
+    safe = []
+    open_until = -1
+    for index, message in enumerate(messages):
+        safe.append(not isinstance(message, ToolMessage) and open_until < index)
+        if isinstance(message, AIMessage):
+            for tool_call in message.tool_calls:
+                open_until = max(open_until, response_index.get(tool_call["id"], len(messages)))
+    return safe
+
+
+def find_compaction_boundary(messages: list[BaseMessage], start: int, keep_recent: int) -> Optional[int]:
+    """
+    Index to cut at so messages[start:cut] are summarized and at least
+    keep_recent messages are kept. A cut before a human message (a turn
+    boundary) is preferred. Returns None if there is nothing to summarize.
+    """
+    latest = len(messages) - max(keep_recent, 1)
+    if latest <= start:
+        return None
+    safe = safe_boundaries(messages)
+    for index in range(latest, start, -1):
+        if safe[index] and isinstance(messages[index], HumanMessage):
+            return index
+    for index in range(latest, start, -1):
+        if safe[index]:
+            return index
+    return None
+
+
+def render_transcript(messages: list[BaseMessage]) -> str:
+    lines = []
+    for message in messages:
+        content = normalize_content(message.content)
+        if isinstance(message, HumanMessage):
+            lines.append(f"User: {content}")
+        elif isinstance(message, AIMessage):
+            if content:
+                lines.append(f"Assistant: {content}")
+            for tool_call in message.tool_calls:
+                lines.append(f"Assistant called {tool_call['name']}({json.dumps(tool_call['args'], default=str)})")
+        elif isinstance(message, ToolMessage):
+            lines.append(f"Tool result: {content[:TRANSCRIPT_TOOL_OUTPUT_CHARS]}")
+        elif isinstance(message, SystemMessage):
+            lines.append(f"System: {content}")
+    return "\n".join(lines)
+
+
+class ContextCompactor:
+    """
+    Keeps the prompt of a long conversation under a share of the model's
+    context window. Once it is reached, older turns are summarized and the
+    prompt becomes the summary plus the messages after it. The messages
+    themselves are not changed, so the full history stays in the context.
+    """
+
+    def __init__(
+        self,
+        config: CompactionConfig,
+        context_window_size: int,
+        model_id: Optional[str] = None,
+        state: Optional[CompactionState] = None,
+    ):
+        self.config = config
+        self.context_window_size = context_window_size
+        self.model_id = model_id
+        self.state = state
+        # Set when this compactor compacted, for the caller to persist
+        self.updated_state: Optional[CompactionState] = None
+
+    def _start(self, messages: list[BaseMessage]) -> int:
+        # A state that doesn't fit the messages (e.g. they were replaced) is ignored
+        if self.state and self.state.compacted_message_count <= len(messages):
+            return self.state.compacted_message_count
+        return 0
+
+    def prompt_messages(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+        """The messages to send to the LLM: the summary and the messages after it."""
+        start = self._start(messages)
+        if not start:
+            return messages
+        return [SystemMessage(content=SUMMARY_MESSAGE_PREFIX + self.state.summary)] + messages[start:]
+
+    def _measure_prompt(self, messages: list[BaseMessage]) -> tuple[int, bool]:
+        """Prompt tokens, and whether they come from the provider's count."""
+        start = self._start(messages)
+        first_reliable = self.state.message_count_at_compaction if start else 0
+        for index in range(len(messages) - 1, first_reliable - 1, -1):
+            message = messages[index]
+            if isinstance(message, AIMessage) and message.usage_metadata and message.usage_metadata.get("total_tokens"):
+                return message.usage_metadata["total_tokens"] + estimate_messages_tokens(messages[index + 1:]), True
+        return estimate_messages_tokens(self.prompt_messages(messages)), False
+
+    def prompt_tokens(self, messages: list[BaseMessage]) -> int:
+        """
+        Prompt size: the provider's count from the last AI message generated
+        with the current summary, plus an estimate of the messages after it.
+        """
+        return self._measure_prompt(messages)[0]
+
+    def _plan(self, messages: list[BaseMessage], fixed_tokens: int) -> Optional[tuple[int, int, int]]:
+        """(prompt tokens, start, cut) if the prompt is over the threshold and can be compacted."""
+        tokens, from_provider = self._measure_prompt(messages)
+        # The provider's count already includes the system prompt and tools
+        if not from_provider:
+            tokens += fixed_tokens
+        if tokens < self.context_window_size * self.config.threshold_percentage / 100:
+            return None
+        start = self._start(messages)
+        cut = find_compaction_boundary(messages, start, self.config.keep_recent_messages)
+        if cut is None:
+            return None
+        return tokens, start, cut
+
+    def _summary_request(self, messages: list[BaseMessage], start: int, cut: int) -> list[BaseMessage]:
+        transcript = render_transcript(messages[start:cut])
+        if start:
+            # Roll the previous summary into the new one
+            transcript = f"{SUMMARY_MESSAGE_PREFIX}{self.state.summary}\n\n{transcript}"
+        return [
+            SystemMessage(content=self.config.summary_prompt or DEFAULT_SUMMARY_PROMPT),
+            HumanMessage(content=transcript),
+        ]
+
+    def _summary_llm(self):
+        return create_llm(self.config.summary_model_id or self.model_id)
+
+    def _apply(self, messages: list[BaseMessage], fixed_tokens: int, tokens: int, start: int, cut: int, summary: str) -> None:
+        self.state = CompactionState(
+            summary=summary,
+            compacted_message_count=cut,
+            message_count_at_compaction=len(messages),
+            compaction_count=(self.state.compaction_count + 1) if start else 1,
+            tokens_before=tokens,
+            tokens_after=0,
+            compacted_at=int(datetime.timestamp(datetime.now())),
+        )
+        self.state.tokens_after = estimate_messages_tokens(self.prompt_messages(messages)) + fixed_tokens
+        self.updated_state = self.state
+        logger.info(
+            f"Compacted context: summarized messages {start}-{cut - 1}, "
+            f"estimated prompt tokens {self.state.tokens_before} -> {self.state.tokens_after} "
+            f"(saved {self.state.tokens_before - self.state.tokens_after})"
+        )
+
+    def maybe_compact(self, messages: list[BaseMessage], fixed_tokens: int = 0) -> bool:
+        """
+        Compact if the prompt is over the threshold. fixed_tokens (e.g. the
+        system prompt) is added to a local estimate, not to the provider's count,
+        which already includes it. Returns whether it compacted. A failed summary is logged
+        and the full prompt is sent as before.
+        """
+        plan = self._plan(messages, fixed_tokens)
+        if plan is None:
+            return False
+        tokens, start, cut = plan
+        try:
+            response = self._summary_llm().invoke(self._summary_request(messages, start, cut))
+        except Exception as e:
+            logger.error(f"Context compaction failed: {e}")
+            return False
+        self._apply(messages, fixed_tokens, tokens, start, cut, normalize_content(response.content))
+        return True
+
+    async def amaybe_compact(self, messages: list[BaseMessage], fixed_tokens: int = 0) -> bool:
+        """Async version of maybe_compact."""
+        plan = self._plan(messages, fixed_tokens)
+        if plan is None:
+            return False
+        tokens, start, cut = plan
+        try:
+            response = await self._summary_llm().ainvoke(self._summary_request(messages, start, cut))
+        except Exception as e:
+            logger.error(f"Context compaction failed: {e}")
+            return False
+        self._apply(messages, fixed_tokens, tokens, start, cut, normalize_content(response.content))
+        return True
+
+
+def create_compactor(
+    config: Optional[CompactionConfig],
+    model_id: Optional[str],
+    state: Optional[CompactionState] = None,
+) -> Optional[ContextCompactor]:
+    """A compactor for the agent's config, or None if compaction is off or the model's window is unknown."""
+    if not config or not config.enabled:
+        return None
+    llm_model = get_model_or_none(model_id or DEFAULT_MODEL)
+    if not llm_model or not llm_model.context_window_size:
+        return None
+    return ContextCompactor(config, llm_model.context_window_size, model_id, state)
@@ -1,15 +1,17 @@
 from typing import Optional
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
-from Models.LLMModel import get_model
+from Models.LLMModel import LLMModel, get_model
 
 DEFAULT_MODEL = "gpt-4.1"
 
-def create_llm(model_id: Optional[str] = None, for_streaming: bool = False):
+def create_llm(model_id: Optional[str] = None, for_streaming: bool = False, llm_model: Optional[LLMModel] = None):
+    """llm_model is the model record of model_id if it was already read."""
     if not model_id:
         return ChatOpenAI(model=DEFAULT_MODEL, stream_usage=True) if for_streaming else ChatOpenAI(model=DEFAULT_MODEL)
 
-    llm_model = get_model(model_id)
+    if llm_model is None or llm_model.model != model_id:
+        llm_model = get_model(model_id)
 
     if llm_model.model_provider == "anthropic":
         return ChatAnthropic(model=llm_model.model)
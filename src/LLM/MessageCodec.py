@@ -0,0 +1,114 @@
+import os
+import copy
+import gzip
+import json
+from pydantic_core import PydanticUndefined
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, SystemMessage
+from Lib.DecimalConversion import decimal_to_serializable
+
+try:
+    import zstandard
+except ImportError:  # gzip is used when zstandard isn't installed
+    zstandard = None
+
+# Compact encoding of a list of dict messages, used for the messages_blob
+# attribute of inline contexts:
+#   byte 0: format version, byte 1: codec, rest: compressed JSON of the
+#   messages with every field that equals its LangChain default removed.
+FORMAT_VERSION = 1
+CODEC_GZIP = 1
+CODEC_ZSTD = 2
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+# Codec of new blobs (gzip or zstd). Code that can't decode zstd raises on
+# zstd blobs, so only switch to zstd once every running container has
+# zstandard installed.
+MESSAGE_BLOB_CODEC = os.environ.get("MESSAGE_BLOB_CODEC", "gzip")
+
+_MESSAGE_CLASSES = {
+    "human": HumanMessage,
+    "ai": AIMessage,
+    "tool": ToolMessage,
+    "system": SystemMessage,
+}
+# Defaults inside each entry of an AI message's tool_calls
+_TOOL_CALL_DEFAULTS = {"type": "tool_call"}
+
+
+def _field_defaults(message_class) -> dict:
+    """Fields of a LangChain message class that have a default, with that default."""
+    defaults = {}
+    for name, field in message_class.model_fields.items():
+        if name == "type":
+            continue
+        if field.default_factory is not None:
+            defaults[name] = field.default_factory()
+        elif field.default is not PydanticUndefined:
+            defaults[name] = field.default
+    return defaults
+
+
+_DEFAULTS_BY_TYPE = {message_type: _field_defaults(message_class) for message_type, message_class in _MESSAGE_CLASSES.items()}
+
+
+def _strip(values: dict, defaults: dict) -> dict:
+    return {key: value for key, value in values.items() if key not in defaults or value != defaults[key]}
+
+
+def _restore(values: dict, defaults: dict) -> dict:
+    restored = {key: copy.copy(value) for key, value in defaults.items() if key not in values}
+    restored.update(values)
+    return restored
+
+
+def strip_message_defaults(message: dict) -> dict:
+    """Drop the fields of a dict message that equal their defaults."""
+    defaults = _DEFAULTS_BY_TYPE.get(message.get("type"))
+    if defaults is None:
+        return message
+    stripped = _strip(message, defaults)
+    if stripped.get("tool_calls"):
+        stripped["tool_calls"] = [_strip(tool_call, _TOOL_CALL_DEFAULTS) for tool_call in stripped["tool_calls"]]
+    return stripped
+
+
+def restore_message_defaults(message: dict) -> dict:
+    """Inverse of strip_message_defaults. A full message is returned unchanged."""
+    defaults = _DEFAULTS_BY_TYPE.get(message.get("type"))
+    if defaults is None:
+        return message
+    restored = _restore(message, defaults)
+    if restored.get("tool_calls"):
+        restored["tool_calls"] = [_restore(tool_call, _TOOL_CALL_DEFAULTS) for tool_call in restored["tool_calls"]]
+    return restored
+
+
+def encode_messages(messages: list[dict], codec: int = None) -> bytes:
+    if codec is None:
+        codec = CODEC_ZSTD if MESSAGE_BLOB_CODEC == "zstd" and zstandard else CODEC_GZIP
+    stripped = [strip_message_defaults(message) for message in decimal_to_serializable(messages)]
+    payload = json.dumps(stripped, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise Exception("zstandard is not installed", 500)
+        compressed = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    else:
+        compressed = gzip.compress(payload, compresslevel=GZIP_LEVEL)
+    return bytes([FORMAT_VERSION, codec]) + compressed
+
+
+def decode_messages(data) -> list[dict]:
+    # boto3 returns Binary attributes wrapped in boto3.dynamodb.types.Binary
+    data = bytes(getattr(data, "value", data))
+    version, codec = data[0], data[1]
+    if version != FORMAT_VERSION:
+        raise Exception(f"Unknown message encoding version {version}", 500)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise Exception("zstandard is required to decode this context", 500)
+        payload = zstandard.ZstdDecompressor().decompress(data[2:])
+    elif codec == CODEC_GZIP:
+        payload = gzip.decompress(data[2:])
+    else:
+        raise Exception(f"Unknown message codec {codec}", 500)
+    return [restore_message_defaults(message) for message in json.loads(payload)]
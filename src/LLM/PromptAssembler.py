@@ -0,0 +1,112 @@
+import os
+from typing import Optional
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
+from AWS.CloudWatchLogs import get_logger
+from LLM.ContextCompactor import safe_boundaries
+from LLM.CreateLLM import DEFAULT_MODEL
+from LLM.TokenEstimator import estimate_message_tokens
+from Models.LLMModel import get_model_or_none
+
+logger = get_logger(log_level=os.environ["LOG_LEVEL"])
+
+# Share of the context window the prompt may use, the rest is left for the
+# response and for the error of the local token estimate
+DEFAULT_BUDGET_PERCENTAGE = 90.0
+# Tool responses that are kept whatever their age: their content is refreshed
+# on every call and the agent relies on it being in view
+PINNED_TOOL_NAMES = ("open_data_window", "open_memory_window")
+
+
+class PromptAssembler:
+    """
+    Selects the messages sent to the LLM so the prompt fits a token budget.
+    Pinned messages (everything before the first human message, such as the
+    results of initialization tools or a compaction summary, and open
+    DataWindows/MemoryWindows) are always sent. The rest of the budget is
+    filled with the most recent turns. A tool call and its responses are kept
+    or dropped together. The messages themselves are not changed.
+    """
+
+    def __init__(self, token_budget: int, pinned_tool_names: tuple = PINNED_TOOL_NAMES):
+        self.token_budget = token_budget
+        self.pinned_tool_names = pinned_tool_names
+        # Messages left out of the last assembled prompt
+        self.dropped_message_count = 0
+
+    def _units(self, messages: list[BaseMessage]) -> list[tuple[int, int]]:
+        """(start, end) ranges that can't be split: a tool call together with its responses."""
+        safe = safe_boundaries(messages)
+        starts = [index for index in range(len(messages)) if safe[index]]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        return [(start, end) for start, end in zip(starts, starts[1:] + [len(messages)])]
+
+    def _pinned(self, messages: list[BaseMessage], units: list[tuple[int, int]]) -> list[bool]:
+        pinned_call_ids = {
+            tool_call["id"]
+            for message in messages if isinstance(message, AIMessage)
+            for tool_call in message.tool_calls if tool_call["name"] in self.pinned_tool_names
+        }
+        first_human = next((index for index, message in enumerate(messages) if isinstance(message, HumanMessage)), len(messages))
+        return [
+            start < first_human or any(
+                isinstance(message, ToolMessage) and message.tool_call_id in pinned_call_ids
+                for message in messages[start:end]
+            )
+            for start, end in units
+        ]
+
+    def assemble(self, messages: list[BaseMessage], fixed_tokens: int = 0) -> list[BaseMessage]:
+        """
+        The messages to send, within the budget less fixed_tokens (e.g. the
+        system prompt and tool definitions). Returns the messages as they are
+        when they fit. The latest turn is always sent, even over the budget.
+        """
+        self.dropped_message_count = 0
+        budget = self.token_budget - fixed_tokens
+        message_tokens = [estimate_message_tokens(message) for message in messages]
+        total = sum(message_tokens)
+        if total <= budget:
+            return messages
+
+        units = self._units(messages)
+        unit_tokens = [sum(message_tokens[start:end]) for start, end in units]
+        pinned = self._pinned(messages, units)
+        keep = list(pinned)
+        used = sum(tokens for tokens, is_pinned in zip(unit_tokens, pinned) if is_pinned)
+
+        # Fill the rest with the most recent units, without gaps
+        recent = []
+        for index in range(len(units) - 1, -1, -1):
+            if pinned[index]:
+                continue
+            if recent and used + unit_tokens[index] > budget:
+                break
+            recent.append(index)
+            used += unit_tokens[index]
+
+        # Start the recent window at a human message, so it doesn't open
+        # halfway through an older turn
+        recent.reverse()
+        turn_starts = [position for position, index in enumerate(recent) if isinstance(messages[units[index][0]], HumanMessage)]
+        if turn_starts:
+            recent = recent[turn_starts[0]:]
+        for index in recent:
+            keep[index] = True
+
+        selected = [message for (start, end), kept in zip(units, keep) if kept for message in messages[start:end]]
+        self.dropped_message_count = len(messages) - len(selected)
+        if self.dropped_message_count:
+            logger.info(
+                f"Prompt assembled within {budget} tokens: dropped {self.dropped_message_count} of {len(messages)} messages, "
+                f"estimated message tokens {total} -> {sum(estimate_message_tokens(message) for message in selected)}"
+            )
+        return selected
+
+
+def create_prompt_assembler(model_id: Optional[str], budget_percentage: float = DEFAULT_BUDGET_PERCENTAGE) -> Optional[PromptAssembler]:
+    """An assembler for the model's context window, or None if the window is unknown."""
+    llm_model = get_model_or_none(model_id or DEFAULT_MODEL)
+    if not llm_model or not llm_model.context_window_size:
+        return None
+    return PromptAssembler(int(llm_model.context_window_size * budget_percentage / 100))
@@ -0,0 +1,95 @@
+import json
+from langchain_core.messages import BaseMessage, AIMessage, ToolMessage
+from Lib.TTLCache import TTLCache
+
+# Fast local token estimates, for budgeting decisions that don't need the
+# provider's exact count: roughly 4 characters per token for English text and
+# JSON, plus a few tokens of per-message framing.
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Key of the estimate stored with each dict message when it is saved
+TOKEN_ESTIMATE_KEY = "token_estimate"
+
+# Estimates of messages with an id, so a long history isn't re-measured on
+# every LLM call of a turn (tool calls and list content are serialized to count)
+_message_tokens_cache = TTLCache(maxsize=8192, ttl=900)
+
+
+def estimate_text_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _content_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, default=str)
+
+
+def _cache_key(message: BaseMessage):
+    message_id = message.id or (message.tool_call_id if isinstance(message, ToolMessage) else None)
+    if not message_id:
+        return None
+    # DataWindow and MemoryWindow responses are refreshed in place, so the
+    # content length is part of the key
+    content_length = len(message.content) if isinstance(message.content, str) else None
+    return (message.type, message_id, content_length)
+
+
+def _tool_calls_tokens(tool_calls: list) -> int:
+    return sum(
+        estimate_text_tokens(tool_call["name"]) + estimate_text_tokens(json.dumps(tool_call["args"], default=str))
+        for tool_call in tool_calls
+    )
+
+
+def _measure_message_tokens(message: BaseMessage) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_text_tokens(_content_text(message.content))
+    if isinstance(message, AIMessage):
+        tokens += _tool_calls_tokens(message.tool_calls)
+    return tokens
+
+
+def estimate_message_tokens(message: BaseMessage) -> int:
+    key = _cache_key(message)
+    if key is None:
+        return _measure_message_tokens(message)
+    tokens = _message_tokens_cache.get(key)
+    if tokens is None:
+        tokens = _measure_message_tokens(message)
+        _message_tokens_cache.set(key, tokens)
+    return tokens
+
+
+def estimate_messages_tokens(messages: list[BaseMessage]) -> int:
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+def estimate_dict_message_tokens(message: dict) -> int:
+    """
+    Estimate for a stored message, the same as estimate_message_tokens gives
+    its BaseMessage. Content offloaded to S3 is counted by its stored size.
+    """
+    if "blob_ref" in message:
+        content_tokens = (int(message["blob_ref"]["size"]) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    else:
+        content_tokens = estimate_text_tokens(_content_text(message.get("content") or ""))
+    return MESSAGE_OVERHEAD_TOKENS + content_tokens + _tool_calls_tokens(message.get("tool_calls") or [])
+
+
+def stored_message_tokens(message: dict) -> int:
+    """The estimate saved with a dict message, computed if it has none (older messages)."""
+    tokens = message.get(TOKEN_ESTIMATE_KEY)
+    return int(tokens) if tokens is not None else estimate_dict_message_tokens(message)
+
+
+def add_token_estimates(messages: list[dict]) -> None:
+    """Store the estimate on each dict message that doesn't have one yet, before it is written."""
+    for message in messages:
+        if TOKEN_ESTIMATE_KEY not in message:
+            message[TOKEN_ESTIMATE_KEY] = estimate_dict_message_tokens(message)
+
+
+def estimate_tools_tokens(tool_params_list: list) -> int:
+    """Tool definitions are sent with every call; their JSON schemas count towards the prompt."""
+    return sum(estimate_text_tokens(json.dumps(params.model_json_schema(), default=str)) for params in tool_params_list)
@@ -1,7 +1,13 @@
 from typing import List, Callable, Awaitable, Optional
 import json
+import time
 from LLM.AgentTool import AgentTool
 from LLM.ContentNormalizer import normalize_content
+from LLM.ContextCompactor import ContextCompactor
+from LLM.PromptAssembler import PromptAssembler
+from LLM.TokenEstimator import estimate_text_tokens, estimate_tools_tokens
+from LLM.ToolExecutor import aexecute_tool_calls
+from LLM.AgentLoop import AgentLoopBudget, AgentLoopLimits, AgentStepTrace, AgentTrace, StopReason, elapsed_ms
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, BaseMessage, ToolMessage, AIMessage
@@ -27,6 +33,11 @@ class TokenStreamingAgentChat:
         on_tool_response: Optional[Callable[[str, str, str], Awaitable[None]]] = None,
         on_response: Optional[Callable] = None,
         prompt_arg_names: List[str] = [],
+        compactor: Optional[ContextCompactor] = None,
+        prompt_assembler: Optional[PromptAssembler] = None,
+        tool_concurrency: Optional[int] = None,
+        tool_timeout_seconds: Optional[float] = None,
+        limits: Optional[AgentLoopLimits] = None,
     ):
         # Instance variables
         self.messages = messages
@@ -34,6 +45,17 @@ class TokenStreamingAgentChat:
         self.on_tool_call = on_tool_call
         self.on_tool_response = on_tool_response
         self.on_response = on_response
+        self.compactor = compactor
+        self.prompt_assembler = prompt_assembler
+        # Defaults come from ToolExecutor (TOOL_CALL_CONCURRENCY / TOOL_CALL_TIMEOUT_SECONDS)
+        self.tool_concurrency = tool_concurrency
+        self.tool_timeout_seconds = tool_timeout_seconds
+        # Steps, time and tokens an invoke may use (AGENT_* env defaults)
+        self.limits = limits
+        # Trace of the last invoke, for profiling
+        self.trace: Optional[AgentTrace] = None
+        self.name_to_tool = {}
+        self.name_to_tool_id = {}
         self.is_generating = False
         self.should_abort_invocation = False
         self.pending_client_side_tool_calls = None
@@ -44,6 +66,10 @@ class TokenStreamingAgentChat:
             if context and context.get("prompt_args") and arg_name in context["prompt_args"]:
                 prompt = prompt.replace(arg_name, str(context["prompt_args"][arg_name]))
         
+        # The system prompt and tool definitions are sent with every call, count
+        # them towards compaction and the prompt budget
+        self._prompt_tokens = estimate_text_tokens(prompt)
+
         # Escape any remaining curly brackets for ChatPromptTemplate
         prompt = prompt.replace("{", "{{").replace("}", "}}")
 
@@ -65,6 +91,7 @@ class TokenStreamingAgentChat:
                 if tool.tool_id:
                     self.name_to_tool_id[tool_name] = tool.tool_id
             llm = llm.bind_tools(tool_params_list)
+            self._prompt_tokens += estimate_tools_tokens(tool_params_list)
 
         # The chain to invoke
         self.prompt_chain = chat_prompt_template | llm
@@ -79,70 +106,106 @@ class TokenStreamingAgentChat:
         if self.is_generating:
             self.should_abort_invocation = True
 
+    @property
+    def new_compaction_state(self):
+        """The compaction state to save on the context if this chat compacted it, else None."""
+        return self.compactor.updated_state if self.compactor else None
+
     ################
     #              #
     # -- Invoke -- #
     #              #
     ################
     async def invoke(self, load_data_windows: bool = True):
-
+        """
+        Run the agent until it answers, within self.limits. Returns an async
+        generator of the answer's text tokens, or None if the turn produced
+        no text (e.g. it ended on client-side tool calls). self.trace
+        describes the turn once the generator is exhausted.
+        """
         # Reset abort state and mark as generating
         self.should_abort_invocation = False
         self.is_generating = True
 
-        # Refresh data windows if enabled
-        if load_data_windows:
-            self._refresh_data_windows()
-
-        accumulated_response = None
-
-        try:
-            response_generator = self.prompt_chain.astream({"messages": self.messages})
-        except Exception as e:
-            self.is_generating = False
-            raise
-
-        chunk_count = 0
-
+        stream = self._stream(load_data_windows)
+        # Tool rounds run before the first token; a turn without text has no stream
         try:
-          async for chunk in response_generator:
-            chunk_count += 1
-            accumulated_response = chunk if accumulated_response is None else accumulated_response + chunk
-
-            # 1.) Content - only enter the content path if there is actual text.
-            #     Anthropic and reasoning models (codex) put tool_use / function_call /
-            #     reasoning blocks in chunk.content as list items that are truthy but
-            #     contain no user-facing text.
-            if normalize_content(chunk.content):
-
-                on_response_cb = self.on_response
-
-                async def async_response_generator():
-                    nonlocal accumulated_response
-                    ai_message = ''
-
-                    first_text = normalize_content(chunk.content)
-                    ai_message += first_text
-                    yield first_text
+            first_token = await stream.__anext__()
+        except StopAsyncIteration:
+            return None
 
-                    async for res_chunk in response_generator:
-                        if self.should_abort_invocation:
-                            break
-                        accumulated_response = accumulated_response + res_chunk
-                        chunk_text = normalize_content(res_chunk.content)
-                        if chunk_text:
-                            ai_message += chunk_text
-                            yield chunk_text
+        async def token_generator():
+            yield first_token
+            async for token in stream:
+                yield token
 
-                    self.is_generating = False
+        return token_generator()
 
+    async def _stream(self, load_data_windows: bool):
+        """The whole turn as one generator: each step streams its text, then runs its tools."""
+        budget = AgentLoopBudget(self.limits)
+        self.trace = budget.trace
+        stop_reason = None
+        try:
+            while True:
+                stop_reason = budget.stop_reason()
+                if stop_reason:
+                    # Out of steps, time or tokens: the turn ends after its last tool round
+                    return
+
+                step = budget.start_step()
+                start = time.perf_counter()
+                if load_data_windows:
+                    self._refresh_data_windows()
+                step.refresh_ms = elapsed_ms(start)
+                # Every later step refreshes DataWindows, the tools may have changed them
+                load_data_windows = True
+
+                # Summarize older turns if the prompt is getting close to the context window
+                start = time.perf_counter()
+                prompt_messages = self.messages
+                if self.compactor:
+                    await self.compactor.amaybe_compact(self.messages, fixed_tokens=self._prompt_tokens)
+                    prompt_messages = self.compactor.prompt_messages(self.messages)
+
+                # Leave out older turns that don't fit the model's context window
+                if self.prompt_assembler:
+                    prompt_messages = self.prompt_assembler.assemble(prompt_messages, fixed_tokens=self._prompt_tokens)
+                step.prompt_ms = elapsed_ms(start)
+
+                start = time.perf_counter()
+                accumulated_response = None
+                ai_message = ''
+                async for chunk in self.prompt_chain.astream({"messages": prompt_messages}):
                     if self.should_abort_invocation:
-                        self.should_abort_invocation = False
-                        return
-
-                    if on_response_cb:
-                        on_response_cb(accumulated_response)
-
+                        break
+                    accumulated_response = chunk if accumulated_response is None else accumulated_response + chunk
+                    # Only yield actual text. Anthropic and reasoning models (codex)
+                    # put tool_use / function_call / reasoning blocks in chunk.content
+                    # as list items that are truthy but contain no user-facing text.
+                    chunk_text = normalize_content(chunk.content)
+                    if chunk_text:
+                        ai_message += chunk_text
+                        yield chunk_text
+                step.llm_ms = elapsed_ms(start)
+
+                if self.should_abort_invocation:
+                    self.should_abort_invocation = False
+                    stop_reason = StopReason.aborted
+                    return
+
+                if not accumulated_response or (not ai_message and not accumulated_response.tool_calls):
+                    stop_reason = StopReason.completed
+                    return
+
+                if self.on_response:
+                    self.on_response(accumulated_response)
+                budget.record_usage(step, accumulated_response.usage_metadata)
+
+                # LangChain's chunk accumulation has already merged all tool_call_chunks
+                # into parsed tool_calls on the accumulated response, regardless of
+                # provider (OpenAI, Anthropic, reasoning models).
+                if ai_message:
                     # Always save the streamed text as its own AI message
                     self.messages.append(AIMessage(
                         content=ai_message,
@@ -150,7 +213,6 @@ class TokenStreamingAgentChat:
                         response_metadata=accumulated_response.response_metadata,
                         id=accumulated_response.id,
                     ))
-
                     # Some models (Anthropic) send text content followed by tool
                     # calls in the same response. Split into a separate AI message.
                     if accumulated_response.tool_calls:
@@ -160,96 +222,55 @@ class TokenStreamingAgentChat:
                             usage_metadata=accumulated_response.usage_metadata,
                             response_metadata=accumulated_response.response_metadata,
                         ))
-                        await self._process_tool_calls(accumulated_response.tool_calls)
-                        if not self.pending_client_side_tool_calls:
-                            recursive_gen = await self.invoke(load_data_windows=True)
-                            if recursive_gen:
-                                async for token in recursive_gen:
-                                    yield token
-
-                return async_response_generator()
-
-        except Exception as e:
-            self.is_generating = False
-            raise
-
-        # 2.) Tool Section - No text content was streamed.
-        #     LangChain's chunk accumulation has already merged all tool_call_chunks
-        #     into parsed tool_calls on the accumulated response, regardless of
-        #     provider (OpenAI, Anthropic, reasoning models).
-
-        if not accumulated_response or not accumulated_response.tool_calls:
-            self.is_generating = False
-            return None
+                else:
+                    self.messages.append(self._chunk_to_ai_message(accumulated_response))
 
-        if self.on_response:
-            self.on_response(accumulated_response)
+                if not accumulated_response.tool_calls:
+                    stop_reason = StopReason.completed
+                    return
 
-        self.messages.append(self._chunk_to_ai_message(accumulated_response))
-        await self._process_tool_calls(accumulated_response.tool_calls)
-        if self.pending_client_side_tool_calls:
+                await self._process_tool_calls(accumulated_response.tool_calls, step, budget)
+                if self.pending_client_side_tool_calls:
+                    stop_reason = StopReason.client_side_tools
+                    return
+        finally:
             self.is_generating = False
-            return None
-        return await self.invoke(load_data_windows=True)
+            budget.finish(stop_reason)
 
-    async def _process_tool_calls(self, tool_calls):
-        """Execute tool calls and append ToolMessages to the conversation.
+    async def _process_tool_calls(self, tool_calls, step: Optional[AgentStepTrace] = None, budget: Optional[AgentLoopBudget] = None):
+        """Execute tool calls concurrently and append their ToolMessages in call order.
         Client-side tools are not executed; they are stored in pending_client_side_tool_calls."""
         client_side_calls = []
+        server_side_calls = []
 
         for tool_call in tool_calls:
-            tool_call_id = tool_call['id']
-            tool_call_name = tool_call['name']
-            tool_call_args = tool_call['args']
-
-            tool = self.name_to_tool.get(tool_call_name)
+            tool = self.name_to_tool.get(tool_call['name'])
 
             # Skip client-side tools -- don't execute or add ToolMessage
             if tool and tool.is_client_side_tool:
                 client_side_calls.append({
-                    "tool_call_id": tool_call_id,
-                    "tool_name": tool_call_name,
-                    "tool_input": tool_call_args,
+                    "tool_call_id": tool_call['id'],
+                    "tool_name": tool_call['name'],
+                    "tool_input": tool_call['args'],
                 })
-                continue
-
-            try:
-                if self.on_tool_call:
-                    await self.on_tool_call(
-                        id=tool_call_id,
-                        tool_name=tool_call_name,
-                        tool_input=tool_call_args
-                    )
-
-                params = {**tool_call_args}
-
-                if tool.is_async:
-                    params['tool_call_id'] = tool_call_id
-
-                if tool.pass_context:
-                    params['context'] = self.context
-
-                tool_response = await tool.function(**params)
-
-                if self.on_tool_response:
-                    await self.on_tool_response(
-                        id=tool_call_id,
-                        tool_name=tool_call_name,
-                        tool_output=tool_response
-                    )
-
-                tool_message = ToolMessage(
-                    tool_call_id=tool_call_id,
-                    content=tool_response
-                )
-
-            except Exception as e:
-                tool_message = ToolMessage(
-                    tool_call_id=tool_call_id,
-                    content=f"Issue calling tool: {tool_call_name}, error: {e}"
-                )
-
-            self.messages.append(tool_message)
+            else:
+                server_side_calls.append(tool_call)
+
+        durations = {}
+        start = time.perf_counter()
+        tool_messages = await aexecute_tool_calls(
+            server_side_calls,
+            self.name_to_tool,
+            self.context,
+            concurrency=self.tool_concurrency,
+            timeout=budget.tool_timeout(self.tool_timeout_seconds) if budget else self.tool_timeout_seconds,
+            on_tool_call=self.on_tool_call,
+            on_tool_response=self.on_tool_response,
+            durations=durations,
+        )
+        if budget:
+            budget.record_tool_calls(step, server_side_calls, tool_messages, durations, start)
+        self.messages.extend(tool_messages)
 
         if client_side_calls:
             self.pending_client_side_tool_calls = client_side_calls
@@ -0,0 +1,188 @@
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import Awaitable, Callable, Optional
+from langchain_core.messages import ToolMessage
+from LLM.AgentTool import AgentTool
+from LLM.TerminatingConfig import TerminatingConfig
+
+# Server-side tool calls of one model response run one after another unless
+# TOOL_CALL_CONCURRENCY is above 1, then at most that many at a time. Tools
+# that take the context (memory writes, pass_event) always run one at a time,
+# in call order, since they read and write shared state.
+TOOL_CALL_CONCURRENCY = int(os.environ.get("TOOL_CALL_CONCURRENCY", "1"))
+# A tool call that takes longer gets an error ToolMessage instead of its
+# result. Unset means no limit.
+TOOL_CALL_TIMEOUT_SECONDS = float(os.environ["TOOL_CALL_TIMEOUT_SECONDS"]) if os.environ.get("TOOL_CALL_TIMEOUT_SECONDS") else None
+
+
+def calls_to_execute(
+    tool_calls: list[dict],
+    name_to_tool_id: dict,
+    terminating_config: Optional[TerminatingConfig] = None,
+) -> tuple[list[dict], Optional[dict]]:
+    """
+    The tool calls to run and the terminating one among them, if any. Calls
+    after the first terminating call (in the model's order) are not run, so
+    concurrent execution ends a turn exactly where sequential execution did.
+    """
+    if not terminating_config:
+        return tool_calls, None
+    for index, tool_call in enumerate(tool_calls):
+        tool_id = name_to_tool_id.get(tool_call["name"])
+        if tool_id and tool_id in terminating_config.tool_ids:
+            return tool_calls[:index + 1], tool_call
+    return tool_calls, None
+
+
+def _tool_params(tool: AgentTool, tool_call: dict, context: Optional[dict]) -> dict:
+    params = {**tool_call["args"]}
+    # Async tools respond later, under the id of the call
+    if tool.is_async:
+        params["tool_call_id"] = tool_call["id"]
+    if tool.pass_context:
+        params["context"] = context
+    return params
+
+
+def _error_message(tool_call: dict, error) -> ToolMessage:
+    return ToolMessage(tool_call_id=tool_call["id"], content=f"Issue calling tool: {tool_call['name']}, error: {error}", status="error")
+
+
+def _timeout_error(timeout: float) -> str:
+    return f"timed out after {timeout:g} seconds"
+
+
+def _run_tool(name_to_tool: dict, tool_call: dict, context: Optional[dict], durations: dict) -> ToolMessage:
+    start = time.perf_counter()
+    try:
+        tool = name_to_tool[tool_call["name"]]
+        return ToolMessage(tool_call_id=tool_call["id"], content=tool.function(**_tool_params(tool, tool_call, context)))
+    finally:
+        durations[tool_call["id"]] = time.perf_counter() - start
+
+
+def _passes_context(name_to_tool: dict, tool_call: dict) -> bool:
+    tool = name_to_tool.get(tool_call["name"])
+    return bool(tool and tool.pass_context)
+
+
+def _run_after(previous, name_to_tool: dict, tool_call: dict, context: Optional[dict], durations: dict) -> ToolMessage:
+    # Calls are picked up in submission order, so the previous one is
+    # already running or done and waiting on it can't starve the pool
+    if previous is not None:
+        wait([previous])
+    return _run_tool(name_to_tool, tool_call, context, durations)
+
+
+def execute_tool_calls(
+    tool_calls: list[dict],
+    name_to_tool: dict,
+    context: Optional[dict] = None,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    durations: Optional[dict] = None,
+) -> list[ToolMessage]:
+    """
+    Run server-side tool calls on a thread pool and return their ToolMessages
+    in the order of tool_calls, however they finish. A failed or timed out
+    call gets an error message; a timed out thread is left to finish on its
+    own, since Python can't stop it. durations, if given, gets the seconds
+    each call took by tool call id. Calls to tools that take the context run
+    one at a time, in call order, alongside the others.
+    """
+    durations = durations if durations is not None else {}
+    concurrency = concurrency or TOOL_CALL_CONCURRENCY
+    timeout = timeout if timeout is not None else TOOL_CALL_TIMEOUT_SECONDS
+    if not tool_calls:
+        return []
+
+    # One call, or concurrency turned off, without a timeout: no threads needed
+    if timeout is None and (len(tool_calls) == 1 or concurrency <= 1):
+        messages = []
+        for tool_call in tool_calls:
+            try:
+                messages.append(_run_tool(name_to_tool, tool_call, context, durations))
+            except Exception as e:
+                messages.append(_error_message(tool_call, e))
+        return messages
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(tool_calls))))
+    try:
+        futures = []
+        previous_context_call = None
+        for tool_call in tool_calls:
+            if _passes_context(name_to_tool, tool_call):
+                future = executor.submit(_run_after, previous_context_call, name_to_tool, tool_call, context, durations)
+                previous_context_call = future
+            else:
+                future = executor.submit(_run_tool, name_to_tool, tool_call, context, durations)
+            futures.append(future)
+        messages = []
+        for tool_call, future in zip(tool_calls, futures):
+            try:
+                # The wait for a result starts once the previous one is in, so
+                # a call queued behind others isn't charged for their time
+                messages.append(future.result(timeout=timeout))
+            except FutureTimeoutError:
+                future.cancel()
+                durations[tool_call["id"]] = timeout
+                messages.append(_error_message(tool_call, _timeout_error(timeout)))
+            except Exception as e:
+                messages.append(_error_message(tool_call, e))
+        return messages
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def aexecute_tool_calls(
+    tool_calls: list[dict],
+    name_to_tool: dict,
+    context: Optional[dict] = None,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    on_tool_call: Optional[Callable[..., Awaitable[None]]] = None,
+    on_tool_response: Optional[Callable[..., Awaitable[None]]] = None,
+    durations: Optional[dict] = None,
+) -> list[ToolMessage]:
+    """
+    Async version of execute_tool_calls for async tool functions, run with
+    asyncio.gather. on_tool_call and on_tool_response are awaited as each
+    call starts and finishes, so responses may be reported out of order.
+    Calls to tools that take the context run one at a time, in call order.
+    """
+    durations = durations if durations is not None else {}
+    concurrency = concurrency or TOOL_CALL_CONCURRENCY
+    timeout = timeout if timeout is not None else TOOL_CALL_TIMEOUT_SECONDS
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # Waiters get the lock first come, first served, i.e. in call order
+    context_lock = asyncio.Lock()
+
+    async def run_tool(tool_call: dict) -> ToolMessage:
+        try:
+            if on_tool_call:
+                await on_tool_call(id=tool_call["id"], tool_name=tool_call["name"], tool_input=tool_call["args"])
+            start = time.perf_counter()
+            try:
+                tool = name_to_tool[tool_call["name"]]
+                call = tool.function(**_tool_params(tool, tool_call, context))
+                tool_response = await (asyncio.wait_for(call, timeout) if timeout is not None else call)
+            finally:
+                durations[tool_call["id"]] = time.perf_counter() - start
+            if on_tool_response:
+                await on_tool_response(id=tool_call["id"], tool_name=tool_call["name"], tool_output=tool_response)
+            return ToolMessage(tool_call_id=tool_call["id"], content=tool_response)
+        except asyncio.TimeoutError:
+            return _error_message(tool_call, _timeout_error(timeout))
+        except Exception as e:
+            return _error_message(tool_call, e)
+
+    async def run(tool_call: dict) -> ToolMessage:
+        async with semaphore:
+            if _passes_context(name_to_tool, tool_call):
+                async with context_lock:
+                    return await run_tool(tool_call)
+            return await run_tool(tool_call)
+
+    return list(await asyncio.gather(*(run(tool_call) for tool_call in tool_calls)))
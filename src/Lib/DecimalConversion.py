@@ -0,0 +1,87 @@
+from decimal import Decimal
+from typing import Any, Callable
+
+# Conversions between Python floats and the Decimals boto3 requires for
+# DynamoDB numbers, in both directions.
+#
+# Both walks are copy-on-write: a dict or list is only copied when one of its
+# values actually changed, and otherwise the original object is returned. A
+# message with no numbers in it costs a read-only pass with no allocations,
+# instead of a full deep copy of the conversation.
+
+
+# Leaves that never need converting in either direction
+_SCALAR_TYPES = frozenset({str, int, bool, type(None), bytes})
+
+
+def _float_to_decimal_leaf(value: float) -> Decimal:
+    return Decimal(str(value))
+
+
+def _decimal_to_number_leaf(value: Decimal):
+    # Whole numbers come back as int, everything else as float
+    if value == value.to_integral_value():
+        return int(value)
+    return float(value)
+
+
+def _build_walker(leaf_type: type, convert_leaf: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def walk_dict(obj: dict) -> dict:
+        converted = None
+        for key, value in obj.items():
+            value_type = type(value)
+            if value_type in _SCALAR_TYPES:
+                continue
+            new_value = dispatch.get(value_type, walk_other)(value)
+            if new_value is not value:
+                if converted is None:
+                    converted = dict(obj)
+                converted[key] = new_value
+        return obj if converted is None else converted
+
+    def walk_list(obj: list) -> list:
+        converted = None
+        for index, value in enumerate(obj):
+            value_type = type(value)
+            if value_type in _SCALAR_TYPES:
+                continue
+            new_value = dispatch.get(value_type, walk_other)(value)
+            if new_value is not value:
+                if converted is None:
+                    converted = list(obj)
+                converted[index] = new_value
+        return obj if converted is None else converted
+
+    def walk_other(obj: Any) -> Any:
+        # Subclasses (OrderedDict, pydantic-built lists, ...) are rare, take the slow path
+        if isinstance(obj, dict):
+            return walk_dict(obj)
+        if isinstance(obj, list):
+            return walk_list(obj)
+        if isinstance(obj, leaf_type):
+            return convert_leaf(obj)
+        return obj
+
+    # Exact-type dispatch; scalars in _SCALAR_TYPES are skipped before lookup
+    dispatch = {dict: walk_dict, list: walk_list, leaf_type: convert_leaf}
+
+    def walk(obj: Any) -> Any:
+        if type(obj) in _SCALAR_TYPES:
+            return obj
+        return dispatch.get(type(obj), walk_other)(obj)
+
+    return walk
+
+
+_float_to_decimal = _build_walker(float, _float_to_decimal_leaf)
+_decimal_to_serializable = _build_walker(Decimal, _decimal_to_number_leaf)
+
+
+def float_to_decimal(obj: Any) -> Any:
+    """Convert floats to Decimal for DynamoDB. Returns obj itself if it has no floats."""
+    return _float_to_decimal(obj)
+
+
+def decimal_to_serializable(obj: Any) -> Any:
+    """Convert Decimals read from DynamoDB to int/float. Returns obj itself if it has no Decimals."""
+    return _decimal_to_serializable(obj)
@@ -0,0 +1,44 @@
+import importlib
+from typing import Any, Iterator
+from collections.abc import Mapping
+
+_resolved: dict[str, Any] = {}
+
+
+def import_string(dotted_path: str) -> Any:
+    """
+    Import and return the attribute at dotted_path, e.g.
+    "RequestHandlers.Job.GetJobHandler.get_job_handler".
+    The module is only imported the first time the path is resolved.
+    """
+    attribute = _resolved.get(dotted_path)
+    if attribute is None:
+        module_path, _, attribute_name = dotted_path.rpartition(".")
+        if not module_path:
+            raise ImportError(f"{dotted_path} is not a dotted path")
+        module = importlib.import_module(module_path)
+        attribute = getattr(module, attribute_name)
+        _resolved[dotted_path] = attribute
+    return attribute
+
+
+class LazyRegistry(Mapping):
+    """
+    Read-only mapping of name -> dotted path that imports each value on first
+    access. Membership checks and key listing never import anything.
+    """
+
+    def __init__(self, paths: dict[str, str]):
+        self._paths = paths
+
+    def __getitem__(self, name: str) -> Any:
+        return import_string(self._paths[name])
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
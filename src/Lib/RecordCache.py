@@ -0,0 +1,64 @@
+import os
+from typing import Hashable, Optional
+from pydantic import BaseModel
+from Lib.TTLCache import TTLCache
+
+# Agents, tools, parameter definitions and models are read on every chat turn
+# but rarely change. Warm containers keep them for RECORD_CACHE_TTL_SECONDS;
+# a save or delete in another container becomes visible once the entry expires.
+# RECORD_CACHE_ENABLED=false (or patching it in tests) turns every record cache off.
+RECORD_CACHE_ENABLED = os.environ.get("RECORD_CACHE_ENABLED", "true").lower() != "false"
+RECORD_CACHE_MAX_SIZE = int(os.environ.get("RECORD_CACHE_MAX_SIZE", "512"))
+RECORD_CACHE_TTL_SECONDS = float(os.environ.get("RECORD_CACHE_TTL_SECONDS", "60"))
+
+_record_caches: dict[str, "RecordCache"] = {}
+
+
+class RecordCache:
+    """
+    TTL cache of records by id. Records are copied in and out, so changing one
+    a caller got doesn't change the cached one. A record with an updated_at
+    only replaces a cached one that is not newer, so a read that started
+    before a save can't put back the record the save replaced.
+    """
+
+    def __init__(self, name: str, maxsize: int = RECORD_CACHE_MAX_SIZE, ttl: float = RECORD_CACHE_TTL_SECONDS):
+        self.name = name
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        _record_caches[name] = self
+
+    def get(self, record_id: Hashable) -> Optional[BaseModel]:
+        if not RECORD_CACHE_ENABLED:
+            return None
+        record = self._cache.get(record_id)
+        return record.model_copy(deep=True) if record is not None else None
+
+    def put(self, record_id: Hashable, record: BaseModel) -> None:
+        if not RECORD_CACHE_ENABLED:
+            return
+        updated_at = getattr(record, "updated_at", None)
+        if updated_at is not None:
+            cached = self._cache.peek(record_id)
+            cached_updated_at = getattr(cached, "updated_at", None)
+            if cached_updated_at is not None and cached_updated_at > updated_at:
+                return
+        self._cache.set(record_id, record.model_copy(deep=True))
+
+    def invalidate(self, record_id: Hashable) -> None:
+        self._cache.invalidate(record_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+def record_cache_stats() -> dict[str, dict]:
+    """Hits, misses and size of every record cache, by name."""
+    return {name: cache.stats() for name, cache in _record_caches.items()}
+
+
+def clear_record_caches() -> None:
+    for cache in _record_caches.values():
+        cache.clear()
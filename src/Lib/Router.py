@@ -0,0 +1,111 @@
+from typing import Optional
+
+# Path parameters that swallow the rest of the path (slashes included),
+# e.g. /scrape-page/{link} where link is a full URL.
+GREEDY_PARAMS = {"link"}
+
+
+class RouteMatch:
+    def __init__(self, handler_info: dict, params: dict):
+        self.handler_info = handler_info
+        self.params = params
+
+
+class _RouteNode:
+    __slots__ = ("static", "param_name", "param_child", "greedy_name", "greedy_methods", "methods")
+
+    def __init__(self):
+        self.static: dict[str, "_RouteNode"] = {}
+        self.param_name: Optional[str] = None
+        self.param_child: Optional["_RouteNode"] = None
+        self.greedy_name: Optional[str] = None
+        self.greedy_methods: Optional[dict] = None
+        self.methods: Optional[dict] = None
+
+
+class Router:
+    """
+    Segment trie built once from a handler registry of the form
+    {"/path/{param}": {"GET": {...handler info...}}}.
+
+    Fully static paths are answered from a dict lookup. Everything else walks
+    the trie one path segment at a time, preferring static segments over
+    {param} segments and backtracking if the branch it took has no handler
+    for the requested method.
+    """
+
+    def __init__(self, handler_registry: dict):
+        self._static_routes: dict[str, dict] = {}
+        self._root = _RouteNode()
+        for route, methods in handler_registry.items():
+            self.add_route(route, methods)
+
+    def add_route(self, route: str, methods: dict) -> None:
+        segments = route.split("/")
+        if not any(_is_param(segment) for segment in segments):
+            self._static_routes[route] = methods
+            return
+
+        node = self._root
+        for i, segment in enumerate(segments):
+            if _is_param(segment):
+                name = segment[1:-1]
+                if name in GREEDY_PARAMS:
+                    if i != len(segments) - 1:
+                        raise ValueError(f"Greedy parameter {{{name}}} must be the last segment of route {route}")
+                    node.greedy_name = name
+                    node.greedy_methods = methods
+                    return
+                if node.param_child is None:
+                    node.param_child = _RouteNode()
+                    node.param_name = name
+                elif node.param_name != name:
+                    raise ValueError(f"Conflicting parameter names {{{node.param_name}}} and {{{name}}} in route {route}")
+                node = node.param_child
+            else:
+                node = node.static.setdefault(segment, _RouteNode())
+        node.methods = methods
+
+    def match(self, request_path: str, method: str) -> Optional[RouteMatch]:
+        methods = self._static_routes.get(request_path)
+        if methods and method in methods:
+            return RouteMatch(methods[method], {})
+
+        params = {}
+        handler_info = self._match_node(self._root, request_path.split("/"), 0, method, params)
+        if handler_info is None:
+            return None
+        return RouteMatch(handler_info, params)
+
+    def _match_node(self, node: _RouteNode, segments: list[str], index: int, method: str, params: dict) -> Optional[dict]:
+        if index == len(segments):
+            if node.methods and method in node.methods:
+                return node.methods[method]
+            return None
+
+        segment = segments[index]
+
+        static_child = node.static.get(segment)
+        if static_child is not None:
+            handler_info = self._match_node(static_child, segments, index + 1, method, params)
+            if handler_info is not None:
+                return handler_info
+
+        if node.param_child is not None and segment:
+            params[node.param_name] = segment
+            handler_info = self._match_node(node.param_child, segments, index + 1, method, params)
+            if handler_info is not None:
+                return handler_info
+            del params[node.param_name]
+
+        if node.greedy_methods is not None and method in node.greedy_methods:
+            remainder = "/".join(segments[index:])
+            if remainder:
+                params[node.greedy_name] = remainder
+                return node.greedy_methods[method]
+
+        return None
+
+
+def _is_param(segment: str) -> bool:
+    return len(segment) > 2 and segment[0] == "{" and segment[-1] == "}"
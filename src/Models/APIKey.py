@@ -1,14 +1,23 @@
 import os
 from datetime import datetime, timedelta
 import uuid
+from typing import Optional
 from AWS.DynamoDB import get_item, put_item, delete_item
 from pydantic import BaseModel
-from Lib.JWT import generate_jwt, validate_jwt, extract_jwt_contents
+from Lib.JWT import generate_jwt, extract_jwt_contents
+from Lib.TTLCache import TTLCache
 
 API_KEYS_TABLE_NAME = os.environ["API_KEYS_TABLE_NAME"]
 API_KEYS_PRIMARY_KEY = os.environ["API_KEYS_PRIMARY_KEY"]
 JWT_SECRET = os.environ["JWT_SECRET"]
 
+# api_key_id -> valid, kept across invocations in a warm container.
+# Revocations made by other containers become visible once the entry expires.
+_api_key_validity_cache = TTLCache(
+    maxsize=int(os.environ.get("API_KEY_CACHE_MAX_SIZE", "1024")),
+    ttl=float(os.environ.get("API_KEY_CACHE_TTL_SECONDS", "60")),
+)
+
 class APIKey(BaseModel):
     api_key_id: str
     org_id: str
@@ -89,43 +98,54 @@ def create_client_api_key(org_id: str, user_id: str) -> APIKey:
     put_item(API_KEYS_TABLE_NAME, api_key.model_dump())
     return api_key
 
-def validate_api_key(token: str) -> bool:
+def authenticate_api_key(token: str) -> Optional[dict]:
     """
-    Validate an API key token.
-    Returns True if the token is valid JWT and the key exists in DB with valid=True.
+    Validate an API key token in a single pass.
+    Decodes the JWT once and checks the key's validity (cached per api_key_id).
+    Returns the token contents if the key is valid, otherwise None.
     """
-    # First validate JWT signature and expiration
-    if not validate_jwt(JWT_SECRET, token):
-        return False
-    
     try:
-        # Extract contents to get api_key_id
         contents = extract_jwt_contents(JWT_SECRET, token)
-        api_key_id = contents.get("api_key_id")
-        
-        if not api_key_id:
-            return False
-        
-        # Check if the key exists and is valid
-        item = get_item(API_KEYS_TABLE_NAME, API_KEYS_PRIMARY_KEY, api_key_id)
-        if not item:
-            return False
-        
-        api_key = APIKey(**item)
-        return api_key.valid
-        
     except Exception:
-        return False
+        return None
+
+    api_key_id = contents.get("api_key_id")
+    if not api_key_id:
+        return None
+
+    valid = _api_key_validity_cache.get(api_key_id)
+    if valid is None:
+        try:
+            item = get_item(API_KEYS_TABLE_NAME, API_KEYS_PRIMARY_KEY, api_key_id)
+            valid = APIKey(**item).valid if item else False
+        except Exception:
+            return None
+        _api_key_validity_cache.set(api_key_id, valid)
+
+    return contents if valid else None
+
+def invalidate_api_key_cache(api_key_id: str) -> None:
+    """
+    Drop the cached validity of an API key in this container.
+    """
+    _api_key_validity_cache.invalidate(api_key_id)
+
+def validate_api_key(token: str) -> bool:
+    """
+    Validate an API key token.
+    Returns True if the token is valid JWT and the key exists in DB with valid=True.
+    """
+    return authenticate_api_key(token) is not None
 
 def get_api_key_contents(token: str) -> dict:
     """
     Extract and return the contents of a valid API key token.
     Raises an exception if the token is invalid.
     """
-    if not validate_api_key(token):
+    contents = authenticate_api_key(token)
+    if contents is None:
         raise Exception("Invalid API key token", 401)
-    
-    return extract_jwt_contents(JWT_SECRET, token)
+    return contents
 
 def get_api_key(api_key_id: str) -> APIKey:
     """
@@ -144,6 +164,7 @@ def revoke_api_key(api_key_id: str) -> APIKey:
     api_key.valid = False
     api_key.updated_at = int(datetime.now().timestamp())
     put_item(API_KEYS_TABLE_NAME, api_key.model_dump())
+    invalidate_api_key_cache(api_key_id)
     return api_key
 
 def delete_api_key(api_key_id: str) -> None:
@@ -151,6 +172,7 @@ def delete_api_key(api_key_id: str) -> None:
     Permanently delete an API key from the database.
     """
     delete_item(API_KEYS_TABLE_NAME, API_KEYS_PRIMARY_KEY, api_key_id)
+    invalidate_api_key_cache(api_key_id)
 
 def get_api_key_type(token: str) -> str:
     """
@@ -1,18 +1,23 @@
 import os
 from datetime import datetime
 import uuid
-from AWS.DynamoDB import get_item, get_items_by_scan, put_item, delete_item, get_all_items_by_index
+from AWS.DynamoDB import get_item, batch_get_items, put_item, delete_item, get_all_items_by_index, batch_delete_items, BULK_DELETE_MAX_WORKERS
 from AWS.CloudWatchLogs import get_logger
 from pydantic import BaseModel
 from typing import Optional
 from Models import User, Tool
+from LLM.CompactionConfig import CompactionConfig
 from Tools import ToolRegistry
+from Lib.RecordCache import RecordCache
 
 logger = get_logger(log_level=os.environ["LOG_LEVEL"])
 
 AGENTS_TABLE_NAME = os.environ["AGENTS_TABLE_NAME"]
 AGENTS_PRIMARY_KEY = os.environ["AGENTS_PRIMARY_KEY"]
 
+# agent_id -> Agent, kept up to date by save_agent and the deletes
+_agent_cache = RecordCache("agents")
+
 class Agent(BaseModel):
     agent_id: str
     agent_name: str
@@ -28,6 +33,7 @@ class Agent(BaseModel):
     voice_id: Optional[str] = None
     initialize_tool_id: Optional[str] = None
     model_id: Optional[str] = None
+    compaction_config: Optional[CompactionConfig] = None
     created_at: int
     updated_at: int
 
@@ -49,6 +55,7 @@ class CreateAgentParams(BaseModel):
     voice_id: Optional[str] = None
     initialize_tool_id: Optional[str] = None
     model_id: Optional[str] = None
+    compaction_config: Optional[CompactionConfig] = None
 
 class UpdateAgentParams(BaseModel):
     agent_name: Optional[str] = None
@@ -62,6 +69,7 @@ class UpdateAgentParams(BaseModel):
     voice_id: Optional[str] = None
     initialize_tool_id: Optional[str] = None
     model_id: Optional[str] = None
+    compaction_config: Optional[CompactionConfig] = None
 
 def agent_exists(agent_id: str) -> bool:
     return get_item(AGENTS_TABLE_NAME, AGENTS_PRIMARY_KEY, agent_id) != None
@@ -79,6 +87,7 @@ def create_agent(
         voice_id: Optional[str] = None,
         initialize_tool_id: Optional[str] = None,
         model_id: Optional[str] = None,
+        compaction_config: Optional[CompactionConfig] = None,
     ) -> Agent:
     agentData = {
         AGENTS_PRIMARY_KEY: str(uuid.uuid4()),
@@ -95,28 +104,48 @@ def create_agent(
         "voice_id": voice_id,
         "initialize_tool_id": initialize_tool_id,
         "model_id": model_id,
+        "compaction_config": compaction_config.model_dump() if compaction_config else None,
         "created_at": int(datetime.timestamp(datetime.now())),
         "updated_at": int(datetime.timestamp(datetime.now())),
     }
     agent = Agent(**agentData)
     put_item(AGENTS_TABLE_NAME, agentData)
+    cache_agent(agent)
     return agent
 
 def get_agent(agent_id: str) -> Agent:
+    agent = _agent_cache.get(agent_id)
+    if agent is not None:
+        return agent
     item = get_item(AGENTS_TABLE_NAME, AGENTS_PRIMARY_KEY, agent_id)
     if item is None:
         raise Exception(f"Agent with id: {agent_id} does not exist", 404)
-    return Agent(**item)
+    agent = Agent(**item)
+    cache_agent(agent)
+    return agent
+
+def get_cached_agent(agent_id: str) -> Optional[Agent]:
+    """The agent if it is cached, without reading the table."""
+    return _agent_cache.get(agent_id)
+
+def cache_agent(agent: Agent) -> None:
+    """Cache an agent read some other way (a batch read for example)."""
+    _agent_cache.put(agent.agent_id, agent)
 
 def save_agent(agent: Agent) -> None:
     agent.updated_at = int(datetime.timestamp(datetime.now()))
     put_item(AGENTS_TABLE_NAME, agent.model_dump())
+    cache_agent(agent)
 
 def delete_agent(agent_id: str) -> None:
     delete_item(AGENTS_TABLE_NAME, AGENTS_PRIMARY_KEY, agent_id)
+    _agent_cache.invalidate(agent_id)
 
 def get_agent_for_user(agent_id: str, user: User.User) -> Agent:
-    agent = get_agent(agent_id)
+    return check_agent_for_user(get_agent(agent_id), user)
+
+def check_agent_for_user(agent: Agent, user: User.User) -> Agent:
+    """Return the agent if the user may use it, for an agent already read."""
     if (agent.is_public):
         return agent
     if (agent.org_id == "default"):
@@ -135,9 +164,14 @@ def parse_agent_items(items: list[dict]) -> list[Agent]:
     return agents
 
 def get_agents_from_ids(agent_ids: list[str]) -> list[Agent]:
-    items = get_items_by_scan(AGENTS_TABLE_NAME, AGENTS_PRIMARY_KEY, agent_ids)
+    items = batch_get_items(AGENTS_TABLE_NAME, AGENTS_PRIMARY_KEY, agent_ids)
     return parse_agent_items(items)
 
+def get_history_agents_from_ids(agent_ids: list[str]) -> list[HistoryAgent]:
+    """Just the fields the context history shows, without reading whole agent items."""
+    items = batch_get_items(AGENTS_TABLE_NAME, AGENTS_PRIMARY_KEY, agent_ids, projection_expression=f"{AGENTS_PRIMARY_KEY}, agent_name, agent_description")
+    return [HistoryAgent(**item) for item in items]
+
 def get_agents_in_org(org_id: str) -> list[Agent]:
     items = get_all_items_by_index(AGENTS_TABLE_NAME, "org_id", org_id)
     return parse_agent_items(items)
@@ -147,7 +181,9 @@ def get_default_agents() -> list[Agent]:
     return parse_agent_items(itmes)
 
 def get_public_agent(agent_id: str) -> Agent:
-    agent = get_agent(agent_id)
+    return check_public_agent(get_agent(agent_id))
+
+def check_public_agent(agent: Agent) -> Agent:
     if (agent.is_public):
         return agent
     raise Exception(f"Agent is not public", 403)
@@ -160,8 +196,10 @@ def transform_to_history_agent(agent: Agent) -> HistoryAgent:
    )
 
 def delete_agents_in_org(org_id: str) -> None:
-    agents = get_agents_in_org(org_id)
-    for agent in agents:
-        delete_agent(agent.agent_id)
+    items = get_all_items_by_index(AGENTS_TABLE_NAME, "org_id", org_id, projection_expression=AGENTS_PRIMARY_KEY)
+    agent_ids = [item[AGENTS_PRIMARY_KEY] for item in items]
+    batch_delete_items(AGENTS_TABLE_NAME, AGENTS_PRIMARY_KEY, agent_ids, max_workers=BULK_DELETE_MAX_WORKERS)
+    for agent_id in agent_ids:
+        _agent_cache.invalidate(agent_id)
 
 
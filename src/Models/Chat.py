@@ -1,12 +1,15 @@
 from pydantic import BaseModel
 from typing import Optional, List, Union
 from LLM.TerminatingConfig import TerminatingConfig
+from LLM.AgentLoop import AgentTrace
 
 class ChatInput(BaseModel):
     context_id: str
     message: str
     save_ai_messages: Optional[bool] = True
     terminating_config: Optional[TerminatingConfig] = None
+    # Return the per-step timing trace of the turn in ChatResponse.trace
+    include_trace: Optional[bool] = False
 
 # Import message types from Context for use in ChatResponse
 # We'll define them inline to avoid circular imports
@@ -39,6 +42,7 @@ class ClientSideToolResponseItem(BaseModel):
 class ClientSideToolResponsesInput(BaseModel):
     context_id: str
     tool_responses: List[ClientSideToolResponseItem]
+    include_trace: Optional[bool] = False
 
 class ChatResponse(BaseModel):
     response: str
@@ -48,4 +52,9 @@ class ChatResponse(BaseModel):
     context_percentage: Optional[float] = None
     invocation_cost: Optional[float] = None
     events: Optional[list[dict]] = None
-    client_side_tool_calls: Optional[List[ClientSideToolCall]] = None
\ No newline at end of file
+    client_side_tool_calls: Optional[List[ClientSideToolCall]] = None
+    # max_steps, deadline or token_budget when the turn was stopped by one of
+    # its limits (response is then empty)
+    stopped_reason: Optional[str] = None
+    # Steps of the turn with their LLM, tool and refresh times, if include_trace was set
+    trace: Optional[AgentTrace] = None
\ No newline at end of file
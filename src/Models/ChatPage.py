@@ -1,7 +1,7 @@
 import os
 from datetime import datetime
 import uuid
-from AWS.DynamoDB import get_item, put_item, delete_item, get_all_items_by_index
+from AWS.DynamoDB import get_item, put_item, delete_item, get_all_items_by_index, batch_delete_items, BULK_DELETE_MAX_WORKERS
 from AWS.CloudWatchLogs import get_logger
 from pydantic import BaseModel
 from typing import Optional
@@ -114,8 +114,8 @@ def get_chat_pages_in_org(org_id: str) -> list[ChatPage]:
     return parse_chat_page_items(items)
 
 def delete_all_chat_pages_for_org(org_id: str) -> None:
-    chat_pages = get_chat_pages_in_org(org_id)
-    for chat_page in chat_pages:
-        delete_chat_page(chat_page.chat_page_id)
+    items = get_all_items_by_index(CHAT_PAGES_TABLE_NAME, "org_id", org_id, projection_expression=CHAT_PAGES_PRIMARY_KEY)
+    chat_page_ids = [item[CHAT_PAGES_PRIMARY_KEY] for item in items]
+    batch_delete_items(CHAT_PAGES_TABLE_NAME, CHAT_PAGES_PRIMARY_KEY, chat_page_ids, max_workers=BULK_DELETE_MAX_WORKERS)
 
 
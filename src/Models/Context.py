@@ -1,13 +1,18 @@
 import os
 from datetime import datetime
 import uuid
-from AWS.DynamoDB import get_item, put_item, get_all_items_by_index, delete_item, get_latest_items_by_index
+from AWS.DynamoDB import get_item, put_item, update_item, get_all_items_by_index, delete_item, batch_delete_items, batch_put_items, BULK_DELETE_MAX_WORKERS, is_conditional_check_failed, query_items, query_pages, scan_pages, batch_get_items, encode_cursor, decode_cursor, transact_put, transact_update, transact_write_items, fits_in_transaction
+from boto3.dynamodb.conditions import Attr, Key
 from AWS.CloudWatchLogs import get_logger
-from pydantic import BaseModel, Field
-from typing import List, Optional, Union
-from Models import Agent, Tool
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from typing import Callable, List, Optional, Union
+from Models import Agent, Tool, ContextMessageLog, MessageBlobStore
 from langchain_core.messages import AIMessage, ToolMessage, SystemMessage, HumanMessage
 from LLM.BaseMessagesConverter import base_messages_to_dict_messages
+from LLM.MessageCodec import encode_messages, decode_messages
+from LLM.CompactionConfig import CompactionState
+from LLM.TokenEstimator import add_token_estimates, stored_message_tokens
+from LLM.ContentNormalizer import normalize_content
 from Tools.ToolRegistry import tool_registry
 from Models.LLMModel import get_model_or_none
 from LLM.CreateLLM import DEFAULT_MODEL
@@ -16,6 +21,51 @@ logger = get_logger(log_level=os.environ["LOG_LEVEL"])
 
 CONTEXTS_TABLE_NAME = os.environ["CONTEXTS_TABLE_NAME"]
 CONTEXTS_PRIMARY_KEY = os.environ["CONTEXTS_PRIMARY_KEY"]
+# How many times a conflicting save is re-read, re-applied and retried
+CONTEXT_SAVE_MAX_ATTEMPTS = int(os.environ.get("CONTEXT_SAVE_MAX_ATTEMPTS", "5"))
+# Reads of a log context whose header and messages don't match yet (see _read_message_log)
+CONTEXT_READ_MAX_ATTEMPTS = int(os.environ.get("CONTEXT_READ_MAX_ATTEMPTS", "3"))
+
+# Message storage modes:
+#   inline - messages are a list attribute of the context item (the original layout)
+#   log    - one item per message in CONTEXT_MESSAGES_TABLE_NAME, the context item is a header
+MESSAGE_STORAGE_INLINE = "inline"
+MESSAGE_STORAGE_LOG = "log"
+# Mode for new contexts; inline contexts are moved to the log on their next save when this is "log"
+CONTEXT_MESSAGE_STORAGE = os.environ.get("CONTEXT_MESSAGE_STORAGE", MESSAGE_STORAGE_INLINE)
+
+# Encoding of inline messages:
+#   json    - a list of message maps in the messages attribute (the original layout)
+#   compact - compressed, default-stripped messages in the messages_blob Binary attribute
+MESSAGE_ENCODING_JSON = "json"
+MESSAGE_ENCODING_COMPACT = "compact"
+# Encoding used whenever an inline context is saved; get_context reads both
+CONTEXT_MESSAGE_ENCODING = os.environ.get("CONTEXT_MESSAGE_ENCODING", MESSAGE_ENCODING_JSON)
+
+# Most messages a paged read returns; an inline page is read as one projection
+# of list elements, and a ProjectionExpression is limited to 4 KB
+CONTEXT_PAGE_MAX_LIMIT = 200
+# Header attributes every projected read includes, so the result is a valid
+# Context that can be authorized and paged
+CONTEXT_HEADER_FIELDS = [
+    "context_id", "agent_id", "user_id", "created_at", "updated_at",
+    "version", "message_storage", "message_encoding", "message_count",
+]
+# Characters of the last message kept on the header for the history page
+LAST_MESSAGE_PREVIEW_CHARS = 200
+# Contexts per history page, and the most a client can ask for
+CONTEXT_HISTORY_PAGE_SIZE = 50
+CONTEXT_HISTORY_MAX_PAGE_SIZE = 100
+# Attributes the history page reads: the header fields it shows, no messages
+CONTEXT_HISTORY_FIELDS = CONTEXT_HEADER_FIELDS + ["last_message_preview"]
+
+
+class ContextConflictError(Exception):
+    """The context was saved by another request since it was read (HTTP 409)."""
+
+    def __init__(self, context_id: str):
+        super().__init__(f"Context {context_id} was modified by another request", 409)
+        self.context_id = context_id
 
 class Context(BaseModel):
     context_id: str
@@ -29,6 +79,23 @@ class Context(BaseModel):
     additional_agent_tools: Optional[list[str]] = []
     async_tool_response_queue: Optional[list[dict]] = []
     model_id: Optional[str] = None
+    # Incremented on every save, used for optimistic concurrency
+    version: int = 0
+    message_storage: Optional[str] = None
+    message_count: Optional[int] = None
+    message_encoding: Optional[str] = None
+    # Summary that replaces older messages in the prompt (messages keep the full history)
+    compaction: Optional[CompactionState] = None
+    # Sum of the messages' stored token estimates, kept up to date on every save
+    token_estimate_total: Optional[int] = None
+    # Denormalized for listing contexts without reading their messages
+    last_message_preview: Optional[str] = None
+    # Fingerprints of the messages as last read/written, for log storage diffs
+    _stored_message_hashes: list = PrivateAttr(default_factory=list)
+    # Index of messages[0] in the full history, for contexts read a page at a time
+    _messages_start: int = PrivateAttr(default=0)
+    # Read with a page or projection, so it doesn't hold everything a save writes
+    _partial: bool = PrivateAttr(default=False)
 
 class InitializeTool(BaseModel):
     tool_id: str
@@ -67,20 +134,31 @@ class FilteredContext(BaseModel):
     user_defined: Optional[dict] = None
     model_id: Optional[str] = None
     context_percentage: Optional[float] = None
+    # Estimated tokens of the messages, without the system prompt and tools
+    token_estimate_total: Optional[int] = None
+    # Messages in the whole context; messages may be just a page of them
+    message_count: Optional[int] = None
+    # Pass as before to read the page before this one, None on the first page
+    next_before: Optional[int] = None
     created_at: int
     updated_at: int
 
+class ProjectedFilteredContext(BaseModel):
+    """The fields of a FilteredContext asked for with GET /context/{context_id}?fields=..."""
+    model_config = ConfigDict(extra="allow")
+
 class HistoryContext(BaseModel):
     context_id: str
     user_id: str
     last_message: str
+    message_count: Optional[int] = None
     created_at: int
     updated_at: int
     agent: Agent.HistoryAgent
 
 
 def context_exists(context_id: str) -> bool:
-    return get_item(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_id) != None
+    return get_item(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_id, attributes=[CONTEXTS_PRIMARY_KEY]) != None
     
 def create_context(
         agent_id: str,
@@ -197,60 +275,508 @@ def create_context(
         
         context.messages = base_messages_to_dict_messages(initialization_messages)
 
-    put_item(CONTEXTS_TABLE_NAME, context.model_dump())
+    save_context(context)
     return context
 
 
-def get_context(context_id: str) -> Context:
+def get_context(
+    context_id: str,
+    limit: Optional[int] = None,
+    before: Optional[int] = None,
+    fields: Optional[list[str]] = None,
+) -> Context:
+    """
+    Read a context. limit and before read one page of messages: the last
+    limit messages before index before (the end if None). fields reads only
+    those header attributes (plus CONTEXT_HEADER_FIELDS); messages are read
+    only if "messages" is one of them. A paged or projected context can't be
+    saved.
+    """
+    if limit is not None or before is not None or fields is not None:
+        return _get_partial_context(context_id, limit, before, fields)
     item = get_item(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_id)
     if item is None:
         raise Exception(f"Context with id: {context_id} does not exist", 404)
+    return context_from_item(item)
+
+def context_from_item(item: dict) -> Context:
+    """A whole context from its stored item, reading its messages from wherever the storage mode keeps them."""
+    if item.get("message_storage") == MESSAGE_STORAGE_LOG:
+        item = _read_message_log(item)
+        context = Context(**item)
+        context._stored_message_hashes = [ContextMessageLog.message_hash(message) for message in context.messages]
+        return context
+    if "messages_blob" in item:
+        item["messages"] = decode_messages(item.pop("messages_blob"))
     return Context(**item)
-    
-def get_context_for_user(context_id: str, user_id: str) -> Context:
-    context = get_context(context_id)
+
+def _read_message_log(item: dict) -> dict:
+    """
+    The header item with its messages from the log. A save too big for one
+    transaction writes the messages and the header separately, so a read in
+    between can find fewer messages than message_count: the header and its
+    messages are then read again, up to CONTEXT_READ_MAX_ATTEMPTS times.
+    """
+    context_id = item[CONTEXTS_PRIMARY_KEY]
+    for attempt in range(CONTEXT_READ_MAX_ATTEMPTS):
+        if attempt:
+            logger.info(f"Context {context_id} has {len(messages)} of its {message_count} messages, reading it again ({attempt})")
+            item = get_item(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_id)
+            if item is None:
+                raise Exception(f"Context with id: {context_id} does not exist", 404)
+        message_count = int(item.get("message_count") or 0)
+        messages = ContextMessageLog.get_messages(context_id, 0, message_count)
+        if len(messages) == message_count:
+            item["messages"] = messages
+            return item
+    raise Exception(f"Context {context_id} has {len(messages)} of its {message_count} messages stored", 500)
+
+def _get_partial_context(context_id: str, limit: Optional[int], before: Optional[int], fields: Optional[list[str]]) -> Context:
+    if limit is not None and not 1 <= limit <= CONTEXT_PAGE_MAX_LIMIT:
+        raise Exception(f"limit must be between 1 and {CONTEXT_PAGE_MAX_LIMIT}", 400)
+    if before is not None and before < 0:
+        raise Exception("before must not be negative", 400)
+    attributes = set(CONTEXT_HEADER_FIELDS)
+    attributes.update(fields if fields is not None else Context.model_fields)
+    unknown = attributes - set(Context.model_fields)
+    if unknown:
+        raise Exception(f"Unknown context fields: {', '.join(sorted(unknown))}", 400)
+    include_messages = "messages" in attributes
+    attributes.discard("messages")
+
+    # The header first, without the messages, to find the page's positions
+    item = get_item(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_id, attributes=sorted(attributes))
+    if item is None:
+        raise Exception(f"Context with id: {context_id} does not exist", 404)
+    start = 0
+    item["messages"] = []
+    if include_messages:
+        if item.get("message_count") is None:
+            # Saved before message_count existed: read everything and slice
+            messages = get_context(context_id).messages
+            count = len(messages)
+        else:
+            messages = None
+            count = int(item["message_count"])
+        end = count if before is None else min(before, count)
+        start = max(0, end - limit) if limit is not None else 0
+        if messages is not None:
+            item["messages"] = messages[start:end]
+        else:
+            item["messages"] = _get_message_range(context_id, item, start, end)
+
+    context = Context(**item)
+    context._messages_start = start
+    context._partial = True
+    return context
+
+def _get_message_range(context_id: str, header: dict, start: int, end: int) -> list[dict]:
+    """messages[start:end] of the context, reading as little of it as the storage mode allows."""
+    if end <= start:
+        return []
+    if header.get("message_storage") == MESSAGE_STORAGE_LOG:
+        return ContextMessageLog.get_messages(context_id, start, end)
+    if header.get("message_encoding") == MESSAGE_ENCODING_COMPACT:
+        # The blob is one value, decode it and slice
+        item = get_item(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_id, attributes=["messages_blob"])
+        return decode_messages(item["messages_blob"])[start:end] if item and "messages_blob" in item else []
+    item = get_item(
+        CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_id,
+        attributes=[f"messages[{index}]" for index in range(start, end)],
+    )
+    return item.get("messages", []) if item else []
+
+def get_context_for_user(
+    context_id: str,
+    user_id: str,
+    limit: Optional[int] = None,
+    before: Optional[int] = None,
+    fields: Optional[list[str]] = None,
+) -> Context:
+    return check_context_for_user(get_context(context_id, limit=limit, before=before, fields=fields), user_id)
+
+def check_context_for_user(context: Context, user_id: str) -> Context:
+    """Return the context if the user may use it, for a context already read."""
     if (context.user_id == "public"):
         return context
     if (context.user_id == user_id):
         return context
     raise Exception(f"Context does not belong to user", 403)
 
-def get_public_context(context_id: str) -> Context:
-    context = get_context(context_id)
+def get_public_context(
+    context_id: str,
+    limit: Optional[int] = None,
+    before: Optional[int] = None,
+    fields: Optional[list[str]] = None,
+) -> Context:
+    context = get_context(context_id, limit=limit, before=before, fields=fields)
     if (context.user_id == "public"):
         return context
     raise Exception(f"Context is not public", 403)
 
-def save_context(context: Context) -> None:
-    context.updated_at = int(datetime.timestamp(datetime.now()))
-    put_item(CONTEXTS_TABLE_NAME, context.model_dump())
+def save_context(context: Context, touch: bool = True) -> None:
+    """
+    Write the context only if nobody else saved it since it was read, then bump
+    context.version. Raises ContextConflictError otherwise.
+    touch=False keeps updated_at (and so the context's place in the history) as is.
+    """
+    _require_complete(context)
+    if context.version == 0:
+        # Contexts written before versioning have no version attribute
+        condition = Attr("version").not_exists() | Attr("version").eq(0)
+    else:
+        condition = Attr("version").eq(context.version)
+
+    item, storage, encoding = _context_item(context, touch)
+
+    try:
+        if storage == MESSAGE_STORAGE_LOG:
+            header = transact_put(CONTEXTS_TABLE_NAME, item, condition_expression=condition)
+            context._stored_message_hashes = _write_message_log(context, header)
+        else:
+            put_item(CONTEXTS_TABLE_NAME, item, condition_expression=condition)
+    except Exception as e:
+        if is_conditional_check_failed(e):
+            raise ContextConflictError(context.context_id)
+        raise
+    context.version = item["version"]
+    context.updated_at = item["updated_at"]
+    context.message_storage = storage
+    context.message_count = item["message_count"]
+    context.token_estimate_total = item["token_estimate_total"]
+    context.last_message_preview = item["last_message_preview"]
+    context.message_encoding = encoding
+
+def _context_item(context: Context, touch: bool = True) -> tuple[dict, str, Optional[str]]:
+    """The item that stores the whole context, with its storage mode and encoding."""
+    # Estimate the messages while their full content is at hand, then move
+    # large content to S3, so neither layout stores it inline
+    add_token_estimates(context.messages)
+    context.messages = MessageBlobStore.offload_messages(context.messages)
+
+    storage = _message_storage_for(context)
+    encoding = None
+    if storage == MESSAGE_STORAGE_LOG:
+        item = context.model_dump(exclude={"messages"})
+        item["messages"] = []
+    elif CONTEXT_MESSAGE_ENCODING == MESSAGE_ENCODING_COMPACT:
+        item = context.model_dump(exclude={"messages"})
+        item["messages"] = []
+        item["messages_blob"] = encode_messages(context.messages)
+        encoding = MESSAGE_ENCODING_COMPACT
+    else:
+        item = context.model_dump()
+        encoding = MESSAGE_ENCODING_JSON
+    item["message_storage"] = storage
+    item["message_encoding"] = encoding
+    item["message_count"] = len(context.messages)
+    item["token_estimate_total"] = sum(stored_message_tokens(message) for message in context.messages)
+    item["last_message_preview"] = message_preview(context.messages)
+    item["version"] = context.version + 1
+    if touch:
+        item["updated_at"] = int(datetime.timestamp(datetime.now()))
+    return item, storage, encoding
+
+def put_contexts(contexts: list[Context], stored_message_counts: Optional[dict] = None) -> None:
+    """
+    Write whole contexts with batch writes and no version check, replacing any
+    stored ones (e.g. an import). updated_at is kept. In log storage, messages
+    are written before their headers and any past the new end, up to the
+    replaced context's count in stored_message_counts, are deleted.
+    """
+    stored_message_counts = stored_message_counts or {}
+    items = []
+    log_contexts = []
+    for context in contexts:
+        _require_complete(context)
+        item, storage, _ = _context_item(context, touch=False)
+        items.append(item)
+        if storage == MESSAGE_STORAGE_LOG:
+            log_contexts.append(context)
+    for context in log_contexts:
+        ContextMessageLog.put_messages(context.context_id, 0, context.messages)
+        ContextMessageLog.delete_messages(context.context_id, len(context.messages), stored_message_counts.get(context.context_id, 0))
+    batch_put_items(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, items)
+
+def message_preview(messages: list[dict]) -> str:
+    """The start of the last message's text, stored on the header for the history page."""
+    if not messages:
+        return ""
+    return normalize_content(messages[-1].get("content") or "")[:LAST_MESSAGE_PREVIEW_CHARS]
 
-def get_contexts_by_user_id(user_id: str) -> list[Context]:
-    items = get_latest_items_by_index(CONTEXTS_TABLE_NAME, "user_id-updated_at-index", "user_id", user_id, 50)
+def _require_complete(context: Context) -> None:
+    if context._partial:
+        raise Exception(f"Context {context.context_id} was read with a page or projection and can't be saved", 500)
+
+def _message_storage_for(context: Context) -> str:
+    if context.message_storage == MESSAGE_STORAGE_LOG or CONTEXT_MESSAGE_STORAGE == MESSAGE_STORAGE_LOG:
+        return MESSAGE_STORAGE_LOG
+    return MESSAGE_STORAGE_INLINE
+
+def _write_message_log(context: Context, header: dict) -> list:
+    """
+    Write the header action with only the messages that changed since the
+    context was read: appended messages become new items, edited ones are
+    overwritten and any left over past the new end are deleted. Returns the
+    new message fingerprints.
+    """
+    hashes = [ContextMessageLog.message_hash(message) for message in context.messages]
+    stored_hashes = context._stored_message_hashes
+    unchanged = 0
+    for new_hash, stored_hash in zip(hashes, stored_hashes):
+        if new_hash != stored_hash:
+            break
+        unchanged += 1
+    _write_log_and_header(context.context_id, unchanged, context.messages[unchanged:], len(stored_hashes), header)
+    return hashes
+
+def _write_log_and_header(context_id: str, start: int, messages: list[dict], stored_count: int, header: dict) -> None:
+    """
+    Write messages from position start, delete the stored ones past them (up
+    to stored_count) and apply the header action, all in one transaction: the
+    new message_count is never visible without its messages, and a save that
+    fails the header's version check writes no message. Changes too big for
+    one transaction write the messages first and the header last.
+    """
+    actions = ContextMessageLog.message_write_actions(context_id, start, messages, stored_count) + [header]
+    if fits_in_transaction(actions):
+        transact_write_items(actions)
+        return
+    ContextMessageLog.put_messages(context_id, start, messages)
+    ContextMessageLog.delete_messages(context_id, start + len(messages), stored_count)
+    transact_write_items([header])
+
+def save_appended_messages(context: Context, base_message_count: int, updated_fields: list[str] = None) -> None:
+    """
+    Save a context whose only change since it was read is messages appended
+    after base_message_count, writing just those messages: a list_append
+    update for inline JSON contexts, new message items for log contexts. The
+    unchanged messages are not serialized again. Contexts that need a full
+    rewrite (compact encoding, a storage change, never saved with a storage
+    mode) fall back to save_context. Raises ContextConflictError like save_context.
+    updated_fields are other header fields that changed and are written too.
+    """
+    _require_complete(context)
+    storage = _message_storage_for(context)
+    appendable = context.message_storage == storage
+    if storage == MESSAGE_STORAGE_LOG:
+        appendable = appendable and len(context._stored_message_hashes) == base_message_count
+    else:
+        appendable = (
+            appendable
+            and CONTEXT_MESSAGE_ENCODING == MESSAGE_ENCODING_JSON
+            and context.message_encoding in (None, MESSAGE_ENCODING_JSON)
+        )
+    if not appendable:
+        save_context(context)
+        return
+
+    add_token_estimates(context.messages[base_message_count:])
+    new_messages = MessageBlobStore.offload_messages(context.messages[base_message_count:])
+    context.messages[base_message_count:] = new_messages
+    # The running total only needs the new messages; headers saved before it
+    # existed are totalled once here
+    token_estimate_total = context.token_estimate_total
+    if token_estimate_total is None:
+        token_estimate_total = sum(stored_message_tokens(message) for message in context.messages[:base_message_count])
+    token_estimate_total += sum(stored_message_tokens(message) for message in new_messages)
+    version = context.version + 1
+    updated_at = int(datetime.timestamp(datetime.now()))
+    update_attributes = context.model_dump(include=set(updated_fields)) if updated_fields else {}
+    update_attributes.update({
+        "version": version,
+        "updated_at": updated_at,
+        "message_count": len(context.messages),
+        "token_estimate_total": token_estimate_total,
+        "last_message_preview": message_preview(context.messages),
+    })
+    condition = Attr("version").eq(context.version)
+    try:
+        if storage == MESSAGE_STORAGE_LOG:
+            header = transact_update(
+                CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context.context_id,
+                update_attributes=update_attributes,
+                condition_expression=condition,
+            )
+            _write_log_and_header(context.context_id, base_message_count, new_messages, base_message_count, header)
+        else:
+            update_item(
+                CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context.context_id,
+                update_attributes=update_attributes,
+                append_attributes={"messages": new_messages},
+                condition_expression=condition,
+                return_values="NONE",
+            )
+    except Exception as e:
+        if is_conditional_check_failed(e):
+            raise ContextConflictError(context.context_id)
+        raise
+    if storage == MESSAGE_STORAGE_LOG:
+        context._stored_message_hashes = context._stored_message_hashes + [ContextMessageLog.message_hash(message) for message in new_messages]
+    context.version = version
+    context.updated_at = updated_at
+    context.message_count = len(context.messages)
+    context.token_estimate_total = token_estimate_total
+    context.last_message_preview = update_attributes["last_message_preview"]
+
+def update_context_with_retry(
+    context: Context,
+    mutate: Callable[[Context], None],
+    save: Callable[[Context], None] = save_context,
+) -> Context:
+    """
+    Apply mutate to the context and save it. On a conflict, re-read the latest
+    context, apply mutate again and retry, up to CONTEXT_SAVE_MAX_ATTEMPTS.
+    mutate must only depend on the context it is given (e.g. append messages).
+    Returns the saved context, which is a fresh object if a retry happened.
+    """
+    for attempt in range(CONTEXT_SAVE_MAX_ATTEMPTS):
+        mutate(context)
+        try:
+            save(context)
+            return context
+        except ContextConflictError:
+            if attempt == CONTEXT_SAVE_MAX_ATTEMPTS - 1:
+                raise
+            logger.info(f"Context {context.context_id} changed while saving, retrying ({attempt + 1})")
+            context = get_context(context.context_id)
+
+def append_messages(context: Context, messages: list[dict], compaction: Optional[CompactionState] = None) -> Context:
+    """
+    Append messages to the context, merging with concurrent writers. Only the
+    new messages are written (see save_appended_messages). A compaction state
+    is saved with them unless the stored one already covers more messages.
+    """
+    if not messages and compaction is None:
+        return context
+
+    def mutate(latest: Context) -> None:
+        latest.messages.extend(messages)
+        if compaction and (latest.compaction is None or latest.compaction.compacted_message_count < compaction.compacted_message_count):
+            latest.compaction = compaction
+
+    return update_context_with_retry(
+        context,
+        mutate,
+        save=lambda latest: save_appended_messages(
+            latest, len(latest.messages) - len(messages),
+            updated_fields=["compaction"] if compaction else None,
+        ),
+    )
+
+def get_context_pages_by_user_id(user_id: str):
+    """
+    Yield all of the user's contexts, whole, one query page at a time (most
+    recently updated first), so they can be walked with bounded memory.
+    """
+    for items in query_pages(CONTEXTS_TABLE_NAME, Key("user_id").eq(user_id), index_name="user_id-updated_at-index", ascending=False):
+        contexts = []
+        for item in items:
+            try:
+                contexts.append(context_from_item(item))
+            except Exception as e:
+                logger.error(f"Error parsing context {item.get(CONTEXTS_PRIMARY_KEY)}: {e}")
+        yield contexts
+
+def referenced_blob_keys() -> set[str]:
+    """
+    Keys of every message blob a stored message refers to, in any storage
+    mode. Scans the contexts table, and the messages table of log contexts,
+    reading only their messages.
+    """
+    keys = set()
+    for items in scan_pages(CONTEXTS_TABLE_NAME, attributes=[CONTEXTS_PRIMARY_KEY, "messages", "messages_blob"]):
+        for item in items:
+            messages = decode_messages(item["messages_blob"]) if "messages_blob" in item else item.get("messages") or []
+            keys |= MessageBlobStore.blob_keys(messages)
+    if ContextMessageLog.is_configured():
+        for items in scan_pages(ContextMessageLog.CONTEXT_MESSAGES_TABLE_NAME, attributes=["message"]):
+            keys |= MessageBlobStore.blob_keys(item["message"] for item in items)
+    return keys
+
+def get_context_items(context_ids: list[str], attributes: list[str]) -> list[dict]:
+    """Just the given attributes of whichever of the contexts exist."""
+    return batch_get_items(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_ids, attributes=attributes)
+
+def get_context_headers_by_user_id(
+    user_id: str,
+    limit: int = CONTEXT_HISTORY_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> tuple[list[Context], Optional[str]]:
+    """
+    One page of the user's contexts, most recently updated first, without
+    their messages: only CONTEXT_HISTORY_FIELDS are read. Returns the contexts
+    and the cursor of the next page (None on the last page).
+    """
+    if not 1 <= limit <= CONTEXT_HISTORY_MAX_PAGE_SIZE:
+        raise Exception(f"limit must be between 1 and {CONTEXT_HISTORY_MAX_PAGE_SIZE}", 400)
+    items, last_evaluated_key = query_items(
+        CONTEXTS_TABLE_NAME,
+        Key("user_id").eq(user_id),
+        index_name="user_id-updated_at-index",
+        ascending=False,
+        limit=limit,
+        attributes=CONTEXT_HISTORY_FIELDS,
+        exclusive_start_key=_decode_history_cursor(cursor, user_id) if cursor else None,
+    )
     contexts = []
     for item in items:
         try:
-            contexts.append(Context(**item))
+            context = Context(**item, messages=[])
+            context._partial = True
+            contexts.append(context)
         except Exception as e:
             logger.error(f"Error parsing context: {item}")
-    return contexts
+    return contexts, encode_cursor(last_evaluated_key)
+
+def _decode_history_cursor(cursor: str, user_id: str) -> dict:
+    key = decode_cursor(cursor, [CONTEXTS_PRIMARY_KEY, "user_id", "updated_at"])
+    if key["user_id"] != user_id:
+        raise Exception("Invalid cursor", 400)
+    return key
 
 def delete_context(context_id: str) -> None:
     delete_item(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_id)
+    if ContextMessageLog.is_configured():
+        ContextMessageLog.delete_all_messages(context_id)
 
 def delete_all_contexts_for_user(user_id: str) -> None:
-    contexts = get_contexts_by_user_id(user_id)
-    for context in contexts:
-        delete_context(context.context_id)
+    # All of the user's contexts, not just the latest page, and only their keys
+    items = get_all_items_by_index(
+        CONTEXTS_TABLE_NAME, "user_id", user_id,
+        index_name="user_id-updated_at-index",
+        projection_expression=CONTEXTS_PRIMARY_KEY,
+    )
+    context_ids = [item[CONTEXTS_PRIMARY_KEY] for item in items]
+    batch_delete_items(CONTEXTS_TABLE_NAME, CONTEXTS_PRIMARY_KEY, context_ids, max_workers=BULK_DELETE_MAX_WORKERS)
+    if ContextMessageLog.is_configured():
+        ContextMessageLog.delete_all_messages_for_contexts(context_ids)
+
+def transform_to_filtered_context(context: Context, show_tool_calls: bool = False, fields: Optional[list[str]] = None) -> FilteredContext:
+    """
+    fields limits the work to those FilteredContext fields (e.g. no model
+    lookup without context_percentage); the others are left empty.
+    """
+    def wanted(field: str) -> bool:
+        return fields is None or field in fields
 
-def transform_to_filtered_context(context: Context, show_tool_calls: bool = False) -> FilteredContext:
-    messages = transform_messages_to_filtered(context.messages, show_tool_calls)
+    message_count = context.message_count if context._partial else len(context.messages)
+    messages = []
+    if wanted("messages"):
+        # Tool responses are only shown with show_tool_calls, so only fetch their offloaded content then
+        messages_to_show = context.messages if show_tool_calls else [m for m in context.messages if m["type"] != "tool"]
+        messages = transform_messages_to_filtered(MessageBlobStore.hydrate_messages(messages_to_show), show_tool_calls)
 
     effective_model_id = context.model_id or DEFAULT_MODEL
     context_percentage = None
-    llm_model = get_model_or_none(effective_model_id)
+    llm_model = get_model_or_none(effective_model_id) if wanted("context_percentage") else None
     if llm_model and llm_model.context_window_size:
-        total_tokens = _get_last_total_tokens(context.messages)
+        # The provider's count of the last call, if the messages reach the
+        # end of the context, else the stored estimate
+        total_tokens = None
+        if context._messages_start + len(context.messages) == message_count:
+            total_tokens = _get_last_total_tokens(context.messages)
+        total_tokens = total_tokens or context.token_estimate_total
         if total_tokens:
             context_percentage = round((total_tokens / llm_model.context_window_size) * 100, 2)
 
@@ -262,6 +788,9 @@ def transform_to_filtered_context(context: Context, show_tool_calls: bool = Fals
         "user_defined": context.user_defined if context.user_defined else {},
         "model_id": effective_model_id,
         "context_percentage": context_percentage,
+        "token_estimate_total": context.token_estimate_total,
+        "message_count": message_count,
+        "next_before": context._messages_start or None,
         "created_at": context.created_at,
         "updated_at": context.updated_at
     })
@@ -279,30 +808,36 @@ def _get_last_total_tokens(messages: list[dict]) -> int:
                     return total
     return 0
 
-def transform_to_history_context(context: Context, agent: Agent.Agent) -> HistoryContext:
+def _get_last_message_content(context: Context) -> str:
+    if context.last_message_preview is not None:
+        return context.last_message_preview
+    if context.messages:
+        return message_preview(context.messages)
+    # Saved before the preview existed: read just the last message
+    if context.message_count != 0:
+        last_messages = get_context(context.context_id, limit=1, fields=["messages"]).messages
+        return message_preview(last_messages)
+    return ""
+
+def transform_to_history_context(context: Context, agent: Union[Agent.Agent, Agent.HistoryAgent]) -> HistoryContext:
     return HistoryContext(**{
         "context_id": context.context_id,
         "user_id": context.user_id,
-        "last_message": context.messages[-1]["content"] if len(context.messages) > 0 else "",
+        "last_message": _get_last_message_content(context),
+        "message_count": context.message_count,
         "created_at": context.created_at,
         "updated_at": context.updated_at,
-        "agent": Agent.transform_to_history_agent(agent)
+        "agent": agent if isinstance(agent, Agent.HistoryAgent) else Agent.transform_to_history_agent(agent)
     })
 
 def add_human_message(context: Context, message: str) -> Context:
-    context.messages.extend(base_messages_to_dict_messages([HumanMessage(content=message)]))
-    save_context(context)
-    return context
+    return append_messages(context, base_messages_to_dict_messages([HumanMessage(content=message)]))
 
 def add_ai_message(context: Context, message: str) -> Context:
-    context.messages.extend(base_messages_to_dict_messages([AIMessage(content=message)]))
-    save_context(context)
-    return context
+    return append_messages(context, base_messages_to_dict_messages([AIMessage(content=message)]))
 
 def add_system_message(context: Context, message: str) -> Context:
-    context.messages.extend(base_messages_to_dict_messages([SystemMessage(content=message)]))
-    save_context(context)
-    return context
+    return append_messages(context, base_messages_to_dict_messages([SystemMessage(content=message)]))
 
 def transform_messages_to_filtered(messages: list[dict], show_tool_calls: bool = False) -> list[MessageType]:
     """
@@ -470,25 +1005,21 @@ def add_async_tool_response(context: Context, tool_call_id: str, response: str)
     """
     Add an async tool response to the queue, replacing any existing response with the same tool_call_id.
     """
-    if not context.async_tool_response_queue:
-        context.async_tool_response_queue = []
-    
-    # Check for duplicate tool_call_id and remove it
-    context.async_tool_response_queue = [
-        item for item in context.async_tool_response_queue 
-        if item.get("tool_call_id") != tool_call_id
-    ]
-    
-    # Add the new response
-    context.async_tool_response_queue.append({
-        "tool_call_id": tool_call_id,
-        "response": response
-    })
+    def enqueue(latest: Context) -> None:
+        # Check for duplicate tool_call_id and remove it
+        latest.async_tool_response_queue = [
+            item for item in (latest.async_tool_response_queue or [])
+            if item.get("tool_call_id") != tool_call_id
+        ]
 
-    # Save the context
-    save_context(context)
-    
-    return context
+        # Add the new response
+        latest.async_tool_response_queue.append({
+            "tool_call_id": tool_call_id,
+            "response": response
+        })
+
+    # Save the context, re-applying on top of concurrent writes
+    return update_context_with_retry(context, enqueue)
 
 
 def process_async_tool_response_queue(context: Context) -> Context:
@@ -500,7 +1031,12 @@ def process_async_tool_response_queue(context: Context) -> Context:
     """
     if not context.async_tool_response_queue or len(context.async_tool_response_queue) == 0:
         return context
-    
+
+    # Save the context, re-applying on top of concurrent writes
+    return update_context_with_retry(context, _apply_async_tool_responses)
+
+
+def _apply_async_tool_responses(context: Context) -> None:
     # Build a mapping of tool_call_id -> tool_name from existing messages
     tool_call_id_to_name = {}
     for message in context.messages:
@@ -563,12 +1099,3 @@ def process_async_tool_response_queue(context: Context) -> Context:
     
     # Update the queue to only contain unmatched responses
     context.async_tool_response_queue = responses_to_keep_queued
-    
-    # Save the context
-    save_context(context)
-    
-    return context
-
-
-    
-
@@ -0,0 +1,133 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from boto3.dynamodb.conditions import Key
+from AWS.DynamoDB import query_items, batch_write_items, transact_put, transact_delete, BULK_DELETE_MAX_WORKERS
+from Lib.DecimalConversion import decimal_to_serializable
+from LLM.MessageCodec import strip_message_defaults, restore_message_defaults
+from LLM.TokenEstimator import TOKEN_ESTIMATE_KEY
+
+# Messages of contexts in "log" storage mode live here, one item per message:
+# partition key = context id, sort key = position of the message in the context.
+# Fields equal to their LangChain defaults aren't stored and are restored on read.
+CONTEXT_MESSAGES_TABLE_NAME = os.environ.get("CONTEXT_MESSAGES_TABLE_NAME")
+CONTEXT_MESSAGES_PARTITION_KEY = os.environ.get("CONTEXTS_PRIMARY_KEY", "context_id")
+CONTEXT_MESSAGES_SORT_KEY = "seq"
+
+
+def is_configured() -> bool:
+    return bool(CONTEXT_MESSAGES_TABLE_NAME)
+
+
+def _require_table() -> str:
+    if not CONTEXT_MESSAGES_TABLE_NAME:
+        raise Exception("CONTEXT_MESSAGES_TABLE_NAME is not configured for log message storage", 500)
+    return CONTEXT_MESSAGES_TABLE_NAME
+
+
+def message_hash(message: dict) -> int:
+    """
+    Fingerprint of a message's content, used to find which messages changed
+    since the context was loaded. Numbers are normalized first so a Decimal
+    read from DynamoDB and the float/int it round-trips to hash the same.
+    The stored token estimate is derived from the message, so a message that
+    only gained one (older messages, on their next save) is not rewritten.
+    """
+    if TOKEN_ESTIMATE_KEY in message:
+        message = {key: value for key, value in message.items() if key != TOKEN_ESTIMATE_KEY}
+    return hash(json.dumps(decimal_to_serializable(message), sort_keys=True, default=str))
+
+
+def get_messages(context_id: str, start: int = 0, end: Optional[int] = None) -> list[dict]:
+    """Messages with start <= seq < end (all of them if end is None), in order."""
+    key_condition = Key(CONTEXT_MESSAGES_PARTITION_KEY).eq(context_id)
+    if end is not None:
+        if end <= start:
+            return []
+        key_condition = key_condition & Key(CONTEXT_MESSAGES_SORT_KEY).between(start, end - 1)
+    elif start > 0:
+        key_condition = key_condition & Key(CONTEXT_MESSAGES_SORT_KEY).gte(start)
+    items, _ = query_items(_require_table(), key_condition)
+    return [restore_message_defaults(item["message"]) for item in items]
+
+
+def get_last_messages(context_id: str, count: int) -> list[dict]:
+    """The last count messages of a context, in order."""
+    items, _ = query_items(
+        _require_table(),
+        Key(CONTEXT_MESSAGES_PARTITION_KEY).eq(context_id),
+        ascending=False,
+        limit=count,
+    )
+    return [restore_message_defaults(item["message"]) for item in reversed(items)]
+
+
+def _message_items(context_id: str, start_seq: int, messages: list[dict]) -> list[dict]:
+    return [
+        {
+            CONTEXT_MESSAGES_PARTITION_KEY: context_id,
+            CONTEXT_MESSAGES_SORT_KEY: start_seq + offset,
+            "message": strip_message_defaults(message),
+        }
+        for offset, message in enumerate(messages)
+    ]
+
+
+def message_write_actions(context_id: str, start_seq: int, messages: list[dict], end_seq: int) -> list[dict]:
+    """
+    TransactWriteItems actions that do what put_messages(context_id, start_seq,
+    messages) and then deleting the positions up to end_seq would do.
+    """
+    table = _require_table()
+    actions = [transact_put(table, item) for item in _message_items(context_id, start_seq, messages)]
+    actions.extend(
+        transact_delete(table, {CONTEXT_MESSAGES_PARTITION_KEY: context_id, CONTEXT_MESSAGES_SORT_KEY: seq})
+        for seq in range(start_seq + len(messages), end_seq)
+    )
+    return actions
+
+
+def put_messages(context_id: str, start_seq: int, messages: list[dict]) -> None:
+    """Write messages at positions start_seq, start_seq + 1, ..."""
+    if not messages:
+        return
+    batch_write_items(
+        _require_table(), CONTEXT_MESSAGES_PARTITION_KEY,
+        put_items=_message_items(context_id, start_seq, messages),
+        sort_key_name=CONTEXT_MESSAGES_SORT_KEY,
+        max_workers=BULK_DELETE_MAX_WORKERS,
+    )
+
+
+def delete_messages(context_id: str, start_seq: int, end_seq: int) -> None:
+    """Delete messages with start_seq <= seq < end_seq."""
+    if end_seq <= start_seq:
+        return
+    batch_write_items(
+        _require_table(), CONTEXT_MESSAGES_PARTITION_KEY,
+        delete_keys=[(context_id, seq) for seq in range(start_seq, end_seq)],
+        sort_key_name=CONTEXT_MESSAGES_SORT_KEY,
+        max_workers=BULK_DELETE_MAX_WORKERS,
+    )
+
+
+def delete_all_messages(context_id: str) -> None:
+    items, _ = query_items(
+        _require_table(),
+        Key(CONTEXT_MESSAGES_PARTITION_KEY).eq(context_id),
+        projection_expression=f"{CONTEXT_MESSAGES_PARTITION_KEY}, {CONTEXT_MESSAGES_SORT_KEY}",
+    )
+    batch_write_items(
+        _require_table(), CONTEXT_MESSAGES_PARTITION_KEY,
+        delete_keys=[(context_id, item[CONTEXT_MESSAGES_SORT_KEY]) for item in items],
+        sort_key_name=CONTEXT_MESSAGES_SORT_KEY,
+        max_workers=BULK_DELETE_MAX_WORKERS,
+    )
+
+
+def delete_all_messages_for_contexts(context_ids: list[str]) -> None:
+    if not context_ids:
+        return
+    with ThreadPoolExecutor(max_workers=min(BULK_DELETE_MAX_WORKERS, len(context_ids))) as executor:
+        list(executor.map(delete_all_messages, context_ids))
@@ -6,10 +6,12 @@ from typing import Optional, Dict, Any
 from pydantic import BaseModel
 from AWS.DynamoDB import (
     get_item,
-    get_items_by_scan,
+    batch_get_items,
     get_all_items_by_index,
     put_item,
     delete_item,
+    batch_delete_items,
+    BULK_DELETE_MAX_WORKERS,
 )
 from AWS.CloudWatchLogs import get_logger
 from Models import User
@@ -100,7 +102,7 @@ def parse_integration_items(items: list[dict]) -> list[Integration]:
 
 
 def get_integrations_from_ids(integration_ids: list[str]) -> list[Integration]:
-    items = get_items_by_scan(INTEGRATIONS_TABLE_NAME, INTEGRATIONS_PRIMARY_KEY, integration_ids)
+    items = batch_get_items(INTEGRATIONS_TABLE_NAME, INTEGRATIONS_PRIMARY_KEY, integration_ids)
     return parse_integration_items(items)
 
 
@@ -110,6 +112,6 @@ def get_integrations_in_org(org_id: str) -> list[Integration]:
 
 
 def delete_integrations_in_org(org_id: str) -> None:
-    integrations = get_integrations_in_org(org_id)
-    for integration in integrations:
-        delete_integration(integration.integration_id)
+    items = get_all_items_by_index(INTEGRATIONS_TABLE_NAME, "org_id", org_id, projection_expression=INTEGRATIONS_PRIMARY_KEY)
+    integration_ids = [item[INTEGRATIONS_PRIMARY_KEY] for item in items]
+    batch_delete_items(INTEGRATIONS_TABLE_NAME, INTEGRATIONS_PRIMARY_KEY, integration_ids, max_workers=BULK_DELETE_MAX_WORKERS)
@@ -8,9 +8,12 @@ from pydantic import BaseModel
 from AWS.DynamoDB import (
     get_item,
     get_all_items_by_index,
-    get_items_by_scan,
+    batch_get_items,
     put_item,
     delete_item,
+    batch_delete_items,
+    batch_put_items,
+    BULK_DELETE_MAX_WORKERS,
 )
 from AWS.CloudWatchLogs import get_logger
 from Models import User
@@ -110,19 +113,22 @@ def get_json_document_for_user(document_id: str, user: User.User) -> JSONDocumen
 
 def parse_json_document_items(items: list[dict]) -> list[JSONDocument]:
     documents = []
+    backfilled = []
     for item in items:
         try:
             if "name" not in item or item["name"] is None:
                 item["name"] = f"Document {item[DOCUMENTS_PRIMARY_KEY]}"
-                put_item(DOCUMENTS_TABLE_NAME, item)
+                backfilled.append(item)
             documents.append(JSONDocument(**item))
         except Exception as e:
             logger.error(f"Error parsing document: {e}")
+    if backfilled:
+        batch_put_items(DOCUMENTS_TABLE_NAME, DOCUMENTS_PRIMARY_KEY, backfilled)
     return documents
 
 
 def get_json_documents_from_ids(document_ids: list[str]) -> list[JSONDocument]:
-    items = get_items_by_scan(DOCUMENTS_TABLE_NAME, DOCUMENTS_PRIMARY_KEY, document_ids)
+    items = batch_get_items(DOCUMENTS_TABLE_NAME, DOCUMENTS_PRIMARY_KEY, document_ids)
     return parse_json_document_items(items)
 
 
@@ -132,9 +138,9 @@ def get_json_documents_in_org(org_id: str) -> list[JSONDocument]:
 
 
 def delete_json_documents_in_org(org_id: str) -> None:
-    documents = get_json_documents_in_org(org_id)
-    for doc in documents:
-        delete_json_document(doc.document_id)
+    items = get_all_items_by_index(DOCUMENTS_TABLE_NAME, "org_id", org_id, projection_expression=DOCUMENTS_PRIMARY_KEY)
+    document_ids = [item[DOCUMENTS_PRIMARY_KEY] for item in items]
+    batch_delete_items(DOCUMENTS_TABLE_NAME, DOCUMENTS_PRIMARY_KEY, document_ids, max_workers=BULK_DELETE_MAX_WORKERS)
 
 
 # --------------------- Data Helpers ---------------------
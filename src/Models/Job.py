@@ -1,7 +1,8 @@
 import os
 from datetime import datetime
 import uuid
-from AWS.DynamoDB import get_item, put_item, delete_item, get_all_items_by_index
+from AWS.DynamoDB import get_item, put_item, delete_item, get_all_items_by_index, update_item, is_conditional_check_failed
+from boto3.dynamodb.conditions import Attr
 from pydantic import BaseModel
 from typing import Optional
 from enum import Enum
@@ -66,6 +67,49 @@ def save_job(job: Job) -> Job:
     put_item(JOBS_TABLE_NAME, job.model_dump())
     return job
 
+def update_job_status(job_id: str, status: JobStatus, message: Optional[str] = None) -> Job:
+    """Set a job's status (and message) without rewriting the rest of the job."""
+    attributes = {
+        "status": status.value if isinstance(status, JobStatus) else status,
+        "updated_at": int(datetime.now().timestamp()),
+    }
+    if message is not None:
+        attributes["message"] = message
+    try:
+        item = update_item(
+            JOBS_TABLE_NAME, JOBS_PRIMARY_KEY, job_id,
+            update_attributes=attributes,
+            condition_expression=Attr(JOBS_PRIMARY_KEY).exists(),
+        )
+    except Exception as e:
+        if is_conditional_check_failed(e):
+            raise Exception(f"Job {job_id} not found", 404)
+        raise
+    return Job(**item)
+
+def append_job_log(job_id: str, message: str) -> None:
+    """Append a message to job.data["logs"] and make it the job's current message."""
+    update_item(
+        JOBS_TABLE_NAME, JOBS_PRIMARY_KEY, job_id,
+        update_attributes={"message": message, "updated_at": int(datetime.now().timestamp())},
+        append_attributes={"data.logs": [message]},
+        condition_expression=Attr(JOBS_PRIMARY_KEY).exists(),
+        return_values="NONE",
+    )
+
+def update_job_data(job_id: str, data: dict, message: Optional[str] = None) -> None:
+    """Set the given keys of job.data (e.g. progress counters) without rewriting the rest of the job."""
+    attributes = {f"data.{key}": value for key, value in data.items()}
+    attributes["updated_at"] = int(datetime.now().timestamp())
+    if message is not None:
+        attributes["message"] = message
+    update_item(
+        JOBS_TABLE_NAME, JOBS_PRIMARY_KEY, job_id,
+        update_attributes=attributes,
+        condition_expression=Attr(JOBS_PRIMARY_KEY).exists(),
+        return_values="NONE",
+    )
+
 def delete_job(job_id: str) -> None:
     delete_item(JOBS_TABLE_NAME, JOBS_PRIMARY_KEY, job_id)
 
@@ -2,10 +2,15 @@ import os
 from AWS.DynamoDB import get_item, put_item, get_all_items
 from typing import Optional
 from pydantic import BaseModel
+from Lib.RecordCache import RecordCache
 
 MODELS_TABLE_NAME = os.environ["MODELS_TABLE_NAME"]
 MODELS_PRIMARY_KEY = "model"
 
+# model -> LLMModel. Models are managed in the table directly, without an
+# updated_at, so a change shows up once the entry expires.
+_model_cache = RecordCache("models")
+
 class LLMModel(BaseModel):
     model: str
     model_provider: str
@@ -16,16 +21,29 @@ class LLMModel(BaseModel):
     use_responses_api: Optional[bool] = False
 
 def get_model(model_name: str) -> LLMModel:
-    item = get_item(MODELS_TABLE_NAME, MODELS_PRIMARY_KEY, model_name)
-    if item is None:
+    model = get_model_or_none(model_name)
+    if model is None:
         raise Exception(f"Model '{model_name}' not found in models table", 404)
-    return LLMModel(**item)
+    return model
 
 def get_model_or_none(model_name: str) -> LLMModel | None:
+    model = _model_cache.get(model_name)
+    if model is not None:
+        return model
     item = get_item(MODELS_TABLE_NAME, MODELS_PRIMARY_KEY, model_name)
     if item is None:
         return None
-    return LLMModel(**item)
+    model = LLMModel(**item)
+    cache_model(model)
+    return model
+
+def get_cached_model(model_name: str) -> LLMModel | None:
+    """The model if it is cached, without reading the table."""
+    return _model_cache.get(model_name)
+
+def cache_model(model: LLMModel) -> None:
+    """Cache a model read some other way (a batch read for example)."""
+    _model_cache.put(model.model, model)
 
 def get_all_models() -> list[LLMModel]:
     items = get_all_items(MODELS_TABLE_NAME)
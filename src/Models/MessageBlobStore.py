@@ -0,0 +1,181 @@
+import os
+import gzip
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+from AWS import S3Functions
+from AWS.CloudWatchLogs import get_logger
+from Lib.TTLCache import TTLCache
+
+logger = get_logger(log_level=os.environ["LOG_LEVEL"])
+
+# Message content larger than MESSAGE_BLOB_THRESHOLD_BYTES is moved to S3 when
+# a context is saved and replaced by a preview plus a "blob_ref". Offloading
+# is disabled while MESSAGE_BLOB_BUCKET is unset.
+MESSAGE_BLOB_BUCKET = os.environ.get("MESSAGE_BLOB_BUCKET")
+MESSAGE_BLOB_PREFIX = os.environ.get("MESSAGE_BLOB_PREFIX", "message-blobs/")
+MESSAGE_BLOB_THRESHOLD_BYTES = int(os.environ.get("MESSAGE_BLOB_THRESHOLD_BYTES", "16384"))
+MESSAGE_BLOB_PREVIEW_CHARS = 200
+MESSAGE_BLOB_FETCH_WORKERS = int(os.environ.get("MESSAGE_BLOB_FETCH_WORKERS", "8"))
+# Blobs are shared by every message with the same content, so deleting a
+# context doesn't delete them. cleanup_message_blobs.py deletes the ones no
+# stored message refers to. It only deletes blobs last uploaded at least this
+# long ago, so a save that has uploaded its blobs but not yet written its
+# messages keeps them.
+MESSAGE_BLOB_MIN_AGE_SECONDS = int(os.environ.get("MESSAGE_BLOB_MIN_AGE_SECONDS", "86400"))
+
+# Blobs are content-addressed, so a key's content never changes and fetched
+# content can be cached.
+_blob_cache = TTLCache(
+    maxsize=int(os.environ.get("MESSAGE_BLOB_CACHE_MAX_SIZE", "256")),
+    ttl=float(os.environ.get("MESSAGE_BLOB_CACHE_TTL_SECONDS", "900")),
+)
+
+
+def is_enabled() -> bool:
+    return bool(MESSAGE_BLOB_BUCKET)
+
+
+def blob_key(data: bytes) -> str:
+    return f"{MESSAGE_BLOB_PREFIX}{hashlib.sha256(data).hexdigest()}"
+
+
+def _encode_content(content) -> tuple[bytes, str]:
+    if isinstance(content, str):
+        return content.encode("utf-8"), "text"
+    return json.dumps(content, separators=(",", ":"), default=str).encode("utf-8"), "json"
+
+
+def _decode_content(data: bytes, content_format: str):
+    text = data.decode("utf-8")
+    return text if content_format == "text" else json.loads(text)
+
+
+def _preview(content) -> str:
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    return text[:MESSAGE_BLOB_PREVIEW_CHARS]
+
+
+def _upload(key: str, data: bytes) -> None:
+    # Put even if the blob exists: it renews its LastModified, so the cleanup
+    # doesn't delete a blob this save is about to refer to again
+    S3Functions.put_bytes(MESSAGE_BLOB_BUCKET, key, gzip.compress(data), content_encoding="gzip")
+
+
+def offload_message(message: dict) -> dict:
+    """
+    Return the message with large content moved to S3, or the message itself
+    if it is small, already offloaded or offloading is disabled.
+    """
+    if not MESSAGE_BLOB_BUCKET or "blob_ref" in message:
+        return message
+    content = message.get("content")
+    if not content:
+        return message
+    # Cheap pre-check before encoding: a short str can't exceed the threshold
+    if isinstance(content, str) and len(content) * 4 <= MESSAGE_BLOB_THRESHOLD_BYTES:
+        return message
+    data, content_format = _encode_content(content)
+    if len(data) <= MESSAGE_BLOB_THRESHOLD_BYTES:
+        return message
+
+    key = blob_key(data)
+    _upload(key, data)
+    _blob_cache.set(key, content)
+    offloaded = dict(message)
+    offloaded["content"] = _preview(content)
+    offloaded["blob_ref"] = {"key": key, "size": len(data), "format": content_format}
+    return offloaded
+
+
+def offload_messages(messages: list[dict]) -> list[dict]:
+    """Offload every large message. Returns the original list if nothing changed."""
+    if not MESSAGE_BLOB_BUCKET:
+        return messages
+    offloaded = [offload_message(message) for message in messages]
+    if all(new is old for new, old in zip(offloaded, messages)):
+        return messages
+    return offloaded
+
+
+def _fetch(blob_ref: dict):
+    """The blob's content, or None if it no longer exists."""
+    key = blob_ref["key"]
+    content = _blob_cache.get(key)
+    if content is None:
+        try:
+            data = gzip.decompress(S3Functions.get_bytes(MESSAGE_BLOB_BUCKET, key))
+        except Exception as e:
+            if getattr(e, "response", {}).get("Error", {}).get("Code") != "NoSuchKey":
+                raise
+            logger.error(f"Message blob {key} is missing, keeping the message's preview")
+            return None
+        content = _decode_content(data, blob_ref.get("format", "text"))
+        _blob_cache.set(key, content)
+    return content
+
+
+def hydrate_messages(messages: list[dict]) -> list[dict]:
+    """
+    Replace offloaded messages with their full content, fetching blobs
+    concurrently. Returns the original list if no message is offloaded.
+    """
+    refs = [index for index, message in enumerate(messages) if "blob_ref" in message]
+    if not refs:
+        return messages
+
+    blob_refs = [messages[index]["blob_ref"] for index in refs]
+    if len(blob_refs) > 1 and MESSAGE_BLOB_FETCH_WORKERS > 1:
+        with ThreadPoolExecutor(max_workers=min(MESSAGE_BLOB_FETCH_WORKERS, len(blob_refs))) as executor:
+            contents = list(executor.map(_fetch, blob_refs))
+    else:
+        contents = [_fetch(blob_ref) for blob_ref in blob_refs]
+
+    hydrated = list(messages)
+    for index, content in zip(refs, contents):
+        if content is None:
+            continue
+        message = {key: value for key, value in messages[index].items() if key != "blob_ref"}
+        message["content"] = content
+        hydrated[index] = message
+    return hydrated
+
+
+def blob_keys(messages: Iterable[dict]) -> set[str]:
+    """Keys of the blobs the messages refer to."""
+    return {message["blob_ref"]["key"] for message in messages if "blob_ref" in message}
+
+
+def _blob_cutoff(min_age_seconds: int = None) -> datetime:
+    if min_age_seconds is None:
+        min_age_seconds = MESSAGE_BLOB_MIN_AGE_SECONDS
+    return datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds)
+
+
+def list_blob_keys(min_age_seconds: int = None) -> list[str]:
+    """Keys of the stored blobs last uploaded at least min_age_seconds (MESSAGE_BLOB_MIN_AGE_SECONDS) ago."""
+    cutoff = _blob_cutoff(min_age_seconds)
+    keys = []
+    for page in S3Functions.list_objects(MESSAGE_BLOB_BUCKET, MESSAGE_BLOB_PREFIX):
+        keys.extend(item["Key"] for item in page if item["LastModified"] <= cutoff)
+    return keys
+
+
+def delete_blobs(keys: list[str], min_age_seconds: int = None) -> list[str]:
+    """
+    Delete the blobs that are still at least min_age_seconds old and return
+    their keys. Each one's age is read again first: a save that reused a blob
+    after it was listed has uploaded it again, and keeps it.
+    """
+    cutoff = _blob_cutoff(min_age_seconds)
+    stale = []
+    for key in keys:
+        last_modified = S3Functions.get_last_modified(MESSAGE_BLOB_BUCKET, key)
+        if last_modified is not None and last_modified <= cutoff:
+            stale.append(key)
+    S3Functions.delete_objects(MESSAGE_BLOB_BUCKET, stale)
+    for key in stale:
+        _blob_cache.invalidate(key)
+    return stale
@@ -6,11 +6,16 @@ from pydantic import BaseModel, Field
 from enum import Enum
 from typing import Optional, Type
 from Models import User
+from Lib.RecordCache import RecordCache
 
 
 PARAMETER_DEFINITIONS_TABLE_NAME = os.environ["PARAMETER_DEFINITIONS_TABLE_NAME"]
 PARAMETER_DEFINITIONS_PRIMARY_KEY = os.environ["PARAMETER_DEFINITIONS_PRIMARY_KEY"]
 
+# pd_id -> ParameterDefinition, kept up to date by save_parameter_definition
+# and delete_parameter_definition
+_parameter_definition_cache = RecordCache("parameter_definitions")
+
 class ParamType(str, Enum):
     string = "string"
     number = "number"
@@ -58,13 +63,27 @@ def create_parameter_definition(
         updated_at=updated_at
     )
     put_item(PARAMETER_DEFINITIONS_TABLE_NAME, parameter_definition.model_dump())
+    cache_parameter_definition(parameter_definition)
     return parameter_definition
 
 def get_parameter_definition(pd_id: str) -> ParameterDefinition:
+    parameter_definition = _parameter_definition_cache.get(pd_id)
+    if parameter_definition is not None:
+        return parameter_definition
     item = get_item(PARAMETER_DEFINITIONS_TABLE_NAME, PARAMETER_DEFINITIONS_PRIMARY_KEY, pd_id)
     if item == None:
         raise Exception(f"ParameterDefinition {pd_id} not found", 404)
-    return ParameterDefinition(**item)
+    parameter_definition = ParameterDefinition(**item)
+    cache_parameter_definition(parameter_definition)
+    return parameter_definition
+
+def get_cached_parameter_definition(pd_id: str) -> Optional[ParameterDefinition]:
+    """The parameter definition if it is cached, without reading the table."""
+    return _parameter_definition_cache.get(pd_id)
+
+def cache_parameter_definition(parameter_definition: ParameterDefinition) -> None:
+    """Cache a parameter definition read some other way (a batch read for example)."""
+    _parameter_definition_cache.put(parameter_definition.pd_id, parameter_definition)
 
 def get_parameter_definition_for_user(pd_id: str, user: User.User) -> ParameterDefinition:
     parameter_definition = get_parameter_definition(pd_id)
@@ -75,10 +94,12 @@ def get_parameter_definition_for_user(pd_id: str, user: User.User) -> ParameterD
 def save_parameter_definition(parameter_definition: ParameterDefinition) -> ParameterDefinition:
     parameter_definition.updated_at = int(datetime.now().timestamp())
     put_item(PARAMETER_DEFINITIONS_TABLE_NAME, parameter_definition.model_dump())
+    cache_parameter_definition(parameter_definition)
     return parameter_definition
 
 def delete_parameter_definition(pd_id: str) -> None:
     delete_item(PARAMETER_DEFINITIONS_TABLE_NAME, PARAMETER_DEFINITIONS_PRIMARY_KEY, pd_id)
+    _parameter_definition_cache.invalidate(pd_id)
 
 def get_parameter_definitions_for_org(org_id: str) -> list[ParameterDefinition]:
     return [ParameterDefinition(**item) for item in get_all_items_by_index(PARAMETER_DEFINITIONS_TABLE_NAME, "org_id", org_id)]
@@ -9,12 +9,16 @@ from typing import Optional
 from LLM.AgentTool import AgentTool
 from AWS.Lambda import invoke_lambda
 from Tools import ToolRegistry
+from Lib.RecordCache import RecordCache
 
 
 TOOLS_TABLE_NAME = os.environ["TOOLS_TABLE_NAME"]
 TOOLS_PRIMARY_KEY = os.environ["TOOLS_PRIMARY_KEY"]
 EXECUTION_LAMBDA_NAME = os.environ["EXECUTION_LAMBDA_NAME"]
 
+# tool_id -> Tool, kept up to date by save_tool and delete_tool
+_tool_cache = RecordCache("tools")
+
 
 class Tool(BaseModel):
     tool_id: str
@@ -83,27 +87,35 @@ def create_tool(
         updated_at=updated_at
     )
     put_item(TOOLS_TABLE_NAME, tool.model_dump())
+    cache_tool(tool)
     return tool
 
 
 def get_tool(tool_id: str) -> Tool:
+    tool = _tool_cache.get(tool_id)
+    if tool is not None:
+        return tool
     item = get_item(TOOLS_TABLE_NAME, TOOLS_PRIMARY_KEY, tool_id)
     if item == None:
         raise Exception(f"Tool {tool_id} not found", 404)
-    return Tool(**item)
+    tool = Tool(**item)
+    cache_tool(tool)
+    return tool
+
+
+def get_cached_tool(tool_id: str) -> Optional[Tool]:
+    """The tool if it is cached, without reading the table."""
+    return _tool_cache.get(tool_id)
+
+
+def cache_tool(tool: Tool) -> None:
+    """Cache a tool read some other way (a batch read for example)."""
+    _tool_cache.put(tool.tool_id, tool)
 
 
 def get_agent_tool_with_id(tool_id: str) -> AgentTool:
     if tool_id in ToolRegistry.tool_registry:
-        # Return a copy of the registry tool with tool_id set
-        registry_tool = ToolRegistry.tool_registry[tool_id]
-        return AgentTool(
-            tool_id=tool_id,
-            function=registry_tool.function,
-            params=registry_tool.params,
-            pass_context=registry_tool.pass_context,
-            is_async=registry_tool.is_async
-        )
+        return get_registry_agent_tool(tool_id)
 
     tool: Tool = get_tool(tool_id)
 
@@ -112,6 +124,24 @@ def get_agent_tool_with_id(tool_id: str) -> AgentTool:
         parameter_definition = ParameterDefinition.get_parameter_definition(
             tool.pd_id)
 
+    return create_agent_tool(tool, parameter_definition)
+
+
+def get_registry_agent_tool(tool_id: str) -> AgentTool:
+    # Return a copy of the registry tool with tool_id set
+    registry_tool = ToolRegistry.tool_registry[tool_id]
+    return AgentTool(
+        tool_id=tool_id,
+        function=registry_tool.function,
+        params=registry_tool.params,
+        pass_context=registry_tool.pass_context,
+        is_async=registry_tool.is_async
+    )
+
+
+def create_agent_tool(tool: Tool, parameter_definition: Optional[ParameterDefinition.ParameterDefinition] = None) -> AgentTool:
+    """AgentTool for a tool record and its parameter definition, both already read."""
+    tool_id = tool.tool_id
     params = ParameterDefinition.create_pydantic_class(
         tool.name,
         parameter_definition.parameters if parameter_definition else [],
@@ -164,11 +194,13 @@ def get_tool_for_org(tool_id: str, org_id: str) -> Tool:
 def save_tool(tool: Tool) -> Tool:
     tool.updated_at = int(datetime.now().timestamp())
     put_item(TOOLS_TABLE_NAME, tool.model_dump())
+    cache_tool(tool)
     return tool
 
 
 def delete_tool(tool_id: str) -> None:
     delete_item(TOOLS_TABLE_NAME, TOOLS_PRIMARY_KEY, tool_id)
+    _tool_cache.invalidate(tool_id)
 
 
 def get_tools_for_org(org_id: str) -> list[Tool]:
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
-from AWS.DynamoDB import get_item, put_item, delete_item
+from AWS.DynamoDB import get_item, put_item, delete_item, update_item
+from boto3.dynamodb.conditions import Attr
 from pydantic import BaseModel
 from Models import APIKey
 
@@ -59,10 +60,14 @@ def delete_user(user_id: str) -> None:
     delete_item(USERS_TABLE_NAME, USERS_PRIMARY_KEY, user_id)
 
 def associate_organization_with_user(user_id: str, organization_id: str,) -> User:
-    user = get_user(user_id)
-    user.organizations.append(organization_id)
-    save_user(user)
-    return user
+    # Atomic append so concurrent associations don't overwrite each other
+    item = update_item(
+        USERS_TABLE_NAME, USERS_PRIMARY_KEY, user_id,
+        update_attributes={"updated_at": int(datetime.timestamp(datetime.now()))},
+        append_attributes={"organizations": [organization_id]},
+        condition_expression=Attr(USERS_PRIMARY_KEY).exists(),
+    )
+    return User(**item)
 
 def user_is_member_of_organization(user_id: str, organization_id: str) -> bool:
     user = get_user(user_id)
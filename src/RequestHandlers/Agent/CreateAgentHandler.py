@@ -37,6 +37,7 @@ def create_agent_handler(lambda_event: LambdaEvent, user: CognitoUser) -> Agent.
         prompt_arg_names=body.prompt_arg_names if body.prompt_arg_names else [],
         initialize_tool_id=body.initialize_tool_id,
         model_id=body.model_id,
+        compaction_config=body.compaction_config,
     )
 
     return agent
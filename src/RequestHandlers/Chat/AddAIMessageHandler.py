@@ -3,13 +3,10 @@ from typing import Optional
 from pydantic import BaseModel
 from AWS.Lambda import LambdaEvent
 from AWS.Cognito import CognitoUser
-from Models import Agent, User, Context, Chat, Tool
-from Models.TokenTracking import InvocationTokenTracker
-from Models.LLMModel import is_anthropic_model, get_model_or_none
-from LLM.AgentChat import AgentChat
-from LLM.CreateLLM import create_llm, DEFAULT_MODEL
-from LLM.BaseMessagesConverter import dict_messages_to_base_messages, base_messages_to_dict_messages
+from Models import Agent, Context, Chat
+from Models.LLMModel import is_anthropic_model
 from LLM.TerminatingConfig import TerminatingConfig
+from Services.ChatTurnPipeline import ChatTurn, ChatTurnPipeline
 
 
 class AddAIMessageInput(BaseModel):
@@ -19,166 +16,94 @@ class AddAIMessageInput(BaseModel):
     save_ai_messages: Optional[bool] = True
     save_system_message: Optional[bool] = True
     terminating_config: Optional[TerminatingConfig] = None
+    include_trace: Optional[bool] = False
 
 
 def add_ai_message_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser]) -> Agent.Agent:  
 
     # Get the body of the request
     body = AddAIMessageInput(**json.loads(lambda_event.body))
-    
-    # Get the context and agent
-    context = None
-    agent = None
-    if (user):
-        db_user = User.get_user(user.sub)
-        context = Context.get_context_for_user(body.context_id, db_user.user_id)
-        agent = Agent.get_agent_for_user(context.agent_id, db_user)
-    else:
-        context = Context.get_public_context(body.context_id)
-        agent = Agent.get_public_agent(context.agent_id)
-
-    # Process any pending async tool responses
-    context = Context.process_async_tool_response_queue(context)
-    
-    # If message just add it to the context and return
-    if body.message:
-        # Add it as an AI message to the context
-        Context.add_ai_message(context=context, message=body.message)
-        # Return the message - no generated messages since we're just adding a pre-written message
-        # Note: save_ai_messages doesn't apply here since we're manually adding a message (always saved)
-        return Chat.ChatResponse(
-            response=body.message,
-            saved_ai_messages=True,
-            generated_messages=[]
-        )
-    
-    # Otherwise, if prompt is provided, append it to the agent's prompt
-    if not body.prompt:
-        raise ValueError("Either 'message' or 'prompt' must be provided in the request body.")
-
-    if context.model_id and is_anthropic_model(context.model_id):
-        raise Exception("Anthropic models do not support adding system messages mid-conversation", 400)
-
-    # Track the message count before adding the system message
-    messages_before_system = len(context.messages)
-    
-    # Add system message with the prompt (this saves immediately)
-    context = Context.add_system_message(context=context, message=body.prompt)
-    
-    # Save the index of the system message we just added
-    system_message_index = messages_before_system
-
-    # Context dict for context updates
-    context_dict = context.model_dump()
-
-    # Capture the number of messages before AI generation (includes system message)
-    messages_before_generation = len(context.messages)
-
-    # Combine agent tools with context additional_agent_tools (remove duplicates)
-    agent_tool_ids = agent.tools if agent.tools else []
-    context_tool_ids = context.additional_agent_tools if context.additional_agent_tools else []
-    combined_tool_ids = list(dict.fromkeys(agent_tool_ids + context_tool_ids))  # Preserve order, remove duplicates
-    
-    # Get tool objects
-    tools = [Tool.get_agent_tool_with_id(tool_id) for tool_id in combined_tool_ids] if combined_tool_ids else []
-
-    # Create token tracker for this invocation
-    token_tracker = InvocationTokenTracker(agent.org_id, context.model_id)
-
-    # Create the agent chat
-    agent_chat = AgentChat(
-        llm=create_llm(context.model_id),
-        prompt=agent.prompt,
-        messages=dict_messages_to_base_messages(context.messages),
-        tools=tools,
-        context=context_dict,
-        prompt_arg_names=agent.prompt_arg_names if agent.prompt_arg_names else [],
-        terminating_config=body.terminating_config,
-        on_response=token_tracker.on_response,
-    )
 
-    # Invoke the agent (no human message added)
-    agent_response = agent_chat.invoke()
-
-    # Convert all messages to dict format
-    all_dict_messages = base_messages_to_dict_messages(agent_chat.messages)
-    
-    # Extract generated messages (everything after the system message was added)
-    generated_dict_messages = all_dict_messages[messages_before_generation:]
-    
-    # Transform generated messages to filtered format (with tool calls shown)
-    generated_filtered_messages = Context.transform_messages_to_filtered(
-        generated_dict_messages, 
-        show_tool_calls=True
+    # Index of the system message added with the prompt
+    system_message_index = None
+
+    def add_message_or_prompt(turn: ChatTurn) -> None:
+        nonlocal system_message_index
+        context = turn.context
+
+        # If message just add it to the context and return
+        if body.message:
+            # Add it as an AI message to the context
+            Context.add_ai_message(context=context, message=body.message)
+            # Return the message - no generated messages since we're just adding a pre-written message
+            # Note: save_ai_messages doesn't apply here since we're manually adding a message (always saved)
+            turn.response = Chat.ChatResponse(
+                response=body.message,
+                saved_ai_messages=True,
+                generated_messages=[]
+            )
+            return
+
+        # Otherwise, if prompt is provided, append it to the agent's prompt
+        if not body.prompt:
+            raise ValueError("Either 'message' or 'prompt' must be provided in the request body.")
+
+        if context.model_id and is_anthropic_model(context.model_id):
+            raise Exception("Anthropic models do not support adding system messages mid-conversation", 400)
+
+        # The system message goes at the end of the current messages
+        system_message_index = len(context.messages)
+
+        # Add system message with the prompt (this saves immediately)
+        turn.context = Context.add_system_message(context=context, message=body.prompt)
+
+    def save_with_flags(turn: ChatTurn) -> None:
+        # Reload context from database to get the current saved state (with system message)
+        if turn.user:
+            context = Context.get_context_for_user(turn.context_id, turn.db_user.user_id)
+        else:
+            context = Context.get_public_context(turn.context_id)
+
+        # Handle saving logic based on flags
+        # At this point, context has: [original messages] + [system message]
+        # generated_dict_messages has: [AI generated messages]
+
+        # Case 1: save_system_message=True, save_ai_messages=True -> Save everything
+        # Case 2: save_system_message=True, save_ai_messages=False -> Keep only up to system message (clear AI messages)
+        # Case 3: save_system_message=False, save_ai_messages=True -> Remove system message, save AI messages
+        # Case 4: save_system_message=False, save_ai_messages=False -> Clear back to before system message
+
+        # Apply the flags as edits on top of the stored context rather than
+        # overwriting it, so messages saved concurrently by other requests are kept.
+        # The system message stays at system_message_index since writers only append.
+
+        def apply_save_flags(latest: Context.Context) -> None:
+            if not body.save_system_message:
+                system_message = latest.messages[system_message_index] if len(latest.messages) > system_message_index else None
+                if system_message and system_message.get("type") == "system":
+                    del latest.messages[system_message_index]
+            if body.save_ai_messages:
+                latest.messages.extend(turn.generated_dict_messages)
+
+        # Case 1 only appends, so just the generated messages (and a new summary) are written.
+        # The other cases edit the stored messages, a summary computed from them isn't saved.
+        # Case 2 (save_system_message=True, save_ai_messages=False) leaves the stored context as is
+        if body.save_system_message and body.save_ai_messages:
+            context = Context.append_messages(context, turn.generated_dict_messages, compaction=turn.agent_chat.new_compaction_state)
+        elif not body.save_system_message:
+            context = Context.update_context_with_retry(context, apply_save_flags)
+        turn.context = context
+
+    turn = ChatTurn(
+        body.context_id,
+        user,
+        save_ai_messages=body.save_ai_messages,
+        terminating_config=body.terminating_config,
+        include_trace=body.include_trace,
     )
-    
-    # Convert filtered messages to dicts for JSON serialization
-    generated_messages_dicts = [msg.model_dump() for msg in generated_filtered_messages]
-
-    # Reload context from database to get the current saved state (with system message)
-    if user:
-        context = Context.get_context_for_user(body.context_id, db_user.user_id)
-    else:
-        context = Context.get_public_context(body.context_id)
-    
-    # Handle saving logic based on flags
-    # At this point, context has: [original messages] + [system message]
-    # all_dict_messages has: [original messages] + [system message] + [AI generated messages]
-    
-    # Case 1: save_system_message=True, save_ai_messages=True -> Save everything
-    # Case 2: save_system_message=True, save_ai_messages=False -> Keep only up to system message (clear AI messages)
-    # Case 3: save_system_message=False, save_ai_messages=True -> Remove system message, save AI messages
-    # Case 4: save_system_message=False, save_ai_messages=False -> Clear back to before system message
-    
-    if body.save_system_message and body.save_ai_messages:
-        # Case 1: Save everything (system message + AI messages)
-        context.messages = all_dict_messages
-        Context.save_context(context)
-    elif body.save_system_message and not body.save_ai_messages:
-        # Case 2: Keep only up to system message (already saved), clear everything after
-        # Context already has messages up to and including system message, just need to ensure no AI messages
-        context.messages = all_dict_messages[:messages_before_generation]
-        Context.save_context(context)
-    elif not body.save_system_message and body.save_ai_messages:
-        # Case 3: Remove system message, keep AI messages
-        # Take messages before system + AI messages after system
-        messages_to_save = all_dict_messages[:system_message_index] + all_dict_messages[messages_before_generation:]
-        context.messages = messages_to_save
-        Context.save_context(context)
-    else:
-        # Case 4: Remove system message and don't save AI messages (clear back to before system message)
-        context.messages = all_dict_messages[:system_message_index]
-        Context.save_context(context)
-
-    # Calculate context percentage and invocation cost
-    effective_model_id = context.model_id or DEFAULT_MODEL
-    context_percentage = None
-    invocation_cost = None
-    llm_model = get_model_or_none(effective_model_id)
-    if llm_model:
-        if llm_model.context_window_size:
-            context_size = agent_chat.get_context_size()
-            context_percentage = round((context_size / llm_model.context_window_size) * 100, 2)
-        invocation_cost = token_tracker.calculate_cost(llm_model.input_token_cost, llm_model.output_token_cost)
-
-    # Initialize the response
-    response = Chat.ChatResponse(
-        response=agent_response,
-        saved_ai_messages=body.save_ai_messages,
-        generated_messages=generated_messages_dicts,
-        model_id=effective_model_id,
-        context_percentage=context_percentage,
-        invocation_cost=invocation_cost,
+    pipeline = (
+        ChatTurnPipeline()
+        .insert_after("async_queue", "ai_message", add_message_or_prompt)
+        .replace("save", save_with_flags)
     )
-
-    # Check for pending client-side tool calls
-    if agent_chat.pending_client_side_tool_calls:
-        response.client_side_tool_calls = [
-            Chat.ClientSideToolCall(**tc) for tc in agent_chat.pending_client_side_tool_calls
-        ]
-
-    # check if there are chat events
-    if (context_dict.get("events")):
-        response.events = context_dict["events"]
-    
-    return response
\ No newline at end of file
+    return pipeline.run(turn)
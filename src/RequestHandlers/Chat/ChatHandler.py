@@ -2,117 +2,25 @@ import json
 from typing import Optional
 from AWS.Lambda import LambdaEvent
 from AWS.Cognito import CognitoUser
-from Models import Agent, User, Context, Chat, Tool
-from Models.TokenTracking import InvocationTokenTracker
-from Models.LLMModel import get_model_or_none
-from LLM.AgentChat import AgentChat
-from LLM.CreateLLM import create_llm, DEFAULT_MODEL
-from LLM.BaseMessagesConverter import dict_messages_to_base_messages, base_messages_to_dict_messages
+from Models import Agent, Context, Chat
+from Services.ChatTurnPipeline import ChatTurn, ChatTurnPipeline
 
 
 def chat_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser]) -> Agent.Agent:  
 
     # Get the body of the request
     body = Chat.ChatInput(**json.loads(lambda_event.body))
-    
-    # Get the context and agent
-    context = None
-    agent = None
-    if (user):
-        db_user = User.get_user(user.sub)
-        context = Context.get_context_for_user(body.context_id, db_user.user_id)
-        agent = Agent.get_agent_for_user(context.agent_id, db_user)
-    else:
-        context = Context.get_public_context(body.context_id)
-        agent = Agent.get_public_agent(context.agent_id)
 
-    # Process any pending async tool responses
-    context = Context.process_async_tool_response_queue(context)
-    
-    # Add the human message to the context and save it immediately
-    context = Context.add_human_message(context, body.message)
+    def add_human_message(turn: ChatTurn) -> None:
+        # Add the human message to the context and save it immediately
+        turn.context = Context.add_human_message(turn.context, body.message)
 
-    # Context dict for context updates (after human message is added)
-    context_dict = context.model_dump()
-
-    # Capture the number of messages before AI generation
-    messages_before_generation = len(context.messages)
-
-    # Combine agent tools with context additional_agent_tools (remove duplicates)
-    agent_tool_ids = agent.tools if agent.tools else []
-    context_tool_ids = context.additional_agent_tools if context.additional_agent_tools else []
-    combined_tool_ids = list(dict.fromkeys(agent_tool_ids + context_tool_ids))  # Preserve order, remove duplicates
-    
-    # Get tool objects
-    tools = [Tool.get_agent_tool_with_id(tool_id) for tool_id in combined_tool_ids] if combined_tool_ids else []
-
-    # Create token tracker for this invocation
-    token_tracker = InvocationTokenTracker(agent.org_id, context.model_id)
-
-    # Create the agent chat with the updated context (including human message)
-    agent_chat = AgentChat(
-        create_llm(context.model_id),
-        agent.prompt,
-        messages=dict_messages_to_base_messages(context.messages),
-        tools=tools,
-        context=context_dict,
-        prompt_arg_names=agent.prompt_arg_names if agent.prompt_arg_names else [],
+    turn = ChatTurn(
+        body.context_id,
+        user,
+        save_ai_messages=body.save_ai_messages,
         terminating_config=body.terminating_config,
-        on_response=token_tracker.on_response,
-    )
-
-    # Invoke the agent (human message already in context)
-    agent_response = agent_chat.invoke()
-
-    # Convert all messages to dict format
-    all_dict_messages = base_messages_to_dict_messages(agent_chat.messages)
-    
-    # Extract generated messages (everything after the human message)
-    generated_dict_messages = all_dict_messages[messages_before_generation:]
-    
-    # Transform generated messages to filtered format (with tool calls shown)
-    generated_filtered_messages = Context.transform_messages_to_filtered(
-        generated_dict_messages, 
-        show_tool_calls=True
+        include_trace=body.include_trace,
     )
-    
-    # Convert filtered messages to dicts for JSON serialization
-    generated_messages_dicts = [msg.model_dump() for msg in generated_filtered_messages]
-
-    # Conditionally save AI-generated messages based on save_ai_messages flag
-    if body.save_ai_messages:
-        context.messages = all_dict_messages
-        Context.save_context(context)
-
-    # Calculate context percentage and invocation cost
-    effective_model_id = context.model_id or DEFAULT_MODEL
-    context_percentage = None
-    invocation_cost = None
-    llm_model = get_model_or_none(effective_model_id)
-    if llm_model:
-        if llm_model.context_window_size:
-            context_size = agent_chat.get_context_size()
-            context_percentage = round((context_size / llm_model.context_window_size) * 100, 2)
-        invocation_cost = token_tracker.calculate_cost(llm_model.input_token_cost, llm_model.output_token_cost)
-
-    # Initialize the response
-    response = Chat.ChatResponse(
-        response=agent_response,
-        saved_ai_messages=body.save_ai_messages,
-        generated_messages=generated_messages_dicts,
-        model_id=effective_model_id,
-        context_percentage=context_percentage,
-        invocation_cost=invocation_cost,
-    )
-
-    # Check for pending client-side tool calls
-    if agent_chat.pending_client_side_tool_calls:
-        response.client_side_tool_calls = [
-            Chat.ClientSideToolCall(**tc) for tc in agent_chat.pending_client_side_tool_calls
-        ]
-
-    # check if there are chat events
-    if (context_dict.get("events")):
-        response.events = context_dict["events"]
-    
-    return response
\ No newline at end of file
+    pipeline = ChatTurnPipeline().insert_after("async_queue", "human_message", add_human_message)
+    return pipeline.run(turn)
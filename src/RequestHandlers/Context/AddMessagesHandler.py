@@ -34,11 +34,8 @@ def add_messages_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser])
     # Convert filtered messages to dict messages
     new_dict_messages = Context.filtered_messages_to_dict_messages(body.messages)
     
-    # Append to existing messages
-    context.messages.extend(new_dict_messages)
-    
-    # Save the context
-    Context.save_context(context)
+    # Append to existing messages and save, merging with concurrent writers
+    context = Context.append_messages(context, new_dict_messages)
     
     # Return the filtered context
     return Context.transform_to_filtered_context(context, show_tool_calls=True)
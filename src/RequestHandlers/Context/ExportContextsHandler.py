@@ -0,0 +1,25 @@
+from typing import Optional
+from AWS.Lambda import LambdaEvent
+from AWS.Cognito import CognitoUser
+from Models.Job import Job, save_job, update_job_status, update_job_data, JobStatus
+from Services import ContextTransferService
+
+
+def export_contexts_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser]) -> Job:
+
+    job = update_job_status(lambda_event.runJobId, JobStatus.in_progress, "Context export in progress")
+
+    # Report progress after every page without rewriting the rest of the job
+    def on_progress(progress: dict):
+        job.data.update(progress)
+        job.message = f"Exported {progress['contexts_exported']} contexts"
+        update_job_data(job.job_id, progress, job.message)
+
+    progress = ContextTransferService.export_contexts(job.job_id, user.sub, on_progress=on_progress)
+
+    job.data.update(progress)
+    job.status = JobStatus.completed
+    job.message = f"Context export complete: {progress['contexts_exported']} contexts"
+    save_job(job)
+
+    return job
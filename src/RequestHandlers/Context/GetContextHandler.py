@@ -1,29 +1,58 @@
-from typing import Optional
+from typing import Optional, Union
 from AWS.Lambda import LambdaEvent
 from AWS.Cognito import CognitoUser
 from Models import Context
 
-def get_context_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser]) -> Context.FilteredContext: 
+# Context attributes each FilteredContext field is built from, beyond the header
+# attributes every read includes (see Context.CONTEXT_HEADER_FIELDS)
+CONTEXT_FIELDS_FOR = {
+    "messages": ["messages"],
+    "user_defined": ["user_defined"],
+    "model_id": ["model_id"],
+    "context_percentage": ["model_id", "token_estimate_total"],
+    "token_estimate_total": ["token_estimate_total"],
+}
+
+
+def _int_param(query_params: dict, name: str) -> Optional[int]:
+    value = query_params.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise Exception(f"{name} must be an integer", 400)
+
+
+def get_context_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser]) -> Union[Context.FilteredContext, Context.ProjectedFilteredContext]:
     # Get the path parameters
     context_id = lambda_event.requestParameters.get("context_id")
 
     # Get the query parameters
-    query_params = lambda_event.queryStringParameters
-    show_tool_calls = False
-    if (query_params):
-        show_tool_calls = query_params.get("with_tool_calls")
+    query_params = lambda_event.queryStringParameters or {}
+    show_tool_calls = query_params.get("with_tool_calls", False)
+    # A page of messages: the last limit messages before index before
+    limit = _int_param(query_params, "limit")
+    before = _int_param(query_params, "before")
+    # Comma-separated FilteredContext fields to return
+    fields = None
+    if query_params.get("fields"):
+        fields = [field.strip() for field in query_params["fields"].split(",") if field.strip()]
+        unknown = [field for field in fields if field not in Context.FilteredContext.model_fields]
+        if unknown:
+            raise Exception(f"Unknown fields: {', '.join(unknown)}", 400)
 
     if ( not context_id):
         raise Exception("context_id is required", 400)
+    context_fields = None
+    if fields is not None:
+        context_fields = sorted({attribute for field in fields for attribute in CONTEXT_FIELDS_FOR.get(field, [])})
     context = None
     if (user):
-        context = Context.get_context_for_user(context_id, user.sub)
+        context = Context.get_context_for_user(context_id, user.sub, limit=limit, before=before, fields=context_fields)
     else:
-        context = Context.get_public_context(context_id)
-    return Context.transform_to_filtered_context(context, show_tool_calls)
-
-
-    
-
-
-            
\ No newline at end of file
+        context = Context.get_public_context(context_id, limit=limit, before=before, fields=context_fields)
+    filtered_context = Context.transform_to_filtered_context(context, show_tool_calls, fields=fields)
+    if fields is None:
+        return filtered_context
+    return Context.ProjectedFilteredContext(**filtered_context.model_dump(include=set(fields)))
@@ -1,3 +1,4 @@
+from typing import Optional
 from AWS.Lambda import LambdaEvent
 from AWS.Cognito import CognitoUser
 from Models import Context, Agent
@@ -5,15 +6,27 @@ from pydantic import BaseModel
 
 class ContextHistoryResponse(BaseModel):
     contexts: list[Context.HistoryContext]
+    # Pass as cursor to get the next (older) page, None on the last page
+    next_cursor: Optional[str] = None
 
-def get_context_history_handler(lambda_event: LambdaEvent, user: CognitoUser) -> ContextHistoryResponse: 
-    contexts = Context.get_contexts_by_user_id(user.sub)
+def get_context_history_handler(lambda_event: LambdaEvent, user: CognitoUser) -> ContextHistoryResponse:
+    query_params = lambda_event.queryStringParameters or {}
+    limit = Context.CONTEXT_HISTORY_PAGE_SIZE
+    if query_params.get("limit"):
+        try:
+            limit = int(query_params["limit"])
+        except ValueError:
+            raise Exception("limit must be an integer", 400)
+
+    # Headers only: the preview and count are stored on them, no messages are read
+    contexts, next_cursor = Context.get_context_headers_by_user_id(user.sub, limit=limit, cursor=query_params.get("cursor"))
 
     agent_ids = set()
     for context in contexts:
         agent_ids.add(context.agent_id)
 
-    agents = {agent.agent_id: agent for agent in Agent.get_agents_from_ids(list(agent_ids))}
+    # Contexts of deleted agents are left out
+    agents = {agent.agent_id: agent for agent in Agent.get_history_agents_from_ids(list(agent_ids))}
 
     return_contexts: list[Context.HistoryContext] = []
     for context in contexts:
@@ -27,11 +40,6 @@ def get_context_history_handler(lambda_event: LambdaEvent, user: CognitoUser) ->
     return_contexts.sort(key=lambda x: x.updated_at, reverse=True)
 
     return ContextHistoryResponse(**{
-        "contexts": return_contexts
+        "contexts": return_contexts,
+        "next_cursor": next_cursor
     })
-
-
-    
-
-
-            
\ No newline at end of file
@@ -0,0 +1,38 @@
+import json
+from typing import Optional
+from pydantic import BaseModel
+from AWS.Lambda import LambdaEvent
+from AWS.Cognito import CognitoUser
+from Models.Job import Job, get_job_for_owner, save_job, update_job_status, update_job_data, JobStatus
+from Services import ContextTransferService
+
+
+class ImportContextsInput(BaseModel):
+    # Job id of a completed POST /context/export
+    export_job_id: str
+    # Replace contexts that already exist instead of skipping them
+    overwrite: bool = False
+
+
+def import_contexts_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser]) -> Job:
+
+    job = update_job_status(lambda_event.runJobId, JobStatus.in_progress, "Context import in progress")
+
+    body = ImportContextsInput(**json.loads(lambda_event.body or "{}"))
+    export_job = get_job_for_owner(body.export_job_id, user.sub)
+    if export_job.status != JobStatus.completed or "contexts_exported" not in export_job.data:
+        raise Exception(f"Job {body.export_job_id} is not a completed context export", 400)
+
+    def on_progress(progress: dict):
+        job.data.update(progress)
+        job.message = f"Imported {progress['contexts_imported']} contexts"
+        update_job_data(job.job_id, progress, job.message)
+
+    progress = ContextTransferService.import_contexts(body.export_job_id, user.sub, overwrite=body.overwrite, on_progress=on_progress)
+
+    job.data.update(progress)
+    job.status = JobStatus.completed
+    job.message = f"Context import complete: {progress['contexts_imported']} imported, {progress['contexts_skipped']} skipped"
+    save_job(job)
+
+    return job
@@ -34,10 +34,11 @@ def set_messages_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser])
     # Convert filtered messages to dict messages
     new_dict_messages = Context.filtered_messages_to_dict_messages(body.messages)
     
-    # Replace all messages
+    # Replace all messages (a summary of the old ones no longer applies)
     context.messages = new_dict_messages
+    context.compaction = None
     
-    # Save the context
+    # Save the context (a replace, so a concurrent change is reported as a 409 instead of merged)
     Context.save_context(context)
     
     # Return the filtered context
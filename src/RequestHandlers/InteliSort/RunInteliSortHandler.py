@@ -6,7 +6,7 @@ from AWS.Cognito import CognitoUser
 from LLM.InteliSort import inteli_sort
 from LLM.LLMExtract import llm_extract
 from LLM.CreateLLM import create_llm
-from Models.Job import get_job, save_job, JobStatus
+from Models.Job import save_job, append_job_log, update_job_status, JobStatus
 from Models.TokenTracking import build_tracking_callback
 from Models.LLMModel import validate_model_id
 from Models.User import get_user
@@ -29,10 +29,7 @@ class ComparisonResult(BaseModel):
 
 def inteli_sort_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser]):
 
-    job = get_job(lambda_event.runJobId)
-    job.status = JobStatus.in_progress
-    job.message = "InteliSort in progress"
-    save_job(job)
+    job = update_job_status(lambda_event.runJobId, JobStatus.in_progress, "InteliSort in progress")
 
     # Parse and validate input
     body = InteliSortInput(**json.loads(lambda_event.body))
@@ -71,12 +68,12 @@ def inteli_sort_handler(lambda_event: LambdaEvent, user: Optional[CognitoUser]):
         result = llm_extract(ComparisonResult, prompt, llm, on_response=tracking_callback)
         return a if result["victor"] == "a" else b
 
-    # Build log function that persists progress to the Job
+    # Build log function that persists progress to the Job (appends, no full rewrite)
     def log(message):
         job.data["logs"] = job.data.get("logs", [])
         job.data["logs"].append(message)
         job.message = message
-        save_job(job)
+        append_job_log(job.job_id, message)
 
     # Run InteliSort
     sorted_items = inteli_sort(items, compare, body.n, log=log)
@@ -1,4 +1,6 @@
 from LLM.AgentChat import AgentChat
+from LLM.ContextCompactor import create_compactor
+from LLM.PromptAssembler import create_prompt_assembler
 from LLM.CreateLLM import create_llm
 from LLM.BaseMessagesConverter import dict_messages_to_base_messages, base_messages_to_dict_messages
 from Models import Context, Agent, Tool
@@ -6,6 +8,7 @@ from Models.TokenTracking import build_tracking_callback
 
 
 def invoke_context(context: Context.Context, agent: Agent.Agent) -> Context.Context:
+    messages_before_count = len(context.messages)
     agentChat: AgentChat = AgentChat(
         create_llm(context.model_id if hasattr(context, 'model_id') else None),
         agent.prompt,
@@ -14,11 +17,14 @@ def invoke_context(context: Context.Context, agent: Agent.Agent) -> Context.Cont
         context=context.model_dump(),
         prompt_arg_names=agent.prompt_arg_names if agent.prompt_arg_names else [],
         on_response=build_tracking_callback(agent.org_id, context.model_id if hasattr(context, 'model_id') else None),
+        compactor=create_compactor(agent.compaction_config, context.model_id, context.compaction),
+        prompt_assembler=create_prompt_assembler(context.model_id),
     )
     agentChat.invoke()
 
-    # Save the new message to context
-    context.messages = base_messages_to_dict_messages(agentChat.messages)
-    Context.save_context(context)
-
-    return context
\ No newline at end of file
+    # Save the new messages to context
+    return Context.append_messages(
+        context,
+        base_messages_to_dict_messages(agentChat.messages[messages_before_count:]),
+        compaction=agentChat.new_compaction_state,
+    )
\ No newline at end of file
@@ -0,0 +1,324 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from AWS.Cognito import CognitoUser
+from AWS.CloudWatchLogs import get_logger
+from AWS.DynamoDB import batch_get_items, batch_get_items_across_tables
+from Models import Agent, User, Context, Chat, Tool, ParameterDefinition
+from Models.TokenTracking import InvocationTokenTracker
+from Models.LLMModel import LLMModel, MODELS_TABLE_NAME, MODELS_PRIMARY_KEY, get_model_or_none, get_cached_model, cache_model
+from Lib.RecordCache import record_cache_stats
+from Tools import ToolRegistry
+from LLM.AgentChat import AgentChat
+from LLM.AgentLoop import elapsed_ms, LIMIT_STOP_REASONS
+from LLM.ContextCompactor import create_compactor
+from LLM.PromptAssembler import create_prompt_assembler
+from LLM.CreateLLM import create_llm, DEFAULT_MODEL
+from LLM.BaseMessagesConverter import dict_messages_to_base_messages, base_messages_to_dict_messages
+from LLM.TerminatingConfig import TerminatingConfig
+
+logger = get_logger(log_level=os.environ["LOG_LEVEL"])
+
+
+class ChatTurn:
+    """
+    The state of one agent turn (a chat, invoke, client-side tool responses
+    or add AI message request). The request fields are set by the handler,
+    the rest is filled in by the pipeline stages.
+    """
+
+    def __init__(
+        self,
+        context_id: str,
+        user: Optional[CognitoUser],
+        save_ai_messages: bool = True,
+        terminating_config: Optional[TerminatingConfig] = None,
+        include_trace: bool = False,
+    ):
+        self.context_id = context_id
+        self.user = user
+        self.save_ai_messages = save_ai_messages
+        self.terminating_config = terminating_config
+        self.include_trace = include_trace
+
+        self.db_user: Optional[User.User] = None
+        self.context: Optional[Context.Context] = None
+        self.agent: Optional[Agent.Agent] = None
+        # Context dict the agent's tools update, its events go in the response
+        self.context_dict: Optional[dict] = None
+        # Tool records and parameter definitions read by the prefetch, by id
+        self.tool_records: dict[str, Tool.Tool] = {}
+        self.parameter_definitions: dict[str, ParameterDefinition.ParameterDefinition] = {}
+        self.tools: list = []
+        # Model record of effective_model_id, and whether it was read (it may not exist)
+        self.llm_model: Optional[LLMModel] = None
+        self.llm_model_read = False
+        self.token_tracker: Optional[InvocationTokenTracker] = None
+        self.agent_chat: Optional[AgentChat] = None
+        # Messages of agent_chat that are already stored
+        self.messages_before_generation = 0
+        self.agent_response = None
+        self.generated_dict_messages: list[dict] = []
+        self.generated_messages_dicts: list[dict] = []
+        self.context_percentage: Optional[float] = None
+        self.invocation_cost: Optional[float] = None
+        # Set by the last stage, or by an earlier one to end the turn there
+        self.response: Optional[Chat.ChatResponse] = None
+        # Milliseconds each stage took, by stage name
+        self.timings: dict[str, float] = {}
+
+    @property
+    def effective_model_id(self) -> str:
+        return self.context.model_id or DEFAULT_MODEL
+
+
+Stage = Callable[[ChatTurn], None]
+
+
+def tool_ids_for_turn(agent: Agent.Agent, context: Context.Context) -> list[str]:
+    """The agent's tools and the context's additional tools, in order without duplicates."""
+    agent_tool_ids = agent.tools if agent.tools else []
+    context_tool_ids = context.additional_agent_tools if context.additional_agent_tools else []
+    return list(dict.fromkeys(agent_tool_ids + context_tool_ids))
+
+
+def _tool_ids_to_read(tool_ids: list[str], turn: ChatTurn) -> list[str]:
+    """
+    Tool ids with a record in the tools table that the turn doesn't have yet.
+    Cached tools are added to the turn instead.
+    """
+    to_read = []
+    for tool_id in tool_ids:
+        if tool_id in ToolRegistry.tool_registry or tool_id in turn.tool_records:
+            continue
+        tool = Tool.get_cached_tool(tool_id)
+        if tool is not None:
+            turn.tool_records[tool_id] = tool
+        else:
+            to_read.append(tool_id)
+    return to_read
+
+
+def _add_tool_records(turn: ChatTurn, items: list[dict]) -> None:
+    for item in items:
+        tool = Tool.Tool(**item)
+        Tool.cache_tool(tool)
+        turn.tool_records[tool.tool_id] = tool
+
+
+def prefetch_turn_records(turn: ChatTurn) -> None:
+    """
+    Read the records the turn needs before the LLM call, in as few round
+    trips as the dependencies between them allow:
+    1. the user and the context, concurrently
+    2. the agent, the model record and the context's additional tools, in one BatchGetItem
+    3. the agent's tools not read yet
+    4. the tools' parameter definitions
+    Registry tools have no record, and cached records aren't read, so rounds
+    2 to 4 are skipped when there is nothing left to read.
+    """
+    if turn.user:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            db_user = executor.submit(User.get_user, turn.user.sub)
+            context = executor.submit(Context.get_context, turn.context_id)
+            turn.db_user = db_user.result()
+            turn.context = Context.check_context_for_user(context.result(), turn.db_user.user_id)
+    else:
+        turn.context = Context.get_public_context(turn.context_id)
+    context = turn.context
+
+    agent = Agent.get_cached_agent(context.agent_id)
+    turn.llm_model = get_cached_model(turn.effective_model_id)
+    records = batch_get_items_across_tables({
+        Agent.AGENTS_TABLE_NAME: (Agent.AGENTS_PRIMARY_KEY, [] if agent else [context.agent_id]),
+        MODELS_TABLE_NAME: (MODELS_PRIMARY_KEY, [] if turn.llm_model else [turn.effective_model_id]),
+        Tool.TOOLS_TABLE_NAME: (Tool.TOOLS_PRIMARY_KEY, _tool_ids_to_read(context.additional_agent_tools or [], turn)),
+    })
+    if agent is None:
+        if not records[Agent.AGENTS_TABLE_NAME]:
+            raise Exception(f"Agent with id: {context.agent_id} does not exist", 404)
+        agent = Agent.Agent(**records[Agent.AGENTS_TABLE_NAME][0])
+        Agent.cache_agent(agent)
+    turn.agent = Agent.check_agent_for_user(agent, turn.db_user) if turn.user else Agent.check_public_agent(agent)
+    if turn.llm_model is None and records[MODELS_TABLE_NAME]:
+        turn.llm_model = LLMModel(**records[MODELS_TABLE_NAME][0])
+        cache_model(turn.llm_model)
+    turn.llm_model_read = True
+    _add_tool_records(turn, records[Tool.TOOLS_TABLE_NAME])
+
+    remaining_tool_ids = _tool_ids_to_read(tool_ids_for_turn(turn.agent, context), turn)
+    if remaining_tool_ids:
+        _add_tool_records(turn, batch_get_items(Tool.TOOLS_TABLE_NAME, Tool.TOOLS_PRIMARY_KEY, remaining_tool_ids))
+
+    pd_ids = []
+    for pd_id in dict.fromkeys(tool.pd_id for tool in turn.tool_records.values() if tool.pd_id):
+        parameter_definition = ParameterDefinition.get_cached_parameter_definition(pd_id)
+        if parameter_definition is not None:
+            turn.parameter_definitions[pd_id] = parameter_definition
+        else:
+            pd_ids.append(pd_id)
+    if pd_ids:
+        for item in batch_get_items(
+            ParameterDefinition.PARAMETER_DEFINITIONS_TABLE_NAME, ParameterDefinition.PARAMETER_DEFINITIONS_PRIMARY_KEY, pd_ids,
+        ):
+            parameter_definition = ParameterDefinition.ParameterDefinition(**item)
+            ParameterDefinition.cache_parameter_definition(parameter_definition)
+            turn.parameter_definitions[parameter_definition.pd_id] = parameter_definition
+
+
+def process_async_tool_responses(turn: ChatTurn) -> None:
+    turn.context = Context.process_async_tool_response_queue(turn.context)
+
+
+def _agent_tool(turn: ChatTurn, tool_id: str):
+    if tool_id in ToolRegistry.tool_registry:
+        return Tool.get_registry_agent_tool(tool_id)
+    tool = turn.tool_records.get(tool_id)
+    # Not prefetched (or missing, then this raises the 404)
+    if tool is None:
+        return Tool.get_agent_tool_with_id(tool_id)
+    parameter_definition = None
+    if tool.pd_id:
+        parameter_definition = turn.parameter_definitions.get(tool.pd_id) or ParameterDefinition.get_parameter_definition(tool.pd_id)
+    return Tool.create_agent_tool(tool, parameter_definition)
+
+
+def resolve_tools(turn: ChatTurn) -> None:
+    turn.tools = [_agent_tool(turn, tool_id) for tool_id in tool_ids_for_turn(turn.agent, turn.context)]
+
+
+def build_agent_chat(turn: ChatTurn) -> None:
+    context, agent = turn.context, turn.agent
+    turn.context_dict = context.model_dump()
+    turn.token_tracker = InvocationTokenTracker(agent.org_id, context.model_id)
+    turn.agent_chat = AgentChat(
+        create_llm(context.model_id, llm_model=turn.llm_model),
+        agent.prompt,
+        messages=dict_messages_to_base_messages(context.messages),
+        tools=turn.tools,
+        context=turn.context_dict,
+        prompt_arg_names=agent.prompt_arg_names if agent.prompt_arg_names else [],
+        terminating_config=turn.terminating_config,
+        on_response=turn.token_tracker.on_response,
+        compactor=create_compactor(agent.compaction_config, context.model_id, context.compaction),
+        prompt_assembler=create_prompt_assembler(context.model_id),
+    )
+    turn.messages_before_generation = len(turn.agent_chat.messages)
+
+
+def invoke_agent(turn: ChatTurn) -> None:
+    turn.agent_response = turn.agent_chat.invoke()
+
+
+def convert_generated_messages(turn: ChatTurn) -> None:
+    # Only the generated messages are converted, the ones before are already stored
+    turn.generated_dict_messages = base_messages_to_dict_messages(turn.agent_chat.messages[turn.messages_before_generation:])
+    # Filtered format (with tool calls shown) for the response
+    turn.generated_messages_dicts = [
+        message.model_dump()
+        for message in Context.transform_messages_to_filtered(turn.generated_dict_messages, show_tool_calls=True)
+    ]
+
+
+def save_generated_messages(turn: ChatTurn) -> None:
+    # Appended (merging with messages other requests appended meanwhile), with
+    # the new summary if the agent chat compacted the context
+    turn.context = Context.append_messages(
+        turn.context,
+        turn.generated_dict_messages if turn.save_ai_messages else [],
+        compaction=turn.agent_chat.new_compaction_state,
+    )
+
+
+def calculate_usage(turn: ChatTurn) -> None:
+    """Context window percentage and invocation cost, when the model is in the models table."""
+    if not turn.llm_model_read:
+        turn.llm_model = get_model_or_none(turn.effective_model_id)
+        turn.llm_model_read = True
+    if not turn.llm_model:
+        return
+    if turn.llm_model.context_window_size:
+        context_size = turn.agent_chat.get_context_size()
+        turn.context_percentage = round((context_size / turn.llm_model.context_window_size) * 100, 2)
+    turn.invocation_cost = turn.token_tracker.calculate_cost(turn.llm_model.input_token_cost, turn.llm_model.output_token_cost)
+
+
+def build_response(turn: ChatTurn) -> None:
+    agent_chat = turn.agent_chat
+    turn.response = Chat.ChatResponse(
+        response=turn.agent_response,
+        saved_ai_messages=turn.save_ai_messages,
+        generated_messages=turn.generated_messages_dicts,
+        model_id=turn.effective_model_id,
+        context_percentage=turn.context_percentage,
+        invocation_cost=turn.invocation_cost,
+        stopped_reason=agent_chat.trace.stop_reason if agent_chat.trace.stop_reason in LIMIT_STOP_REASONS else None,
+        trace=agent_chat.trace if turn.include_trace else None,
+    )
+    if agent_chat.pending_client_side_tool_calls:
+        turn.response.client_side_tool_calls = [
+            Chat.ClientSideToolCall(**tc) for tc in agent_chat.pending_client_side_tool_calls
+        ]
+    if turn.context_dict.get("events"):
+        turn.response.events = turn.context_dict["events"]
+
+
+DEFAULT_STAGES: list[tuple[str, Stage]] = [
+    ("prefetch", prefetch_turn_records),
+    ("async_queue", process_async_tool_responses),
+    ("tools", resolve_tools),
+    ("build", build_agent_chat),
+    ("invoke", invoke_agent),
+    ("convert", convert_generated_messages),
+    ("save", save_generated_messages),
+    ("usage", calculate_usage),
+    ("response", build_response),
+]
+
+
+class ChatTurnPipeline:
+    """
+    Runs an agent turn as a list of named stages, each a function of the
+    ChatTurn. Handlers add or replace stages for what is particular to them;
+    the turn ends after the last stage, or as soon as a stage sets a response.
+    How long each stage took is logged and kept in turn.timings.
+    """
+
+    def __init__(self, stages: Optional[list[tuple[str, Stage]]] = None):
+        self.stages = list(stages if stages is not None else DEFAULT_STAGES)
+
+    def _index(self, name: str) -> int:
+        for index, (stage_name, _) in enumerate(self.stages):
+            if stage_name == name:
+                return index
+        raise ValueError(f"No stage named {name}")
+
+    def insert_before(self, name: str, stage_name: str, stage: Stage) -> "ChatTurnPipeline":
+        self.stages.insert(self._index(name), (stage_name, stage))
+        return self
+
+    def insert_after(self, name: str, stage_name: str, stage: Stage) -> "ChatTurnPipeline":
+        self.stages.insert(self._index(name) + 1, (stage_name, stage))
+        return self
+
+    def replace(self, name: str, stage: Stage) -> "ChatTurnPipeline":
+        self.stages[self._index(name)] = (name, stage)
+        return self
+
+    def run(self, turn: ChatTurn) -> Chat.ChatResponse:
+        start = time.perf_counter()
+        try:
+            for name, stage in self.stages:
+                stage_start = time.perf_counter()
+                try:
+                    stage(turn)
+                finally:
+                    turn.timings[name] = elapsed_ms(stage_start)
+                if turn.response is not None:
+                    break
+        finally:
+            stages = ", ".join(f"{name} {ms} ms" for name, ms in turn.timings.items())
+            caches = ", ".join(f"{name} {stats['hits']}/{stats['misses']}" for name, stats in record_cache_stats().items())
+            logger.info(f"Chat turn {turn.context_id}: {elapsed_ms(start)} ms ({stages}); record cache hits/misses: {caches}")
+        return turn.response
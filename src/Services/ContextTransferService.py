@@ -0,0 +1,161 @@
+import os
+import json
+import gzip
+import zlib
+from typing import Callable, Optional
+from AWS import S3Functions
+from AWS.CloudWatchLogs import get_logger
+from Lib.DecimalConversion import decimal_to_serializable
+from Models import Context, MessageBlobStore
+
+logger = get_logger(log_level=os.environ["LOG_LEVEL"])
+
+# Exports are written to CONTEXT_EXPORT_BUCKET as gzip-compressed NDJSON, one
+# context per line. Export and import are disabled while it is unset.
+CONTEXT_EXPORT_BUCKET = os.environ.get("CONTEXT_EXPORT_BUCKET")
+CONTEXT_EXPORT_PREFIX = os.environ.get("CONTEXT_EXPORT_PREFIX", "context-exports/")
+# Compressed bytes buffered before a part is uploaded. S3 requires every part
+# but the last to be at least 5 MB.
+EXPORT_PART_SIZE_BYTES = int(os.environ.get("CONTEXT_EXPORT_PART_SIZE_BYTES", str(8 * 1024 * 1024)))
+# Contexts written per batch on import (the BatchWriteItem limit)
+IMPORT_BATCH_SIZE = 25
+# Storage details that belong to the table the context was read from
+EXPORT_EXCLUDED_FIELDS = {"version", "message_storage", "message_count", "message_encoding"}
+
+
+def _require_bucket() -> str:
+    if not CONTEXT_EXPORT_BUCKET:
+        raise Exception("Context export is not configured", 500)
+    return CONTEXT_EXPORT_BUCKET
+
+
+def export_key(job_id: str) -> str:
+    return f"{CONTEXT_EXPORT_PREFIX}{job_id}.ndjson.gz"
+
+
+class GzipMultipartWriter:
+    """
+    Compresses lines into a gzip stream and uploads it to S3 as a multipart
+    upload, so only about one part of compressed data is held in memory.
+    """
+
+    def __init__(self, bucket_name: str, key: str, part_size: Optional[int] = None):
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = part_size or EXPORT_PART_SIZE_BYTES
+        # wbits=31 writes a gzip header and trailer
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        self._buffer = bytearray()
+        self._parts: list[dict] = []
+        self.bytes_written = 0
+        self.upload_id = S3Functions.create_multipart_upload(bucket_name, key, content_type="application/x-ndjson", content_encoding="gzip")
+
+    @property
+    def parts_uploaded(self) -> int:
+        return len(self._parts)
+
+    def _upload_part(self) -> None:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self._parts.append(S3Functions.upload_part(self.bucket_name, self.key, self.upload_id, len(self._parts) + 1, data))
+        self.bytes_written += len(data)
+
+    def write_line(self, line: str) -> None:
+        self._buffer += self._compressor.compress(line.encode("utf-8") + b"\n")
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+
+    def close(self) -> None:
+        self._buffer += self._compressor.flush()
+        self._upload_part()
+        S3Functions.complete_multipart_upload(self.bucket_name, self.key, self.upload_id, self._parts)
+
+    def abort(self) -> None:
+        try:
+            S3Functions.abort_multipart_upload(self.bucket_name, self.key, self.upload_id)
+        except Exception as e:
+            logger.error(f"Failed to abort upload of {self.key}: {e}")
+
+
+def export_record(context: Context.Context) -> dict:
+    """A context as one export line: whole messages, no storage details."""
+    record = context.model_dump(exclude=EXPORT_EXCLUDED_FIELDS)
+    record["messages"] = MessageBlobStore.hydrate_messages(context.messages)
+    return decimal_to_serializable(record)
+
+
+def export_contexts(job_id: str, user_id: str, on_progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Stream all of the user's contexts, one query page at a time, to the job's
+    export object. on_progress is called with the counters after every page.
+    Returns the final counters.
+    """
+    progress = {"key": export_key(job_id), "contexts_exported": 0, "bytes_written": 0, "parts_uploaded": 0}
+    writer = GzipMultipartWriter(_require_bucket(), progress["key"])
+    try:
+        for contexts in Context.get_context_pages_by_user_id(user_id):
+            for context in contexts:
+                writer.write_line(json.dumps(export_record(context), separators=(",", ":")))
+            progress["contexts_exported"] += len(contexts)
+            progress["bytes_written"] = writer.bytes_written
+            progress["parts_uploaded"] = writer.parts_uploaded
+            if on_progress:
+                on_progress(dict(progress))
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    progress["bytes_written"] = writer.bytes_written
+    progress["parts_uploaded"] = writer.parts_uploaded
+    return progress
+
+
+def _import_batch(records: list[dict], user_id: str, overwrite: bool, progress: dict) -> None:
+    stored = {
+        item["context_id"]: item
+        for item in Context.get_context_items([record["context_id"] for record in records], ["context_id", "user_id", "version", "message_count"])
+    }
+    contexts = []
+    for record in records:
+        existing = stored.get(record["context_id"])
+        # Another user's context is never replaced
+        if existing and (not overwrite or existing.get("user_id") != user_id):
+            progress["contexts_skipped"] += 1
+            continue
+        context = Context.Context(**{**record, "user_id": user_id})
+        if existing:
+            # Carry the version on, so a save based on a read from before the import conflicts
+            context.version = int(existing.get("version") or 0)
+        contexts.append(context)
+    stored_message_counts = {context_id: int(item.get("message_count") or 0) for context_id, item in stored.items()}
+    Context.put_contexts(contexts, stored_message_counts=stored_message_counts)
+    progress["contexts_imported"] += len(contexts)
+
+
+def import_contexts(
+    export_job_id: str,
+    user_id: str,
+    overwrite: bool = False,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Stream an export back in, IMPORT_BATCH_SIZE contexts at a time. Contexts
+    that already exist are skipped unless overwrite is set. on_progress is
+    called with the counters after every batch. Returns the final counters.
+    """
+    progress = {"export_job_id": export_job_id, "contexts_imported": 0, "contexts_skipped": 0}
+    body = S3Functions.get_stream(_require_bucket(), export_key(export_job_id))
+    records = []
+    with gzip.GzipFile(fileobj=body) as lines:
+        for line in lines:
+            if not line.strip():
+                continue
+            records.append(json.loads(line))
+            if len(records) >= IMPORT_BATCH_SIZE:
+                _import_batch(records, user_id, overwrite, progress)
+                records = []
+                if on_progress:
+                    on_progress(dict(progress))
+    if records:
+        _import_batch(records, user_id, overwrite, progress)
+    return progress
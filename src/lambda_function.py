@@ -1,6 +1,5 @@
 import os
 import json
-import re
 import uuid
 import requests
 from typing import Optional
@@ -9,575 +8,462 @@ from AWS.Lambda import LambdaEvent, invoke_lambda
 from AWS.Cognito import get_user_from_cognito, CognitoUser
 from AWS.APIGateway import create_api_gateway_response, APIGatewayResponse
 from AWS.CloudWatchLogs import get_logger
+from Lib.Router import Router
+from Lib.LazyImport import import_string
 from Models import APIKey
-from Models.Job import create_job, get_job as get_job_by_id, save_job as persist_job, JobStatus
-
-# User
-from RequestHandlers.User.CreateUserHandler import create_user_handler
-from RequestHandlers.User.GetUserHandler import get_user_handler
-from RequestHandlers.User.DeleteUserHandler import delete_user_handler
-
-# Organization
-from RequestHandlers.Organization.CreateOrganizationHandler import create_organization_handler
-
-# Context
-from RequestHandlers.Context.CreateContextHandler import create_context_handler
-from RequestHandlers.Context.GetContextHandler import get_context_handler
-from RequestHandlers.Context.DeleteContextHandler import delete_context_handler
-from RequestHandlers.Context.GetContextHistoryHandler import get_context_history_handler
-from RequestHandlers.Context.AddMessagesHandler import add_messages_handler
-from RequestHandlers.Context.SetMessagesHandler import set_messages_handler
-
-# Agents
-from RequestHandlers.Agent.GetAgentsHandler import get_agents_handler
-from RequestHandlers.Agent.CreateAgentHandler import create_agent_handler
-from RequestHandlers.Agent.GetAgentHandler import get_agent_handler
-from RequestHandlers.Agent.UpdateAgentHandler import update_agent_handler
-from RequestHandlers.Agent.DeleteAgentHandler import delete_agent_handler
-
-# Chat
-from RequestHandlers.Chat.ChatHandler import chat_handler
-from RequestHandlers.Chat.AddAIMessageHandler import add_ai_message_handler
-from RequestHandlers.Chat.InvokeHandler import invoke_handler
-from RequestHandlers.Chat.ClientSideToolResponsesHandler import client_side_tool_responses_handler
-
-# Chatpage
-from RequestHandlers.ChatPage.CreateChatPageHandler import create_chat_page_handler
-from RequestHandlers.ChatPage.GetChatPageHandler import get_chat_page_handler
-from RequestHandlers.ChatPage.UpdateChatPageHandler import update_chat_page_handler
-from RequestHandlers.ChatPage.DeleteChatPageHandler import delete_chat_page_handler
-from RequestHandlers.ChatPage.GetChatPagesHandler import get_chat_pages_handler
-
-# Chat Bot
-from RequestHandlers.ChatBot.GetChatBotHandler import get_chat_bot_handler
-
-# Scrape Page
-from RequestHandlers.ScrapePage.ScrapePageHandler import scrape_page_handler
-
-# Job
-from RequestHandlers.Job.GetJobHandler import get_job_handler
-
-# Parameter Definition
-from RequestHandlers.ParameterDefinition.CreateParameterDefinitionHandler import create_parameter_definition_handler
-from RequestHandlers.ParameterDefinition.GetParameterDefinitionHandler import get_parameter_definition_handler
-from RequestHandlers.ParameterDefinition.UpdateParameterDefinitionHandler import update_parameter_definition_handler
-from RequestHandlers.ParameterDefinition.DeleteParameterDefinitionHandler import delete_parameter_definition_handler
-from RequestHandlers.ParameterDefinition.GetParameterDefinitionsHandler import get_parameter_definitions_handler
-
-# Tool
-from RequestHandlers.Tool.CreateToolHandler import create_tool_handler
-from RequestHandlers.Tool.GetToolHandler import get_tool_handler
-from RequestHandlers.Tool.UpdateToolHandler import update_tool_handler
-from RequestHandlers.Tool.DeleteToolHandler import delete_tool_handler
-from RequestHandlers.Tool.GetToolsHandler import get_tools_handler
-from RequestHandlers.Tool.TestToolHandler import test_tool_handler
-
-# Structured Response Endpoint
-from RequestHandlers.StructuredResponseEndpoint.CreateSREHandler import create_sre_handler
-from RequestHandlers.StructuredResponseEndpoint.GetSREHandler import get_sre_handler
-from RequestHandlers.StructuredResponseEndpoint.UpdateSREHandler import update_sre_handler
-from RequestHandlers.StructuredResponseEndpoint.DeleteSREHandler import delete_sre_handler
-from RequestHandlers.StructuredResponseEndpoint.GetSREsHandler import get_sres_handler
-from RequestHandlers.StructuredResponseEndpoint.RunSREHandler import run_sre_handler
-
-# DataWindow
-from RequestHandlers.DataWindow.CreateDataWindowHandler import create_data_window_handler
-from RequestHandlers.DataWindow.GetDataWindowHandler import get_data_window_handler
-from RequestHandlers.DataWindow.GetDataWindowsHandler import get_data_windows_handler
-from RequestHandlers.DataWindow.UpdateDataWindowHandler import update_data_window_handler
-from RequestHandlers.DataWindow.DeleteDataWindowHandler import delete_data_window_handler
-
-# APIKey
-from RequestHandlers.APIKey.GenerateAPIKeyHandler import generate_api_key_handler
-
-# Tool Response
-from RequestHandlers.ToolResponse.OnToolCallResponseHandler import on_tool_call_response_handler
-
-# JSON Documents
-from RequestHandlers.JSONDocument.CreateJSONDocumentHandler import create_json_document_handler
-from RequestHandlers.JSONDocument.GetJSONDocumentHandler import get_json_document_handler
-from RequestHandlers.JSONDocument.UpdateJSONDocumentHandler import update_json_document_handler
-from RequestHandlers.JSONDocument.DeleteJSONDocumentHandler import delete_json_document_handler
-from RequestHandlers.JSONDocument.GetJSONDocumentsHandler import get_json_documents_handler
-from RequestHandlers.JSONDocument.SetJSONValueHandler import set_json_value_handler
-from RequestHandlers.JSONDocument.AddListItemHandler import add_list_item_handler
-from RequestHandlers.JSONDocument.DeleteValueHandler import delete_value_handler
-from RequestHandlers.JSONDocument.GetValueHandler import get_value_handler
-from RequestHandlers.JSONDocument.GetSchema import get_schema_handler
-
-# Integrations
-from RequestHandlers.Integration.CreateIntegrationHandler import create_integration_handler
-from RequestHandlers.Integration.GetIntegrationHandler import get_integration_handler
-from RequestHandlers.Integration.UpdateIntegrationHandler import update_integration_handler
-from RequestHandlers.Integration.DeleteIntegrationHandler import delete_integration_handler
-from RequestHandlers.Integration.GetIntegrationsHandler import get_integrations_handler
-from RequestHandlers.Jira.JiraHandlers import (
-    jira_auth_code_handler,
-    jira_projects_handler,
-    jira_create_issue_handler,
-    jira_get_issues_handler,
-    jira_update_issue_handler,
-)
-from RequestHandlers.Gmail.GmailHandlers import (
-    gmail_auth_url_handler,
-    gmail_auth_code_handler,
-)
-from RequestHandlers.Outlook.OutlookHandlers import (
-    outlook_auth_url_handler,
-    outlook_auth_code_handler,
-)
-from RequestHandlers.GoogleCalendar.GoogleCalendarHandlers import (
-    google_calendar_auth_url_handler,
-    google_calendar_auth_code_handler,
-)
-
-# InteliSort
-from RequestHandlers.InteliSort.RunInteliSortHandler import inteli_sort_handler
-
-# Usage
-from RequestHandlers.Usage.GetUsageHandler import get_usage_handler
-
-# Models
-from RequestHandlers.Model.GetModelsHandler import get_models_handler
-
-
-
+from Models.Job import create_job, update_job_status, JobStatus
 
 # Set up the logger
 logger = get_logger(log_level=os.environ["LOG_LEVEL"])
 
 # Handler registry
+# Handlers are referenced by dotted path and imported on first use so a cold
+# start only pays for the modules the requested route actually needs.
 handler_registry = {
     "/user": {
         "POST": {
-            "handler": create_user_handler,
+            "handler": "RequestHandlers.User.CreateUserHandler.create_user_handler",
             "public": False
         },
         "GET": {
-            "handler": get_user_handler,
+            "handler": "RequestHandlers.User.GetUserHandler.get_user_handler",
             "public": False
         },
         "DELETE": {
-            "handler": delete_user_handler,
+            "handler": "RequestHandlers.User.DeleteUserHandler.delete_user_handler",
             "public": False
         }
     },
     "/organization": {
         "POST": {
-            "handler": create_organization_handler,
+            "handler": "RequestHandlers.Organization.CreateOrganizationHandler.create_organization_handler",
             "public": False
         }
     },
     "/context": {
         "POST": {
-            "handler": create_context_handler,
+            "handler": "RequestHandlers.Context.CreateContextHandler.create_context_handler",
             "public": True
         }
     },
     "/context/{context_id}": {
         "GET": {
-            "handler": get_context_handler,
+            "handler": "RequestHandlers.Context.GetContextHandler.get_context_handler",
             "public": True
         },
         "DELETE": {
-            "handler": delete_context_handler,
+            "handler": "RequestHandlers.Context.DeleteContextHandler.delete_context_handler",
             "public": False
         }
     },
     "/context-history": {
         "GET": {
-            "handler": get_context_history_handler,
+            "handler": "RequestHandlers.Context.GetContextHistoryHandler.get_context_history_handler",
             "public": False
         }
     },
     "/context/add-messages": {
         "POST": {
-            "handler": add_messages_handler,
+            "handler": "RequestHandlers.Context.AddMessagesHandler.add_messages_handler",
             "public": True
         }
     },
     "/context/set-messages": {
         "POST": {
-            "handler": set_messages_handler,
+            "handler": "RequestHandlers.Context.SetMessagesHandler.set_messages_handler",
             "public": True
         }
     },
+    "/context/export": {
+        "POST": {
+            "handler": "RequestHandlers.Context.ExportContextsHandler.export_contexts_handler",
+            "public": False,
+            "async_job": True
+        }
+    },
+    "/context/import": {
+        "POST": {
+            "handler": "RequestHandlers.Context.ImportContextsHandler.import_contexts_handler",
+            "public": False,
+            "async_job": True
+        }
+    },
     "/agents": {
         "GET": {
-            "handler": get_agents_handler,
+            "handler": "RequestHandlers.Agent.GetAgentsHandler.get_agents_handler",
             "public": False
         }
     },
     "/agent": {
         "POST": {
-            "handler": create_agent_handler,
+            "handler": "RequestHandlers.Agent.CreateAgentHandler.create_agent_handler",
             "public": False
         }
     },
     "/agent/{agent_id}": {
         "GET": {
-            "handler": get_agent_handler,
+            "handler": "RequestHandlers.Agent.GetAgentHandler.get_agent_handler",
             "public": True
         },
         "POST": {
-            "handler": update_agent_handler,
+            "handler": "RequestHandlers.Agent.UpdateAgentHandler.update_agent_handler",
             "public": False
         },
         "DELETE": {
-            "handler": delete_agent_handler,
+            "handler": "RequestHandlers.Agent.DeleteAgentHandler.delete_agent_handler",
             "public": False
         }
     },
     "/chat": {
         "POST": {
-            "handler": chat_handler,
+            "handler": "RequestHandlers.Chat.ChatHandler.chat_handler",
             "public": True
         }
     },
     "/chat/add-ai-message": {
         "POST": {
-            "handler": add_ai_message_handler,
+            "handler": "RequestHandlers.Chat.AddAIMessageHandler.add_ai_message_handler",
             "public": True
         }
     },
     "/chat/invoke": {
         "POST": {
-            "handler": invoke_handler,
+            "handler": "RequestHandlers.Chat.InvokeHandler.invoke_handler",
             "public": True
         }
     },
     "/chat/client-side-tool-responses": {
         "POST": {
-            "handler": client_side_tool_responses_handler,
+            "handler": "RequestHandlers.Chat.ClientSideToolResponsesHandler.client_side_tool_responses_handler",
             "public": True
         }
     },
     "/chat-page": {
         "POST": {
-            "handler": create_chat_page_handler,
+            "handler": "RequestHandlers.ChatPage.CreateChatPageHandler.create_chat_page_handler",
             "public": False
         }
     },
     "/chat-page/{chat_page_id}": {
         "POST": {
-            "handler": update_chat_page_handler,
+            "handler": "RequestHandlers.ChatPage.UpdateChatPageHandler.update_chat_page_handler",
             "public": False
         },
         "GET": {
-            "handler": get_chat_page_handler,
+            "handler": "RequestHandlers.ChatPage.GetChatPageHandler.get_chat_page_handler",
             "public": True
         },
         "DELETE": {
-            "handler": delete_chat_page_handler,
+            "handler": "RequestHandlers.ChatPage.DeleteChatPageHandler.delete_chat_page_handler",
             "public": False
         }
     },
     "/chat-pages": {
         "GET": {
-            "handler": get_chat_pages_handler,
+            "handler": "RequestHandlers.ChatPage.GetChatPagesHandler.get_chat_pages_handler",
             "public": False
         }
     },
     "/scrape-page/{link}": {
         "GET": {
-            "handler": scrape_page_handler,
+            "handler": "RequestHandlers.ScrapePage.ScrapePageHandler.scrape_page_handler",
             "public": False
         }
     },
     "/job/{job_id}": {
         "GET": {
-            "handler": get_job_handler,
+            "handler": "RequestHandlers.Job.GetJobHandler.get_job_handler",
             "public": False
         }
     },
     "/chat-bot/{chat_page_id}": {
         "GET": {
-            "handler": get_chat_bot_handler,
+            "handler": "RequestHandlers.ChatBot.GetChatBotHandler.get_chat_bot_handler",
             "public": True,
             "return_type": "application/javascript"
         }
     },
     "/parameter-definition": {
         "POST": {
-            "handler": create_parameter_definition_handler,
+            "handler": "RequestHandlers.ParameterDefinition.CreateParameterDefinitionHandler.create_parameter_definition_handler",
             "public": False
         }
     },
     "/parameter-definition/{pd_id}": {
         "GET": {
-            "handler": get_parameter_definition_handler,
+            "handler": "RequestHandlers.ParameterDefinition.GetParameterDefinitionHandler.get_parameter_definition_handler",
             "public": False
         },
         "POST": {
-            "handler": update_parameter_definition_handler,
+            "handler": "RequestHandlers.ParameterDefinition.UpdateParameterDefinitionHandler.update_parameter_definition_handler",
             "public": False
         },
         "DELETE": {
-            "handler": delete_parameter_definition_handler,
+            "handler": "RequestHandlers.ParameterDefinition.DeleteParameterDefinitionHandler.delete_parameter_definition_handler",
             "public": False
         }
     },
     "/parameter-definitions": {
         "GET": {
-            "handler": get_parameter_definitions_handler,
+            "handler": "RequestHandlers.ParameterDefinition.GetParameterDefinitionsHandler.get_parameter_definitions_handler",
             "public": False
         }
     },
     "/tool": {
         "POST": {
-            "handler": create_tool_handler,
+            "handler": "RequestHandlers.Tool.CreateToolHandler.create_tool_handler",
             "public": False
         }
     },
     "/tool/{tool_id}": {
         "GET": {
-            "handler": get_tool_handler,
+            "handler": "RequestHandlers.Tool.GetToolHandler.get_tool_handler",
             "public": False
         },
         "POST": {
-            "handler": update_tool_handler,
+            "handler": "RequestHandlers.Tool.UpdateToolHandler.update_tool_handler",
             "public": False
         },
         "DELETE": {
-            "handler": delete_tool_handler,
+            "handler": "RequestHandlers.Tool.DeleteToolHandler.delete_tool_handler",
             "public": False
         }
     },
     "/tools": {
         "GET": {
-            "handler": get_tools_handler,
+            "handler": "RequestHandlers.Tool.GetToolsHandler.get_tools_handler",
             "public": False
         }
     },
     "/test-tool": {
         "POST": {
-            "handler": test_tool_handler,
+            "handler": "RequestHandlers.Tool.TestToolHandler.test_tool_handler",
             "public": False
         }
     },
     "/sre": {
         "POST": {
-            "handler": create_sre_handler,
+            "handler": "RequestHandlers.StructuredResponseEndpoint.CreateSREHandler.create_sre_handler",
             "public": False
         }
     },
     "/sre/{sre_id}": {
         "GET": {
-            "handler": get_sre_handler,
+            "handler": "RequestHandlers.StructuredResponseEndpoint.GetSREHandler.get_sre_handler",
             "public": False
         },
         "POST": {
-            "handler": update_sre_handler,
+            "handler": "RequestHandlers.StructuredResponseEndpoint.UpdateSREHandler.update_sre_handler",
             "public": False
         },
         "DELETE": {
-            "handler": delete_sre_handler,
+            "handler": "RequestHandlers.StructuredResponseEndpoint.DeleteSREHandler.delete_sre_handler",
             "public": False
         }
     },
     "/sres": {
         "GET": {
-            "handler": get_sres_handler,
+            "handler": "RequestHandlers.StructuredResponseEndpoint.GetSREsHandler.get_sres_handler",
             "public": False
         }
     },
     "/run-sre/{sre_id}": {
         "POST": {
-            "handler": run_sre_handler,
+            "handler": "RequestHandlers.StructuredResponseEndpoint.RunSREHandler.run_sre_handler",
             "public": True
         }
     },
     "/data-window": {
         "POST": {
-            "handler": create_data_window_handler,
+            "handler": "RequestHandlers.DataWindow.CreateDataWindowHandler.create_data_window_handler",
             "public": False
         }
     },
     "/data-window/{data_window_id}": {
         "GET": {
-            "handler": get_data_window_handler,
+            "handler": "RequestHandlers.DataWindow.GetDataWindowHandler.get_data_window_handler",
             "public": False
         },
         "POST": {
-            "handler": update_data_window_handler,
+            "handler": "RequestHandlers.DataWindow.UpdateDataWindowHandler.update_data_window_handler",
             "public": False
         },
         "DELETE": {
-            "handler": delete_data_window_handler,
+            "handler": "RequestHandlers.DataWindow.DeleteDataWindowHandler.delete_data_window_handler",
             "public": False
         }
     },
     "/data-windows": {
         "GET": {
-            "handler": get_data_windows_handler,
+            "handler": "RequestHandlers.DataWindow.GetDataWindowsHandler.get_data_windows_handler",
             "public": False
         }
     },
     "/generate-api-key": {
         "POST": {
-            "handler": generate_api_key_handler,
+            "handler": "RequestHandlers.APIKey.GenerateAPIKeyHandler.generate_api_key_handler",
             "public": False
         }
     },
     "/integration": {
         "POST": {
-            "handler": create_integration_handler,
+            "handler": "RequestHandlers.Integration.CreateIntegrationHandler.create_integration_handler",
             "public": False
         }
     },
     "/integration/{integration_id}": {
         "GET": {
-            "handler": get_integration_handler,
+            "handler": "RequestHandlers.Integration.GetIntegrationHandler.get_integration_handler",
             "public": False
         },
         "POST": {
-            "handler": update_integration_handler,
+            "handler": "RequestHandlers.Integration.UpdateIntegrationHandler.update_integration_handler",
             "public": False
         },
         "DELETE": {
-            "handler": delete_integration_handler,
+            "handler": "RequestHandlers.Integration.DeleteIntegrationHandler.delete_integration_handler",
             "public": False
         }
     },
     "/integrations": {
         "GET": {
-            "handler": get_integrations_handler,
+            "handler": "RequestHandlers.Integration.GetIntegrationsHandler.get_integrations_handler",
             "public": False
         }
     },
     "/jira-auth-code": {
         "POST": {
-            "handler": jira_auth_code_handler,
+            "handler": "RequestHandlers.Jira.JiraHandlers.jira_auth_code_handler",
             "public": False
         }
     },
     "/jira/projects": {
         "GET": {
-            "handler": jira_projects_handler,
+            "handler": "RequestHandlers.Jira.JiraHandlers.jira_projects_handler",
             "public": False
         }
     },
     "/jira/issues": {
         "GET": {
-            "handler": jira_get_issues_handler,
+            "handler": "RequestHandlers.Jira.JiraHandlers.jira_get_issues_handler",
             "public": False
         },
         "POST": {
-            "handler": jira_create_issue_handler,
+            "handler": "RequestHandlers.Jira.JiraHandlers.jira_create_issue_handler",
             "public": False
         }
     },
     "/jira/issues/{issue_id}": {
         "POST": {
-            "handler": jira_update_issue_handler,
+            "handler": "RequestHandlers.Jira.JiraHandlers.jira_update_issue_handler",
             "public": False
         }
     },
     # Gmail
     "/gmail/auth-url": {
         "GET": {
-            "handler": gmail_auth_url_handler,
+            "handler": "RequestHandlers.Gmail.GmailHandlers.gmail_auth_url_handler",
             "public": False
         }
     },
     "/gmail/auth": {
         "POST": {
-            "handler": gmail_auth_code_handler,
+            "handler": "RequestHandlers.Gmail.GmailHandlers.gmail_auth_code_handler",
             "public": False
         }
     },
     # Outlook
     "/outlook/auth-url": {
         "GET": {
-            "handler": outlook_auth_url_handler,
+            "handler": "RequestHandlers.Outlook.OutlookHandlers.outlook_auth_url_handler",
             "public": False
         }
     },
     "/outlook/auth": {
         "POST": {
-            "handler": outlook_auth_code_handler,
+            "handler": "RequestHandlers.Outlook.OutlookHandlers.outlook_auth_code_handler",
             "public": False
         }
     },
     # Google Calendar
     "/google-calendar/auth-url": {
         "GET": {
-            "handler": google_calendar_auth_url_handler,
+            "handler": "RequestHandlers.GoogleCalendar.GoogleCalendarHandlers.google_calendar_auth_url_handler",
             "public": False
         }
     },
     "/google-calendar/auth": {
         "POST": {
-            "handler": google_calendar_auth_code_handler,
+            "handler": "RequestHandlers.GoogleCalendar.GoogleCalendarHandlers.google_calendar_auth_code_handler",
             "public": False
         }
     },
    "/json-document": {
         "POST": {
-            "handler": create_json_document_handler,
+            "handler": "RequestHandlers.JSONDocument.CreateJSONDocumentHandler.create_json_document_handler",
             "public": False
         }
     },
     "/json-document/{document_id}": {
         "GET": {
-            "handler": get_json_document_handler,
+            "handler": "RequestHandlers.JSONDocument.GetJSONDocumentHandler.get_json_document_handler",
             "public": True
         },
         "POST": {
-            "handler": update_json_document_handler,
+            "handler": "RequestHandlers.JSONDocument.UpdateJSONDocumentHandler.update_json_document_handler",
             "public": False
         },
         "DELETE": {
-            "handler": delete_json_document_handler,
+            "handler": "RequestHandlers.JSONDocument.DeleteJSONDocumentHandler.delete_json_document_handler",
             "public": False
         }
     },
     "/json-document/{document_id}/set": {
         "POST": {
-            "handler": set_json_value_handler,
+            "handler": "RequestHandlers.JSONDocument.SetJSONValueHandler.set_json_value_handler",
             "public": True
         }
     },
     "/json-document/{document_id}/add": {
         "POST": {
-            "handler": add_list_item_handler,
+            "handler": "RequestHandlers.JSONDocument.AddListItemHandler.add_list_item_handler",
             "public": True
         }
     },
     "/json-document/{document_id}/delete": {
         "POST": {
-            "handler": delete_value_handler,
+            "handler": "RequestHandlers.JSONDocument.DeleteValueHandler.delete_value_handler",
             "public": True
         }
     },
     "/json-document/{document_id}/value": {
         "GET": {
-            "handler": get_value_handler,
+            "handler": "RequestHandlers.JSONDocument.GetValueHandler.get_value_handler",
             "public": True
         }
     },
     "/json-document/{document_id}/shape": {
         "GET": {
-            "handler": get_schema_handler,
+            "handler": "RequestHandlers.JSONDocument.GetSchema.get_schema_handler",
             "public": True
         }
     },
     "/json-documents": {
         "GET": {
-            "handler": get_json_documents_handler,
+            "handler": "RequestHandlers.JSONDocument.GetJSONDocumentsHandler.get_json_documents_handler",
             "public": False
         }
     },
     "/on-tool-call-response": {
         "POST": {
-            "handler": on_tool_call_response_handler,
+            "handler": "RequestHandlers.ToolResponse.OnToolCallResponseHandler.on_tool_call_response_handler",
             "public": False
         }
     },
     # InteliSort
     "/inteli-sort": {
         "POST": {
-            "handler": inteli_sort_handler,
+            "handler": "RequestHandlers.InteliSort.RunInteliSortHandler.inteli_sort_handler",
             "public": False,
             "async_job": True
         }
@@ -585,42 +471,33 @@ handler_registry = {
     # Usage
     "/usage": {
         "GET": {
-            "handler": get_usage_handler,
+            "handler": "RequestHandlers.Usage.GetUsageHandler.get_usage_handler",
             "public": False
         }
     },
     # Models
     "/models": {
         "GET": {
-            "handler": get_models_handler,
+            "handler": "RequestHandlers.Model.GetModelsHandler.get_models_handler",
             "public": False
         }
     },
 }
 
-def match_route(request_path: str, method: str, handler_registry: dict) -> tuple:
-    for route, methods in handler_registry.items():
-        # Replace placeholder variables with regex capture groups
-        route_pattern = re.sub(
-            r'\{(\w+)\}', 
-            lambda m: rf'(?P<{m.group(1)}>.+)' if m.group(1) == 'link' else rf'(?P<{m.group(1)}>[^/]+)', 
-            route
-        )
-        route_regex = f"^{route_pattern}$"
-        match = re.match(route_regex, request_path)
-        
-        if match:
-            handler_info = methods.get(method)
-            if handler_info:
-                # Extract named groups as parameters
-                params = match.groupdict()
-                handler = handler_info.get('handler')
-                is_public = handler_info.get('public', False)
-                return_type = handler_info.get('return_type', 'application/json')
-                is_async_job = handler_info.get('async_job', False)
-                return handler, params, is_public, return_type, is_async_job
-    
-    return None, None, None, None, None
+# Router built once per container from the registry above
+router = Router(handler_registry)
+
+def match_route(request_path: str, method: str, router: Router = router) -> tuple:
+    route_match = router.match(request_path, method)
+    if route_match is None:
+        return None, None, None, None, None
+
+    handler_info = route_match.handler_info
+    handler = handler_info.get('handler')
+    is_public = handler_info.get('public', False)
+    return_type = handler_info.get('return_type', 'application/json')
+    is_async_job = handler_info.get('async_job', False)
+    return handler, route_match.params, is_public, return_type, is_async_job
 
 
 # LAMBDA HANDLER - What gets called when a request is made. event has any data that's passed in the request
@@ -637,7 +514,7 @@ def lambda_handler(event: dict, context) -> APIGatewayResponse:
         request_method: str = lambda_event.httpMethod
 
         # Get the handler for the request
-        handler, request_params, is_public, return_type, is_async_job = match_route(request_path, request_method, handler_registry)
+        handler, request_params, is_public, return_type, is_async_job = match_route(request_path, request_method)
         if not handler:
             raise Exception("Invalid request path", 404)
         lambda_event.requestParameters = request_params
@@ -649,10 +526,9 @@ def lambda_handler(event: dict, context) -> APIGatewayResponse:
                 raise Exception("No authentication token provided")
             token = lambda_event.headers["Authorization"]
             
-            # Try API key authentication first
-            if APIKey.validate_api_key(token):
-                contents = APIKey.get_api_key_contents(token)
-                
+            # Try API key authentication first (single JWT decode, cached key lookup)
+            contents = APIKey.authenticate_api_key(token)
+            if contents:
                 # Block client tokens from accessing this API. Client tokens are used for WebSocket Chat, not API access.
                 if contents.get("type", "client") == "client":
                     raise Exception("Client tokens cannot access this API", 403)
@@ -700,7 +576,7 @@ def lambda_handler(event: dict, context) -> APIGatewayResponse:
                 return create_api_gateway_response(202, {"status": "processing", "request_id": request_id}, "application/json")
 
         # ── Normal / async job execution flow ──
-        response: BaseModel = handler(
+        response: BaseModel = import_string(handler)(
             lambda_event=lambda_event,
             user=user
         )
@@ -737,10 +613,7 @@ def lambda_handler(event: dict, context) -> APIGatewayResponse:
         # If this was an async job invocation, update the job to error status
         if lambda_event.runJobId:
             try:
-                job = get_job_by_id(lambda_event.runJobId)
-                job.status = JobStatus.error
-                job.message = str(error)
-                persist_job(job)
+                update_job_status(lambda_event.runJobId, JobStatus.error, str(error))
             except Exception:
                 logger.error(f"Failed to update job {lambda_event.runJobId} to error status")
         
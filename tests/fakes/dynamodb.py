@@ -0,0 +1,483 @@
+"""
+In-memory stand-in for the boto3 DynamoDB service resource, used by tests and
+benchmarks that patch AWS.DynamoDB._dynamodb.
+
+It implements only what AWS.DynamoDB uses and keeps DynamoDB's limits (1 MB
+scan and query pages, 100-key BatchGetItem, 25-item BatchWriteItem,
+100-action TransactWriteItems). It also
+counts requests, request payload bytes, bytes written and consumed capacity
+units, sizing items by their JSON length as an approximation (binary
+attributes count their length).
+"""
+
+import copy
+import json
+import math
+import re
+import time
+from collections import Counter
+from types import SimpleNamespace
+from botocore.exceptions import ClientError
+
+
+def _size_default(value):
+    # Binary attributes are stored as raw bytes, not as their repr
+    if isinstance(value, (bytes, bytearray)):
+        return "_" * len(value)
+    return str(value)
+
+
+def item_size(item: dict) -> int:
+    return len(json.dumps(item, default=_size_default).encode("utf-8"))
+
+
+def read_units(size: int) -> float:
+    # Eventually consistent reads: 0.5 RCU per 4 KB
+    return math.ceil(max(size, 1) / 4096) * 0.5
+
+
+def evaluate_condition(condition, item: dict) -> bool:
+    """Evaluate a boto3.dynamodb.conditions expression against an item."""
+    expression = condition.get_expression()
+    operator = expression["operator"]
+    values = expression["values"]
+
+    if operator == "AND":
+        return evaluate_condition(values[0], item) and evaluate_condition(values[1], item)
+    if operator == "OR":
+        return evaluate_condition(values[0], item) or evaluate_condition(values[1], item)
+    if operator == "NOT":
+        return not evaluate_condition(values[0], item)
+
+    name = values[0].name
+    if operator == "attribute_exists":
+        return name in item
+    if operator == "attribute_not_exists":
+        return name not in item
+    if name not in item:
+        return False
+    value = item[name]
+    if operator == "=":
+        return value == values[1]
+    if operator == "<>":
+        return value != values[1]
+    if operator == "<":
+        return value < values[1]
+    if operator == "<=":
+        return value <= values[1]
+    if operator == ">":
+        return value > values[1]
+    if operator == ">=":
+        return value >= values[1]
+    if operator == "IN":
+        return value in values[1]
+    if operator == "BETWEEN":
+        return values[1] <= value <= values[2]
+    if operator == "begins_with":
+        return value.startswith(values[1])
+    raise NotImplementedError(f"Condition operator {operator} is not supported by the fake")
+
+
+def conditional_check_failed(operation: str) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}},
+        operation,
+    )
+
+
+_PATH_PART = re.compile(r"([^.\[\]]+)((?:\[\d+\])*)")
+
+
+def _resolve_path(path: str, names: dict) -> list:
+    """Turn "#u0.#u1[2]" into ["data", "logs", 2]."""
+    steps = []
+    for name, indexes in _PATH_PART.findall(path):
+        steps.append(names.get(name, name))
+        steps.extend(int(index) for index in re.findall(r"\d+", indexes))
+    return steps
+
+
+def _get_path(item, steps: list):
+    for step in steps:
+        try:
+            item = item[step]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return item
+
+
+def _set_path(item, steps: list, value) -> None:
+    for step in steps[:-1]:
+        item = item[step]
+    if isinstance(item, list) and steps[-1] >= len(item):
+        item.append(value)
+    else:
+        item[steps[-1]] = value
+
+
+def _remove_path(item, steps: list) -> None:
+    parent = _get_path(item, steps[:-1])
+    if isinstance(parent, dict):
+        parent.pop(steps[-1], None)
+    elif isinstance(parent, list) and steps[-1] < len(parent):
+        del parent[steps[-1]]
+
+
+def _split_top_level(text: str) -> list[str]:
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _evaluate_operand(operand: str, item: dict, names: dict, values: dict):
+    operand = operand.strip()
+    if operand.startswith(":"):
+        return copy.deepcopy(values[operand])
+    for function in ("if_not_exists", "list_append"):
+        if operand.startswith(function + "("):
+            first, second = _split_top_level(operand[len(function) + 1:-1])
+            if function == "if_not_exists":
+                existing = _get_path(item, _resolve_path(first, names))
+                return copy.deepcopy(existing) if existing is not None else _evaluate_operand(second, item, names, values)
+            return _evaluate_operand(first, item, names, values) + _evaluate_operand(second, item, names, values)
+    return copy.deepcopy(_get_path(item, _resolve_path(operand, names)))
+
+
+def apply_update_expression(item: dict, expression: str, names: dict, values: dict) -> None:
+    """Apply the SET / REMOVE / ADD clauses of an UpdateExpression in place."""
+    sections = re.split(r"\b(SET|REMOVE|ADD)\b", expression)
+    for action, body in zip(sections[1::2], sections[2::2]):
+        for clause in _split_top_level(body):
+            if action == "SET":
+                path, operand = clause.split("=", 1)
+                _set_path(item, _resolve_path(path.strip(), names), _evaluate_operand(operand, item, names, values))
+            elif action == "REMOVE":
+                _remove_path(item, _resolve_path(clause, names))
+            else:
+                path, operand = clause.split()
+                steps = _resolve_path(path, names)
+                current = _get_path(item, steps)
+                increment = values[operand]
+                _set_path(item, steps, increment if current is None else current + increment)
+
+
+def project(item: dict, projection_expression: str = None, names: dict = None) -> dict:
+    """Top-level attributes and top-level list elements ("#p0[3]"), which come back as a shorter list."""
+    if not projection_expression:
+        return copy.deepcopy(item)
+    projected = {}
+    for path in projection_expression.split(","):
+        steps = _resolve_path(path.strip(), names or {})
+        if steps[0] not in item:
+            continue
+        if len(steps) == 1:
+            projected[steps[0]] = copy.deepcopy(item[steps[0]])
+            continue
+        value = _get_path(item, steps)
+        if value is not None:
+            projected.setdefault(steps[0], []).append(copy.deepcopy(value))
+    return projected
+
+
+class FakeTable:
+    def __init__(self, resource: "FakeDynamoDB", name: str, key_name: str, indexes: dict = None, sort_key_name: str = None):
+        """
+        :param indexes: {index_name: (partition_key, sort_key or None)}
+        :param sort_key_name: Sort key of the table itself; items are then
+            stored under (partition, sort) tuples
+        """
+        self.resource = resource
+        self.name = name
+        self.key_name = key_name
+        self.sort_key_name = sort_key_name
+        self.indexes = indexes or {}
+        self.items: dict = {}
+
+    def _key(self, key: dict):
+        if self.sort_key_name:
+            return (key[self.key_name], key[self.sort_key_name])
+        return key[self.key_name]
+
+    def _key_dict(self, item: dict) -> dict:
+        key = {self.key_name: item[self.key_name]}
+        if self.sort_key_name:
+            key[self.sort_key_name] = item[self.sort_key_name]
+        return key
+
+    def get_item(self, Key: dict, ProjectionExpression: str = None, ExpressionAttributeNames: dict = None):
+        self.resource._request("GetItem")
+        item = self.items.get(self._key(Key))
+        if item is None:
+            return {}
+        # Billed on the whole item, projected or not
+        self.resource.consumed_read_units += read_units(item_size(item))
+        return {"Item": project(item, ProjectionExpression, ExpressionAttributeNames)}
+
+    def put_item(self, Item: dict, ConditionExpression=None):
+        self.resource._request("PutItem", item_size(Item))
+        if ConditionExpression is not None:
+            existing = self.items.get(self._key(Item)) or {}
+            if not evaluate_condition(ConditionExpression, existing):
+                raise conditional_check_failed("PutItem")
+        self.resource._record_write(item_size(Item))
+        self.items[self._key(Item)] = copy.deepcopy(Item)
+        return {}
+
+    def update_item(
+        self,
+        Key: dict,
+        UpdateExpression: str,
+        ExpressionAttributeNames: dict = None,
+        ExpressionAttributeValues: dict = None,
+        ConditionExpression=None,
+        ReturnValues: str = "NONE",
+    ):
+        self.resource._request("UpdateItem", item_size(ExpressionAttributeValues or {}))
+        existing = self.items.get(self._key(Key))
+        if ConditionExpression is not None and not evaluate_condition(ConditionExpression, existing or {}):
+            raise conditional_check_failed("UpdateItem")
+
+        item = copy.deepcopy(existing) if existing is not None else dict(Key)
+        apply_update_expression(item, UpdateExpression, ExpressionAttributeNames or {}, ExpressionAttributeValues or {})
+        self.items[self._key(Key)] = item
+        self.resource._record_write(item_size(item))
+        if ReturnValues == "ALL_NEW":
+            return {"Attributes": copy.deepcopy(item)}
+        if ReturnValues == "ALL_OLD" and existing is not None:
+            return {"Attributes": copy.deepcopy(existing)}
+        return {}
+
+    def delete_item(self, Key: dict):
+        self.resource._request("DeleteItem")
+        self.resource.consumed_write_units += 1
+        self.items.pop(self._key(Key), None)
+        return {}
+
+    def scan(self, FilterExpression=None, ExclusiveStartKey=None, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        self.resource._request("Scan")
+        keys = sorted(self.items)
+        start = 0
+        if ExclusiveStartKey:
+            start = keys.index(self._key(ExclusiveStartKey)) + 1
+
+        page, scanned_bytes, last_key = [], 0, None
+        for key in keys[start:]:
+            item = self.items[key]
+            scanned_bytes += item_size(item)
+            if FilterExpression is None or evaluate_condition(FilterExpression, item):
+                page.append(copy.deepcopy(project(item, ProjectionExpression, ExpressionAttributeNames)))
+            if scanned_bytes >= 1024 * 1024:
+                last_key = key
+                break
+
+        self.resource.consumed_read_units += read_units(scanned_bytes)
+        response = {"Items": page, "ScannedCount": len(page)}
+        if last_key is not None and last_key != keys[-1]:
+            response["LastEvaluatedKey"] = self._key_dict(self.items[last_key])
+        return response
+
+
+    def query(
+        self,
+        KeyConditionExpression,
+        IndexName: str = None,
+        ExclusiveStartKey: dict = None,
+        ScanIndexForward: bool = True,
+        Limit: int = None,
+        ProjectionExpression: str = None,
+        ExpressionAttributeNames: dict = None,
+        **kwargs,
+    ):
+        self.resource._request("Query")
+        sort_key = self.indexes[IndexName][1] if IndexName else self.sort_key_name
+        matches = [item for item in self.items.values() if evaluate_condition(KeyConditionExpression, item)]
+        matches.sort(key=lambda item: (item.get(sort_key, 0) if sort_key else 0, item[self.key_name]), reverse=not ScanIndexForward)
+
+        start = 0
+        if ExclusiveStartKey:
+            keys = [self._key(item) for item in matches]
+            start = keys.index(self._key(ExclusiveStartKey)) + 1
+
+        page, read_bytes, last_item = [], 0, None
+        for item in matches[start:]:
+            read_bytes += item_size(item)
+            page.append(project(item, ProjectionExpression, ExpressionAttributeNames))
+            if (Limit and len(page) >= Limit) or read_bytes >= 1024 * 1024:
+                last_item = item
+                break
+
+        self.resource.consumed_read_units += read_units(read_bytes)
+        response = {"Items": page, "Count": len(page)}
+        if last_item is not None and last_item is not matches[-1]:
+            last_key = self._key_dict(last_item)
+            # An index query's key also has the index's key attributes
+            for name in self.indexes[IndexName] if IndexName else ():
+                if name:
+                    last_key[name] = last_item[name]
+            response["LastEvaluatedKey"] = last_key
+        return response
+
+
+class FakeDynamoDB:
+    def __init__(self, latency_seconds: float = 0.0, unprocessed_every: int = 0):
+        """
+        :param latency_seconds: Simulated round-trip time added to every request
+        :param unprocessed_every: If > 0, every Nth key of a batch request is
+            returned as unprocessed on its first attempt
+        """
+        self.latency_seconds = latency_seconds
+        self.unprocessed_every = unprocessed_every
+        self.tables: dict[str, FakeTable] = {}
+        self.requests: Counter = Counter()
+        self.consumed_read_units = 0.0
+        self.consumed_write_units = 0
+        self.bytes_written = 0
+        # Attribute values sent in write requests: what the client serialized
+        self.request_bytes = 0
+        self._deferred: set = set()
+        # TransactWriteItems is only on the client, as with boto3
+        self.meta = SimpleNamespace(client=self)
+
+    def create_table(self, name: str, key_name: str, indexes: dict = None, sort_key_name: str = None) -> FakeTable:
+        self.tables[name] = FakeTable(self, name, key_name, indexes, sort_key_name)
+        return self.tables[name]
+
+    def Table(self, name: str) -> FakeTable:
+        return self.tables[name]
+
+    def _request(self, operation: str, payload_size: int = 0):
+        self.requests[operation] += 1
+        self.request_bytes += payload_size
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def _record_write(self, size: int, transactional: bool = False):
+        # Transactional writes cost two units per KB
+        self.consumed_write_units += math.ceil(max(size, 1) / 1024) * (2 if transactional else 1)
+        self.bytes_written += size
+
+    def _should_defer(self, table_name: str, key, index: int) -> bool:
+        if not self.unprocessed_every or (index + 1) % self.unprocessed_every:
+            return False
+        marker = (table_name, key)
+        if marker in self._deferred:
+            return False
+        self._deferred.add(marker)
+        return True
+
+    def batch_get_item(self, RequestItems: dict):
+        self._request("BatchGetItem")
+        if sum(len(request["Keys"]) for request in RequestItems.values()) > 100:
+            raise Exception("ValidationException: Too many items requested for the BatchGetItem call")
+
+        responses, unprocessed = {}, {}
+        for table_name, request in RequestItems.items():
+            table = self.tables[table_name]
+            keys = [table._key(key) for key in request["Keys"]]
+            if len(set(keys)) != len(keys):
+                raise Exception("ValidationException: Provided list of item keys contains duplicates")
+            found, deferred = [], []
+            for index, key_dict in enumerate(request["Keys"]):
+                key = table._key(key_dict)
+                if self._should_defer(table_name, key, index):
+                    deferred.append(key_dict)
+                    continue
+                item = table.items.get(key)
+                if item is not None:
+                    self.consumed_read_units += read_units(item_size(item))
+                    found.append(project(item, request.get("ProjectionExpression"), request.get("ExpressionAttributeNames")))
+            responses[table_name] = found
+            if deferred:
+                unprocessed[table_name] = {**request, "Keys": deferred}
+        return {"Responses": responses, "UnprocessedKeys": unprocessed}
+
+    def batch_write_item(self, RequestItems: dict):
+        self._request("BatchWriteItem", sum(
+            item_size(request.get("PutRequest", {}).get("Item") or request.get("DeleteRequest", {}).get("Key"))
+            for requests in RequestItems.values() for request in requests
+        ))
+        if sum(len(requests) for requests in RequestItems.values()) > 25:
+            raise Exception("ValidationException: Too many items requested for the BatchWriteItem call")
+
+        unprocessed = {}
+        for table_name, requests in RequestItems.items():
+            table = self.tables[table_name]
+            keys = [
+                table._key(request["PutRequest"]["Item"] if "PutRequest" in request else request["DeleteRequest"]["Key"])
+                for request in requests
+            ]
+            if len(set(keys)) != len(keys):
+                raise Exception("ValidationException: Provided list of item keys contains duplicates")
+            deferred = []
+            for index, (key, request) in enumerate(zip(keys, requests)):
+                if self._should_defer(table_name, key, index):
+                    deferred.append(request)
+                    continue
+                if "PutRequest" in request:
+                    item = request["PutRequest"]["Item"]
+                    self._record_write(item_size(item))
+                    table.items[key] = copy.deepcopy(item)
+                else:
+                    self.consumed_write_units += 1
+                    table.items.pop(key, None)
+            if deferred:
+                unprocessed[table_name] = deferred
+        return {"UnprocessedItems": unprocessed}
+
+    def transact_write_items(self, TransactItems: list):
+        self._request("TransactWriteItems", sum(
+            item_size(request.get("Item") or request.get("ExpressionAttributeValues") or request["Key"])
+            for action in TransactItems for request in action.values()
+        ))
+        if len(TransactItems) > 100:
+            raise Exception("ValidationException: Member must have length less than or equal to 100")
+
+        targets = []
+        for action in TransactItems:
+            (operation, request), = action.items()
+            table = self.tables[request["TableName"]]
+            targets.append((operation, request, table, table._key(request.get("Key") or request["Item"])))
+        if len({(table.name, key) for _, _, table, key in targets}) != len(targets):
+            raise Exception("ValidationException: Transaction request cannot include multiple operations on one item")
+
+        # All or nothing: every condition is checked before anything is written
+        reasons = []
+        for _, request, table, key in targets:
+            condition = request.get("ConditionExpression")
+            passed = condition is None or evaluate_condition(condition, table.items.get(key) or {})
+            reasons.append({"Code": "None" if passed else "ConditionalCheckFailed"})
+        if any(reason["Code"] != "None" for reason in reasons):
+            raise ClientError(
+                {
+                    "Error": {"Code": "TransactionCanceledException", "Message": "Transaction cancelled"},
+                    "CancellationReasons": reasons,
+                },
+                "TransactWriteItems",
+            )
+
+        for operation, request, table, key in targets:
+            if operation == "Put":
+                item = copy.deepcopy(request["Item"])
+            elif operation == "Update":
+                existing = table.items.get(key)
+                item = copy.deepcopy(existing) if existing is not None else dict(request["Key"])
+                apply_update_expression(
+                    item, request["UpdateExpression"],
+                    request.get("ExpressionAttributeNames") or {}, request.get("ExpressionAttributeValues") or {},
+                )
+            else:
+                self.consumed_write_units += 2
+                table.items.pop(key, None)
+                continue
+            self._record_write(item_size(item), transactional=True)
+            table.items[key] = item
+        return {}
@@ -0,0 +1,36 @@
+"""
+TestCase mixin for tests of code that reads and writes through AWS.DynamoDB,
+served by a FakeDynamoDB instead.
+"""
+
+from unittest import mock
+from AWS import DynamoDB  # the module every Model reads and writes through
+from Models import ContextMessageLog
+from tests.fakes.dynamodb import FakeDynamoDB
+
+
+class FakeDynamoDBMixin:
+    """
+    Gives each test a new FakeDynamoDB as self.fake and patches
+    AWS.DynamoDB to use it. Patches made with self.patch are undone after the
+    test, so subclasses need no tearDown. Mix in before unittest.TestCase.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.fake = FakeDynamoDB()
+        self.patch(DynamoDB, "_dynamodb", self.fake)
+
+    def patch(self, target, attribute: str, new=mock.DEFAULT, **kwargs):
+        """mock.patch.object for the rest of the test. Returns the patched value."""
+        patcher = mock.patch.object(target, attribute, new, **kwargs)
+        patched = patcher.start()
+        self.addCleanup(patcher.stop)
+        return patched
+
+    def create_context_tables(self, indexes: dict = None):
+        """Create the contexts and context messages tables. Returns both."""
+        contexts = self.fake.create_table("contexts", "context_id", indexes=indexes)
+        messages = self.fake.create_table("context_messages", "context_id", sort_key_name="seq")
+        self.patch(ContextMessageLog, "CONTEXT_MESSAGES_TABLE_NAME", "context_messages")
+        return contexts, messages
@@ -0,0 +1,112 @@
+"""
+In-memory stand-in for a boto3 S3 client, used by tests and benchmarks that
+patch AWS.ClientPool so get_client("s3") returns it. Implements put_object,
+get_object, head_object, list_objects_v2, delete_objects and multipart
+uploads, and counts requests and bytes transferred.
+"""
+
+import io
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from botocore.exceptions import ClientError
+
+
+class FakeS3:
+    # Like S3, every part of a multipart upload but the last must be this large
+    min_part_size = 5 * 1024 * 1024
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.objects: dict = {}
+        # upload_id -> (bucket, key, object params, {part_number: bytes})
+        self.uploads: dict = {}
+        self.requests: Counter = Counter()
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    def _request(self, operation: str):
+        self.requests[operation] += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def _missing(self, operation: str, code: str):
+        return ClientError({"Error": {"Code": code, "Message": "Not Found"}}, operation)
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs):
+        self._request("PutObject")
+        data = Body if isinstance(Body, bytes) else Body.encode("utf-8")
+        self.objects[(Bucket, Key)] = {"Body": data, "LastModified": datetime.now(timezone.utc), **kwargs}
+        self.bytes_written += len(data)
+        return {}
+
+    def get_object(self, Bucket: str, Key: str):
+        self._request("GetObject")
+        stored = self.objects.get((Bucket, Key))
+        if stored is None:
+            raise self._missing("GetObject", "NoSuchKey")
+        self.bytes_read += len(stored["Body"])
+        return {"Body": io.BytesIO(stored["Body"]), "ContentLength": len(stored["Body"])}
+
+    def head_object(self, Bucket: str, Key: str):
+        self._request("HeadObject")
+        stored = self.objects.get((Bucket, Key))
+        if stored is None:
+            raise self._missing("HeadObject", "404")
+        return {"ContentLength": len(stored["Body"]), "LastModified": stored["LastModified"]}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", ContinuationToken: str = None, MaxKeys: int = 1000):
+        self._request("ListObjectsV2")
+        keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+        start = int(ContinuationToken) if ContinuationToken else 0
+        page = keys[start:start + MaxKeys]
+        response = {
+            "Contents": [
+                {"Key": key, "Size": len(self.objects[(Bucket, key)]["Body"]), "LastModified": self.objects[(Bucket, key)]["LastModified"]}
+                for key in page
+            ],
+            "IsTruncated": start + MaxKeys < len(keys),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + MaxKeys)
+        return response
+
+    def delete_objects(self, Bucket: str, Delete: dict):
+        self._request("DeleteObjects")
+        if len(Delete["Objects"]) > 1000:
+            raise ClientError({"Error": {"Code": "MalformedXML", "Message": "Too many objects"}}, "DeleteObjects")
+        for item in Delete["Objects"]:
+            self.objects.pop((Bucket, item["Key"]), None)
+        return {}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs):
+        self._request("CreateMultipartUpload")
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = (Bucket, Key, kwargs, {})
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes):
+        self._request("UploadPart")
+        if UploadId not in self.uploads:
+            raise self._missing("UploadPart", "NoSuchUpload")
+        self.uploads[UploadId][3][PartNumber] = Body
+        self.bytes_written += len(Body)
+        return {"ETag": f'"{UploadId}-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict):
+        self._request("CompleteMultipartUpload")
+        if UploadId not in self.uploads:
+            raise self._missing("CompleteMultipartUpload", "NoSuchUpload")
+        _, _, params, parts = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        if any(len(parts[number]) < self.min_part_size for number in numbers[:-1]):
+            raise ClientError({"Error": {"Code": "EntityTooSmall", "Message": "Part too small"}}, "CompleteMultipartUpload")
+        self.objects[(Bucket, Key)] = {
+            "Body": b"".join(parts[number] for number in numbers), "LastModified": datetime.now(timezone.utc), **params,
+        }
+        return {}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str):
+        self._request("AbortMultipartUpload")
+        self.uploads.pop(UploadId, None)
+        return {}
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from pydantic import BaseModel
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from src.LLM.AgentLoop import AgentLoopLimits, StopReason
+from src.LLM import AgentLoop
+from LLM.AgentChat import AgentChat
+from LLM.AgentTool import AgentTool
+from LLM.TokenStreamingAgentChat import TokenStreamingAgentChat
+
+
+class ToolCallingFakeModel(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class lookup(BaseModel):
+    """Look something up."""
+    query: str
+
+
+USAGE = {"input_tokens": 100, "output_tokens": 10, "total_tokens": 110}
+
+
+def tool_round(index: int, calls: int = 1) -> AIMessage:
+    return AIMessage(
+        content="",
+        tool_calls=[{"id": f"call-{index}-{n}", "name": "lookup", "args": {"query": f"q{index}"}} for n in range(calls)],
+        usage_metadata=USAGE,
+    )
+
+
+def lookup_tool(query: str) -> str:
+    time.sleep(0.01)
+    return f"result for {query}"
+
+
+async def async_lookup_tool(query: str) -> str:
+    await asyncio.sleep(0.01)
+    return f"result for {query}"
+
+
+class TestAgentChatLoop(unittest.TestCase):
+
+    def agent_chat(self, responses: list, limits: AgentLoopLimits = None) -> AgentChat:
+        return AgentChat(
+            ToolCallingFakeModel(responses=responses), "You are helpful.",
+            tools=[AgentTool(function=lookup_tool, params=lookup)],
+            messages=[HumanMessage(content="go")], limits=limits,
+        )
+
+    def test_many_tool_rounds_run_without_recursion(self):
+        rounds = 250
+        agent_chat = self.agent_chat([tool_round(index) for index in range(rounds)] + [AIMessage(content="done")], AgentLoopLimits(max_steps=None))
+        previous_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(200)
+        try:
+            self.assertEqual(agent_chat.invoke(load_data_windows=False), "done")
+        finally:
+            sys.setrecursionlimit(previous_limit)
+        self.assertEqual(len(agent_chat.trace.steps), rounds + 1)
+        self.assertEqual(agent_chat.trace.stop_reason, StopReason.completed)
+
+    def test_trace_records_each_step(self):
+        agent_chat = self.agent_chat([tool_round(0, calls=2), AIMessage(content="done", usage_metadata=USAGE)])
+        agent_chat.invoke(load_data_windows=False)
+        trace = agent_chat.trace
+        self.assertEqual([step.step for step in trace.steps], [1, 2])
+        self.assertEqual(trace.total_tokens, 220)
+        self.assertEqual(trace.steps[0].input_tokens, 100)
+        self.assertEqual([call.tool_call_id for call in trace.steps[0].tool_calls], ["call-0-0", "call-0-1"])
+        self.assertGreaterEqual(trace.steps[0].tool_calls[0].latency_ms, 10)
+        self.assertGreater(trace.steps[0].tools_ms, 0)
+        self.assertEqual(trace.steps[1].tool_calls, [])
+        self.assertGreaterEqual(trace.total_ms, trace.steps[0].tools_ms)
+
+    def test_stops_after_max_steps_with_a_valid_history(self):
+        agent_chat = self.agent_chat([tool_round(index) for index in range(10)], AgentLoopLimits(max_steps=3))
+        self.assertEqual(agent_chat.invoke(load_data_windows=False), "")
+        self.assertEqual(agent_chat.trace.stop_reason, StopReason.max_steps)
+        self.assertEqual(len(agent_chat.trace.steps), 3)
+        # Every tool call made has its response
+        self.assertIsInstance(agent_chat.messages[-1], ToolMessage)
+        self.assertEqual(len([m for m in agent_chat.messages if isinstance(m, ToolMessage)]), 3)
+
+    def test_stops_at_token_budget(self):
+        agent_chat = self.agent_chat([tool_round(index) for index in range(10)], AgentLoopLimits(max_steps=None, token_budget=250))
+        agent_chat.invoke(load_data_windows=False)
+        self.assertEqual(agent_chat.trace.stop_reason, StopReason.token_budget)
+        self.assertEqual(len(agent_chat.trace.steps), 3)
+
+    def test_limits_from_the_environment(self):
+        with mock.patch.dict(os.environ, {"AGENT_MAX_STEPS": ""}):
+            self.assertEqual(AgentLoop._limit_from_env("AGENT_MAX_STEPS", int, 50), 50)
+        with mock.patch.dict(os.environ, {"AGENT_MAX_STEPS": "none"}):
+            self.assertIsNone(AgentLoop._limit_from_env("AGENT_MAX_STEPS", int, 50))
+        with mock.patch.dict(os.environ, {"AGENT_DEADLINE_SECONDS": "25.5"}):
+            self.assertEqual(AgentLoop._limit_from_env("AGENT_DEADLINE_SECONDS", float), 25.5)
+        self.assertIsNone(AgentLoop._limit_from_env("AGENT_UNSET_LIMIT", int))
+
+    def test_stops_at_deadline(self):
+        agent_chat = self.agent_chat([tool_round(index) for index in range(100)], AgentLoopLimits(max_steps=None, deadline_seconds=0.05))
+        agent_chat.invoke(load_data_windows=False)
+        self.assertEqual(agent_chat.trace.stop_reason, StopReason.deadline)
+        self.assertLess(len(agent_chat.trace.steps), 100)
+
+
+class TestTokenStreamingLoop(unittest.TestCase):
+
+    def agent_chat(self, responses: list, limits: AgentLoopLimits = None) -> TokenStreamingAgentChat:
+        return TokenStreamingAgentChat(
+            ToolCallingFakeModel(responses=responses), "You are helpful.",
+            tools=[AgentTool(function=async_lookup_tool, params=lookup)],
+            messages=[HumanMessage(content="go")], limits=limits,
+        )
+
+    async def collect(self, agent_chat: TokenStreamingAgentChat):
+        stream = await agent_chat.invoke(load_data_windows=False)
+        if stream is None:
+            return None
+        return [token async for token in stream]
+
+    def test_streams_the_answer_after_tool_rounds(self):
+        agent_chat = self.agent_chat([tool_round(0), tool_round(1), AIMessage(content="the answer")])
+        self.assertEqual(asyncio.run(self.collect(agent_chat)), ["the answer"])
+        self.assertEqual(agent_chat.trace.stop_reason, StopReason.completed)
+        self.assertEqual(len(agent_chat.trace.steps), 3)
+        self.assertEqual([type(m).__name__ for m in agent_chat.messages], [
+            "HumanMessage", "AIMessage", "ToolMessage", "AIMessage", "ToolMessage", "AIMessage",
+        ])
+        self.assertFalse(agent_chat.is_generating)
+
+    def test_turn_without_text_has_no_stream(self):
+        agent_chat = self.agent_chat([tool_round(index) for index in range(5)], AgentLoopLimits(max_steps=2))
+        self.assertIsNone(asyncio.run(self.collect(agent_chat)))
+        self.assertEqual(agent_chat.trace.stop_reason, StopReason.max_steps)
+        self.assertIsInstance(agent_chat.messages[-1], ToolMessage)
+        self.assertFalse(agent_chat.is_generating)
+
+
+if __name__ == '__main__':
+    unittest.main()
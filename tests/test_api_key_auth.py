@@ -0,0 +1,55 @@
+import unittest
+import sys
+sys.path.append("../")
+from Models import APIKey
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+class TestAPIKeyAuthentication(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.fake.create_table("api_keys", "api_key_id")
+        self.patch(APIKey, "extract_jwt_contents", wraps=APIKey.extract_jwt_contents)
+        self.api_key = APIKey.create_org_api_key("org-1")
+        self.client_key = APIKey.create_client_api_key("org-1", "user-1")
+        APIKey._api_key_validity_cache.clear()
+
+    def tearDown(self):
+        APIKey._api_key_validity_cache.clear()
+
+    def test_token_is_decoded_once_per_request(self):
+        contents = APIKey.get_api_key_contents(self.api_key.token)
+        self.assertEqual(contents["org_id"], "org-1")
+        self.assertEqual(contents["type"], "org")
+        self.assertEqual(APIKey.extract_jwt_contents.call_count, 1)
+        self.assertEqual(self.fake.requests["GetItem"], 1)
+
+    def test_cached_validity_skips_the_read(self):
+        self.assertTrue(APIKey.validate_api_key(self.api_key.token))
+        self.assertTrue(APIKey.validate_api_key(self.api_key.token))
+        self.assertEqual(APIKey.get_api_key_type(self.client_key.token), "client")
+        # One read per key; the org key's second check came from the cache
+        self.assertEqual(self.fake.requests["GetItem"], 2)
+
+    def test_revoked_key_is_rejected_on_the_next_call(self):
+        self.assertTrue(APIKey.validate_api_key(self.api_key.token))
+        APIKey.revoke_api_key(self.api_key.api_key_id)
+        self.assertFalse(APIKey.validate_api_key(self.api_key.token))
+        with self.assertRaises(Exception) as raised:
+            APIKey.get_api_key_contents(self.api_key.token)
+        self.assertEqual(raised.exception.args[1], 401)
+
+    def test_deleted_key_is_rejected_on_the_next_call(self):
+        self.assertTrue(APIKey.validate_api_key(self.client_key.token))
+        APIKey.delete_api_key(self.client_key.api_key_id)
+        self.assertFalse(APIKey.validate_api_key(self.client_key.token))
+
+    def test_invalid_token_is_rejected_without_a_read(self):
+        self.assertIsNone(APIKey.authenticate_api_key("not-a-token"))
+        self.assertIsNone(APIKey.authenticate_api_key(self.api_key.token + "x"))
+        self.assertEqual(self.fake.requests["GetItem"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
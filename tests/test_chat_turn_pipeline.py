@@ -0,0 +1,209 @@
+import json
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+from Services import ChatTurnPipeline
+from AWS.Cognito import CognitoUser
+from AWS.Lambda import LambdaEvent
+from Lib import RecordCache
+from LLM import AgentLoop
+from Models import Context
+from RequestHandlers.Chat.ChatHandler import chat_handler
+from RequestHandlers.Chat.InvokeHandler import invoke_handler
+from RequestHandlers.Chat.ClientSideToolResponsesHandler import client_side_tool_responses_handler
+from RequestHandlers.Chat.AddAIMessageHandler import add_ai_message_handler
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+class ToolCallingFakeModel(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+USER = CognitoUser(email="user@example.com", sub="user-1", family_name="User", given_name="Test")
+USAGE = {"input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100}
+
+
+def event(path: str, body: dict) -> LambdaEvent:
+    return LambdaEvent(path=path, httpMethod="POST", body=json.dumps(body))
+
+
+class TestChatTurnPipeline(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.fake.create_table("users", "user_id").items["user-1"] = {
+            "user_id": "user-1", "organizations": ["org-1"], "created_at": 1, "updated_at": 1,
+        }
+        self.fake.create_table("agents", "agent_id").items["agent-1"] = {
+            "agent_id": "agent-1", "agent_name": "Helper", "agent_description": "Helps",
+            "prompt": "You are helpful.", "org_id": "org-1", "is_public": False, "is_default_agent": False,
+            "tools": ["confirm-tool"], "created_at": 1, "updated_at": 1,
+        }
+        self.fake.create_table("tools", "tool_id").items["confirm-tool"] = {
+            "tool_id": "confirm-tool", "org_id": "org-1", "name": "confirm", "description": "Ask the user to confirm.",
+            "is_client_side_tool": True, "created_at": 1, "updated_at": 1,
+        }
+        self.fake.create_table("models", "model").items["test-model"] = {
+            "model": "test-model", "model_provider": "openai", "input_token_cost": 2.0,
+            "output_token_cost": 8.0, "context_window_size": 100000,
+        }
+        self.fake.create_table("token_tracking", "tracking_id")
+        self.fake.create_table("contexts", "context_id").items["context-1"] = {
+            "context_id": "context-1", "agent_id": "agent-1", "user_id": "user-1", "model_id": "test-model",
+            "messages": [{"type": "human", "content": "hi"}, {"type": "ai", "content": "hello"}],
+            "async_tool_response_queue": [], "created_at": 1, "updated_at": 1,
+        }
+        # One model for the test, so each turn continues its responses
+        self.llm = ToolCallingFakeModel(responses=[])
+        self.responses = self.llm.responses
+        self.patch(ChatTurnPipeline, "create_llm", lambda model_id, llm_model=None: self.llm)
+        RecordCache.clear_record_caches()
+        self.addCleanup(RecordCache.clear_record_caches)
+
+    def stored_messages(self) -> list[dict]:
+        return Context.get_context("context-1").messages
+
+    def test_chat_saves_the_turn_and_reports_cost(self):
+        self.responses.append(AIMessage(content="the answer", usage_metadata=USAGE))
+        with self.assertLogs(ChatTurnPipeline.logger, "INFO") as logs:
+            response = chat_handler(event("/chat", {"context_id": "context-1", "message": "question", "include_trace": True}), USER)
+        self.assertEqual(response.response, "the answer")
+        self.assertEqual(response.model_id, "test-model")
+        self.assertEqual(response.invocation_cost, 0.0028)
+        self.assertEqual(response.trace.stop_reason, "completed")
+        self.assertIsNone(response.stopped_reason)
+        self.assertEqual([m["content"] for m in self.stored_messages()], ["hi", "hello", "question", "the answer"])
+        # Every stage is timed in one log line
+        line = next(output for output in logs.output if "Chat turn context-1" in output)
+        for stage in ["prefetch", "async_queue", "human_message", "tools", "build", "invoke", "convert", "save", "usage", "response"]:
+            self.assertIn(f"{stage} ", line)
+
+    def test_invoke_without_saving(self):
+        self.responses.append(AIMessage(content="continued"))
+        response = invoke_handler(event("/chat/invoke", {"context_id": "context-1", "save_ai_messages": False}), USER)
+        self.assertEqual(response.response, "continued")
+        self.assertFalse(response.saved_ai_messages)
+        self.assertEqual(len(response.generated_messages), 1)
+        self.assertIsNone(response.trace)
+        self.assertEqual(len(self.stored_messages()), 2)
+
+    def test_limit_stop_is_reported(self):
+        limits = AgentLoop.AgentLoopLimits(max_steps=0)
+        with mock.patch.object(AgentLoop, "AgentLoopLimits", lambda: limits):
+            response = invoke_handler(event("/chat/invoke", {"context_id": "context-1"}), USER)
+        self.assertEqual(response.response, "")
+        self.assertEqual(response.stopped_reason, "max_steps")
+
+    def test_client_side_tool_round_trip(self):
+        self.responses.extend([
+            AIMessage(content="", tool_calls=[{"id": "call-1", "name": "confirm", "args": {}}]),
+            AIMessage(content="confirmed"),
+        ])
+        response = chat_handler(event("/chat", {"context_id": "context-1", "message": "delete it"}), USER)
+        self.assertEqual([call.tool_call_id for call in response.client_side_tool_calls], ["call-1"])
+
+        response = client_side_tool_responses_handler(event("/chat/client-side-tool-responses", {
+            "context_id": "context-1", "tool_responses": [{"tool_call_id": "call-1", "response": "yes"}],
+        }), USER)
+        self.assertEqual(response.response, "confirmed")
+        self.assertEqual([m["type"] for m in self.stored_messages()[-3:]], ["ai", "tool", "ai"])
+
+    def test_client_side_tool_responses_must_cover_every_call(self):
+        self.responses.append(AIMessage(content="", tool_calls=[{"id": "call-1", "name": "confirm", "args": {}}]))
+        chat_handler(event("/chat", {"context_id": "context-1", "message": "delete it"}), USER)
+        with self.assertRaises(Exception) as raised:
+            client_side_tool_responses_handler(event("/chat/client-side-tool-responses", {
+                "context_id": "context-1", "tool_responses": [],
+            }), USER)
+        self.assertEqual(raised.exception.args[1], 400)
+
+    def test_add_ai_message_ends_the_turn_early(self):
+        with mock.patch.object(ChatTurnPipeline, "resolve_tools") as resolve_tools:
+            response = add_ai_message_handler(event("/chat/add-ai-message", {"context_id": "context-1", "message": "written"}), USER)
+        self.assertEqual(response.response, "written")
+        resolve_tools.assert_not_called()
+        self.assertEqual(self.stored_messages()[-1]["content"], "written")
+
+    def test_add_ai_message_prompt_without_saving_the_system_message(self):
+        self.responses.append(AIMessage(content="prompted"))
+        response = add_ai_message_handler(event("/chat/add-ai-message", {
+            "context_id": "context-1", "prompt": "Say something", "save_system_message": False,
+        }), USER)
+        self.assertEqual(response.response, "prompted")
+        self.assertEqual([m["type"] for m in self.stored_messages()], ["human", "ai", "ai"])
+
+    def test_prefetch_reads_records_in_batches(self):
+        self.fake.tables["agents"].items["agent-1"]["tools"] = ["confirm-tool", "lookup-tool"]
+        self.fake.tables["tools"].items["lookup-tool"] = {
+            "tool_id": "lookup-tool", "org_id": "org-1", "name": "lookup", "description": "Look something up.",
+            "pd_id": "pd-1", "code": "def lookup(query): return query", "created_at": 1, "updated_at": 1,
+        }
+        self.fake.tables["tools"].items["extra-tool"] = {
+            "tool_id": "extra-tool", "org_id": "org-1", "name": "extra", "description": "An extra tool.",
+            "code": "def extra(): return 1", "created_at": 1, "updated_at": 1,
+        }
+        self.fake.create_table("parameter_definitions", "pd_id").items["pd-1"] = {
+            "pd_id": "pd-1", "org_id": "org-1", "created_at": 1, "updated_at": 1,
+            "parameters": [{"name": "query", "description": "What to look up", "type": "string"}],
+        }
+        self.fake.tables["contexts"].items["context-1"]["additional_agent_tools"] = ["extra-tool", "confirm-tool"]
+        self.responses.append(AIMessage(content="the answer", usage_metadata=USAGE))
+
+        with mock.patch.object(ChatTurnPipeline, "get_model_or_none") as get_model_or_none:
+            response = invoke_handler(event("/chat/invoke", {"context_id": "context-1"}), USER)
+        get_model_or_none.assert_not_called()
+        self.assertEqual(response.invocation_cost, 0.0028)
+        # Agent, model and the context's tools; the agent's other tool; its parameter definition
+        self.assertEqual(self.fake.requests["BatchGetItem"], 3)
+
+        turn = ChatTurnPipeline.ChatTurn("context-1", USER)
+        ChatTurnPipeline.prefetch_turn_records(turn)
+        ChatTurnPipeline.resolve_tools(turn)
+        self.assertEqual([tool.tool_id for tool in turn.tools], ["confirm-tool", "lookup-tool", "extra-tool"])
+        self.assertEqual(list(turn.tools[1].params.model_fields), ["query"])
+        self.assertEqual(turn.llm_model.model, "test-model")
+
+    def test_later_turns_read_records_from_the_caches(self):
+        self.responses.extend([AIMessage(content="first"), AIMessage(content="second")])
+        invoke_handler(event("/chat/invoke", {"context_id": "context-1"}), USER)
+        self.assertEqual(self.fake.requests["BatchGetItem"], 2)
+        invoke_handler(event("/chat/invoke", {"context_id": "context-1"}), USER)
+        self.assertEqual(self.fake.requests["BatchGetItem"], 2)
+
+    @mock.patch.object(RecordCache, "RECORD_CACHE_ENABLED", False)
+    def test_prefetch_checks_access(self):
+        self.fake.tables["contexts"].items["context-1"]["user_id"] = "user-2"
+        with self.assertRaises(Exception) as raised:
+            invoke_handler(event("/chat/invoke", {"context_id": "context-1"}), USER)
+        self.assertEqual(raised.exception.args[1], 403)
+
+        self.fake.tables["contexts"].items["context-1"]["user_id"] = "user-1"
+        self.fake.tables["agents"].items["agent-1"]["org_id"] = "org-2"
+        with self.assertRaises(Exception) as raised:
+            invoke_handler(event("/chat/invoke", {"context_id": "context-1"}), USER)
+        self.assertEqual(raised.exception.args[1], 403)
+
+        del self.fake.tables["agents"].items["agent-1"]
+        with self.assertRaises(Exception) as raised:
+            invoke_handler(event("/chat/invoke", {"context_id": "context-1"}), USER)
+        self.assertEqual(raised.exception.args[1], 404)
+
+    def test_stages_can_be_added_and_replaced(self):
+        ran = []
+        pipeline = ChatTurnPipeline.ChatTurnPipeline([("first", lambda turn: ran.append("first")), ("last", lambda turn: ran.append("last"))])
+        pipeline.insert_before("last", "middle", lambda turn: ran.append("middle"))
+        pipeline.replace("first", lambda turn: ran.append("replaced"))
+        turn = ChatTurnPipeline.ChatTurn("context-1", None)
+        self.assertIsNone(pipeline.run(turn))
+        self.assertEqual(ran, ["replaced", "middle", "last"])
+        self.assertEqual(list(turn.timings), ["first", "middle", "last"])
+        with self.assertRaises(ValueError):
+            pipeline.insert_after("missing", "stage", lambda turn: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
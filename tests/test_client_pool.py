@@ -0,0 +1,42 @@
+import unittest
+import sys
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append("../")
+from src.AWS import ClientPool
+
+
+class TestClientPool(unittest.TestCase):
+
+    def setUp(self):
+        ClientPool.reset()
+
+    def tearDown(self):
+        ClientPool.reset()
+
+    def test_client_created_once_per_service(self):
+        with mock.patch.object(ClientPool.boto3, "client", side_effect=lambda *args, **kwargs: object()):
+            lambda_client = ClientPool.get_client("lambda")
+            for _ in range(10):
+                self.assertIs(ClientPool.get_client("lambda"), lambda_client)
+            ClientPool.get_client("s3")
+        self.assertEqual(ClientPool.client_creation_counts["lambda"], 1)
+        self.assertEqual(ClientPool.client_creation_counts["s3"], 1)
+
+    def test_client_created_once_under_concurrency(self):
+        with mock.patch.object(ClientPool.boto3, "client", side_effect=lambda *args, **kwargs: object()):
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                clients = list(executor.map(lambda _: ClientPool.get_client("cognito-idp"), range(64)))
+        self.assertEqual(len({id(client) for client in clients}), 1)
+        self.assertEqual(ClientPool.client_creation_counts["cognito-idp"], 1)
+
+    def test_clients_use_shared_config(self):
+        with mock.patch.object(ClientPool.boto3, "client") as create_client:
+            ClientPool.get_client("lambda")
+        create_client.assert_called_once_with("lambda", config=ClientPool.CLIENT_CONFIG)
+
+    def test_resource_created_once(self):
+        with mock.patch.object(ClientPool.boto3, "resource", side_effect=lambda *args, **kwargs: object()):
+            dynamodb = ClientPool.get_resource("dynamodb")
+            self.assertIs(ClientPool.get_resource("dynamodb"), dynamodb)
+        self.assertEqual(ClientPool.resource_creation_counts["dynamodb"], 1)
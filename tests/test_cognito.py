@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+import jwt
+from src.AWS import Cognito
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+TEST_USER_POOL_ID = "ap-southeast-4_TestPool"
+TEST_ISSUER = f"https://cognito-idp.ap-southeast-4.amazonaws.com/{TEST_USER_POOL_ID}"
+
+with open(os.path.join(FIXTURES_DIR, "cognito_jwks.json")) as f:
+    TEST_JWKS = json.load(f)
+with open(os.path.join(FIXTURES_DIR, "cognito_test_private_key.pem")) as f:
+    TEST_PRIVATE_KEY = f.read()
+
+
+def create_access_token(kid: str = "test-key-1", **claims) -> str:
+    now = int(time.time())
+    payload = {
+        "sub": "b689b508-50f1-7008-579e-7910d4640fae",
+        "iss": TEST_ISSUER,
+        "token_use": "access",
+        "client_id": "test-client",
+        "iat": now,
+        "exp": now + 3600,
+        **claims
+    }
+    return jwt.encode(payload, TEST_PRIVATE_KEY, algorithm="RS256", headers={"kid": kid})
+
+
+class TestCognitoLocalVerification(unittest.TestCase):
+
+    def setUp(self):
+        self.env_patch = mock.patch.dict(os.environ, {"USER_POOL_ID": TEST_USER_POOL_ID})
+        self.env_patch.start()
+        self.fetch_patch = mock.patch.object(Cognito, "_fetch_jwks", return_value=TEST_JWKS)
+        self.fetch_jwks = self.fetch_patch.start()
+        self.mode_patch = mock.patch.object(Cognito, "COGNITO_LOCAL_VERIFICATION", True)
+        self.mode_patch.start()
+        Cognito._jwks_cache = None
+        Cognito._user_attributes_cache.clear()
+
+    def tearDown(self):
+        self.mode_patch.stop()
+        self.fetch_patch.stop()
+        self.env_patch.stop()
+        Cognito._jwks_cache = None
+        Cognito._user_attributes_cache.clear()
+
+    def test_user_built_from_claims(self):
+        token = create_access_token(email="test@example.com", given_name="Test", family_name="User")
+        with mock.patch.object(Cognito, "get_user_from_cognito_api") as get_user_api:
+            user = Cognito.get_user_from_cognito(token)
+            get_user_api.assert_not_called()
+        self.assertEqual(user.email, "test@example.com")
+        self.assertEqual(user.sub, "b689b508-50f1-7008-579e-7910d4640fae")
+
+    def test_jwks_fetched_once(self):
+        token = create_access_token(email="test@example.com", given_name="Test", family_name="User")
+        for _ in range(5):
+            Cognito.get_user_from_cognito(token)
+        self.assertEqual(self.fetch_jwks.call_count, 1)
+
+    def test_falls_back_to_get_user_once_when_attributes_missing(self):
+        token = create_access_token()
+        api_user = Cognito.CognitoUser(
+            email="test@example.com",
+            sub="b689b508-50f1-7008-579e-7910d4640fae",
+            family_name="User",
+            given_name="Test"
+        )
+        with mock.patch.object(Cognito, "get_user_from_cognito_api", return_value=api_user) as get_user_api:
+            self.assertEqual(Cognito.get_user_from_cognito(token), api_user)
+            self.assertEqual(Cognito.get_user_from_cognito(token), api_user)
+            self.assertEqual(get_user_api.call_count, 1)
+
+    def test_rejects_expired_token(self):
+        token = create_access_token(exp=int(time.time()) - 10)
+        with self.assertRaises(Exception):
+            Cognito.verify_access_token(token)
+
+    def test_rejects_wrong_issuer(self):
+        token = create_access_token(iss="https://cognito-idp.us-east-1.amazonaws.com/us-east-1_Other")
+        with self.assertRaises(Exception):
+            Cognito.verify_access_token(token)
+
+    def test_rejects_id_token(self):
+        token = create_access_token(token_use="id")
+        with self.assertRaises(Exception):
+            Cognito.verify_access_token(token)
+
+    def test_unknown_key_id_refetches_jwks(self):
+        Cognito.verify_access_token(create_access_token())
+        with mock.patch.object(Cognito, "JWKS_REFRESH_MIN_INTERVAL_SECONDS", 0):
+            with self.assertRaises(Exception):
+                Cognito.verify_access_token(create_access_token(kid="rotated-key"))
+        self.assertEqual(self.fetch_jwks.call_count, 2)
@@ -0,0 +1,184 @@
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, SystemMessage
+from src.Models import Context
+from LLM import ContextCompactor  # the module AgentChat compacts through
+from LLM.AgentChat import AgentChat
+from LLM.CompactionConfig import CompactionConfig
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+# Messages of every RecordingChatModel call
+calls = []
+
+
+class RecordingChatModel(FakeListChatModel):
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(messages)
+        return super()._call(messages, stop, run_manager, **kwargs)
+
+
+def turn(index: int, with_tool: bool = False) -> list:
+    messages = [HumanMessage(content=f"question {index} " + "x" * 400)]
+    if with_tool:
+        messages += [
+            AIMessage(content="", tool_calls=[{"id": f"call-{index}", "name": "lookup", "args": {}}]),
+            ToolMessage(tool_call_id=f"call-{index}", content="result " + "y" * 400),
+        ]
+    messages.append(AIMessage(content=f"answer {index} " + "z" * 400))
+    return messages
+
+
+class TestCompactionBoundary(unittest.TestCase):
+
+    def test_never_cuts_between_tool_call_and_response(self):
+        messages = turn(0) + turn(1, with_tool=True) + turn(2)
+        safe = ContextCompactor.safe_boundaries(messages)
+        # [human, ai, human, ai(call), tool, ai, human, ai]
+        self.assertEqual(safe, [True, True, True, True, False, True, True, True])
+
+    def test_pending_tool_call_blocks_cut(self):
+        messages = turn(0) + [HumanMessage(content="go"), AIMessage(content="", tool_calls=[{"id": "call-x", "name": "client_tool", "args": {}}])]
+        safe = ContextCompactor.safe_boundaries(messages)
+        self.assertFalse(any(safe[index] for index in range(4, len(messages))))
+
+    def test_prefers_turn_boundary(self):
+        messages = turn(0) + turn(1, with_tool=True) + turn(2)
+        # Cutting 3 from the end would start at the tool response's answer
+        self.assertEqual(ContextCompactor.find_compaction_boundary(messages, 0, 3), 2)
+
+    def test_nothing_to_compact(self):
+        messages = turn(0)
+        self.assertIsNone(ContextCompactor.find_compaction_boundary(messages, 0, 5))
+
+
+class TestContextCompactor(unittest.TestCase):
+
+    def setUp(self):
+        calls.clear()
+        self.summarizer = RecordingChatModel(responses=["summary one", "summary two"])
+        self.patch = mock.patch.object(ContextCompactor, "create_llm", lambda model_id=None: self.summarizer)
+        self.patch.start()
+        self.config = CompactionConfig(threshold_percentage=50, keep_recent_messages=2)
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_below_threshold_does_nothing(self):
+        compactor = ContextCompactor.ContextCompactor(self.config, context_window_size=100_000)
+        messages = turn(0) + turn(1)
+        self.assertFalse(compactor.maybe_compact(messages))
+        self.assertIs(compactor.prompt_messages(messages), messages)
+        self.assertEqual(calls, [])
+
+    def test_compacts_older_turns_into_summary(self):
+        compactor = ContextCompactor.ContextCompactor(self.config, context_window_size=600)
+        messages = turn(0) + turn(1, with_tool=True) + turn(2)
+        self.assertTrue(compactor.maybe_compact(messages))
+
+        state = compactor.updated_state
+        self.assertEqual(state.summary, "summary one")
+        self.assertEqual(state.compacted_message_count, 6)
+        self.assertLess(state.tokens_after, state.tokens_before)
+        prompt = compactor.prompt_messages(messages)
+        self.assertIsInstance(prompt[0], SystemMessage)
+        self.assertIn("summary one", prompt[0].content)
+        self.assertEqual(prompt[1:], messages[6:])
+        # The history itself is untouched
+        self.assertEqual(len(messages), 8)
+        self.assertIn("question 1", calls[0][1].content)
+
+    def test_previous_summary_is_rolled_in(self):
+        compactor = ContextCompactor.ContextCompactor(self.config, context_window_size=600)
+        messages = turn(0) + turn(1)
+        compactor.maybe_compact(messages)
+        messages += turn(2) + turn(3)
+        self.assertTrue(compactor.maybe_compact(messages))
+        self.assertIn("summary one", calls[1][1].content)
+        self.assertEqual(compactor.state.compaction_count, 2)
+        self.assertEqual(compactor.state.compacted_message_count, 6)
+
+    def test_usage_from_before_compaction_is_not_trusted(self):
+        compactor = ContextCompactor.ContextCompactor(self.config, context_window_size=600)
+        messages = turn(0) + turn(1)
+        compactor.maybe_compact(messages)
+        messages[-1].usage_metadata = {"input_tokens": 5000, "output_tokens": 10, "total_tokens": 5010}
+        self.assertLess(compactor.prompt_tokens(messages), 5000)
+
+    def test_fixed_tokens_are_not_added_to_the_provider_count(self):
+        compactor = ContextCompactor.ContextCompactor(self.config, context_window_size=10_000)
+        messages = turn(0) + turn(1)
+        messages[-1].usage_metadata = {"input_tokens": 4000, "output_tokens": 10, "total_tokens": 4010}
+        # 4010 is under the threshold of 5000; adding the system prompt again would cross it
+        self.assertFalse(compactor.maybe_compact(messages, fixed_tokens=3000))
+
+        messages[-1].usage_metadata = {"input_tokens": 6000, "output_tokens": 10, "total_tokens": 6010}
+        self.assertTrue(compactor.maybe_compact(messages, fixed_tokens=3000))
+        self.assertEqual(compactor.updated_state.tokens_before, 6010)
+        self.assertEqual(compactor.updated_state.tokens_after, compactor.prompt_tokens(messages) + 3000)
+
+    def test_fixed_tokens_are_added_to_an_estimate(self):
+        compactor = ContextCompactor.ContextCompactor(self.config, context_window_size=10_000)
+        messages = turn(0) + turn(1)
+        self.assertFalse(compactor.maybe_compact(messages))
+        self.assertTrue(compactor.maybe_compact(messages, fixed_tokens=5000))
+        self.assertEqual(compactor.updated_state.tokens_before, ContextCompactor.estimate_messages_tokens(messages) + 5000)
+
+    def test_failed_summary_keeps_full_prompt(self):
+        compactor = ContextCompactor.ContextCompactor(self.config, context_window_size=600)
+        messages = turn(0) + turn(1)
+        with mock.patch.object(ContextCompactor, "create_llm", side_effect=Exception("down")):
+            self.assertFalse(compactor.maybe_compact(messages))
+        self.assertIsNone(compactor.updated_state)
+        self.assertIs(compactor.prompt_messages(messages), messages)
+
+    def test_agent_chat_sends_compacted_prompt(self):
+        compactor = ContextCompactor.ContextCompactor(self.config, context_window_size=600)
+        chat_llm = RecordingChatModel(responses=["reply"])
+        messages = turn(0) + turn(1) + [HumanMessage(content="latest")]
+        agent_chat = AgentChat(chat_llm, "You are helpful.", messages=messages, compactor=compactor)
+        self.assertEqual(agent_chat.invoke(load_data_windows=False), "reply")
+
+        sent = calls[-1]
+        self.assertIn("summary one", sent[1].content)
+        self.assertEqual(sent[-1].content, "latest")
+        self.assertEqual(len(agent_chat.messages), 6)
+        self.assertIs(agent_chat.new_compaction_state, compactor.updated_state)
+
+
+class TestCompactionPersistence(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.fake.create_table("contexts", "context_id")
+        Context.save_context(Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1",
+            messages=[{"type": "human", "content": "hi"}], created_at=1, updated_at=1,
+        ))
+
+    def state(self, count: int):
+        return ContextCompactor.CompactionState(
+            summary=f"up to {count}", compacted_message_count=count, message_count_at_compaction=count + 2,
+            tokens_before=1000, tokens_after=100, compacted_at=1,
+        )
+
+    def test_state_is_saved_with_appended_messages(self):
+        Context.append_messages(Context.get_context("context-1"), [{"type": "ai", "content": "a"}], compaction=self.state(1))
+        context = Context.get_context("context-1")
+        self.assertEqual(context.compaction.summary, "up to 1")
+        self.assertEqual(len(context.messages), 2)
+
+    def test_older_state_does_not_replace_newer(self):
+        stale = Context.get_context("context-1")
+        Context.append_messages(Context.get_context("context-1"), [], compaction=self.state(5))
+        Context.append_messages(stale, [{"type": "ai", "content": "a"}], compaction=self.state(3))
+        context = Context.get_context("context-1")
+        self.assertEqual(context.compaction.compacted_message_count, 5)
+        self.assertEqual(len(context.messages), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
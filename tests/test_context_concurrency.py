@@ -0,0 +1,119 @@
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from src.Models import Context
+from tests.fakes.dynamodb import FakeDynamoDB
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+def stored_context(fake: FakeDynamoDB) -> dict:
+    return fake.tables["contexts"].items["context-1"]
+
+
+class TestContextConcurrency(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        table = self.fake.create_table("contexts", "context_id")
+        # Written before versioning: no version attribute
+        table.items["context-1"] = {
+            "context_id": "context-1", "agent_id": "agent-1", "user_id": "user-1",
+            "messages": [{"type": "human", "content": "hi"}],
+            "async_tool_response_queue": [],
+            "created_at": 1, "updated_at": 1,
+        }
+
+    def test_save_bumps_version(self):
+        context = Context.get_context("context-1")
+        self.assertEqual(context.version, 0)
+        Context.save_context(context)
+        Context.save_context(context)
+        self.assertEqual(context.version, 2)
+        self.assertEqual(stored_context(self.fake)["version"], 2)
+
+    def test_stale_save_raises_conflict(self):
+        first = Context.get_context("context-1")
+        second = Context.get_context("context-1")
+        Context.save_context(first)
+        second.messages = []
+        with self.assertRaises(Context.ContextConflictError) as raised:
+            Context.save_context(second)
+        self.assertEqual(raised.exception.args[1], 409)
+        self.assertEqual(len(stored_context(self.fake)["messages"]), 1)
+
+    def test_concurrent_appends_are_merged(self):
+        first = Context.get_context("context-1")
+        second = Context.get_context("context-1")
+        Context.append_messages(first, [{"type": "ai", "content": "from first"}])
+        merged = Context.append_messages(second, [{"type": "ai", "content": "from second"}])
+        contents = [message["content"] for message in stored_context(self.fake)["messages"]]
+        self.assertEqual(contents, ["hi", "from first", "from second"])
+        self.assertEqual(merged.version, 2)
+
+    def test_async_responses_are_not_lost(self):
+        first = Context.get_context("context-1")
+        second = Context.get_context("context-1")
+        Context.add_async_tool_response(first, "call-1", "one")
+        Context.add_async_tool_response(second, "call-2", "two")
+        queue = stored_context(self.fake)["async_tool_response_queue"]
+        self.assertEqual([item["tool_call_id"] for item in queue], ["call-1", "call-2"])
+
+    def test_gives_up_after_max_attempts(self):
+        context = Context.get_context("context-1")
+
+        def always_conflict(latest):
+            stored_context(self.fake)["version"] = stored_context(self.fake).get("version", 0) + 1
+
+        with self.assertRaises(Context.ContextConflictError):
+            Context.update_context_with_retry(context, always_conflict)
+        self.assertEqual(self.fake.requests["PutItem"], Context.CONTEXT_SAVE_MAX_ATTEMPTS)
+
+
+class TestAppendMessages(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.fake.create_table("contexts", "context_id")
+        self.patch(Context, "CONTEXT_MESSAGE_ENCODING", Context.MESSAGE_ENCODING_JSON)
+        Context.save_context(Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1",
+            messages=[{"type": "human", "content": "x" * 5000}], created_at=1, updated_at=1,
+        ))
+        self.fake.requests.clear()
+        self.fake.request_bytes = 0
+
+    def test_append_sends_only_new_messages(self):
+        context = Context.append_messages(Context.get_context("context-1"), [{"type": "ai", "content": "answer"}])
+        self.assertEqual(self.fake.requests["UpdateItem"], 1)
+        self.assertEqual(self.fake.requests["PutItem"], 0)
+        self.assertLess(self.fake.request_bytes, 1000)
+        stored = stored_context(self.fake)
+        self.assertEqual([m["content"] for m in stored["messages"]][1:], ["answer"])
+        self.assertEqual(stored["message_count"], 2)
+        self.assertEqual(stored["version"], 2)
+        self.assertEqual(context.version, 2)
+
+    def test_conflicting_append_is_retried_on_latest(self):
+        stale = Context.get_context("context-1")
+        Context.append_messages(Context.get_context("context-1"), [{"type": "ai", "content": "first"}])
+        merged = Context.append_messages(stale, [{"type": "ai", "content": "second"}])
+        self.assertEqual([m["content"] for m in stored_context(self.fake)["messages"]][1:], ["first", "second"])
+        self.assertEqual(len(merged.messages), 3)
+        self.assertEqual(self.fake.requests["PutItem"], 0)
+
+    def test_contexts_saved_before_storage_modes_are_rewritten(self):
+        del stored_context(self.fake)["message_storage"]
+        Context.append_messages(Context.get_context("context-1"), [{"type": "ai", "content": "answer"}])
+        self.assertEqual(self.fake.requests["PutItem"], 1)
+        self.assertEqual(stored_context(self.fake)["message_storage"], "inline")
+
+    def test_compact_contexts_are_rewritten(self):
+        with mock.patch.object(Context, "CONTEXT_MESSAGE_ENCODING", Context.MESSAGE_ENCODING_COMPACT):
+            Context.append_messages(Context.get_context("context-1"), [{"type": "ai", "content": "answer"}])
+            self.assertEqual(self.fake.requests["PutItem"], 1)
+            self.assertEqual(len(Context.get_context("context-1").messages), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from src.Models import Context
+from AWS import DynamoDB
+from AWS.Lambda import LambdaEvent
+from RequestHandlers.Context.GetContextHistoryHandler import get_context_history_handler
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+class TestContextHistory(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.contexts, _ = self.create_context_tables(indexes={"user_id-updated_at-index": ("user_id", "updated_at")})
+        agents = self.fake.create_table("agents", "agent_id")
+        agents.items["agent-1"] = {"agent_id": "agent-1", "agent_name": "Helper", "agent_description": "Helps", "prompt": "p" * 1000}
+        for index in range(5):
+            Context.save_context(Context.Context(
+                context_id=f"context-{index}", agent_id="agent-1", user_id="user-1",
+                messages=[{"type": "human", "content": "x" * 1000}, {"type": "ai", "content": f"reply {index} " + "y" * 500}],
+                created_at=index, updated_at=index,
+            ), touch=False)
+
+    def history(self, **query_params):
+        event = LambdaEvent(path="/context-history", httpMethod="GET", queryStringParameters=query_params or None)
+        return get_context_history_handler(event, mock.Mock(sub="user-1"))
+
+    def test_header_carries_preview_and_count(self):
+        item = self.contexts.items["context-0"]
+        self.assertEqual(item["last_message_preview"], ("reply 0 " + "y" * 500)[:Context.LAST_MESSAGE_PREVIEW_CHARS])
+        self.assertEqual(item["message_count"], 2)
+
+    def test_history_reads_no_messages(self):
+        requests = []
+        original = self.contexts.query
+        self.contexts.query = lambda **kwargs: requests.append(kwargs) or original(**kwargs)
+        response = self.history()
+        # Every field goes through a placeholder, so reserved words are safe
+        self.assertEqual(sorted(requests[0]["ExpressionAttributeNames"].values()), sorted(Context.CONTEXT_HISTORY_FIELDS))
+        self.assertNotIn("messages", requests[0]["ExpressionAttributeNames"].values())
+        self.assertEqual([c.context_id for c in response.contexts], [f"context-{i}" for i in range(4, -1, -1)])
+        self.assertTrue(response.contexts[0].last_message.startswith("reply 4"))
+        self.assertEqual(response.contexts[0].message_count, 2)
+        self.assertEqual(response.contexts[0].agent.agent_name, "Helper")
+        self.assertIsNone(response.next_cursor)
+
+    def test_pages_with_cursor(self):
+        first = self.history(limit="2")
+        self.assertEqual([c.context_id for c in first.contexts], ["context-4", "context-3"])
+        second = self.history(limit="2", cursor=first.next_cursor)
+        self.assertEqual([c.context_id for c in second.contexts], ["context-2", "context-1"])
+        third = self.history(limit="2", cursor=second.next_cursor)
+        self.assertEqual([c.context_id for c in third.contexts], ["context-0"])
+
+    def test_invalid_cursor(self):
+        key = {"context_id": "context-2", "user_id": "user-1", "updated_at": 2}
+        cursors = [
+            "not-a-cursor",
+            DynamoDB.encode_cursor({**key, "secret": "x"}),
+            DynamoDB.encode_cursor({"context_id": "context-2", "user_id": "user-1"}),
+            DynamoDB.encode_cursor({**key, "updated_at": {"nested": 1}}),
+            DynamoDB.encode_cursor({**key, "user_id": "user-2"}),
+        ]
+        for cursor in cursors:
+            with self.assertRaises(Exception) as error:
+                self.history(cursor=cursor)
+            self.assertEqual(error.exception.args[1], 400)
+        self.assertEqual([c.context_id for c in self.history(cursor=DynamoDB.encode_cursor(key)).contexts], ["context-1", "context-0"])
+
+    def test_preview_follows_appended_messages(self):
+        Context.append_messages(Context.get_context("context-2"), [{"type": "human", "content": "latest"}])
+        self.assertEqual(self.contexts.items["context-2"]["last_message_preview"], "latest")
+        self.assertEqual(self.history().contexts[0].last_message, "latest")
+
+    def test_header_without_preview_reads_last_message(self):
+        del self.contexts.items["context-4"]["last_message_preview"]
+        self.assertTrue(self.history().contexts[0].last_message.startswith("reply 4"))
+
+    def test_contexts_of_deleted_agents_are_hidden(self):
+        Context.save_context(Context.Context(
+            context_id="orphan", agent_id="deleted", user_id="user-1",
+            messages=[{"type": "human", "content": "hi"}], created_at=9, updated_at=9,
+        ), touch=False)
+        self.assertNotIn("orphan", [c.context_id for c in self.history().contexts])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from src.Models import Context
+from AWS import DynamoDB
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+def message(content: str, type: str = "human") -> dict:
+    return {"type": type, "content": content}
+
+
+class TestContextMessageLog(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        _, self.messages_table = self.create_context_tables()
+        self.patch(Context, "CONTEXT_MESSAGE_STORAGE", Context.MESSAGE_STORAGE_LOG)
+        self.context = Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1",
+            messages=[message(f"m{i}") for i in range(3)], created_at=1, updated_at=1,
+        )
+        Context.save_context(self.context)
+
+    def stored_contents(self) -> list[str]:
+        return [item["message"]["content"] for _, item in sorted(self.messages_table.items.items())]
+
+    def test_header_does_not_hold_messages(self):
+        header = self.fake.tables["contexts"].items["context-1"]
+        self.assertEqual(header["messages"], [])
+        self.assertEqual(header["message_count"], 3)
+        self.assertEqual(header["message_storage"], "log")
+        self.assertEqual(self.stored_contents(), ["m0", "m1", "m2"])
+
+    def test_get_context_reassembles_messages(self):
+        context = Context.get_context("context-1")
+        self.assertEqual([m["content"] for m in context.messages], ["m0", "m1", "m2"])
+        self.assertEqual(context.version, 1)
+
+    def test_append_writes_only_new_messages(self):
+        context = Context.get_context("context-1")
+        self.fake.requests.clear()
+        self.fake.consumed_write_units = 0
+        Context.append_messages(context, [message("m3"), message("m4", "ai")])
+        self.assertEqual(self.fake.requests["TransactWriteItems"], 1)
+        self.assertEqual(self.fake.requests["BatchWriteItem"] + self.fake.requests["UpdateItem"], 0)
+        # The header plus one unit per new message, doubled for the transaction
+        self.assertEqual(self.fake.consumed_write_units, 6)
+        self.assertEqual(self.stored_contents(), ["m0", "m1", "m2", "m3", "m4"])
+
+    def test_rewrite_replaces_and_trims(self):
+        context = Context.get_context("context-1")
+        context.messages = [message("m0"), message("edited")]
+        Context.save_context(context)
+        self.assertEqual(self.stored_contents(), ["m0", "edited"])
+        self.assertEqual([m["content"] for m in Context.get_context("context-1").messages], ["m0", "edited"])
+
+    def test_inline_context_moves_to_log_on_save(self):
+        self.fake.tables["contexts"].items["context-2"] = {
+            "context_id": "context-2", "agent_id": "agent-1", "user_id": "user-1",
+            "messages": [message("inline")], "created_at": 1, "updated_at": 1,
+        }
+        context = Context.get_context("context-2")
+        Context.append_messages(context, [message("next")])
+        self.assertEqual(self.fake.tables["contexts"].items["context-2"]["messages"], [])
+        self.assertEqual([m["content"] for m in Context.get_context("context-2").messages], ["inline", "next"])
+
+    def test_concurrent_appends_do_not_overwrite_positions(self):
+        first = Context.get_context("context-1")
+        second = Context.get_context("context-1")
+        Context.append_messages(first, [message("from first")])
+        Context.append_messages(second, [message("from second")])
+        self.assertEqual(self.stored_contents(), ["m0", "m1", "m2", "from first", "from second"])
+
+    def test_stale_save_writes_no_messages(self):
+        first = Context.get_context("context-1")
+        second = Context.get_context("context-1")
+        first.messages.append(message("from first"))
+        Context.save_appended_messages(first, 3)
+        second.messages.append(message("from second"))
+        with self.assertRaises(Context.ContextConflictError):
+            Context.save_appended_messages(second, 3)
+        second.messages = [message("rewritten")]
+        with self.assertRaises(Context.ContextConflictError):
+            Context.save_context(second)
+        self.assertEqual(self.stored_contents(), ["m0", "m1", "m2", "from first"])
+
+    def test_save_too_big_for_a_transaction_writes_messages_first(self):
+        context = Context.get_context("context-1")
+        context.messages.extend(message(f"n{i}") for i in range(3))
+        written = []
+        put_messages = Context.ContextMessageLog.put_messages
+        with mock.patch.object(DynamoDB, "TRANSACT_WRITE_MAX_ITEMS", 2), \
+                mock.patch.object(Context.ContextMessageLog, "put_messages", side_effect=lambda *args: (written.append("messages"), put_messages(*args))), \
+                mock.patch.object(Context, "transact_write_items", side_effect=lambda actions: (written.append("header"), DynamoDB.transact_write_items(actions))):
+            Context.save_context(context)
+        self.assertEqual(written, ["messages", "header"])
+        self.assertEqual(len(Context.get_context("context-1").messages), 6)
+
+    def test_short_read_is_retried_then_raises(self):
+        header = self.fake.tables["contexts"].items["context-1"]
+        header["message_count"] = 4
+        get_messages = Context.ContextMessageLog.get_messages
+
+        def finish_save(*args):
+            # The missing message is written while the context is being read
+            messages = get_messages(*args)
+            Context.ContextMessageLog.put_messages("context-1", 3, [message("m3")])
+            return messages
+
+        with mock.patch.object(Context.ContextMessageLog, "get_messages", side_effect=finish_save):
+            context = Context.get_context("context-1")
+        self.assertEqual(len(context.messages), 4)
+
+        header["message_count"] = 5
+        with self.assertRaises(Exception) as raised:
+            Context.get_context("context-1")
+        self.assertEqual(raised.exception.args[1], 500)
+
+    def test_history_reads_last_message_from_log(self):
+        header = Context.Context(**self.fake.tables["contexts"].items["context-1"])
+        self.assertEqual(Context._get_last_message_content(header), "m2")
+
+    def test_delete_removes_messages(self):
+        Context.delete_context("context-1")
+        self.assertEqual(self.messages_table.items, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
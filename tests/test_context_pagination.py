@@ -0,0 +1,131 @@
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from src.Models import Context
+from AWS.Lambda import LambdaEvent
+from RequestHandlers.Context.GetContextHandler import get_context_handler
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+def message(index: int) -> dict:
+    return {"type": "human" if index % 2 == 0 else "ai", "content": f"m{index}"}
+
+
+class ContextPaginationFixture(FakeDynamoDBMixin):
+    storage = Context.MESSAGE_STORAGE_INLINE
+    encoding = Context.MESSAGE_ENCODING_JSON
+
+    def setUp(self):
+        super().setUp()
+        self.contexts, _ = self.create_context_tables()
+        self.fake.create_table("models", "model")
+        self.patch(Context, "CONTEXT_MESSAGE_STORAGE", self.storage)
+        self.patch(Context, "CONTEXT_MESSAGE_ENCODING", self.encoding)
+        Context.save_context(Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1",
+            messages=[message(i) for i in range(120)], created_at=1, updated_at=1,
+            user_defined={"k": "v"},
+        ))
+
+    def contents(self, context) -> list[str]:
+        return [m["content"] for m in context.messages]
+
+
+class TestInlinePagination(ContextPaginationFixture, unittest.TestCase):
+
+    def test_last_page(self):
+        context = Context.get_context("context-1", limit=50)
+        self.assertEqual(self.contents(context), [f"m{i}" for i in range(70, 120)])
+        self.assertEqual(context.message_count, 120)
+
+    def test_page_before_index(self):
+        context = Context.get_context("context-1", limit=50, before=30)
+        self.assertEqual(self.contents(context), [f"m{i}" for i in range(30)])
+
+    def test_inline_page_projects_only_its_messages(self):
+        requests = []
+        original = self.contexts.get_item
+        self.contexts.get_item = lambda **kwargs: requests.append(kwargs) or original(**kwargs)
+        Context.get_context("context-1", limit=2)
+        self.assertNotIn("messages", requests[0]["ExpressionAttributeNames"].values())
+        self.assertEqual(requests[1]["ProjectionExpression"], "#p0[118], #p0[119]")
+
+    def test_projection_without_messages(self):
+        context = Context.get_context("context-1", fields=["model_id"])
+        self.assertEqual(context.messages, [])
+        self.assertIsNone(context.user_defined)
+        self.assertEqual(context.message_count, 120)
+
+    def test_partial_context_cannot_be_saved(self):
+        context = Context.get_context("context-1", limit=10)
+        with self.assertRaises(Exception) as error:
+            Context.save_context(context)
+        self.assertEqual(error.exception.args[1], 500)
+        with self.assertRaises(Exception):
+            Context.append_messages(context, [message(120)])
+        self.assertEqual(len(Context.get_context("context-1").messages), 120)
+
+    def test_invalid_limit(self):
+        with self.assertRaises(Exception) as error:
+            Context.get_context("context-1", limit=Context.CONTEXT_PAGE_MAX_LIMIT + 1)
+        self.assertEqual(error.exception.args[1], 400)
+
+    def test_header_without_message_count_is_sliced(self):
+        del self.contexts.items["context-1"]["message_count"]
+        context = Context.get_context("context-1", limit=5)
+        self.assertEqual(self.contents(context), [f"m{i}" for i in range(115, 120)])
+
+
+class TestCompactPagination(ContextPaginationFixture, unittest.TestCase):
+    encoding = Context.MESSAGE_ENCODING_COMPACT
+
+    def test_page_from_blob(self):
+        context = Context.get_context("context-1", limit=3, before=10)
+        self.assertEqual(self.contents(context), ["m7", "m8", "m9"])
+
+
+class TestLogPagination(ContextPaginationFixture, unittest.TestCase):
+    storage = Context.MESSAGE_STORAGE_LOG
+
+    def test_page_reads_only_its_items(self):
+        self.fake.requests.clear()
+        context = Context.get_context("context-1", limit=4, before=100)
+        self.assertEqual(self.contents(context), ["m96", "m97", "m98", "m99"])
+        self.assertEqual(self.fake.requests["Query"], 1)
+
+
+class TestGetContextHandler(ContextPaginationFixture, unittest.TestCase):
+
+    def get(self, **query_params):
+        event = LambdaEvent(path="/context/context-1", httpMethod="GET", requestParameters={"context_id": "context-1"}, queryStringParameters=query_params)
+        user = mock.Mock(sub="user-1")
+        return get_context_handler(event, user).model_dump()
+
+    def test_page_with_cursor(self):
+        response = self.get(limit="50")
+        self.assertEqual([m["message"] for m in response["messages"]], [f"m{i}" for i in range(70, 120)])
+        self.assertEqual(response["message_count"], 120)
+        self.assertEqual(response["next_before"], 70)
+        first_page = self.get(limit="50", before="20")
+        self.assertEqual(len(first_page["messages"]), 20)
+        self.assertIsNone(first_page["next_before"])
+
+    def test_fields(self):
+        response = self.get(fields="context_id,user_defined")
+        self.assertEqual(response, {"context_id": "context-1", "user_defined": {"k": "v"}})
+
+    def test_unknown_field(self):
+        with self.assertRaises(Exception) as error:
+            self.get(fields="messages,secret")
+        self.assertEqual(error.exception.args[1], 400)
+
+    def test_full_read_is_unchanged(self):
+        response = self.get()
+        self.assertEqual(len(response["messages"]), 120)
+        self.assertIsNone(response["next_before"])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import gzip
+import json
+import random
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from src.Models import Context
+from AWS import ClientPool  # the module S3Functions gets its client from
+from AWS.Lambda import LambdaEvent
+from Models import Job, MessageBlobStore
+from Services import ContextTransferService
+from RequestHandlers.Context.ImportContextsHandler import import_contexts_handler
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+from tests.fakes.s3 import FakeS3
+
+
+def save(context_id: str, user_id: str = "user-1", messages: list = None, updated_at: int = 1) -> None:
+    Context.save_context(Context.Context(
+        context_id=context_id, agent_id="agent-1", user_id=user_id,
+        messages=messages or [{"type": "human", "content": f"hi from {context_id}"}, {"type": "ai", "content": "hello"}],
+        created_at=1, updated_at=updated_at, user_defined={"n": 1.5},
+    ), touch=False)
+
+
+class TestContextTransfer(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.contexts, _ = self.create_context_tables(indexes={"user_id-updated_at-index": ("user_id", "updated_at")})
+        self.fake.create_table("jobs", "job_id")
+        self.s3 = FakeS3()
+        self.s3.min_part_size = 1024
+        self.patches = [
+            mock.patch.dict(ClientPool._clients, {"s3": self.s3}),
+            mock.patch.object(ContextTransferService, "CONTEXT_EXPORT_BUCKET", "exports"),
+            mock.patch.object(ContextTransferService, "EXPORT_PART_SIZE_BYTES", 1024),
+            mock.patch.object(MessageBlobStore, "MESSAGE_BLOB_BUCKET", "blobs"),
+            mock.patch.object(MessageBlobStore, "MESSAGE_BLOB_THRESHOLD_BYTES", 1024),
+        ]
+        for patch in self.patches:
+            patch.start()
+        for index in range(30):
+            save(f"context-{index}", updated_at=index)
+        save("other-context", user_id="user-2")
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def exported_records(self, job_id: str) -> list[dict]:
+        body = self.s3.objects[("exports", ContextTransferService.export_key(job_id))]["Body"]
+        return [json.loads(line) for line in gzip.decompress(body).splitlines()]
+
+    def test_export_streams_the_users_contexts_in_parts(self):
+        # Incompressible content, so the export spans several parts
+        noise = "".join(random.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(40000))
+        save("context-big", messages=[{"type": "tool", "content": noise, "tool_call_id": "call-1"}], updated_at=100)
+        updates = []
+        progress = ContextTransferService.export_contexts("job-1", "user-1", on_progress=updates.append)
+
+        records = self.exported_records("job-1")
+        self.assertEqual(progress["contexts_exported"], 31)
+        self.assertEqual(len(records), 31)
+        self.assertNotIn("other-context", [record["context_id"] for record in records])
+        self.assertGreater(progress["parts_uploaded"], 1)
+        self.assertEqual(self.s3.requests["UploadPart"], progress["parts_uploaded"])
+        self.assertTrue(updates)
+        # Offloaded content is exported whole, without storage details
+        self.assertEqual(records[0]["messages"][0]["content"], noise)
+        self.assertNotIn("blob_ref", records[0]["messages"][0])
+        self.assertNotIn("version", records[0])
+        self.assertEqual(records[0]["user_defined"], {"n": 1.5})
+
+    def test_failed_export_aborts_the_upload(self):
+        with mock.patch.object(ContextTransferService, "export_record", side_effect=Exception("boom")):
+            with self.assertRaises(Exception):
+                ContextTransferService.export_contexts("job-1", "user-1")
+        self.assertEqual(self.s3.requests["AbortMultipartUpload"], 1)
+        self.assertEqual(self.s3.uploads, {})
+        self.assertNotIn(("exports", ContextTransferService.export_key("job-1")), self.s3.objects)
+
+    def test_import_restores_deleted_contexts(self):
+        ContextTransferService.export_contexts("job-1", "user-1")
+        original = Context.get_context("context-3")
+        for index in range(30):
+            del self.contexts.items[f"context-{index}"]
+
+        progress = ContextTransferService.import_contexts("job-1", "user-1")
+        self.assertEqual(progress["contexts_imported"], 30)
+        self.assertEqual(progress["contexts_skipped"], 0)
+        restored = Context.get_context("context-3")
+        self.assertEqual(restored.messages, original.messages)
+        self.assertEqual(restored.updated_at, original.updated_at)
+        self.assertEqual(restored.message_count, 2)
+
+    def test_import_skips_existing_unless_overwrite(self):
+        ContextTransferService.export_contexts("job-1", "user-1")
+        Context.append_messages(Context.get_context("context-0"), [{"type": "human", "content": "newer"}])
+        progress = ContextTransferService.import_contexts("job-1", "user-1")
+        self.assertEqual(progress["contexts_skipped"], 30)
+        self.assertEqual(len(Context.get_context("context-0").messages), 3)
+
+        stale = Context.get_context("context-0")
+        progress = ContextTransferService.import_contexts("job-1", "user-1", overwrite=True)
+        self.assertEqual(progress["contexts_imported"], 30)
+        restored = Context.get_context("context-0")
+        self.assertEqual(len(restored.messages), 2)
+        self.assertGreater(restored.version, stale.version)
+        # A save based on a read from before the import conflicts
+        with self.assertRaises(Context.ContextConflictError):
+            Context.save_context(stale)
+
+    def test_import_never_replaces_another_users_context(self):
+        ContextTransferService.export_contexts("job-1", "user-1")
+        del self.contexts.items["context-5"]
+        save("context-5", user_id="user-2")
+        progress = ContextTransferService.import_contexts("job-1", "user-1", overwrite=True)
+        self.assertEqual(progress["contexts_skipped"], 1)
+        self.assertEqual(Context.get_context("context-5").user_id, "user-2")
+
+    def test_import_requires_a_completed_export_of_the_caller(self):
+        export_job = Job.create_job(owner_id="user-1", status=Job.JobStatus.in_progress, data={})
+        import_job = Job.create_job(owner_id="user-1")
+        event = LambdaEvent(
+            path="/context/import", httpMethod="POST", runJobId=import_job.job_id,
+            body=json.dumps({"export_job_id": export_job.job_id}),
+        )
+        with self.assertRaises(Exception) as error:
+            import_contexts_handler(event, mock.Mock(sub="user-1"))
+        self.assertEqual(error.exception.args[1], 400)
+        with self.assertRaises(Exception) as error:
+            import_contexts_handler(event, mock.Mock(sub="user-2"))
+        self.assertEqual(error.exception.args[1], 404)
+
+    def test_job_data_progress_keeps_other_data(self):
+        job = Job.create_job(owner_id="user-1", data={"logs": ["started"]})
+        Job.update_job_data(job.job_id, {"contexts_exported": 25}, "Exported 25 contexts")
+        job = Job.get_job(job.job_id)
+        self.assertEqual(job.data, {"logs": ["started"], "contexts_exported": 25})
+        self.assertEqual(job.message, "Exported 25 contexts")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import sys
+from collections import OrderedDict
+from decimal import Decimal
+sys.path.append("../")
+from src.Lib.DecimalConversion import float_to_decimal, decimal_to_serializable
+
+
+class TestFloatToDecimal(unittest.TestCase):
+
+    def test_converts_nested_floats(self):
+        converted = float_to_decimal({"a": 0.1, "b": [1, 2.5, {"c": 3.0}], "d": True, "e": None})
+        self.assertEqual(converted, {"a": Decimal("0.1"), "b": [1, Decimal("2.5"), {"c": Decimal("3.0")}], "d": True, "e": None})
+
+    def test_returns_same_object_without_floats(self):
+        message = {"type": "ai", "content": "hi", "tool_calls": [{"args": {"n": 1}}]}
+        self.assertIs(float_to_decimal(message), message)
+
+    def test_only_copies_changed_branches(self):
+        unchanged = {"text": "x"}
+        original = {"score": 0.5, "meta": unchanged, "items": [unchanged]}
+        converted = float_to_decimal(original)
+        self.assertEqual(original["score"], 0.5)
+        self.assertIs(converted["meta"], unchanged)
+        self.assertIs(converted["items"], original["items"])
+
+    def test_handles_subclasses(self):
+        converted = float_to_decimal(OrderedDict(x=1.5))
+        self.assertEqual(converted, {"x": Decimal("1.5")})
+
+
+class TestDecimalToSerializable(unittest.TestCase):
+
+    def test_whole_numbers_become_int(self):
+        converted = decimal_to_serializable({"a": Decimal("3"), "b": [Decimal("2.50")], "c": Decimal("1E+2")})
+        self.assertEqual(converted, {"a": 3, "b": [2.5], "c": 100})
+        self.assertIsInstance(converted["a"], int)
+        self.assertIsInstance(converted["b"][0], float)
+
+    def test_returns_same_object_without_decimals(self):
+        messages = [{"type": "human", "content": "hello"}, {"type": "ai", "content": ["a", {"k": "v"}]}]
+        self.assertIs(decimal_to_serializable(messages), messages)
+
+    def test_round_trip(self):
+        value = {"usage": {"input_tokens": 10, "cost": 0.25}}
+        self.assertEqual(decimal_to_serializable(float_to_decimal(value)), value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+from decimal import Decimal
+from unittest import mock
+sys.path.append("../")
+from src.AWS import DynamoDB
+from tests.fakes.dynamodb import FakeDynamoDB
+
+
+class TestBatchGetItems(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeDynamoDB()
+        self.table = self.fake.create_table("agents", "agent_id")
+        for i in range(250):
+            self.table.items[f"agent-{i}"] = {"agent_id": f"agent-{i}", "agent_name": f"Agent {i}"}
+        self.patch = mock.patch.object(DynamoDB, "_dynamodb", self.fake)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_chunks_requests_by_100_keys(self):
+        keys = [f"agent-{i}" for i in range(250)]
+        items = DynamoDB.batch_get_items("agents", "agent_id", keys)
+        self.assertEqual(sorted(item["agent_id"] for item in items), sorted(keys))
+        self.assertEqual(self.fake.requests["BatchGetItem"], 3)
+        self.assertEqual(self.fake.requests["Scan"], 0)
+
+    def test_deduplicates_and_skips_missing_keys(self):
+        items = DynamoDB.batch_get_items("agents", "agent_id", ["agent-1", "agent-1", "missing", None])
+        self.assertEqual([item["agent_id"] for item in items], ["agent-1"])
+
+    def test_empty_keys_make_no_requests(self):
+        self.assertEqual(DynamoDB.batch_get_items("agents", "agent_id", []), [])
+        self.assertEqual(self.fake.requests["BatchGetItem"], 0)
+
+    def test_retries_unprocessed_keys(self):
+        self.fake.unprocessed_every = 3
+        keys = [f"agent-{i}" for i in range(50)]
+        with mock.patch.object(DynamoDB, "_backoff"):
+            items = DynamoDB.batch_get_items("agents", "agent_id", keys)
+        self.assertEqual(len(items), 50)
+        self.assertEqual(self.fake.requests["BatchGetItem"], 2)
+
+    def test_concurrent_chunks(self):
+        keys = [f"agent-{i}" for i in range(250)]
+        items = DynamoDB.batch_get_items("agents", "agent_id", keys, max_workers=4)
+        self.assertEqual(len(items), 250)
+
+    def test_across_tables_in_one_request(self):
+        self.fake.create_table("models", "model").items["gpt-4.1"] = {"model": "gpt-4.1"}
+        results = DynamoDB.batch_get_items_across_tables({
+            "agents": ("agent_id", ["agent-1", "agent-2", "agent-1", "missing"]),
+            "models": ("model", ["gpt-4.1"]),
+            "tools": ("tool_id", []),
+        })
+        self.assertEqual(sorted(item["agent_id"] for item in results["agents"]), ["agent-1", "agent-2"])
+        self.assertEqual(results["models"], [{"model": "gpt-4.1"}])
+        self.assertEqual(results["tools"], [])
+        self.assertEqual(self.fake.requests["BatchGetItem"], 1)
+
+    def test_across_tables_chunks_and_retries(self):
+        self.fake.create_table("models", "model").items["gpt-4.1"] = {"model": "gpt-4.1"}
+        self.fake.unprocessed_every = 7
+        with mock.patch.object(DynamoDB, "_backoff"):
+            results = DynamoDB.batch_get_items_across_tables({
+                "agents": ("agent_id", [f"agent-{i}" for i in range(150)]),
+                "models": ("model", ["gpt-4.1"]),
+            })
+        self.assertEqual(len(results["agents"]), 150)
+        self.assertEqual(len(results["models"]), 1)
+        self.assertEqual(self.fake.requests["BatchGetItem"], 4)
+
+
+class TestBatchWriteItems(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeDynamoDB()
+        self.table = self.fake.create_table("contexts", "context_id", indexes={"user_id-updated_at-index": ("user_id", "updated_at")})
+        for i in range(60):
+            self.table.items[f"context-{i}"] = {"context_id": f"context-{i}", "user_id": "user-1", "updated_at": i}
+        self.patch = mock.patch.object(DynamoDB, "_dynamodb", self.fake)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_deletes_in_chunks_of_25(self):
+        keys = [f"context-{i}" for i in range(60)]
+        DynamoDB.batch_delete_items("contexts", "context_id", keys + ["context-1"])
+        self.assertEqual(self.table.items, {})
+        self.assertEqual(self.fake.requests["BatchWriteItem"], 3)
+        self.assertEqual(self.fake.requests["DeleteItem"], 0)
+
+    def test_puts_and_deletes_in_one_call(self):
+        DynamoDB.batch_write_items(
+            "contexts", "context_id",
+            put_items=[{"context_id": "new", "user_id": "user-2", "score": 0.5}],
+            delete_keys=["context-0", "new"],
+        )
+        self.assertNotIn("context-0", self.table.items)
+        self.assertEqual(self.table.items["new"]["score"], Decimal("0.5"))
+
+    def test_retries_unprocessed_items(self):
+        self.fake.unprocessed_every = 4
+        keys = [f"context-{i}" for i in range(60)]
+        with mock.patch.object(DynamoDB, "_backoff"):
+            DynamoDB.batch_delete_items("contexts", "context_id", keys, max_workers=3)
+        self.assertEqual(self.table.items, {})
+        self.assertGreater(self.fake.requests["BatchWriteItem"], 3)
+
+    def test_index_query_returns_projected_keys(self):
+        items = DynamoDB.get_all_items_by_index(
+            "contexts", "user_id", "user-1",
+            index_name="user_id-updated_at-index",
+            projection_expression="context_id",
+        )
+        self.assertEqual(len(items), 60)
+        self.assertEqual(items[0], {"context_id": "context-0"})
@@ -0,0 +1,77 @@
+import unittest
+import sys
+from decimal import Decimal
+from unittest import mock
+sys.path.append("../")
+from boto3.dynamodb.conditions import Attr
+from src.AWS import DynamoDB
+from tests.fakes.dynamodb import FakeDynamoDB
+
+
+class TestUpdateExpressionBuilder(unittest.TestCase):
+
+    def test_builds_set_remove_and_add_sections(self):
+        builder = DynamoDB.UpdateExpressionBuilder()
+        builder.set("status", "error").remove("message").add("prompt_tokens", 5)
+        params = builder.build()
+        self.assertEqual(params["UpdateExpression"], "SET #u0 = :u0 REMOVE #u1 ADD #u2 :u1")
+        self.assertEqual(params["ExpressionAttributeNames"], {"#u0": "status", "#u1": "message", "#u2": "prompt_tokens"})
+        self.assertEqual(params["ExpressionAttributeValues"], {":u0": "error", ":u1": 5})
+
+    def test_nested_paths_reuse_name_placeholders(self):
+        builder = DynamoDB.UpdateExpressionBuilder()
+        builder.set("data.status", "done").append("data.logs", ["hi"]).set("messages[2].content", 1.5)
+        params = builder.build()
+        self.assertEqual(
+            params["UpdateExpression"],
+            "SET #u0.#u1 = :u0, #u0.#u2 = list_append(if_not_exists(#u0.#u2, :u1), :u2), #u3[2].#u4 = :u3",
+        )
+        self.assertEqual(params["ExpressionAttributeValues"][":u3"], Decimal("1.5"))
+
+    def test_empty_builder_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DynamoDB.UpdateExpressionBuilder().build()
+
+
+class TestUpdateItem(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeDynamoDB()
+        self.table = self.fake.create_table("jobs", "job_id")
+        self.table.items["job-1"] = {"job_id": "job-1", "status": "queued", "message": "m", "data": {}, "count": 1}
+        self.patch = mock.patch.object(DynamoDB, "_dynamodb", self.fake)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_partial_update_is_a_single_request(self):
+        item = DynamoDB.update_item(
+            "jobs", "job_id", "job-1",
+            update_attributes={"status": "in_progress"},
+            remove_attributes=["message"],
+            add_attributes={"count": 2},
+            append_attributes={"data.logs": ["first"]},
+        )
+        self.assertEqual(item, {"job_id": "job-1", "status": "in_progress", "data": {"logs": ["first"]}, "count": 3})
+        self.assertEqual(self.fake.requests["UpdateItem"], 1)
+        self.assertEqual(self.fake.requests["GetItem"] + self.fake.requests["PutItem"], 0)
+
+    def test_appends_accumulate(self):
+        for message in ("a", "b"):
+            DynamoDB.update_item("jobs", "job_id", "job-1", append_attributes={"data.logs": [message]})
+        self.assertEqual(self.table.items["job-1"]["data"]["logs"], ["a", "b"])
+
+    def test_failed_condition_is_detected(self):
+        with self.assertRaises(Exception) as context:
+            DynamoDB.update_item(
+                "jobs", "job_id", "missing",
+                update_attributes={"status": "error"},
+                condition_expression=Attr("job_id").exists(),
+            )
+        self.assertTrue(DynamoDB.is_conditional_check_failed(context.exception))
+        self.assertNotIn("missing", self.table.items)
+
+
+if __name__ == "__main__":
+    unittest.main()
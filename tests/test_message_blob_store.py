@@ -0,0 +1,150 @@
+import gzip
+import unittest
+from datetime import datetime, timedelta, timezone
+import sys
+from unittest import mock
+sys.path.append("../")
+from src.LLM.BaseMessagesConverter import dict_messages_to_base_messages
+from Models import MessageBlobStore  # the module the converter and Context use
+from Models import Context
+from AWS import ClientPool
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+from tests.fakes.s3 import FakeS3
+
+BIG_OUTPUT = "page content " * 2000
+
+
+def tool_message(content) -> dict:
+    return {"type": "tool", "content": content, "tool_call_id": "call-1", "name": None, "id": None}
+
+
+class TestMessageBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = FakeS3()
+        self.patches = [
+            mock.patch.dict(ClientPool._clients, {"s3": self.s3}),
+            mock.patch.object(MessageBlobStore, "MESSAGE_BLOB_BUCKET", "blobs"),
+            mock.patch.object(MessageBlobStore, "MESSAGE_BLOB_THRESHOLD_BYTES", 1024),
+        ]
+        for patch in self.patches:
+            patch.start()
+        MessageBlobStore._blob_cache.clear()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_small_messages_are_untouched(self):
+        messages = [tool_message("short")]
+        self.assertIs(MessageBlobStore.offload_messages(messages), messages)
+        self.assertEqual(self.s3.requests["PutObject"], 0)
+
+    def test_large_content_is_offloaded_compressed(self):
+        offloaded = MessageBlobStore.offload_message(tool_message(BIG_OUTPUT))
+        self.assertEqual(len(offloaded["content"]), MessageBlobStore.MESSAGE_BLOB_PREVIEW_CHARS)
+        self.assertEqual(offloaded["blob_ref"]["size"], len(BIG_OUTPUT.encode("utf-8")))
+        stored = self.s3.objects[("blobs", offloaded["blob_ref"]["key"])]["Body"]
+        self.assertLess(len(stored), len(BIG_OUTPUT) / 10)
+        self.assertEqual(gzip.decompress(stored).decode("utf-8"), BIG_OUTPUT)
+
+    def test_identical_content_shares_one_blob(self):
+        first = MessageBlobStore.offload_message(tool_message(BIG_OUTPUT))
+        second = MessageBlobStore.offload_message(tool_message(BIG_OUTPUT))
+        self.assertEqual(first["blob_ref"]["key"], second["blob_ref"]["key"])
+        self.assertEqual(len(self.s3.objects), 1)
+
+    def test_hydrates_concurrently_for_the_llm(self):
+        list_content = [{"type": "text", "text": BIG_OUTPUT}]
+        messages = MessageBlobStore.offload_messages([
+            {"type": "human", "content": "read these"},
+            tool_message(BIG_OUTPUT + "a"),
+            tool_message(list_content),
+        ])
+        MessageBlobStore._blob_cache.clear()
+        base_messages = dict_messages_to_base_messages(messages)
+        self.assertEqual(base_messages[1].content, BIG_OUTPUT + "a")
+        self.assertEqual(base_messages[2].content, list_content)
+        self.assertEqual(self.s3.requests["GetObject"], 2)
+        self.assertIn("blob_ref", messages[1])
+
+    def test_hydrate_without_refs_returns_same_list(self):
+        messages = [tool_message("short")]
+        self.assertIs(MessageBlobStore.hydrate_messages(messages), messages)
+
+    def test_missing_blob_keeps_the_preview(self):
+        messages = MessageBlobStore.offload_messages([tool_message(BIG_OUTPUT)])
+        MessageBlobStore.delete_blobs([messages[0]["blob_ref"]["key"]], min_age_seconds=0)
+        with self.assertLogs(MessageBlobStore.logger, "ERROR"):
+            hydrated = MessageBlobStore.hydrate_messages(messages)
+        self.assertEqual(hydrated[0]["content"], BIG_OUTPUT[:MessageBlobStore.MESSAGE_BLOB_PREVIEW_CHARS])
+
+
+class TestMessageBlobCleanup(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.s3 = FakeS3()
+        self.create_context_tables()
+        self.patches = [
+            mock.patch.dict(ClientPool._clients, {"s3": self.s3}),
+            mock.patch.object(MessageBlobStore, "MESSAGE_BLOB_BUCKET", "blobs"),
+            mock.patch.object(MessageBlobStore, "MESSAGE_BLOB_THRESHOLD_BYTES", 1024),
+        ]
+        for patch in self.patches:
+            patch.start()
+        MessageBlobStore._blob_cache.clear()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def save(self, context_id: str, content: str, storage: str = Context.MESSAGE_STORAGE_INLINE, encoding: str = Context.MESSAGE_ENCODING_JSON) -> str:
+        with mock.patch.object(Context, "CONTEXT_MESSAGE_STORAGE", storage), mock.patch.object(Context, "CONTEXT_MESSAGE_ENCODING", encoding):
+            context = Context.Context(
+                context_id=context_id, agent_id="agent-1", user_id="user-1",
+                messages=[tool_message(content)], created_at=1, updated_at=1,
+            )
+            Context.save_context(context)
+        return context.messages[0]["blob_ref"]["key"]
+
+    def test_only_unreferenced_blobs_are_deleted(self):
+        shared = self.save("inline", BIG_OUTPUT)
+        self.assertEqual(self.save("deleted-shared", BIG_OUTPUT), shared)
+        compact = self.save("compact", BIG_OUTPUT + "c", encoding=Context.MESSAGE_ENCODING_COMPACT)
+        log = self.save("log", BIG_OUTPUT + "l", storage=Context.MESSAGE_STORAGE_LOG)
+        orphan = self.save("deleted", BIG_OUTPUT + "d")
+        Context.delete_context("deleted-shared")
+        Context.delete_context("deleted")
+
+        referenced = Context.referenced_blob_keys()
+        self.assertEqual(referenced, {shared, compact, log})
+        candidates = MessageBlobStore.list_blob_keys(min_age_seconds=0)
+        MessageBlobStore.delete_blobs([key for key in candidates if key not in referenced], min_age_seconds=0)
+        self.assertEqual({key for _, key in self.s3.objects}, {shared, compact, log})
+        self.assertNotIn(("blobs", orphan), self.s3.objects)
+
+    def test_blob_reused_during_cleanup_is_kept(self):
+        key = self.save("deleted", BIG_OUTPUT)
+        Context.delete_context("deleted")
+        self.s3.objects[("blobs", key)]["LastModified"] = datetime.now(timezone.utc) - timedelta(days=2)
+
+        candidates = MessageBlobStore.list_blob_keys()
+        self.assertEqual(candidates, [key])
+        self.assertEqual(Context.referenced_blob_keys(), set())
+        # A save reuses the blob after the scan has passed
+        self.assertEqual(self.save("new", BIG_OUTPUT), key)
+        self.assertEqual(MessageBlobStore.delete_blobs(candidates), [])
+
+        MessageBlobStore._blob_cache.clear()
+        context = Context.get_context("new")
+        self.assertEqual(MessageBlobStore.hydrate_messages(context.messages)[0]["content"], BIG_OUTPUT)
+
+    def test_recent_blobs_are_not_listed(self):
+        self.save("deleted", BIG_OUTPUT)
+        self.assertEqual(MessageBlobStore.list_blob_keys(), [])
+        self.assertEqual(len(MessageBlobStore.list_blob_keys(min_age_seconds=0)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import sys
+from decimal import Decimal
+from unittest import mock
+sys.path.append("../")
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, SystemMessage
+from src.Models import Context
+from LLM import MessageCodec  # the module Models.Context encodes through
+from LLM.BaseMessagesConverter import base_messages_to_dict_messages, dict_messages_to_base_messages
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+def sample_messages() -> list[dict]:
+    return base_messages_to_dict_messages([
+        SystemMessage(content="You are helpful."),
+        HumanMessage(content="What's the weather?"),
+        AIMessage(
+            content="",
+            tool_calls=[{"id": "call-1", "name": "get_weather", "args": {"city": "Paris"}}],
+            usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+        ),
+        ToolMessage(tool_call_id="call-1", content="Sunny, 21.5C"),
+        AIMessage(content="It's sunny.", response_metadata={"finish_reason": "stop"}),
+    ])
+
+
+class TestMessageCodec(unittest.TestCase):
+
+    def test_strip_removes_defaults_only(self):
+        ai, tool = sample_messages()[2], sample_messages()[3]
+        stripped = MessageCodec.strip_message_defaults(ai)
+        self.assertNotIn("additional_kwargs", stripped)
+        self.assertNotIn("invalid_tool_calls", stripped)
+        self.assertNotIn("id", stripped)
+        self.assertEqual(stripped["usage_metadata"]["total_tokens"], 15)
+        self.assertNotIn("type", stripped["tool_calls"][0])
+        self.assertNotIn("status", MessageCodec.strip_message_defaults(tool))
+
+    def test_restore_is_inverse_of_strip(self):
+        for message in sample_messages():
+            self.assertEqual(MessageCodec.restore_message_defaults(MessageCodec.strip_message_defaults(message)), message)
+
+    def test_restore_keeps_full_messages_unchanged(self):
+        for message in sample_messages():
+            self.assertEqual(MessageCodec.restore_message_defaults(message), message)
+
+    def test_unknown_message_types_pass_through(self):
+        message = {"type": "custom", "content": "x", "id": None}
+        self.assertIs(MessageCodec.strip_message_defaults(message), message)
+
+    def test_round_trip_with_each_codec(self):
+        messages = sample_messages()
+        codecs = [MessageCodec.CODEC_GZIP]
+        if MessageCodec.zstandard is not None:
+            codecs.append(MessageCodec.CODEC_ZSTD)
+        for codec in codecs:
+            data = MessageCodec.encode_messages(messages, codec)
+            self.assertEqual(data[:2], bytes([MessageCodec.FORMAT_VERSION, codec]))
+            self.assertEqual(MessageCodec.decode_messages(data), messages)
+
+    def test_gzip_unless_zstd_is_configured(self):
+        self.assertEqual(MessageCodec.encode_messages(sample_messages())[1], MessageCodec.CODEC_GZIP)
+        if MessageCodec.zstandard is not None:
+            with mock.patch.object(MessageCodec, "MESSAGE_BLOB_CODEC", "zstd"):
+                self.assertEqual(MessageCodec.encode_messages(sample_messages())[1], MessageCodec.CODEC_ZSTD)
+
+    def test_round_trip_rebuilds_langchain_messages(self):
+        messages = sample_messages()
+        decoded = MessageCodec.decode_messages(MessageCodec.encode_messages(messages))
+        self.assertEqual(dict_messages_to_base_messages(decoded), dict_messages_to_base_messages(messages))
+
+    def test_decimals_from_dynamodb_are_encoded_as_numbers(self):
+        messages = [{"type": "human", "content": "hi", "additional_kwargs": {"score": Decimal("0.5"), "n": Decimal("3")}}]
+        decoded = MessageCodec.decode_messages(MessageCodec.encode_messages(messages))
+        self.assertEqual(decoded[0]["additional_kwargs"], {"score": 0.5, "n": 3})
+
+    def test_decode_accepts_boto3_binary(self):
+        from boto3.dynamodb.types import Binary
+        messages = sample_messages()
+        self.assertEqual(MessageCodec.decode_messages(Binary(MessageCodec.encode_messages(messages))), messages)
+
+    def test_unknown_version_is_rejected(self):
+        data = bytearray(MessageCodec.encode_messages(sample_messages()))
+        data[0] = 99
+        with self.assertRaises(Exception):
+            MessageCodec.decode_messages(bytes(data))
+
+
+class TestContextMessageEncoding(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.table, self.messages_table = self.create_context_tables()
+        self.patch(Context, "CONTEXT_MESSAGE_ENCODING", Context.MESSAGE_ENCODING_COMPACT)
+        self.patch(Context, "CONTEXT_MESSAGE_STORAGE", Context.MESSAGE_STORAGE_INLINE)
+        self.context = Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1",
+            messages=sample_messages(), created_at=1, updated_at=1,
+        )
+
+    def test_compact_item_stores_blob_instead_of_list(self):
+        Context.save_context(self.context)
+        item = self.table.items["context-1"]
+        self.assertEqual(item["messages"], [])
+        self.assertIsInstance(item["messages_blob"], bytes)
+        self.assertEqual(item["message_encoding"], "compact")
+        self.assertEqual(item["message_count"], 5)
+
+    def test_get_context_decodes_transparently(self):
+        Context.save_context(self.context)
+        context = Context.get_context("context-1")
+        # The saved messages, which now carry their token estimate
+        self.assertEqual(context.messages, self.context.messages)
+        self.assertEqual(context.message_encoding, "compact")
+
+    def test_json_contexts_are_re_encoded_on_save(self):
+        with mock.patch.object(Context, "CONTEXT_MESSAGE_ENCODING", Context.MESSAGE_ENCODING_JSON):
+            Context.save_context(self.context)
+        self.assertNotIn("messages_blob", self.table.items["context-1"])
+        self.assertEqual(len(self.table.items["context-1"]["messages"]), 5)
+
+        Context.append_messages(Context.get_context("context-1"), [{"type": "human", "content": "thanks"}])
+        item = self.table.items["context-1"]
+        self.assertEqual(item["messages"], [])
+        self.assertEqual(len(Context.get_context("context-1").messages), 6)
+
+    def test_save_without_touch_keeps_updated_at(self):
+        Context.save_context(self.context, touch=False)
+        self.assertEqual(self.table.items["context-1"]["updated_at"], 1)
+
+    def test_log_storage_stores_stripped_messages(self):
+        with mock.patch.object(Context, "CONTEXT_MESSAGE_STORAGE", Context.MESSAGE_STORAGE_LOG):
+            Context.save_context(self.context)
+            stored = self.messages_table.items[("context-1", 2)]["message"]
+            self.assertNotIn("invalid_tool_calls", stored)
+            self.assertEqual(Context.get_context("context-1").messages, self.context.messages)
+
+
+if __name__ == '__main__':
+    unittest.main()
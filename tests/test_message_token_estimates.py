@@ -0,0 +1,82 @@
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from src.Models import Context
+from AWS import DynamoDB
+from LLM.BaseMessagesConverter import dict_messages_to_base_messages
+from LLM.TokenEstimator import estimate_dict_message_tokens, estimate_message_tokens
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+def message(content: str, type: str = "human") -> dict:
+    return {"type": type, "content": content}
+
+
+class TestMessageTokenEstimates(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.contexts, self.messages_table = self.create_context_tables()
+        self.fake.create_table("models", "model")
+        self.context = Context.Context(
+            context_id="context-1", agent_id="agent-1", user_id="user-1",
+            messages=[message("a" * 40), message("b" * 80, "ai")], created_at=1, updated_at=1,
+        )
+
+    def test_save_stores_estimates_and_total(self):
+        Context.save_context(self.context)
+        item = self.contexts.items["context-1"]
+        self.assertEqual([m["token_estimate"] for m in item["messages"]], [14, 24])
+        self.assertEqual(item["token_estimate_total"], 38)
+
+    def test_append_adds_only_new_messages_to_total(self):
+        Context.save_context(self.context)
+        context = Context.get_context("context-1")
+        context.messages[0]["token_estimate"] = 1000  # not re-estimated on append
+        Context.append_messages(context, [message("c" * 120)])
+        self.assertEqual(self.contexts.items["context-1"]["token_estimate_total"], 38 + 34)
+        self.assertEqual(Context.get_context("context-1").token_estimate_total, 72)
+
+    def test_header_without_total_is_totalled_on_append(self):
+        Context.save_context(self.context)
+        del self.contexts.items["context-1"]["token_estimate_total"]
+        Context.append_messages(Context.get_context("context-1"), [message("c" * 120)])
+        self.assertEqual(self.contexts.items["context-1"]["token_estimate_total"], 72)
+
+    def test_estimate_matches_base_message_and_is_dropped_on_conversion(self):
+        Context.save_context(self.context)
+        stored = Context.get_context("context-1").messages
+        base_messages = dict_messages_to_base_messages(stored)
+        self.assertNotIn("token_estimate", base_messages[0].model_dump())
+        self.assertEqual([estimate_message_tokens(m) for m in base_messages], [m["token_estimate"] for m in stored])
+
+    def test_offloaded_content_is_counted_by_size(self):
+        offloaded = {"type": "tool", "content": "preview", "tool_call_id": "c", "blob_ref": {"key": "k", "size": 4000, "format": "text"}}
+        self.assertEqual(estimate_dict_message_tokens(offloaded), 1004)
+
+    def test_log_messages_gaining_an_estimate_are_not_rewritten(self):
+        with mock.patch.object(Context, "CONTEXT_MESSAGE_STORAGE", Context.MESSAGE_STORAGE_LOG):
+            Context.save_context(self.context)
+            # A message stored before estimates existed
+            del self.messages_table.items[("context-1", 0)]["message"]["token_estimate"]
+            context = Context.get_context("context-1")
+            self.fake.requests.clear()
+            Context.save_context(context)
+            self.assertEqual(self.fake.requests.get("BatchWriteItem", 0), 0)
+            self.assertEqual(self.contexts.items["context-1"]["token_estimate_total"], 38)
+
+    def test_filtered_context_exposes_total(self):
+        DynamoDB.put_item("models", {
+            "model": "gpt-4.1", "model_provider": "openai", "input_token_cost": 0,
+            "output_token_cost": 0, "context_window_size": 1000,
+        })
+        Context.save_context(self.context)
+        filtered = Context.transform_to_filtered_context(Context.get_context("context-1"))
+        self.assertEqual(filtered.token_estimate_total, 38)
+        # No AI message has usage_metadata, so the percentage comes from the estimate
+        self.assertEqual(filtered.context_percentage, 3.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
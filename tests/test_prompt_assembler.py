@@ -0,0 +1,118 @@
+import unittest
+import sys
+sys.path.append("../")
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, SystemMessage
+from LLM.AgentChat import AgentChat
+from LLM.PromptAssembler import PromptAssembler
+from LLM.TokenEstimator import estimate_message_tokens, estimate_messages_tokens
+
+
+# Messages of every RecordingChatModel call
+calls = []
+
+
+class RecordingChatModel(FakeListChatModel):
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(messages)
+        return super()._call(messages, stop, run_manager, **kwargs)
+
+
+def turn(index: int, with_tool: bool = False) -> list:
+    messages = [HumanMessage(content=f"question {index} " + "x" * 400)]
+    if with_tool:
+        messages += [
+            AIMessage(content="", tool_calls=[{"id": f"call-{index}", "name": "lookup", "args": {}}]),
+            ToolMessage(tool_call_id=f"call-{index}", content="result " + "y" * 400),
+        ]
+    messages.append(AIMessage(content=f"answer {index} " + "z" * 400))
+    return messages
+
+
+def initialization() -> list:
+    return [
+        AIMessage(content="", tool_calls=[{"id": "init-1", "name": "load_profile", "args": {}}]),
+        ToolMessage(tool_call_id="init-1", content="profile " + "p" * 400),
+    ]
+
+
+def data_window(index: int) -> list:
+    return [
+        HumanMessage(content="open it"),
+        AIMessage(content="", tool_calls=[{"id": f"window-{index}", "name": "open_data_window", "args": {"data_window_id": "dw-1"}}]),
+        ToolMessage(tool_call_id=f"window-{index}", content="window " + "w" * 400),
+        AIMessage(content="opened"),
+    ]
+
+
+class TestPromptAssembler(unittest.TestCase):
+
+    def test_fitting_prompt_is_unchanged(self):
+        messages = turn(0) + turn(1)
+        assembler = PromptAssembler(token_budget=100_000)
+        self.assertIs(assembler.assemble(messages), messages)
+        self.assertEqual(assembler.dropped_message_count, 0)
+
+    def test_keeps_most_recent_turns(self):
+        messages = turn(0) + turn(1) + turn(2) + turn(3)
+        assembler = PromptAssembler(token_budget=500)
+        prompt = assembler.assemble(messages)
+        self.assertEqual(prompt, messages[4:])
+        self.assertEqual(assembler.dropped_message_count, 4)
+
+    def test_fixed_tokens_reduce_the_budget(self):
+        messages = turn(0) + turn(1) + turn(2) + turn(3)
+        prompt = PromptAssembler(token_budget=500).assemble(messages, fixed_tokens=250)
+        self.assertEqual(prompt, messages[6:])
+
+    def test_tool_call_pairs_stay_together(self):
+        messages = turn(0) + turn(1, with_tool=True) + turn(2)
+        prompt = PromptAssembler(token_budget=700).assemble(messages)
+        call_ids = {tool_call["id"] for message in prompt if isinstance(message, AIMessage) for tool_call in message.tool_calls}
+        response_ids = {message.tool_call_id for message in prompt if isinstance(message, ToolMessage)}
+        self.assertEqual(call_ids, response_ids)
+        # The window starts at a human message, not halfway through turn 1
+        self.assertIsInstance(prompt[0], HumanMessage)
+
+    def test_initialization_and_open_windows_are_pinned(self):
+        messages = initialization() + turn(0) + data_window(1) + turn(2) + turn(3) + turn(4)
+        prompt = PromptAssembler(token_budget=900).assemble(messages)
+        self.assertEqual(prompt[:2], messages[:2])
+        self.assertIn(messages[6], prompt)
+        self.assertNotIn(messages[2], prompt)
+        self.assertEqual(prompt[-2:], messages[-2:])
+
+    def test_latest_turn_is_sent_over_budget(self):
+        messages = turn(0) + [HumanMessage(content="q" * 4000)]
+        prompt = PromptAssembler(token_budget=100).assemble(messages)
+        self.assertEqual(prompt, messages[-1:])
+
+    def test_agent_chat_sends_assembled_prompt(self):
+        calls.clear()
+        messages = turn(0) + turn(1) + turn(2) + [HumanMessage(content="latest")]
+        agent_chat = AgentChat(RecordingChatModel(responses=["reply"]), "You are helpful.", messages=messages, prompt_assembler=PromptAssembler(token_budget=300))
+        self.assertEqual(agent_chat.invoke(load_data_windows=False), "reply")
+
+        sent = calls[-1]
+        self.assertIsInstance(sent[0], SystemMessage)
+        self.assertEqual(sent[1].content, "question 2 " + "x" * 400)
+        self.assertEqual(sent[-1].content, "latest")
+        # The history itself keeps every message
+        self.assertEqual(len(agent_chat.messages), 8)
+
+
+class TestTokenEstimateCache(unittest.TestCase):
+
+    def test_refreshed_content_is_measured_again(self):
+        message = ToolMessage(tool_call_id="window-cache", content="a" * 40)
+        before = estimate_message_tokens(message)
+        message.content = "a" * 400
+        self.assertGreater(estimate_message_tokens(message), before)
+
+    def test_messages_without_id_are_measured(self):
+        messages = [HumanMessage(content="a" * 40), HumanMessage(content="a" * 80)]
+        self.assertEqual(estimate_messages_tokens(messages), 14 + 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import sys
+from unittest import mock
+sys.path.append("../")
+from pydantic import BaseModel
+from Lib import RecordCache
+from Models import Agent, Tool, ParameterDefinition, LLMModel
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+class Record(BaseModel):
+    record_id: str
+    values: list[int] = []
+    updated_at: int = 0
+
+
+def agent_item(agent_id: str, org_id: str = "org-1", updated_at: int = 1) -> dict:
+    return {
+        "agent_id": agent_id, "agent_name": "Helper", "agent_description": "Helps", "prompt": "You are helpful.",
+        "org_id": org_id, "is_public": False, "is_default_agent": False, "created_at": 1, "updated_at": updated_at,
+    }
+
+
+class TestRecordCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = RecordCache.RecordCache("test-records", maxsize=10, ttl=60)
+
+    def test_records_are_copied_in_and_out(self):
+        record = Record(record_id="a", values=[1])
+        self.cache.put("a", record)
+        record.values.append(2)
+        cached = self.cache.get("a")
+        cached.values.append(3)
+        self.assertEqual(self.cache.get("a").values, [1])
+
+    def test_older_record_does_not_replace_a_newer_one(self):
+        self.cache.put("a", Record(record_id="a", values=[2], updated_at=20))
+        self.cache.put("a", Record(record_id="a", values=[1], updated_at=10))
+        self.assertEqual(self.cache.get("a").values, [2])
+        self.cache.put("a", Record(record_id="a", values=[3], updated_at=20))
+        self.assertEqual(self.cache.get("a").values, [3])
+
+    def test_stats_count_hits_and_misses(self):
+        self.cache.get("a")
+        self.cache.put("a", Record(record_id="a"))
+        self.cache.get("a")
+        self.assertEqual(RecordCache.record_cache_stats()["test-records"], {"hits": 1, "misses": 1, "size": 1})
+
+    @mock.patch.object(RecordCache, "RECORD_CACHE_ENABLED", False)
+    def test_can_be_disabled(self):
+        self.cache.put("a", Record(record_id="a"))
+        self.assertIsNone(self.cache.get("a"))
+
+
+class TestModelCaches(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.fake.create_table("agents", "agent_id", indexes={"org_id": ("org_id", None)})
+        self.fake.create_table("tools", "tool_id")
+        self.fake.create_table("parameter_definitions", "pd_id")
+        self.fake.create_table("models", "model").items["gpt-4.1"] = {
+            "model": "gpt-4.1", "model_provider": "openai", "input_token_cost": 2.0,
+            "output_token_cost": 8.0, "context_window_size": 1000000,
+        }
+        self.fake.tables["agents"].items["agent-1"] = agent_item("agent-1")
+        RecordCache.clear_record_caches()
+        self.addCleanup(RecordCache.clear_record_caches)
+
+    def test_agent_is_read_once(self):
+        Agent.get_agent("agent-1")
+        Agent.get_agent("agent-1")
+        self.assertEqual(self.fake.requests["GetItem"], 1)
+
+    def test_save_writes_through(self):
+        agent = Agent.get_agent("agent-1")
+        agent.prompt = "You are terse."
+        Agent.save_agent(agent)
+        self.assertEqual(Agent.get_agent("agent-1").prompt, "You are terse.")
+        self.assertEqual(self.fake.requests["GetItem"], 1)
+
+    def test_deletes_invalidate(self):
+        Agent.get_agent("agent-1")
+        Agent.delete_agent("agent-1")
+        with self.assertRaises(Exception) as raised:
+            Agent.get_agent("agent-1")
+        self.assertEqual(raised.exception.args[1], 404)
+
+        self.fake.tables["agents"].items["agent-2"] = agent_item("agent-2", org_id="org-2")
+        Agent.get_agent("agent-2")
+        Agent.delete_agents_in_org("org-2")
+        self.assertIsNone(Agent.get_cached_agent("agent-2"))
+
+    def test_tool_and_parameter_definition(self):
+        parameter_definition = ParameterDefinition.create_parameter_definition("org-1", [
+            {"name": "query", "description": "What to look up", "type": "string"},
+        ])
+        tool = Tool.create_tool("org-1", "lookup", "Look something up.", code="def lookup(query): return query", pd_id=parameter_definition.pd_id)
+        Tool.get_agent_tool_with_id(tool.tool_id)
+        self.assertEqual(self.fake.requests["GetItem"], 0)
+
+        Tool.delete_tool(tool.tool_id)
+        ParameterDefinition.delete_parameter_definition(parameter_definition.pd_id)
+        with self.assertRaises(Exception):
+            Tool.get_tool(tool.tool_id)
+        with self.assertRaises(Exception):
+            ParameterDefinition.get_parameter_definition(parameter_definition.pd_id)
+
+    def test_model_is_read_once(self):
+        self.assertEqual(LLMModel.get_model("gpt-4.1").context_window_size, 1000000)
+        self.assertFalse(LLMModel.is_anthropic_model("gpt-4.1"))
+        self.assertIsNone(LLMModel.get_model_or_none("missing"))
+        self.assertEqual(self.fake.requests["GetItem"], 2)
+
+    @mock.patch.object(RecordCache, "RECORD_CACHE_ENABLED", False)
+    def test_disabled_caches_read_every_time(self):
+        Agent.get_agent("agent-1")
+        Agent.get_agent("agent-1")
+        self.assertEqual(self.fake.requests["GetItem"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import sys
+sys.path.append("../")
+from src.Lib.Router import Router
+
+
+registry = {
+    "/context": {"POST": {"handler": "create_context"}},
+    "/context/{context_id}": {
+        "GET": {"handler": "get_context"},
+        "DELETE": {"handler": "delete_context"}
+    },
+    "/context/add-messages": {"POST": {"handler": "add_messages"}},
+    "/json-document/{document_id}/set": {"POST": {"handler": "set_value"}},
+    "/json-documents": {"GET": {"handler": "get_documents"}},
+    "/scrape-page/{link}": {"GET": {"handler": "scrape_page"}},
+}
+
+
+class TestRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.router = Router(registry)
+
+    def test_static_route(self):
+        match = self.router.match("/context", "POST")
+        self.assertEqual(match.handler_info["handler"], "create_context")
+        self.assertEqual(match.params, {})
+
+    def test_param_route(self):
+        match = self.router.match("/context/abc-123", "GET")
+        self.assertEqual(match.handler_info["handler"], "get_context")
+        self.assertEqual(match.params, {"context_id": "abc-123"})
+
+    def test_static_segment_preferred_over_param(self):
+        match = self.router.match("/context/add-messages", "POST")
+        self.assertEqual(match.handler_info["handler"], "add_messages")
+
+    def test_falls_back_to_param_when_static_lacks_method(self):
+        match = self.router.match("/context/add-messages", "GET")
+        self.assertEqual(match.handler_info["handler"], "get_context")
+        self.assertEqual(match.params, {"context_id": "add-messages"})
+
+    def test_nested_param_route(self):
+        match = self.router.match("/json-document/doc-1/set", "POST")
+        self.assertEqual(match.handler_info["handler"], "set_value")
+        self.assertEqual(match.params, {"document_id": "doc-1"})
+
+    def test_greedy_param_captures_slashes(self):
+        match = self.router.match("/scrape-page/https://example.com/a/b", "GET")
+        self.assertEqual(match.handler_info["handler"], "scrape_page")
+        self.assertEqual(match.params, {"link": "https://example.com/a/b"})
+
+    def test_no_match(self):
+        self.assertIsNone(self.router.match("/context/abc/extra", "GET"))
+        self.assertIsNone(self.router.match("/context/", "GET"))
+        self.assertIsNone(self.router.match("/json-documents", "POST"))
+        self.assertIsNone(self.router.match("/scrape-page/", "GET"))
+        self.assertIsNone(self.router.match("/unknown", "GET"))
@@ -0,0 +1,204 @@
+import asyncio
+import time
+import unittest
+import sys
+sys.path.append("../")
+from pydantic import BaseModel
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from src.LLM import ToolExecutor
+from LLM.AgentChat import AgentChat
+from LLM.AgentTool import AgentTool
+from LLM.TerminatingConfig import TerminatingConfig
+from Models import JSONDocument
+from Tools.MemoryTools.write_memory import write_memory, write_memory_func, write_memory_func_async
+from tests.fakes.dynamodb_test_case import FakeDynamoDBMixin
+
+
+class ToolCallingFakeModel(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class wait(BaseModel):
+    """Wait, then answer."""
+    seconds: float
+    answer: str
+
+
+class finish(BaseModel):
+    """Finish the task."""
+    result: str
+
+
+def wait_tool(seconds: float, answer: str) -> str:
+    time.sleep(seconds)
+    if answer == "fail":
+        raise ValueError("bad input")
+    return answer
+
+
+async def async_wait_tool(seconds: float, answer: str) -> str:
+    await asyncio.sleep(seconds)
+    if answer == "fail":
+        raise ValueError("bad input")
+    return answer
+
+
+def call(index: int, seconds: float, answer: str = None, name: str = "wait") -> dict:
+    args = {"seconds": seconds, "answer": answer or f"answer {index}"} if name == "wait" else {"result": answer}
+    return {"id": f"call-{index}", "name": name, "args": args}
+
+
+class TestExecuteToolCalls(unittest.TestCase):
+
+    def setUp(self):
+        self.tools = {"wait": AgentTool(function=wait_tool, params=wait)}
+
+    def test_runs_concurrently_in_call_order(self):
+        # The first call finishes last
+        calls = [call(0, 0.3), call(1, 0.1), call(2, 0.2)]
+        start = time.perf_counter()
+        messages = ToolExecutor.execute_tool_calls(calls, self.tools, concurrency=3)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual([m.tool_call_id for m in messages], ["call-0", "call-1", "call-2"])
+        self.assertEqual([m.content for m in messages], ["answer 0", "answer 1", "answer 2"])
+
+    def test_concurrency_limit(self):
+        calls = [call(index, 0.1) for index in range(4)]
+        start = time.perf_counter()
+        ToolExecutor.execute_tool_calls(calls, self.tools, concurrency=2)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+
+    def test_errors_and_timeouts_become_tool_messages(self):
+        calls = [call(0, 0, "fail"), call(1, 0.5), call(2, 0), call(3, 0, name="missing")]
+        messages = ToolExecutor.execute_tool_calls(calls, self.tools, concurrency=4, timeout=0.2)
+        self.assertEqual(messages[0].content, "Issue calling tool: wait, error: bad input")
+        self.assertEqual(messages[1].content, "Issue calling tool: wait, error: timed out after 0.2 seconds")
+        self.assertEqual(messages[2].content, "answer 2")
+        self.assertIn("Issue calling tool: missing", messages[3].content)
+
+    def test_async_runs_concurrently_and_reports_each_call(self):
+        tools = {"wait": AgentTool(function=async_wait_tool, params=wait)}
+        events = []
+
+        async def on_tool_call(id, tool_name, tool_input):
+            events.append(("call", id))
+
+        async def on_tool_response(id, tool_name, tool_output):
+            events.append(("response", id))
+
+        calls = [call(0, 0.3), call(1, 0.1), call(2, 0, "fail"), call(3, 0.5)]
+        start = time.perf_counter()
+        messages = asyncio.run(ToolExecutor.aexecute_tool_calls(
+            calls, tools, concurrency=4, timeout=0.4, on_tool_call=on_tool_call, on_tool_response=on_tool_response,
+        ))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual([m.tool_call_id for m in messages], ["call-0", "call-1", "call-2", "call-3"])
+        self.assertEqual(messages[0].content, "answer 0")
+        self.assertEqual(messages[2].content, "Issue calling tool: wait, error: bad input")
+        self.assertEqual(messages[3].content, "Issue calling tool: wait, error: timed out after 0.4 seconds")
+        # Responses are reported as the calls finish
+        self.assertEqual([id for kind, id in events if kind == "response"], ["call-1", "call-0"])
+
+    def test_nothing_after_the_first_terminating_call(self):
+        calls = [call(0, 0), call(1, 0, "done", name="finish"), call(2, 0)]
+        to_run, terminating = ToolExecutor.calls_to_execute(calls, {"finish": "finish-tool"}, TerminatingConfig(tool_ids=["finish-tool"]))
+        self.assertEqual(to_run, calls[:2])
+        self.assertIs(terminating, calls[1])
+        self.assertEqual(ToolExecutor.calls_to_execute(calls, {}, None), (calls, None))
+
+
+class TestContextToolCalls(FakeDynamoDBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.fake.create_table("json_documents", "document_id")
+        get_json_document = JSONDocument.get_json_document
+
+        def slow_read(document_id):
+            # Widen the gap between a write's read and its put
+            document = get_json_document(document_id)
+            time.sleep(0.1)
+            return document
+
+        self.patch(JSONDocument, "get_json_document", slow_read)
+        self.document = JSONDocument.create_json_document(JSONDocument.CreateJSONDocumentParams(
+            name="Notes", data={}, org_id="org-1", is_public=True,
+        ))
+
+    def write_calls(self) -> list[dict]:
+        return [
+            {"id": f"call-{key}", "name": "write_memory", "args": {"document_id": self.document.document_id, "path": key, "value": key, "type": "string"}}
+            for key in ("first", "second")
+        ]
+
+    def test_memory_writes_to_one_document_keep_both_updates(self):
+        tools = {"write_memory": AgentTool(function=write_memory_func, params=write_memory, pass_context=True)}
+        messages = ToolExecutor.execute_tool_calls(self.write_calls(), tools, context={}, concurrency=4)
+        self.assertEqual([m.content for m in messages], ["Memory updated successfully."] * 2)
+        self.assertEqual(JSONDocument.get_json_document(self.document.document_id).data, {"first": "first", "second": "second"})
+
+    def test_async_memory_writes_to_one_document_keep_both_updates(self):
+        tools = {"write_memory": AgentTool(function=write_memory_func_async, params=write_memory, pass_context=True)}
+        asyncio.run(ToolExecutor.aexecute_tool_calls(self.write_calls(), tools, context={}, concurrency=4))
+        self.assertEqual(JSONDocument.get_json_document(self.document.document_id).data, {"first": "first", "second": "second"})
+
+    def test_other_tools_still_run_alongside(self):
+        tools = {
+            "write_memory": AgentTool(function=write_memory_func, params=write_memory, pass_context=True),
+            "wait": AgentTool(function=wait_tool, params=wait),
+        }
+        start = time.perf_counter()
+        messages = ToolExecutor.execute_tool_calls(self.write_calls() + [call(0, 0.2)], tools, context={}, concurrency=4)
+        self.assertLess(time.perf_counter() - start, 0.35)
+        self.assertEqual(messages[2].content, "answer 0")
+
+
+class TestAgentChatToolCalls(unittest.TestCase):
+
+    def tools(self, ran: list) -> list[AgentTool]:
+        def finish_tool(result: str) -> str:
+            ran.append("finish")
+            return f"finished: {result}"
+
+        def timed_wait_tool(seconds: float, answer: str) -> str:
+            ran.append(answer)
+            return wait_tool(seconds, answer)
+
+        return [
+            AgentTool(tool_id="wait-tool", function=timed_wait_tool, params=wait),
+            AgentTool(tool_id="finish-tool", function=finish_tool, params=finish),
+        ]
+
+    def test_tool_round_runs_concurrently(self):
+        ran = []
+        llm = ToolCallingFakeModel(responses=[
+            AIMessage(content="", tool_calls=[call(0, 0.3), call(1, 0.3), call(2, 0.3)]),
+            AIMessage(content="all done"),
+        ])
+        agent_chat = AgentChat(llm, "You are helpful.", tools=self.tools(ran), messages=[HumanMessage(content="go")], tool_concurrency=3)
+        start = time.perf_counter()
+        self.assertEqual(agent_chat.invoke(load_data_windows=False), "all done")
+        self.assertLess(time.perf_counter() - start, 0.8)
+        tool_messages = [m for m in agent_chat.messages if isinstance(m, ToolMessage)]
+        self.assertEqual([m.tool_call_id for m in tool_messages], ["call-0", "call-1", "call-2"])
+
+    def test_terminating_call_ends_the_turn_where_sequential_execution_did(self):
+        ran = []
+        llm = ToolCallingFakeModel(responses=[
+            AIMessage(content="", tool_calls=[call(0, 0.2), call(1, 0, "report", name="finish"), call(2, 0)]),
+        ])
+        agent_chat = AgentChat(
+            llm, "You are helpful.", tools=self.tools(ran), messages=[HumanMessage(content="go")],
+            terminating_config=TerminatingConfig(tool_ids=["finish-tool"]),
+        )
+        self.assertEqual(agent_chat.invoke(load_data_windows=False), "finished: report")
+        self.assertEqual(sorted(ran), ["answer 0", "finish"])
+        # The stored AI message only has the calls that were run, each with its response
+        self.assertEqual([c["id"] for c in agent_chat.messages[1].tool_calls], ["call-0", "call-1"])
+        self.assertEqual([m.tool_call_id for m in agent_chat.messages[2:]], ["call-0", "call-1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+import sys
+sys.path.append("../")
+from src.Lib.TTLCache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_get_and_set(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertTrue("a" in cache)
+
+    def test_falsy_values_are_cached(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("revoked", False)
+        self.assertIs(cache.get("revoked"), False)
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=10, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_invalidate(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.invalidate("a")
+        cache.invalidate("missing")
+        self.assertIsNone(cache.get("a"))
+
+    def test_counts_hits_and_misses(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.get("a")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        self.assertTrue("a" in cache)
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "size": 1})